@@ -7,10 +7,11 @@ import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timezone
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 import os
+import time
 
-from ..services.llm_integration_service import LLMProvider, LLMTaskType
+from ..models.llm_models import LLMProvider, LLMTaskType
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +39,13 @@ class LLMRouter:
         self.cost_tracking: Dict[str, float] = {}  # Daily cost tracking
         self.rate_limits: Dict[LLMProvider, Dict[str, int]] = {}
         
+        # Measured performance routing: swap to the fallback when it is clearly faster/more reliable,
+        # but let the demoted primary through once per probe interval so its numbers stay current
+        self.performance_ewma_alpha = 0.2
+        self.min_samples_for_routing = int(os.getenv("LLM_ROUTING_MIN_SAMPLES", "3"))
+        self.latency_switch_ratio = float(os.getenv("LLM_ROUTING_SWITCH_RATIO", "1.5"))
+        self.probe_interval_seconds = float(os.getenv("LLM_ROUTING_PROBE_SECONDS", "60"))
+        
         # Cost optimization settings
         self.cost_optimization_enabled = os.getenv("COST_OPTIMIZATION_ENABLED", "true").lower() == "true"
         self.max_daily_cost = float(os.getenv("MAX_DAILY_LLM_COST", "50.0"))
@@ -99,6 +107,51 @@ class LLMRouter:
             cost_budget: Available budget for this request
             context: Additional context for routing decision
         """
+        decision = self._preferred_decision(task_type, complexity, agent_id, cost_budget, context)
+        return self._apply_measured_performance(decision)
+    
+    def _measured_score(self, perf: Dict[str, float]) -> float:
+        """Expected seconds per successful response; lower is better"""
+        return perf["latency_ewma"] / max(perf["success_ewma"], 0.05)
+    
+    def _apply_measured_performance(self, decision: RoutingDecision) -> RoutingDecision:
+        """Swap primary and fallback when measured latency/success say the fallback is clearly better"""
+        primary = self.provider_performance.get(decision.primary_provider)
+        fallback = self.provider_performance.get(decision.fallback_provider) if decision.fallback_provider else None
+        if primary is None or primary["total_requests"] < self.min_samples_for_routing:
+            return decision
+        if time.monotonic() - primary["updated_at"] > self.probe_interval_seconds:
+            return replace(decision, reasoning=f"{decision.reasoning} (probing measured performance)")
+        
+        estimated = replace(decision, estimated_time=round(primary["latency_ewma"], 2))
+        if fallback is None or fallback["total_requests"] < self.min_samples_for_routing:
+            return estimated
+        
+        primary_score = self._measured_score(primary)
+        fallback_score = self._measured_score(fallback)
+        if fallback_score * self.latency_switch_ratio >= primary_score:
+            return estimated
+        
+        return RoutingDecision(
+            primary_provider=decision.fallback_provider,
+            fallback_provider=decision.primary_provider,
+            reasoning=(
+                f"{decision.reasoning}; measured {decision.fallback_provider.value} {fallback_score:.2f}s "
+                f"vs {decision.primary_provider.value} {primary_score:.2f}s"
+            ),
+            estimated_cost=decision.estimated_cost,
+            estimated_time=round(fallback["latency_ewma"], 2)
+        )
+    
+    def _preferred_decision(
+        self,
+        task_type: LLMTaskType,
+        complexity: int,
+        agent_id: Optional[str],
+        cost_budget: Optional[float],
+        context: Optional[Dict[str, Any]]
+    ) -> RoutingDecision:
+        """Static routing from agent preferences, cost budget and task type"""
         try:
             # Check daily cost limits
             today = datetime.now(timezone.utc).date().isoformat()
@@ -223,18 +276,28 @@ class LLMRouter:
         provider: LLMProvider,
         response_time: float,
         success: bool,
-        cost: float
+        cost: float,
+        queue_wait: float = 0.0
     ):
-        """Update provider performance metrics"""
+        """Update provider performance metrics; routing uses service time, queue wait is kept for reporting"""
         if provider not in self.provider_performance:
             self.provider_performance[provider] = {
                 "avg_response_time": 0.0,
                 "success_rate": 1.0,
                 "total_requests": 0,
-                "total_cost": 0.0
+                "total_cost": 0.0,
+                "latency_ewma": response_time,
+                "success_ewma": 1.0,
+                "queue_wait_ewma": queue_wait,
+                "updated_at": time.monotonic()
             }
         
         perf = self.provider_performance[provider]
+        alpha = self.performance_ewma_alpha
+        perf["latency_ewma"] = (1 - alpha) * perf["latency_ewma"] + alpha * response_time
+        perf["queue_wait_ewma"] = (1 - alpha) * perf["queue_wait_ewma"] + alpha * queue_wait
+        perf["success_ewma"] = (1 - alpha) * perf["success_ewma"] + alpha * (1.0 if success else 0.0)
+        perf["updated_at"] = time.monotonic()
         perf["total_requests"] += 1
         perf["total_cost"] += cost
         
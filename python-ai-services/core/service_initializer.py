@@ -4,279 +4,269 @@ Handles the initialization of all platform services with proper dependency injec
 """
 
 import logging
-from typing import Dict, Any, List
+from dataclasses import dataclass, field
+from graphlib import TopologicalSorter
+from typing import Dict, Any, List, Callable, Optional
 import asyncio
+import importlib
+import time
 
 from .service_registry import registry
 from .database_manager import db_manager
 
-# Import factory functions for new services
-from services.historical_data_service import create_historical_data_service
-from services.trading_engine_service import create_trading_engine_service
-from services.order_management_service import create_order_management_service
-from services.portfolio_tracker_service import create_portfolio_tracker_service
-from services.ai_prediction_service import create_ai_prediction_service
-from services.technical_analysis_service import create_technical_analysis_service
-from services.sentiment_analysis_service import create_sentiment_analysis_service
-from services.ml_portfolio_optimizer_service import create_ml_portfolio_optimizer_service
+logger = logging.getLogger(__name__)
 
-# Import existing services (keeping imports for services that exist)
-try:
-    from services.market_data_service import MarketDataService
-except ImportError:
-    MarketDataService = None
-    
-try:
-    from services.risk_management_service import RiskManagementService
-except ImportError:
-    RiskManagementService = None
-    
-try:
-    from services.agent_management_service import AgentManagementService
-except ImportError:
-    AgentManagementService = None
-    
-try:
-    from services.execution_specialist_service import ExecutionSpecialistService
-except ImportError:
-    ExecutionSpecialistService = None
-    
-try:
-    from services.hyperliquid_execution_service import HyperliquidExecutionService
-except ImportError:
-    HyperliquidExecutionService = None
-    
-try:
-    from services.strategy_config_service import StrategyConfigService
-except ImportError:
-    StrategyConfigService = None
-    
-try:
-    from services.watchlist_service import WatchlistService
-except ImportError:
-    WatchlistService = None
-    
-try:
-    from services.user_preference_service import UserPreferenceService
-except ImportError:
-    UserPreferenceService = None
+# Services whose failure stops any not-yet-started services from initializing
+CRITICAL_SERVICES = {"market_data", "trading_engine", "portfolio_tracker"}
 
-# Import agent frameworks (optional)
-try:
-    from agents.crew_setup import trading_analysis_crew
-except ImportError:
-    trading_analysis_crew = None
-    
-try:
-    from agents.autogen_setup import autogen_trading_system
-except ImportError:
-    autogen_trading_system = None
 
-logger = logging.getLogger(__name__)
+def _import_optional(module_path: str, attribute: str) -> Optional[Any]:
+    """Import a service class or factory on first use; None if the module is not available"""
+    try:
+        return getattr(importlib.import_module(module_path), attribute)
+    except ImportError as e:
+        logger.warning(f"{module_path}.{attribute} not available: {e}")
+        return None
+
+
+@dataclass
+class ServiceSpec:
+    """
+    Declaration of a platform service: how to build it and what it needs first.
+    Lazy services are registered as registry factories and built (and their
+    modules imported) on first get_service() instead of at startup.
+    """
+    name: str
+    create: Callable[[], Any]
+    dependencies: List[str] = field(default_factory=list)
+    critical: bool = False
+    lazy: bool = False
+
 
 class ServiceInitializer:
     """
     Handles the initialization of all platform services
-    Manages service dependencies and startup order
+    Builds a dependency graph from the service specs and starts independent services concurrently
     """
     
     def __init__(self):
-        self.initialization_order = [
-            # Phase 1: Core Infrastructure Services
-            "market_data",
-            "historical_data",
+        self.service_specs: Dict[str, ServiceSpec] = {}
+        for spec in [
+            # Core infrastructure
+            ServiceSpec("market_data", self._create_market_data, critical=True),
+            ServiceSpec("historical_data", self._create_historical_data),
             
-            # Phase 2: Trading Engine Services (dependent on core infrastructure)
-            "portfolio_tracker",
-            "trading_engine", 
-            "order_management",
-            "risk_management",
+            # Trading engine (dependent on core infrastructure)
+            ServiceSpec("portfolio_tracker", self._create_portfolio_tracker, ["market_data"], critical=True),
+            ServiceSpec("trading_engine", self._create_trading_engine, ["market_data"], critical=True),
+            ServiceSpec("order_management", self._create_order_management),
+            ServiceSpec("risk_management", self._create_risk_management, ["portfolio_tracker"]),
             
-            # Phase 3: AI and Analytics Services (independent)
-            "ai_prediction",
-            "technical_analysis",
-            "sentiment_analysis",
-            "ml_portfolio_optimizer",
+            # AI and analytics (independent; the ML-heavy ones load on first use)
+            ServiceSpec("ai_prediction", self._create_ai_prediction, lazy=True),
+            ServiceSpec("technical_analysis", self._create_technical_analysis),
+            ServiceSpec("sentiment_analysis", self._create_sentiment_analysis),
+            ServiceSpec("ml_portfolio_optimizer", self._create_ml_portfolio_optimizer, lazy=True),
             
-            # Phase 4: Agent and Execution Services (dependent on trading engine)
-            "execution_specialist",
-            "hyperliquid_execution",
-            "agent_management",
+            # Agent and execution
+            ServiceSpec("execution_specialist", self._create_execution_specialist),
+            ServiceSpec("hyperliquid_execution", self._create_hyperliquid_execution),
+            ServiceSpec("agent_management", self._create_agent_management),
             
-            # Phase 5: Business Logic Services
-            "strategy_config",
-            "watchlist",
-            "user_preference",
+            # Business logic
+            ServiceSpec("strategy_config", self._create_strategy_config),
+            ServiceSpec("watchlist", self._create_watchlist),
+            ServiceSpec("user_preference", self._create_user_preference),
             
-            # Phase 6: Agent Frameworks
-            "crew_trading_analysis",
-            "autogen_trading_system"
-        ]
+            # Agent frameworks (crewai/autogen imports are slow; load on first use)
+            ServiceSpec("crew_trading_analysis", self._create_crew_trading_analysis, lazy=True),
+            ServiceSpec("autogen_trading_system", self._create_autogen_trading_system, lazy=True)
+        ]:
+            self.register_spec(spec)
+    
+    def register_spec(self, spec: ServiceSpec) -> None:
+        """Add or replace a service declaration"""
+        self.service_specs[spec.name] = spec
+    
+    @property
+    def initialization_order(self) -> List[str]:
+        """A dependency-respecting order of all declared services"""
+        return self._resolve_order()
+    
+    def _resolve_order(self) -> List[str]:
+        """Topologically sort the specs; raises ValueError on unknown dependencies or cycles"""
+        graph = {}
+        for name, spec in self.service_specs.items():
+            unknown = [dep for dep in spec.dependencies if dep not in self.service_specs]
+            if unknown:
+                raise ValueError(f"Service {name} depends on unknown services: {unknown}")
+            graph[name] = spec.dependencies
+        try:
+            return list(TopologicalSorter(graph).static_order())
+        except Exception as e:
+            raise ValueError(f"Service dependency cycle: {e}") from e
     
     async def initialize_all_services(self) -> Dict[str, str]:
-        """Initialize all services in the correct order"""
+        """Initialize all services, each one as soon as its dependencies are done"""
         logger.info("🔧 Starting service initialization...")
+        started = time.perf_counter()
         
         # Ensure database connections are ready
         if not db_manager.is_initialized():
             await db_manager.initialize_connections()
         
-        results = {}
+        order = self._resolve_order()
+        results: Dict[str, str] = {}
+        self._critical_failure: Optional[str] = None
         
-        for service_name in self.initialization_order:
-            try:
-                result = await self._initialize_service(service_name)
-                results[service_name] = result
-                logger.info(f"✅ {service_name} initialized successfully")
-            except Exception as e:
-                results[service_name] = f"failed: {str(e)}"
-                logger.error(f"❌ Failed to initialize {service_name}: {e}")
-                
-                # Check if this is a critical service
-                if service_name in ["market_data", "trading_engine", "portfolio_tracker"]:
-                    logger.error(f"Critical service {service_name} failed - stopping initialization")
-                    break
+        tasks: Dict[str, asyncio.Task] = {}
+        for service_name in order:
+            tasks[service_name] = asyncio.create_task(self._run_service(service_name, tasks, results))
+        await asyncio.gather(*tasks.values())
         
         # Register all connections in the registry
         self._register_connections()
         
         registry.mark_initialized()
-        logger.info("✅ Service initialization completed")
+        logger.info(f"✅ Service initialization completed in {time.perf_counter() - started:.2f}s")
         
-        return results
+        return {service_name: results[service_name] for service_name in order}
     
-    async def _initialize_service(self, service_name: str) -> str:
-        """Initialize a single service"""
-        
-        if service_name == "market_data":
-            if MarketDataService:
-                service = MarketDataService(redis_client=db_manager.get_redis_client())
-                registry.register_service("market_data", service)
-                return "initialized"
-            else:
-                return "skipped - service not available"
-        
-        elif service_name == "historical_data":
-            service = create_historical_data_service()
-            registry.register_service("historical_data", service)
-            return "initialized"
-        
-        elif service_name == "portfolio_tracker":
-            service = create_portfolio_tracker_service()
-            registry.register_service("portfolio_tracker", service)
-            return "initialized"
-        
-        elif service_name == "trading_engine":
-            service = create_trading_engine_service()
-            registry.register_service("trading_engine", service)
-            return "initialized"
-        
-        elif service_name == "order_management":
-            service = create_order_management_service()
-            registry.register_service("order_management", service)
-            return "initialized"
-        
-        elif service_name == "risk_management":
-            if RiskManagementService:
-                service = RiskManagementService(
-                    portfolio_service=registry.get_service("portfolio_tracker")
-                )
-                registry.register_service("risk_management", service)
-                return "initialized"
-            else:
-                return "skipped - service not available"
-        
-        elif service_name == "ai_prediction":
-            service = create_ai_prediction_service()
-            registry.register_service("ai_prediction", service)
-            return "initialized"
-        
-        elif service_name == "technical_analysis":
-            service = create_technical_analysis_service()
-            registry.register_service("technical_analysis", service)
-            return "initialized"
-        
-        elif service_name == "sentiment_analysis":
-            service = create_sentiment_analysis_service()
-            registry.register_service("sentiment_analysis", service)
-            return "initialized"
-        
-        elif service_name == "ml_portfolio_optimizer":
-            service = create_ml_portfolio_optimizer_service()
-            registry.register_service("ml_portfolio_optimizer", service)
-            return "initialized"
-        
-        elif service_name == "execution_specialist":
-            if ExecutionSpecialistService:
-                service = ExecutionSpecialistService()
-                registry.register_service("execution_specialist", service)
-                return "initialized"
-            else:
-                return "skipped - service not available"
+    async def _run_service(self, service_name: str, tasks: Dict[str, asyncio.Task], results: Dict[str, str]) -> None:
+        """Wait for a service's dependencies, then initialize it and record its timing"""
+        spec = self.service_specs[service_name]
+        if spec.dependencies:
+            await asyncio.gather(*(tasks[dep] for dep in spec.dependencies))
         
-        elif service_name == "hyperliquid_execution":
-            if HyperliquidExecutionService:
-                service = HyperliquidExecutionService()
-                registry.register_service("hyperliquid_execution", service)
-                return "initialized"
-            else:
-                return "skipped - service not available"
-        
-        elif service_name == "agent_management":
-            if AgentManagementService:
-                service = AgentManagementService(session_factory=db_manager.get_session_factory())
-                # Load existing agent statuses from database
-                try:
-                    await service.load_all_agent_statuses_from_db()
-                except Exception as e:
-                    logger.warning(f"Could not load agent statuses: {e}")
-                registry.register_service("agent_management", service)
-                return "initialized"
-            else:
-                return "skipped - service not available"
-        
-        elif service_name == "strategy_config":
-            if StrategyConfigService:
-                service = StrategyConfigService(session_factory=db_manager.get_session_factory())
-                registry.register_service("strategy_config", service)
-                return "initialized"
-            else:
-                return "skipped - service not available"
-        
-        elif service_name == "watchlist":
-            if WatchlistService:
-                service = WatchlistService(supabase_client=db_manager.get_supabase_client())
-                registry.register_service("watchlist", service)
-                return "initialized"
-            else:
-                return "skipped - service not available"
-        
-        elif service_name == "user_preference":
-            if UserPreferenceService:
-                service = UserPreferenceService(supabase_client=db_manager.get_supabase_client())
-                registry.register_service("user_preference", service)
-                return "initialized"
-            else:
-                return "skipped - service not available"
+        failed_dependencies = [dep for dep in spec.dependencies if results[dep].startswith("failed")]
+        if self._critical_failure:
+            results[service_name] = f"skipped - critical service {self._critical_failure} failed"
+        elif failed_dependencies:
+            results[service_name] = f"skipped - dependencies failed: {', '.join(failed_dependencies)}"
+        else:
+            started = time.perf_counter()
+            try:
+                results[service_name] = await self._initialize_service(service_name)
+                logger.info(f"✅ {service_name} {results[service_name]}")
+            except Exception as e:
+                results[service_name] = f"failed: {str(e)}"
+                logger.error(f"❌ Failed to initialize {service_name}: {e}")
+                if spec.critical and not self._critical_failure:
+                    logger.error(f"Critical service {service_name} failed - skipping services not yet started")
+                    self._critical_failure = service_name
+            registry.record_startup_timing(
+                service_name, started, time.perf_counter(), results[service_name],
+                dependencies=spec.dependencies, lazy=spec.lazy
+            )
+            return
         
-        elif service_name == "crew_trading_analysis":
-            if trading_analysis_crew:
-                # Initialize CrewAI framework
-                registry.register_service("crew_trading_analysis", trading_analysis_crew)
-                return "initialized"
-            else:
-                return "skipped - service not available"
+        logger.warning(f"⏭️ {service_name} {results[service_name]}")
+        registry.record_startup_timing(service_name, None, None, results[service_name], dependencies=spec.dependencies, lazy=spec.lazy)
+    
+    async def _initialize_service(self, service_name: str) -> str:
+        """Initialize a single service"""
+        spec = self.service_specs.get(service_name)
+        if spec is None:
+            raise ValueError(f"Unknown service: {service_name}")
         
-        elif service_name == "autogen_trading_system":
-            if autogen_trading_system:
-                # Initialize AutoGen framework
-                registry.register_service("autogen_trading_system", autogen_trading_system)
-                return "initialized"
-            else:
-                return "skipped - service not available"
+        if spec.lazy:
+            registry.register_service_factory(service_name, spec.create)
+            return "registered - loads on first use"
         
+        if asyncio.iscoroutinefunction(spec.create):
+            service = await spec.create()
         else:
-            raise ValueError(f"Unknown service: {service_name}")
+            # Sync constructors and the module imports inside them block, so run them in a
+            # worker thread to let independent services actually overlap
+            service = await asyncio.to_thread(spec.create)
+            if asyncio.iscoroutine(service):
+                service = await service
+        if service is None:
+            return "skipped - service not available"
+        registry.register_service(service_name, service)
+        return "initialized"
+    
+    # --- Service constructors; imports happen here so unused modules are never loaded ---
+    
+    def _create_market_data(self):
+        MarketDataService = _import_optional("services.market_data_service", "MarketDataService")
+        return MarketDataService(redis_client=db_manager.get_redis_client()) if MarketDataService else None
+    
+    def _create_historical_data(self):
+        from services.historical_data_service import create_historical_data_service
+        return create_historical_data_service()
+    
+    def _create_portfolio_tracker(self):
+        from services.portfolio_tracker_service import create_portfolio_tracker_service
+        return create_portfolio_tracker_service()
+    
+    def _create_trading_engine(self):
+        from services.trading_engine_service import create_trading_engine_service
+        return create_trading_engine_service()
+    
+    def _create_order_management(self):
+        from services.order_management_service import create_order_management_service
+        return create_order_management_service()
+    
+    def _create_risk_management(self):
+        RiskManagementService = _import_optional("services.risk_management_service", "RiskManagementService")
+        if not RiskManagementService:
+            return None
+        return RiskManagementService(portfolio_service=registry.get_service("portfolio_tracker"))
+    
+    def _create_ai_prediction(self):
+        from services.ai_prediction_service import create_ai_prediction_service
+        return create_ai_prediction_service()
+    
+    def _create_technical_analysis(self):
+        from services.technical_analysis_service import create_technical_analysis_service
+        return create_technical_analysis_service()
+    
+    def _create_sentiment_analysis(self):
+        from services.sentiment_analysis_service import create_sentiment_analysis_service
+        return create_sentiment_analysis_service()
+    
+    def _create_ml_portfolio_optimizer(self):
+        from services.ml_portfolio_optimizer_service import create_ml_portfolio_optimizer_service
+        return create_ml_portfolio_optimizer_service()
+    
+    def _create_execution_specialist(self):
+        ExecutionSpecialistService = _import_optional("services.execution_specialist_service", "ExecutionSpecialistService")
+        return ExecutionSpecialistService() if ExecutionSpecialistService else None
+    
+    def _create_hyperliquid_execution(self):
+        HyperliquidExecutionService = _import_optional("services.hyperliquid_execution_service", "HyperliquidExecutionService")
+        return HyperliquidExecutionService() if HyperliquidExecutionService else None
+    
+    async def _create_agent_management(self):
+        AgentManagementService = _import_optional("services.agent_management_service", "AgentManagementService")
+        if not AgentManagementService:
+            return None
+        service = AgentManagementService(session_factory=db_manager.get_session_factory())
+        # Load existing agent statuses from database
+        try:
+            await service.load_all_agent_statuses_from_db()
+        except Exception as e:
+            logger.warning(f"Could not load agent statuses: {e}")
+        return service
+    
+    def _create_strategy_config(self):
+        StrategyConfigService = _import_optional("services.strategy_config_service", "StrategyConfigService")
+        return StrategyConfigService(session_factory=db_manager.get_session_factory()) if StrategyConfigService else None
+    
+    def _create_watchlist(self):
+        WatchlistService = _import_optional("services.watchlist_service", "WatchlistService")
+        return WatchlistService(supabase_client=db_manager.get_supabase_client()) if WatchlistService else None
+    
+    def _create_user_preference(self):
+        UserPreferenceService = _import_optional("services.user_preference_service", "UserPreferenceService")
+        return UserPreferenceService(supabase_client=db_manager.get_supabase_client()) if UserPreferenceService else None
+    
+    def _create_crew_trading_analysis(self):
+        return _import_optional("agents.crew_setup", "trading_analysis_crew")
+    
+    def _create_autogen_trading_system(self):
+        return _import_optional("agents.autogen_setup", "autogen_trading_system")
     
     def _register_connections(self):
         """Register all database connections in the service registry"""
@@ -288,28 +278,8 @@ class ServiceInitializer:
     
     async def get_service_dependencies(self, service_name: str) -> List[str]:
         """Get the dependencies for a service"""
-        dependencies = {
-            "market_data": [],
-            "historical_data": [],
-            "portfolio_tracker": ["market_data"],
-            "trading_engine": ["market_data"],
-            "order_management": [],
-            "risk_management": ["portfolio_tracker"],
-            "ai_prediction": [],
-            "technical_analysis": [],
-            "sentiment_analysis": [],
-            "ml_portfolio_optimizer": [],
-            "execution_specialist": [],
-            "hyperliquid_execution": [],
-            "agent_management": [],
-            "strategy_config": [],
-            "watchlist": [],
-            "user_preference": [],
-            "crew_trading_analysis": [],
-            "autogen_trading_system": []
-        }
-        
-        return dependencies.get(service_name, [])
+        spec = self.service_specs.get(service_name)
+        return list(spec.dependencies) if spec else []
     
     async def health_check_all_services(self) -> Dict[str, Any]:
         """Perform health check on all initialized services"""
@@ -4,8 +4,9 @@ Centralized service and connection management for the monorepo
 """
 
 import logging
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, Optional, Callable, List
 import asyncio
+import time
 from contextlib import asynccontextmanager
 
 logger = logging.getLogger(__name__)
@@ -20,6 +21,7 @@ class ServiceRegistry:
         self._services: Dict[str, Any] = {}
         self._connections: Dict[str, Any] = {}
         self._factories: Dict[str, Callable] = {}
+        self._startup_timings: Dict[str, Dict[str, Any]] = {}
         self._initialized = False
     
     def register_connection(self, name: str, connection: Any) -> None:
@@ -53,8 +55,17 @@ class ServiceRegistry:
         # Check if factory exists to create service
         if name in self._factories:
             logger.info(f"Creating service '{name}' from factory")
-            service = self._factories[name]()
-            self._services[name] = service
+            started = time.perf_counter()
+            try:
+                service = self._factories[name]()
+            except Exception as e:
+                self.record_startup_timing(name, started, time.perf_counter(), f"failed: {e}", lazy=True)
+                raise
+            self.record_startup_timing(
+                name, started, time.perf_counter(), "initialized" if service is not None else "skipped - service not available", lazy=True
+            )
+            if service is not None:
+                self._services[name] = service
             return service
         
         logger.warning(f"Service '{name}' not found")
@@ -79,6 +90,53 @@ class ServiceRegistry:
         """Get all connections"""
         return self._connections.copy()
     
+    def record_startup_timing(
+        self,
+        name: str,
+        started: Optional[float],
+        finished: Optional[float],
+        status: str,
+        dependencies: Optional[List[str]] = None,
+        lazy: bool = False
+    ) -> None:
+        """Record how long a service took to build (time.perf_counter() stamps; None if it never ran)"""
+        timing = self._startup_timings.setdefault(name, {"dependencies": [], "lazy": lazy})
+        timing.update({"started": started, "finished": finished, "status": status})
+        if dependencies is not None:
+            timing["dependencies"] = list(dependencies)
+    
+    def get_startup_report(self) -> Dict[str, Any]:
+        """Per-service startup timings, with offsets relative to the first service that started"""
+        ran = [timing for timing in self._startup_timings.values() if timing["started"] is not None]
+        origin = min((timing["started"] for timing in ran), default=0.0)
+        services = {}
+        for name, timing in sorted(
+            self._startup_timings.items(),
+            key=lambda item: item[1]["started"] if item[1]["started"] is not None else float("inf")
+        ):
+            entry = {"status": timing["status"], "lazy": timing["lazy"], "dependencies": timing["dependencies"]}
+            if timing["started"] is not None:
+                entry.update({
+                    "start_offset_ms": round((timing["started"] - origin) * 1000, 2),
+                    "duration_ms": round((timing["finished"] - timing["started"]) * 1000, 2)
+                })
+            services[name] = entry
+        
+        total_ms = sum(entry.get("duration_ms", 0.0) for entry in services.values())
+        wall_clock_ms = round((max((timing["finished"] for timing in ran), default=origin) - origin) * 1000, 2)
+        return {
+            "services": services,
+            "summary": {
+                "wall_clock_ms": wall_clock_ms,
+                "sum_of_durations_ms": round(total_ms, 2),
+                "parallelism": round(total_ms / wall_clock_ms, 2) if wall_clock_ms else 0.0,
+                "slowest": sorted(
+                    (name for name in services if "duration_ms" in services[name]),
+                    key=lambda name: services[name]["duration_ms"], reverse=True
+                )[:5]
+            }
+        }
+    
     def is_initialized(self) -> bool:
         """Check if registry is initialized"""
         return self._initialized
@@ -159,6 +217,7 @@ class ServiceRegistry:
         self._services.clear()
         self._connections.clear()
         self._factories.clear()
+        self._startup_timings.clear()
         self._initialized = False
         logger.info("Registry cleanup completed")
 
@@ -296,8 +296,12 @@ async def lifespan(app: FastAPI):
         redis_ttl = int(os.getenv("REDIS_REALTIME_STATE_TTL_SECONDS", "3600"))
         agent_state_manager = AgentStateManager(
             persistence_service=persistence_service,
-            redis_realtime_ttl_seconds=redis_ttl
+            redis_realtime_ttl_seconds=redis_ttl,
+            write_behind=os.getenv("AGENT_STATE_WRITE_BEHIND", "false").lower() == "true",
+            flush_interval_seconds=float(os.getenv("AGENT_STATE_FLUSH_INTERVAL_SECONDS", "1.0")),
+            journal_path=os.getenv("AGENT_STATE_JOURNAL_PATH", "/tmp/agent_state_journal.jsonl")
         )
+        await agent_state_manager.start()
         services["agent_state_manager"] = agent_state_manager
         logger.info("Refactored AgentStateManager initialized.")
     except Exception as e:
@@ -355,6 +359,13 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Error closing MemoryService Letta client: {e}")
 
+    if services.get("agent_state_manager"):
+        try:
+            await services["agent_state_manager"].shutdown() # Flush pending write-behind state before clients close
+            logger.info("AgentStateManager flushed and stopped.")
+        except Exception as e:
+            logger.error(f"Error shutting down AgentStateManager: {e}")
+
     if services.get("agent_persistence_service"):
         try:
             await services["agent_persistence_service"].close_clients()
@@ -188,8 +188,8 @@ async def lifespan(app: FastAPI):
         # Verify AI services
         ai_services = ["ai_prediction", "technical_analysis", "sentiment_analysis", "ml_portfolio_optimizer"]
         for service_name in ai_services:
-            service = registry.get_service(service_name)
-            if service:
+            # list_services() includes lazy factories without building them
+            if service_name in registry.list_services():
                 logger.info(f"✅ AI service {service_name} ready")
                 available_services.append(service_name)
             else:
@@ -208,7 +208,8 @@ async def lifespan(app: FastAPI):
             "environment": ENVIRONMENT,
             "services_initialized": len(registry.all_services),
             "connections_active": len(registry.all_connections),
-            "websocket_broadcaster": "running"
+            "websocket_broadcaster": "running",
+            "startup_report": registry.get_startup_report()
         })
         
     except Exception as e:
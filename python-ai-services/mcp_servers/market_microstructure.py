@@ -206,6 +206,7 @@ class OrderBookUpdate(BaseModel):
     symbol: str = Field(..., description="Trading symbol")
     bids: List[Dict[str, float]] = Field(..., description="Bid levels [price, size, orders]")
     asks: List[Dict[str, float]] = Field(..., description="Ask levels [price, size, orders]")
+    is_snapshot: bool = Field(default=True, description="Replace the book (True) or apply levels as diffs; size 0 deletes a level")
     timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
 
 class ImpactAnalysisRequest(BaseModel):
@@ -215,9 +216,233 @@ class ImpactAnalysisRequest(BaseModel):
     participation_rate: float = Field(default=0.1, description="Participation rate (0-1)")
     model_type: ImpactModel = Field(default=ImpactModel.SQUARE_ROOT, description="Impact model")
 
+# Array-backed order book
+DEPTH_BUCKETS_BPS = (5, 10, 25, 50)
+
+class OrderBookSide:
+    """One side of an L2 book held as contiguous arrays sorted best level first.
+
+    Prices are stored as sort keys (ask price, negated bid price) so both sides
+    share one ascending binary search. Cumulative size is maintained lazily from
+    the first changed level, so depth-through-price queries are a searchsorted
+    plus a single lookup.
+
+    A diff is an O(log n) search plus, for inserts and deletes, an O(n) memmove
+    of the levels behind it. OrderBookLevel objects are only built on the first
+    levels() call after a snapshot; after that diffs patch the cached list in
+    place (one new object per changed level) and levels() is a shallow copy.
+    """
+
+    def __init__(self, is_bid: bool, capacity: int = 64):
+        self.is_bid = is_bid
+        self.count = 0
+        self._keys = np.empty(capacity)
+        self._sizes = np.empty(capacity)
+        self._orders = np.empty(capacity, dtype=np.int64)
+        self._timestamps = np.empty(capacity, dtype=object)
+        self._cumulative = np.empty(capacity)
+        self._cumulative_valid = 0  # Leading entries of _cumulative that are current
+        self._levels: Optional[List[OrderBookLevel]] = None  # Materialized view, kept in step once built
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _key(self, price: float) -> float:
+        return -price if self.is_bid else price
+
+    def _grow(self, needed: int):
+        capacity = len(self._keys)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("_keys", "_sizes", "_orders", "_timestamps", "_cumulative"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def replace(self, levels: List[Dict[str, float]], timestamp: str):
+        """Replace every level; later duplicates of a price win and empty levels are dropped"""
+        levels = [level for level in levels if level["size"] > 0]
+        n = len(levels)
+        self._grow(n)
+        keys = np.fromiter((self._key(level["price"]) for level in levels), dtype=float, count=n)
+        sizes = np.fromiter((level["size"] for level in levels), dtype=float, count=n)
+        orders = np.fromiter((int(level.get("orders", 1)) for level in levels), dtype=np.int64, count=n)
+
+        # Keep the last occurrence of each price, then order best level first
+        reversed_keys = keys[::-1]
+        _, first_from_end = np.unique(reversed_keys, return_index=True)
+        keep = n - 1 - first_from_end
+        self.count = len(keep)
+        self._keys[:self.count] = keys[keep]
+        self._sizes[:self.count] = sizes[keep]
+        self._orders[:self.count] = orders[keep]
+        self._timestamps[:self.count] = timestamp
+        self._cumulative_valid = 0
+        self._levels = None
+
+    def apply(self, price: float, size: float, orders: int, timestamp: str):
+        """Insert, update or (size <= 0) delete the level at price"""
+        key = self._key(price)
+        n = self.count
+        index = int(np.searchsorted(self._keys[:n], key))
+        found = index < n and self._keys[index] == key
+
+        if size <= 0:
+            if not found:
+                return
+            for array in (self._keys, self._sizes, self._orders, self._timestamps):
+                array[index:n - 1] = array[index + 1:n]
+            self.count = n - 1
+            if self._levels is not None:
+                del self._levels[index]
+        elif found:
+            self._sizes[index] = size
+            self._orders[index] = orders
+            self._timestamps[index] = timestamp
+            if self._levels is not None:
+                self._levels[index] = OrderBookLevel(float(price), float(size), int(orders), timestamp)
+        else:
+            self._grow(n + 1)
+            for array, value in ((self._keys, key), (self._sizes, size),
+                                 (self._orders, orders), (self._timestamps, timestamp)):
+                array[index + 1:n + 1] = array[index:n]
+                array[index] = value
+            self.count = n + 1
+            if self._levels is not None:
+                self._levels.insert(index, OrderBookLevel(float(price), float(size), int(orders), timestamp))
+
+        self._cumulative_valid = min(self._cumulative_valid, index)
+
+    def _cumulative_sizes(self) -> np.ndarray:
+        start, n = self._cumulative_valid, self.count
+        if start < n:
+            running = self._sizes[start:n].copy()
+            if start:
+                running[0] += self._cumulative[start - 1]
+            np.cumsum(running, out=self._cumulative[start:n])
+            self._cumulative_valid = n
+        return self._cumulative[:n]
+
+    @property
+    def best_price(self) -> Optional[float]:
+        return float(abs(self._keys[0])) if self.count else None
+
+    @property
+    def best_size(self) -> float:
+        return float(self._sizes[0]) if self.count else 0.0
+
+    def top_size(self, levels: int) -> float:
+        """Total size of the best `levels` levels"""
+        levels = min(levels, self.count)
+        return float(self._cumulative_sizes()[levels - 1]) if levels else 0.0
+
+    def size_through(self, price: float) -> float:
+        """Total size of levels priced at or better than price"""
+        levels = int(np.searchsorted(self._keys[:self.count], self._key(price), side="right"))
+        return self.top_size(levels)
+
+    def prices(self) -> np.ndarray:
+        keys = self._keys[:self.count]
+        return -keys if self.is_bid else keys.copy()
+
+    def sizes(self) -> np.ndarray:
+        return self._sizes[:self.count].copy()
+
+    def levels(self) -> List[OrderBookLevel]:
+        """Best-first levels; the returned list is a copy, and its level objects are never mutated"""
+        if self._levels is None:
+            self._levels = [
+                OrderBookLevel(price=price, size=size, orders=orders, timestamp=timestamp)
+                for price, size, orders, timestamp in zip(
+                    self.prices().tolist(), self._sizes[:self.count].tolist(),
+                    self._orders[:self.count].tolist(), self._timestamps[:self.count].tolist()
+                )
+            ]
+        return list(self._levels)
+
+class L2OrderBook:
+    """Price-level book for one symbol built from snapshots or per-level diffs"""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = OrderBookSide(is_bid=True)
+        self.asks = OrderBookSide(is_bid=False)
+
+    def apply_update(self, update: OrderBookUpdate):
+        if update.is_snapshot:
+            self.bids.replace(update.bids, update.timestamp)
+            self.asks.replace(update.asks, update.timestamp)
+            return
+        for side, levels in ((self.bids, update.bids), (self.asks, update.asks)):
+            for level in levels:
+                side.apply(level["price"], level["size"], int(level.get("orders", 1)), update.timestamp)
+
+    @property
+    def is_two_sided(self) -> bool:
+        return bool(self.bids.count and self.asks.count)
+
+    def depth(self, mid_price: float, buckets_bps: Tuple[int, ...] = DEPTH_BUCKETS_BPS) -> Dict[str, float]:
+        """Depth at the BBO and within each basis-point band around mid"""
+        depth = {"bbo": self.bids.best_size + self.asks.best_size}
+        for bps in buckets_bps:
+            price_range = mid_price * (bps / 10000)
+            depth[f"{bps}bps"] = (
+                self.bids.size_through(mid_price - price_range) + self.asks.size_through(mid_price + price_range)
+            )
+        return depth
+
+    def imbalance(self) -> float:
+        """Size imbalance between the best bid and best ask (-1 to 1)"""
+        if not self.is_two_sided:
+            return 0.0
+        total_size = self.bids.best_size + self.asks.best_size
+        if total_size == 0:
+            return 0.0
+        return (self.bids.best_size - self.asks.best_size) / total_size
+
+class OrderBookHistory:
+    """Fixed-capacity ring buffer of order book summary statistics"""
+
+    DEPTH_FIELDS = ("bbo",) + tuple(f"{bps}bps" for bps in DEPTH_BUCKETS_BPS)
+    FIELDS = ("mid_price", "spread", "imbalance") + DEPTH_FIELDS
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.count = 0
+        self._next = 0
+        self._values = np.zeros((capacity, len(self.FIELDS)))
+        self._timestamps = np.empty(capacity, dtype=object)
+        self._columns = {name: i for i, name in enumerate(self.FIELDS)}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, timestamp: str, mid_price: float, spread: float, imbalance: float, depth: Dict[str, float]):
+        row = self._values[self._next]
+        row[:3] = (mid_price, spread, imbalance)
+        row[3:] = [depth.get(name, 0.0) for name in self.DEPTH_FIELDS]
+        self._timestamps[self._next] = timestamp
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _recent_indices(self, last: Optional[int]) -> np.ndarray:
+        n = self.count if last is None else min(last, self.count)
+        return np.arange(self._next - n, self._next) % self.capacity
+
+    def column(self, name: str, last: Optional[int] = None) -> np.ndarray:
+        """Oldest-to-newest values of one field over the most recent `last` snapshots"""
+        return self._values[self._recent_indices(last), self._columns[name]]
+
+    def timestamps(self, last: Optional[int] = None) -> List[str]:
+        return self._timestamps[self._recent_indices(last)].tolist()
+
 class MarketMicrostructure:
     def __init__(self):
         self.order_books = {}
+        self.l2_books = {}
         self.trades = {}
         self.order_flow_metrics = {}
         self.liquidity_metrics = {}
@@ -228,7 +453,7 @@ class MarketMicrostructure:
         
         # Real-time data structures
         self.trade_streams = defaultdict(lambda: deque(maxlen=10000))
-        self.order_book_snapshots = defaultdict(lambda: deque(maxlen=1000))
+        self.order_book_snapshots = defaultdict(lambda: OrderBookHistory(capacity=1000))
         self.volume_profiles = defaultdict(lambda: defaultdict(float))
         self.tick_data = defaultdict(lambda: deque(maxlen=50000))
         
@@ -365,59 +590,40 @@ class MarketMicrostructure:
         return trade
     
     async def update_order_book(self, update: OrderBookUpdate) -> OrderBook:
-        """Update order book with new levels"""
+        """Apply a snapshot or per-level diff to the symbol's order book"""
         symbol = update.symbol
         
-        # Create order book levels
-        bids = []
-        for bid_data in update.bids:
-            level = OrderBookLevel(
-                price=bid_data["price"],
-                size=bid_data["size"],
-                orders=int(bid_data.get("orders", 1)),
-                timestamp=update.timestamp
-            )
-            bids.append(level)
-        
-        asks = []
-        for ask_data in update.asks:
-            level = OrderBookLevel(
-                price=ask_data["price"],
-                size=ask_data["size"],
-                orders=int(ask_data.get("orders", 1)),
-                timestamp=update.timestamp
-            )
-            asks.append(level)
-        
-        # Sort levels
-        bids.sort(key=lambda x: x.price, reverse=True)  # Highest first
-        asks.sort(key=lambda x: x.price)  # Lowest first
+        book = self.l2_books.get(symbol)
+        if book is None:
+            book = self.l2_books[symbol] = L2OrderBook(symbol)
+        book.apply_update(update)
         
         # Calculate mid price and spread
-        if bids and asks:
-            best_bid = bids[0].price
-            best_ask = asks[0].price
+        if book.is_two_sided:
+            best_bid = book.bids.best_price
+            best_ask = book.asks.best_price
             mid_price = (best_bid + best_ask) / 2
             spread = best_ask - best_bid
         else:
-            mid_price = self.order_books.get(symbol, {}).get("mid_price", 100.0)
+            previous = self.order_books.get(symbol)
+            mid_price = previous.mid_price if previous else 100.0
             spread = 0.01
         
         # Calculate depth at various levels
-        depth = await self._calculate_order_book_depth(bids, asks, mid_price)
+        depth = await self._calculate_order_book_depth(book, mid_price)
         
         # Calculate order imbalance
-        imbalance = await self._calculate_order_imbalance(bids, asks)
+        imbalance = await self._calculate_order_imbalance(book)
         
         # Generate microstructure signals
-        microstructure_signals = await self._generate_microstructure_signals(symbol, bids, asks, imbalance)
+        microstructure_signals = await self._generate_microstructure_signals(symbol, book, imbalance)
         
-        # Create updated order book
+        # Create updated order book view
         order_book = OrderBook(
             symbol=symbol,
             timestamp=update.timestamp,
-            bids=bids,
-            asks=asks,
+            bids=book.bids.levels(),
+            asks=book.asks.levels(),
             mid_price=mid_price,
             spread=spread,
             depth=depth,
@@ -427,53 +633,23 @@ class MarketMicrostructure:
         
         # Store order book
         self.order_books[symbol] = order_book
-        self.order_book_snapshots[symbol].append(order_book)
+        self.order_book_snapshots[symbol].append(update.timestamp, mid_price, spread, imbalance, depth)
         
         # Broadcast update
         await self._broadcast_order_book(order_book)
         
         return order_book
     
-    async def _calculate_order_book_depth(self, bids: List[OrderBookLevel], 
-                                        asks: List[OrderBookLevel], mid_price: float) -> Dict[str, float]:
+    async def _calculate_order_book_depth(self, book: L2OrderBook, mid_price: float) -> Dict[str, float]:
         """Calculate order book depth at various price levels"""
-        depth = {}
-        
-        # Depth at best bid/offer
-        depth["bbo"] = (bids[0].size if bids else 0) + (asks[0].size if asks else 0)
-        
-        # Depth within basis points
-        for bps in [5, 10, 25, 50]:
-            price_range = mid_price * (bps / 10000)
-            
-            bid_depth = sum(level.size for level in bids 
-                           if level.price >= mid_price - price_range)
-            ask_depth = sum(level.size for level in asks 
-                           if level.price <= mid_price + price_range)
-            
-            depth[f"{bps}bps"] = bid_depth + ask_depth
-        
-        return depth
+        return book.depth(mid_price, DEPTH_BUCKETS_BPS)
     
-    async def _calculate_order_imbalance(self, bids: List[OrderBookLevel], 
-                                       asks: List[OrderBookLevel]) -> float:
+    async def _calculate_order_imbalance(self, book: L2OrderBook) -> float:
         """Calculate order book imbalance"""
-        if not bids or not asks:
-            return 0.0
-        
-        # Volume imbalance at best levels
-        best_bid_size = bids[0].size
-        best_ask_size = asks[0].size
-        
-        total_size = best_bid_size + best_ask_size
-        if total_size == 0:
-            return 0.0
-        
-        imbalance = (best_bid_size - best_ask_size) / total_size
-        return imbalance
+        return book.imbalance()
     
-    async def _generate_microstructure_signals(self, symbol: str, bids: List[OrderBookLevel],
-                                             asks: List[OrderBookLevel], imbalance: float) -> Dict[str, float]:
+    async def _generate_microstructure_signals(self, symbol: str, book: L2OrderBook,
+                                             imbalance: float) -> Dict[str, float]:
         """Generate microstructure trading signals"""
         signals = {}
         
@@ -481,20 +657,20 @@ class MarketMicrostructure:
         signals["order_imbalance"] = imbalance
         
         # Spread signal (tight spread = good liquidity)
-        if bids and asks:
-            spread = asks[0].price - bids[0].price
-            mid_price = (bids[0].price + asks[0].price) / 2
+        if book.is_two_sided:
+            spread = book.asks.best_price - book.bids.best_price
+            mid_price = (book.bids.best_price + book.asks.best_price) / 2
             relative_spread = spread / mid_price
             signals["liquidity_signal"] = max(-1, min(1, 1 - relative_spread * 1000))
         
         # Order book depth signal
-        total_depth = sum(level.size for level in bids[:5]) + sum(level.size for level in asks[:5])
+        total_depth = book.bids.top_size(5) + book.asks.top_size(5)
         signals["depth_signal"] = min(1.0, total_depth / 10000)  # Normalize
         
         # Price level concentration
-        if len(bids) > 1 and len(asks) > 1:
-            bid_concentration = bids[0].size / sum(level.size for level in bids[:5])
-            ask_concentration = asks[0].size / sum(level.size for level in asks[:5])
+        if len(book.bids) > 1 and len(book.asks) > 1:
+            bid_concentration = book.bids.best_size / book.bids.top_size(5)
+            ask_concentration = book.asks.best_size / book.asks.top_size(5)
             signals["concentration_signal"] = (bid_concentration + ask_concentration) / 2
         
         return signals
@@ -658,9 +834,10 @@ class MarketMicrostructure:
             raise HTTPException(status_code=404, detail="Symbol not found")
         
         # Bid-ask spreads
-        if order_book.bids and order_book.asks:
-            best_bid = order_book.bids[0].price
-            best_ask = order_book.asks[0].price
+        book = self.l2_books.get(symbol)
+        if book is not None and book.is_two_sided:
+            best_bid = book.bids.best_price
+            best_ask = book.asks.best_price
             mid_price = order_book.mid_price
             
             bid_ask_spread = best_ask - best_bid
@@ -733,17 +910,17 @@ class MarketMicrostructure:
     async def _calculate_resilience(self, symbol: str) -> float:
         """Calculate order book resilience (recovery speed after trades)"""
         # Simplified resilience calculation
-        recent_snapshots = list(self.order_book_snapshots[symbol])[-10:]
+        history = self.order_book_snapshots[symbol]
         
-        if len(recent_snapshots) < 2:
+        if len(history) < 2:
             return 0.5  # Default moderate resilience
         
         # Calculate spread stability
-        spreads = [snapshot.spread for snapshot in recent_snapshots]
+        spreads = history.column("spread", last=10)
         spread_stability = 1 - (np.std(spreads) / np.mean(spreads)) if np.mean(spreads) > 0 else 0
         
         # Calculate depth stability
-        depths = [snapshot.depth.get("bbo", 0) for snapshot in recent_snapshots]
+        depths = history.column("bbo", last=10)
         depth_stability = 1 - (np.std(depths) / np.mean(depths)) if np.mean(depths) > 0 else 0
         
         resilience = (spread_stability + depth_stability) / 2
@@ -974,13 +1151,13 @@ class MarketMicrostructure:
         # Calculate regime indicators
         price_changes = [trade.market_impact for trade in recent_trades]
         volumes = [trade.size for trade in recent_trades]
-        spreads = [snapshot.spread for snapshot in list(self.order_book_snapshots[symbol])[-50:]]
+        spreads = self.order_book_snapshots[symbol].column("spread", last=50)
         
         # Volatility level
         volatility_level = np.std(price_changes) if price_changes else 0.02
         
         # Liquidity level (inverse of spread)
-        avg_spread = np.mean(spreads) if spreads else 0.01
+        avg_spread = np.mean(spreads) if len(spreads) else 0.01
         liquidity_level = max(0, 1 - avg_spread * 1000)  # Normalize
         
         # Volume pattern
@@ -5,19 +5,22 @@ Specialized server for advanced order management, routing, and execution strateg
 """
 
 import asyncio
+import heapq
+import itertools
 import json
 import logging
 import os
+import time
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Callable, Awaitable, Set
 from enum import Enum
 import aiohttp
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, WebSocket
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import uvicorn
 from pydantic import BaseModel, Field
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 import numpy as np
 from collections import defaultdict, deque
 
@@ -99,6 +102,37 @@ class AdvancedOrder:
     remaining_quantity: float = 0.0
     estimated_completion: Optional[str] = None
 
+class SimulatedClock:
+    """Manually advanced clock for driving the execution scheduler in tests and replays"""
+
+    def __init__(self, start: Optional[float] = None):
+        self.now = start if start is not None else time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@dataclass(order=True)
+class ScheduledWork:
+    """Heap entry: order or slice work due at `due` (epoch seconds), ties broken by order priority then FIFO"""
+    due: float
+    rank: int
+    seq: int
+    order_id: str = field(compare=False)
+    slice_id: Optional[str] = field(default=None, compare=False)
+    follow_up: bool = field(default=False, compare=False)  # Re-run the order's strategy once this slice fills
+
+PRIORITY_RANK = {
+    OrderPriority.URGENT: 0,
+    OrderPriority.HIGH: 1,
+    OrderPriority.NORMAL: 2,
+    OrderPriority.LOW: 3
+}
+
+StrategyHandler = Callable[[AdvancedOrder], Awaitable[None]]
+
 class AdvancedOrderRequest(BaseModel):
     symbol: str = Field(..., description="Trading symbol")
     side: str = Field(..., description="Order side (buy/sell)")
@@ -115,20 +149,42 @@ class AdvancedOrderRequest(BaseModel):
     strategy_id: Optional[str] = Field(None, description="Strategy ID")
 
 class OrderManagementService:
-    def __init__(self):
+    def __init__(self, clock: Callable[[], float] = time.time):
         self.orders: Dict[str, AdvancedOrder] = {}
         self.order_slices: Dict[str, List[OrderSlice]] = defaultdict(list)
-        self.execution_queues: Dict[OrderPriority, deque] = {
-            OrderPriority.URGENT: deque(),
-            OrderPriority.HIGH: deque(),
-            OrderPriority.NORMAL: deque(),
-            OrderPriority.LOW: deque()
-        }
         self.market_data_cache: Dict[str, Dict] = {}
         self.volume_profiles: Dict[str, List] = defaultdict(list)
         self.execution_engine_running = False
         self.connected_clients: List[WebSocket] = []
         
+        # Execution scheduler: a heap of due work, woken early whenever earlier work is pushed
+        self.clock = clock
+        self.schedule: List[ScheduledWork] = []
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self.price_watchers: Dict[str, Set[str]] = defaultdict(set)  # symbol -> orders waiting on a price move
+        self.scheduling_lag: deque = deque(maxlen=4096)  # Seconds between due time and dispatch
+        self.work_processed = 0
+        self.strategy_handlers: Dict[OrderStrategy, StrategyHandler] = {}
+        for strategy, handler in [
+            (OrderStrategy.IMMEDIATE, self._execute_immediate_strategy),
+            (OrderStrategy.TWAP, self._execute_twap_strategy),
+            (OrderStrategy.VWAP, self._execute_vwap_strategy),
+            (OrderStrategy.ICEBERG, self._execute_iceberg_strategy),
+            (OrderStrategy.SNIPER, self._execute_sniper_strategy),
+            (OrderStrategy.ACCUMULATION, self._execute_accumulation_strategy),
+            (OrderStrategy.DISTRIBUTION, self._execute_distribution_strategy),
+        ]:
+            self.register_strategy(strategy, handler)
+        
+    def register_strategy(self, strategy: OrderStrategy, handler: StrategyHandler):
+        """Route orders of `strategy` to `handler`, which plans or executes slices for the order"""
+        self.strategy_handlers[strategy] = handler
+
+    def _now(self) -> datetime:
+        return datetime.fromtimestamp(self.clock())
+
+
     async def initialize(self):
         """Initialize the order management service"""
         # Start execution engine
@@ -177,6 +233,7 @@ class OrderManagementService:
                     data['ask'] = data['price'] + spread/2
                     data['spread'] = spread
                     data['last_update'] = datetime.now().isoformat()
+                    self.on_market_data(symbol)
                 
                 await asyncio.sleep(2)
                 
@@ -185,51 +242,104 @@ class OrderManagementService:
                 await asyncio.sleep(5)
 
     async def _execution_engine(self):
-        """Main execution engine that processes orders"""
+        """Main execution engine: sleeps until the earliest due work or until new work is scheduled"""
         self.execution_engine_running = True
         
         while self.execution_engine_running:
             try:
-                # Process orders by priority
-                for priority in [OrderPriority.URGENT, OrderPriority.HIGH, 
-                               OrderPriority.NORMAL, OrderPriority.LOW]:
-                    queue = self.execution_queues[priority]
-                    
-                    if queue:
-                        order_id = queue.popleft()
-                        order = self.orders.get(order_id)
-                        
-                        if order and order.status == ExecutionStatus.ACTIVE:
-                            await self._process_order(order)
-                
-                await asyncio.sleep(1)  # Process every second
+                self._wakeup.clear()
+                await self.run_due()
+                timeout = max(0.0, self.schedule[0].due - self.clock()) if self.schedule else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
                 
             except Exception as e:
                 logger.error(f"Error in execution engine: {e}")
                 await asyncio.sleep(5)
 
+    def _push(self, order: AdvancedOrder, due: float, slice_id: Optional[str] = None, follow_up: bool = False):
+        heapq.heappush(self.schedule, ScheduledWork(
+            due, PRIORITY_RANK[order.priority], next(self._sequence), order.id, slice_id, follow_up
+        ))
+        self._wakeup.set()
+
+    def schedule_order(self, order: AdvancedOrder, due: Optional[float] = None):
+        """Run the order's strategy handler at `due` (default: now)"""
+        self._push(order, self.clock() if due is None else due)
+
+    def schedule_slice(self, order: AdvancedOrder, slice_order: OrderSlice, follow_up: bool = False):
+        """Execute `slice_order` at its scheduled_time"""
+        self._push(order, datetime.fromisoformat(slice_order.scheduled_time).timestamp(), slice_order.id, follow_up)
+
+    def watch_price(self, order: AdvancedOrder):
+        """Re-run the order's strategy handler on the next market data update for its symbol"""
+        self.price_watchers[order.symbol].add(order.id)
+
+    def on_market_data(self, symbol: str):
+        """Market data trigger: schedule every order waiting on `symbol` for immediate evaluation"""
+        waiting = self.price_watchers.pop(symbol, None)
+        for order_id in waiting or ():
+            order = self.orders.get(order_id)
+            if order and order.status == ExecutionStatus.ACTIVE:
+                self.schedule_order(order)
+
+    async def run_due(self) -> int:
+        """Dispatch all work due at the current clock time, including work it schedules for now; returns the count"""
+        processed = 0
+        while self.schedule and self.schedule[0].due <= self.clock():
+            work = heapq.heappop(self.schedule)
+            order = self.orders.get(work.order_id)
+            if not order or order.status != ExecutionStatus.ACTIVE:
+                continue
+            if work.slice_id is None:
+                self.scheduling_lag.append(self.clock() - work.due)
+                await self._process_order(order)
+            else:
+                slice_order = next((s for s in self.order_slices[order.id] if s.id == work.slice_id), None)
+                if slice_order is None or slice_order.status != 'scheduled':
+                    continue
+                self.scheduling_lag.append(self.clock() - work.due)
+                await self._execute_slice(slice_order, order)
+                if work.follow_up and order.status == ExecutionStatus.ACTIVE:
+                    self.schedule_order(order)
+            processed += 1
+        self.work_processed += processed
+        return processed
+
     async def _process_order(self, order: AdvancedOrder):
         """Process a single advanced order"""
         try:
-            if order.strategy == OrderStrategy.IMMEDIATE:
-                await self._execute_immediate_strategy(order)
-            elif order.strategy == OrderStrategy.TWAP:
-                await self._execute_twap_strategy(order)
-            elif order.strategy == OrderStrategy.VWAP:
-                await self._execute_vwap_strategy(order)
-            elif order.strategy == OrderStrategy.ICEBERG:
-                await self._execute_iceberg_strategy(order)
-            elif order.strategy == OrderStrategy.SNIPER:
-                await self._execute_sniper_strategy(order)
-            elif order.strategy == OrderStrategy.ACCUMULATION:
-                await self._execute_accumulation_strategy(order)
-            elif order.strategy == OrderStrategy.DISTRIBUTION:
-                await self._execute_distribution_strategy(order)
+            handler = self.strategy_handlers.get(order.strategy)
+            if handler is None:
+                raise ValueError(f"No handler registered for strategy {order.strategy}")
+            await handler(order)
                 
         except Exception as e:
             logger.error(f"Error processing order {order.id}: {e}")
             order.status = ExecutionStatus.FAILED
 
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """Queue sizes and scheduling lag percentiles (milliseconds) over recent dispatches"""
+        if self.scheduling_lag:
+            lag_ms = np.fromiter(self.scheduling_lag, dtype=np.float64) * 1000
+            lag = {
+                "p50": round(float(np.percentile(lag_ms, 50)), 3),
+                "p95": round(float(np.percentile(lag_ms, 95)), 3),
+                "p99": round(float(np.percentile(lag_ms, 99)), 3),
+                "max": round(float(lag_ms.max()), 3)
+            }
+        else:
+            lag = {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        return {
+            "scheduled": len(self.schedule),
+            "next_due_in_seconds": round(self.schedule[0].due - self.clock(), 3) if self.schedule else None,
+            "price_watchers": sum(len(orders) for orders in self.price_watchers.values()),
+            "processed": self.work_processed,
+            "scheduling_lag_ms": lag
+        }
+
     async def _execute_immediate_strategy(self, order: AdvancedOrder):
         """Execute order immediately as market order"""
         market_data = self.market_data_cache.get(order.symbol)
@@ -237,6 +347,7 @@ class OrderManagementService:
             return
         
         fill_price = market_data['ask'] if order.side == 'buy' else market_data['bid']
+        quantity = order.remaining_quantity
         
         # Create single slice for immediate execution
         slice_order = OrderSlice(
@@ -244,26 +355,35 @@ class OrderManagementService:
             parent_order_id=order.id,
             symbol=order.symbol,
             side=order.side,
-            quantity=order.total_quantity,
+            quantity=quantity,
             price=None,  # Market order
             order_type='market',
-            status='filled',
-            scheduled_time=datetime.now().isoformat(),
-            executed_time=datetime.now().isoformat(),
-            filled_quantity=order.total_quantity,
-            filled_price=fill_price
+            status='scheduled',
+            scheduled_time=self._now().isoformat()
         )
+        slice_order.filled_price = fill_price
         
         self.order_slices[order.id].append(slice_order)
-        
-        # Update order
-        order.completed_quantity = order.total_quantity
-        order.remaining_quantity = 0
-        order.avg_fill_price = fill_price
-        order.status = ExecutionStatus.COMPLETED
-        
-        await self._notify_order_update(order)
-        logger.info(f"Immediate order {order.id} completed: {order.total_quantity} {order.symbol} @ {fill_price}")
+        await self._execute_slice(slice_order, order)
+        logger.info(f"Immediate order {order.id} filled: {quantity} {order.symbol} @ {fill_price}")
+
+    def _plan_slice(self, order: AdvancedOrder, quantity: float, price: Optional[float], scheduled_time: datetime,
+                    follow_up: bool = False) -> OrderSlice:
+        """Record a limit slice and put it on the execution schedule"""
+        slice_order = OrderSlice(
+            id=str(uuid.uuid4()),
+            parent_order_id=order.id,
+            symbol=order.symbol,
+            side=order.side,
+            quantity=quantity,
+            price=price,
+            order_type='limit',
+            status='scheduled',
+            scheduled_time=scheduled_time.isoformat()
+        )
+        self.order_slices[order.id].append(slice_order)
+        self.schedule_slice(order, slice_order, follow_up)
+        return slice_order
 
     async def _execute_twap_strategy(self, order: AdvancedOrder):
         """Execute Time-Weighted Average Price strategy"""
@@ -271,49 +391,19 @@ class OrderManagementService:
             order.time_window = 60  # Default 1 hour
         
         # Calculate number of slices based on time window
-        num_slices = min(order.time_window, int(order.total_quantity / order.min_slice_size))
+        num_slices = max(1, min(order.time_window, int(order.total_quantity / order.min_slice_size)))
         slice_size = order.total_quantity / num_slices
         interval_minutes = order.time_window / num_slices
         
         market_data = self.market_data_cache.get(order.symbol)
         current_price = market_data['price'] if market_data else 150.0
         
-        # Create slices
+        # Schedule slices; the first is due now
+        start = self._now()
         for i in range(num_slices):
-            scheduled_time = datetime.now() + timedelta(minutes=i * interval_minutes)
-            
             # Add some price randomness for TWAP
             slice_price = current_price * (1 + np.random.normal(0, 0.002))
-            
-            slice_order = OrderSlice(
-                id=str(uuid.uuid4()),
-                parent_order_id=order.id,
-                symbol=order.symbol,
-                side=order.side,
-                quantity=slice_size,
-                price=slice_price,
-                order_type='limit',
-                status='scheduled',
-                scheduled_time=scheduled_time.isoformat()
-            )
-            
-            self.order_slices[order.id].append(slice_order)
-        
-        # Simulate execution of first slice
-        if self.order_slices[order.id]:
-            first_slice = self.order_slices[order.id][0]
-            first_slice.status = 'filled'
-            first_slice.executed_time = datetime.now().isoformat()
-            first_slice.filled_quantity = first_slice.quantity
-            first_slice.filled_price = first_slice.price
-            
-            order.completed_quantity += first_slice.quantity
-            order.remaining_quantity = order.total_quantity - order.completed_quantity
-            
-            if order.remaining_quantity <= 0:
-                order.status = ExecutionStatus.COMPLETED
-            
-            await self._notify_order_update(order)
+            self._plan_slice(order, slice_size, slice_price, start + timedelta(minutes=i * interval_minutes))
 
     async def _execute_vwap_strategy(self, order: AdvancedOrder):
         """Execute Volume-Weighted Average Price strategy"""
@@ -324,67 +414,38 @@ class OrderManagementService:
             return
         
         # Calculate slices based on volume profile
-        total_volume = sum(volume_profile)
         target_participation = order.max_participation_rate
         
         market_data = self.market_data_cache.get(order.symbol)
         current_price = market_data['price'] if market_data else 150.0
         
-        # Create slices based on volume periods
+        # Schedule slices per volume period
+        start = self._now()
+        planned = 0.0
         for i, period_volume in enumerate(volume_profile[:60]):  # First hour
-            if order.completed_quantity >= order.total_quantity:
+            if planned >= order.remaining_quantity:
                 break
                 
             # Calculate slice size based on volume
             slice_volume = period_volume * target_participation
-            slice_size = min(slice_volume, order.remaining_quantity)
+            slice_size = min(slice_volume, order.remaining_quantity - planned)
             
             if slice_size < order.min_slice_size:
                 continue
             
-            scheduled_time = datetime.now() + timedelta(minutes=i)
             slice_price = current_price * (1 + np.random.normal(0, 0.001))
-            
-            slice_order = OrderSlice(
-                id=str(uuid.uuid4()),
-                parent_order_id=order.id,
-                symbol=order.symbol,
-                side=order.side,
-                quantity=slice_size,
-                price=slice_price,
-                order_type='limit',
-                status='scheduled',
-                scheduled_time=scheduled_time.isoformat()
-            )
-            
-            self.order_slices[order.id].append(slice_order)
-        
-        # Execute first slice
-        if self.order_slices[order.id]:
-            await self._execute_slice(self.order_slices[order.id][0], order)
+            self._plan_slice(order, slice_size, slice_price, start + timedelta(minutes=i))
+            planned += slice_size
 
     async def _execute_iceberg_strategy(self, order: AdvancedOrder):
         """Execute iceberg strategy - only show small portions"""
-        visible_size = min(order.max_slice_size, order.total_quantity * 0.1)
+        visible_size = min(order.max_slice_size, order.total_quantity * 0.1, order.remaining_quantity)
         
         market_data = self.market_data_cache.get(order.symbol)
         current_price = market_data['price'] if market_data else 150.0
         
-        # Create visible slice
-        slice_order = OrderSlice(
-            id=str(uuid.uuid4()),
-            parent_order_id=order.id,
-            symbol=order.symbol,
-            side=order.side,
-            quantity=visible_size,
-            price=current_price,
-            order_type='limit',
-            status='active',
-            scheduled_time=datetime.now().isoformat()
-        )
-        
-        self.order_slices[order.id].append(slice_order)
-        await self._execute_slice(slice_order, order)
+        # Show the next visible slice now; once it fills, the strategy runs again for the one after
+        self._plan_slice(order, visible_size, current_price, self._now(), follow_up=True)
 
     async def _execute_sniper_strategy(self, order: AdvancedOrder):
         """Execute sniper strategy - wait for optimal price"""
@@ -393,6 +454,7 @@ class OrderManagementService:
         
         market_data = self.market_data_cache.get(order.symbol)
         if not market_data:
+            self.watch_price(order)
             return
         
         current_price = market_data['price']
@@ -408,28 +470,33 @@ class OrderManagementService:
             # Execute immediately
             await self._execute_immediate_strategy(order)
         else:
-            # Keep monitoring
-            logger.info(f"Sniper order {order.id} waiting for target price {order.target_price}, current: {current_price}")
+            # Re-evaluate on the next price update
+            self.watch_price(order)
+            logger.debug(f"Sniper order {order.id} waiting for target price {order.target_price}, current: {current_price}")
 
     async def _execute_accumulation_strategy(self, order: AdvancedOrder):
         """Execute accumulation strategy - buy dips"""
-        market_data = self.market_data_cache.get(order.symbol)
-        if not market_data:
+        if not order.price_range:
             return
         
-        current_price = market_data['price']
-        
-        # Check if price is in favorable range for buying
-        if order.side == 'buy':
-            # Buy when price drops
-            if order.price_range and current_price <= order.price_range[0]:
-                slice_size = min(order.max_slice_size, order.remaining_quantity)
-                await self._create_and_execute_slice(order, slice_size, current_price)
-        else:
-            # Sell when price rises
-            if order.price_range and current_price >= order.price_range[1]:
-                slice_size = min(order.max_slice_size, order.remaining_quantity)
-                await self._create_and_execute_slice(order, slice_size, current_price)
+        market_data = self.market_data_cache.get(order.symbol)
+        if market_data:
+            current_price = market_data['price']
+            
+            # Check if price is in favorable range for buying
+            if order.side == 'buy':
+                # Buy when price drops
+                if current_price <= order.price_range[0]:
+                    slice_size = min(order.max_slice_size, order.remaining_quantity)
+                    await self._create_and_execute_slice(order, slice_size, current_price)
+            else:
+                # Sell when price rises
+                if current_price >= order.price_range[1]:
+                    slice_size = min(order.max_slice_size, order.remaining_quantity)
+                    await self._create_and_execute_slice(order, slice_size, current_price)
+        
+        if order.status == ExecutionStatus.ACTIVE:
+            self.watch_price(order)
 
     async def _execute_distribution_strategy(self, order: AdvancedOrder):
         """Execute distribution strategy - spread over time and price levels"""
@@ -445,28 +512,11 @@ class OrderManagementService:
         
         quantity_per_level = order.total_quantity / (price_levels * time_periods)
         
+        start = self._now()
         for i in range(price_levels):
             for j in range(time_periods):
                 price_level = min_price + (i * price_step)
-                scheduled_time = datetime.now() + timedelta(minutes=j * time_step)
-                
-                slice_order = OrderSlice(
-                    id=str(uuid.uuid4()),
-                    parent_order_id=order.id,
-                    symbol=order.symbol,
-                    side=order.side,
-                    quantity=quantity_per_level,
-                    price=price_level,
-                    order_type='limit',
-                    status='scheduled',
-                    scheduled_time=scheduled_time.isoformat()
-                )
-                
-                self.order_slices[order.id].append(slice_order)
-        
-        # Execute first slice
-        if self.order_slices[order.id]:
-            await self._execute_slice(self.order_slices[order.id][0], order)
+                self._plan_slice(order, quantity_per_level, price_level, start + timedelta(minutes=j * time_step))
 
     async def _create_and_execute_slice(self, order: AdvancedOrder, quantity: float, price: float):
         """Create and execute a slice"""
@@ -478,31 +528,21 @@ class OrderManagementService:
             quantity=quantity,
             price=price,
             order_type='limit',
-            status='active',
-            scheduled_time=datetime.now().isoformat(),
-            executed_time=datetime.now().isoformat(),
-            filled_quantity=quantity,
-            filled_price=price
+            status='scheduled',
+            scheduled_time=self._now().isoformat()
         )
         
         self.order_slices[order.id].append(slice_order)
-        
-        # Update order
-        order.completed_quantity += quantity
-        order.remaining_quantity = order.total_quantity - order.completed_quantity
-        
-        if order.remaining_quantity <= 0:
-            order.status = ExecutionStatus.COMPLETED
-        
-        await self._notify_order_update(order)
+        await self._execute_slice(slice_order, order)
 
     async def _execute_slice(self, slice_order: OrderSlice, parent_order: AdvancedOrder):
         """Execute a single slice"""
         # Simulate execution
         slice_order.status = 'filled'
-        slice_order.executed_time = datetime.now().isoformat()
+        slice_order.executed_time = self._now().isoformat()
         slice_order.filled_quantity = slice_order.quantity
-        slice_order.filled_price = slice_order.price
+        if slice_order.filled_price is None:
+            slice_order.filled_price = slice_order.price
         
         # Update parent order
         parent_order.completed_quantity += slice_order.quantity
@@ -520,7 +560,8 @@ class OrderManagementService:
         if total_filled_quantity > 0:
             parent_order.avg_fill_price = total_filled_value / total_filled_quantity
         
-        if parent_order.remaining_quantity <= 0:
+        if parent_order.remaining_quantity <= 1e-9 * parent_order.total_quantity:
+            parent_order.remaining_quantity = 0
             parent_order.status = ExecutionStatus.COMPLETED
         
         await self._notify_order_update(parent_order)
@@ -552,7 +593,7 @@ class OrderManagementService:
             strategy=order_request.strategy,
             priority=order_request.priority,
             status=ExecutionStatus.QUEUED,
-            created_at=datetime.now().isoformat(),
+            created_at=self._now().isoformat(),
             target_price=order_request.target_price,
             price_range=order_request.price_range,
             time_window=order_request.time_window,
@@ -567,16 +608,14 @@ class OrderManagementService:
         
         # Estimate completion time
         if order_request.time_window:
-            estimated_completion = datetime.now() + timedelta(minutes=order_request.time_window)
+            estimated_completion = self._now() + timedelta(minutes=order_request.time_window)
             order.estimated_completion = estimated_completion.isoformat()
         
         self.orders[order_id] = order
         
-        # Add to execution queue
-        self.execution_queues[order_request.priority].append(order_id)
-        
         # Start processing
         order.status = ExecutionStatus.ACTIVE
+        self.schedule_order(order)
         
         logger.info(f"Advanced order submitted: {order_id} - {order_request.strategy} {order_request.quantity} {order_request.symbol}")
         
@@ -589,6 +628,7 @@ class OrderManagementService:
         
         order = self.orders[order_id]
         order.status = ExecutionStatus.CANCELLED
+        self.price_watchers[order.symbol].discard(order_id)
         
         # Cancel all pending slices
         for slice_order in self.order_slices[order_id]:
@@ -655,7 +695,8 @@ async def get_metrics():
         "network_in": 1536,
         "network_out": 3072,
         "active_connections": len(order_management_service.connected_clients),
-        "queue_length": sum(len(q) for q in order_management_service.execution_queues.values()),
+        "queue_length": len(order_management_service.schedule),
+        "scheduler": order_management_service.get_scheduler_stats(),
         "errors_last_hour": 1,
         "requests_last_hour": 156,
         "response_time_p95": 45.0
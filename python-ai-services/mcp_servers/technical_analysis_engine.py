@@ -18,6 +18,7 @@ import uvicorn
 from pydantic import BaseModel, Field
 import uuid
 import math
+from collections import deque
 from enum import Enum
 
 # Configure logging
@@ -131,12 +132,359 @@ class AnalysisRequest(BaseModel):
     include_patterns: bool = Field(default=True, description="Include pattern detection")
     include_support_resistance: bool = Field(default=True, description="Include S/R levels")
 
+# Incremental indicator state
+class _RollingWindow:
+    """Fixed-size window with O(1) mean/variance updates (Welford add/remove).
+    
+    Non-finite values are held as missing, so the mean is NaN until the window
+    is full of finite values, matching pandas rolling(window).mean().
+    """
+    
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque()
+        self.count = 0      # finite values in the window
+        self.missing = 0    # non-finite values in the window
+        self.nonzero = 0
+        self.mean_value = 0.0
+        self.m2 = 0.0
+        self._since_resync = 0
+    
+    def push(self, value: float):
+        self.values.append(value)
+        self._add(value)
+        if len(self.values) > self.size:
+            self._remove(self.values.popleft())
+        
+        # Re-derive the running moments once per window length to bound drift
+        self._since_resync += 1
+        if self._since_resync >= self.size:
+            self._resync()
+    
+    def _add(self, value: float):
+        if not math.isfinite(value):
+            self.missing += 1
+            return
+        self.count += 1
+        self.nonzero += value != 0
+        delta = value - self.mean_value
+        self.mean_value += delta / self.count
+        self.m2 += delta * (value - self.mean_value)
+    
+    def _remove(self, value: float):
+        if not math.isfinite(value):
+            self.missing -= 1
+            return
+        self.count -= 1
+        self.nonzero -= value != 0
+        if self.count == 0:
+            self.mean_value = 0.0
+            self.m2 = 0.0
+            return
+        delta = value - self.mean_value
+        self.mean_value -= delta / self.count
+        self.m2 -= delta * (value - self.mean_value)
+    
+    def _resync(self):
+        finite = [v for v in self.values if math.isfinite(v)]
+        self.count = len(finite)
+        self.mean_value = math.fsum(finite) / self.count if finite else 0.0
+        self.m2 = math.fsum((v - self.mean_value) ** 2 for v in finite)
+        self._since_resync = 0
+    
+    @property
+    def full(self) -> bool:
+        return self.count == self.size
+    
+    def mean(self) -> float:
+        if not self.full:
+            return math.nan
+        return self.mean_value if self.nonzero else 0.0
+    
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1)"""
+        if not self.full or self.size < 2:
+            return math.nan
+        return math.sqrt(max(self.m2, 0.0) / (self.size - 1))
+
+
+class _RollingExtreme:
+    """Rolling max or min in amortized O(1) via a monotonic deque"""
+    
+    def __init__(self, size: int, is_max: bool):
+        self.size = size
+        self.is_max = is_max
+        self.candidates = deque()  # (bar index, value)
+        self.index = -1
+    
+    def push(self, value: float):
+        self.index += 1
+        if self.is_max:
+            while self.candidates and self.candidates[-1][1] <= value:
+                self.candidates.pop()
+        else:
+            while self.candidates and self.candidates[-1][1] >= value:
+                self.candidates.pop()
+        self.candidates.append((self.index, value))
+        if self.candidates[0][0] <= self.index - self.size:
+            self.candidates.popleft()
+    
+    def value(self) -> float:
+        if self.index + 1 < self.size:
+            return math.nan
+        return self.candidates[0][1]
+
+
+class _AdjustedEMA:
+    """Exponential moving average equivalent to pandas ewm(span, adjust=True)"""
+    
+    def __init__(self, span: int):
+        self.decay = 1 - 2 / (span + 1)
+        self.weight = 0.0
+        self.value = math.nan
+    
+    def push(self, value: float) -> float:
+        if self.weight == 0.0:
+            self.value = value
+            self.weight = 1.0
+        else:
+            self.weight *= self.decay
+            if value != self.value:  # Same guard as pandas against drift on constant series
+                self.value = (self.weight * self.value + value) / (self.weight + 1)
+            self.weight += 1
+        return self.value
+
+
+def _divide(numerator: float, denominator: float) -> float:
+    """IEEE-style division (x/0 -> +/-inf, 0/0 -> nan) as pandas does"""
+    if denominator == 0:
+        if numerator == 0 or math.isnan(numerator):
+            return math.nan
+        return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+    return numerator / denominator
+
+
+class IncrementalIndicatorState:
+    """
+    O(1)-per-bar indicator state for one symbol/timeframe stream.
+    
+    Mirrors the batch calculations of TechnicalAnalysisEngine (simple rolling
+    means for RSI/ATR/ADX, adjusted EMAs for MACD, session-cumulative OBV and
+    VWAP) so indicator_values() returns what _batch_indicator_values() would
+    compute over every bar seen so far.
+    """
+    
+    def __init__(self, indicator_configs: Dict[str, Dict[str, Any]]):
+        self.configs = indicator_configs
+        self.bar_count = 0
+        self.last_timestamp = None
+        self.close = math.nan
+        self._prev_close = math.nan
+        self._prev_high = math.nan
+        self._prev_low = math.nan
+        self._extremes: Dict[Tuple[str, int], _RollingExtreme] = {}
+        
+        rsi = indicator_configs["rsi"]
+        self._rsi_gain = _RollingWindow(rsi["period"])
+        self._rsi_loss = _RollingWindow(rsi["period"])
+        
+        macd = indicator_configs["macd"]
+        self._ema_fast = _AdjustedEMA(macd["fast"])
+        self._ema_slow = _AdjustedEMA(macd["slow"])
+        self._macd_signal = _AdjustedEMA(macd["signal"])
+        self._macd = math.nan
+        self._histogram = math.nan
+        self._prev_histogram = math.nan
+        
+        self._bollinger = _RollingWindow(indicator_configs["bollinger"]["period"])
+        
+        stochastic = indicator_configs["stochastic"]
+        self._stochastic_k = math.nan
+        self._stochastic_d = _RollingWindow(stochastic["d_period"])
+        self._williams_r = math.nan
+        
+        adx_period = indicator_configs["adx"]["period"]
+        self._adx_tr = _RollingWindow(adx_period)
+        self._plus_dm = _RollingWindow(adx_period)
+        self._minus_dm = _RollingWindow(adx_period)
+        self._dx = _RollingWindow(adx_period)
+        self._plus_di = math.nan
+        self._minus_di = math.nan
+        self._atr = _RollingWindow(indicator_configs["atr"]["period"])
+        
+        self._obv = 0.0
+        self._obv_window = _RollingWindow(20)
+        self._close_window = _RollingWindow(20)
+        
+        self._cum_price_volume = 0.0
+        self._cum_volume = 0.0
+        
+        ichimoku = indicator_configs["ichimoku"]
+        self._senkou_a_lag = deque(maxlen=ichimoku["kijun"] + 1)
+        self._senkou_b_lag = deque(maxlen=ichimoku["kijun"] + 1)
+        
+        # Periods used by more than one indicator share a single high/low tracker
+        for period in {
+            stochastic["k_period"], indicator_configs["williams_r"]["period"],
+            ichimoku["tenkan"], ichimoku["kijun"], ichimoku["senkou"]
+        }:
+            self._extremes[("high", period)] = _RollingExtreme(period, is_max=True)
+            self._extremes[("low", period)] = _RollingExtreme(period, is_max=False)
+    
+    def _channel(self, period: int) -> Tuple[float, float]:
+        """Rolling (highest high, lowest low) over period bars"""
+        return self._extremes[("high", period)].value(), self._extremes[("low", period)].value()
+    
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, indicator_configs: Dict[str, Dict[str, Any]]) -> "IncrementalIndicatorState":
+        """Seed state by replaying every bar of a DataFrame"""
+        state = cls(indicator_configs)
+        state.update_many(df)
+        return state
+    
+    def update_many(self, df: pd.DataFrame):
+        columns = [df[name].to_numpy(dtype=np.float64).tolist() for name in ("high", "low", "close", "volume")]
+        timestamps = df["timestamp"].tolist() if "timestamp" in df else [None] * len(df)
+        for timestamp, high, low, close, volume in zip(timestamps, *columns):
+            self.update(high, low, close, volume, timestamp)
+    
+    def update(self, high: float, low: float, close: float, volume: float, timestamp: Any = None):
+        """Fold one closed bar into every indicator"""
+        high, low, close, volume = float(high), float(low), float(close), float(volume)
+        prev_close = self._prev_close
+        first_bar = self.bar_count == 0
+        
+        for (field, _), extreme in self._extremes.items():
+            extreme.push(high if field == "high" else low)
+        
+        # RSI (the undefined first delta counts as no gain and no loss)
+        delta = 0.0 if first_bar else close - prev_close
+        self._rsi_gain.push(delta if delta > 0 else 0.0)
+        self._rsi_loss.push(-delta if delta < 0 else 0.0)
+        
+        # MACD
+        self._macd = self._ema_fast.push(close) - self._ema_slow.push(close)
+        self._prev_histogram = self._histogram
+        self._histogram = self._macd - self._macd_signal.push(self._macd)
+        
+        # Bollinger
+        self._bollinger.push(close)
+        
+        # Stochastic / Williams %R
+        k_high, k_low = self._channel(self.configs["stochastic"]["k_period"])
+        self._stochastic_k = 100 * _divide(close - k_low, k_high - k_low)
+        self._stochastic_d.push(self._stochastic_k)
+        wr_high, wr_low = self._channel(self.configs["williams_r"]["period"])
+        self._williams_r = -100 * _divide(wr_high - close, wr_high - wr_low)
+        
+        # True range, ADX, ATR
+        if first_bar:
+            true_range = high - low
+            plus_dm = minus_dm = 0.0
+        else:
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+            high_diff = high - self._prev_high
+            low_diff = abs(low - self._prev_low)
+            plus_dm = high_diff if high_diff > low_diff and high_diff > 0 else 0.0
+            minus_dm = low_diff if low_diff > high_diff and low_diff > 0 else 0.0
+        self._adx_tr.push(true_range)
+        self._plus_dm.push(plus_dm)
+        self._minus_dm.push(minus_dm)
+        adx_atr = self._adx_tr.mean()
+        self._plus_di = 100 * _divide(self._plus_dm.mean(), adx_atr)
+        self._minus_di = 100 * _divide(self._minus_dm.mean(), adx_atr)
+        self._dx.push(100 * _divide(abs(self._plus_di - self._minus_di), self._plus_di + self._minus_di))
+        self._atr.push(true_range)
+        
+        # OBV
+        if not first_bar and close != prev_close:
+            self._obv += volume if close > prev_close else -volume
+        self._obv_window.push(self._obv)
+        self._close_window.push(close)
+        
+        # VWAP
+        self._cum_price_volume += (high + low + close) / 3 * volume
+        self._cum_volume += volume
+        
+        # Ichimoku (leading spans are plotted kijun bars ahead)
+        ichimoku = self.configs["ichimoku"]
+        tenkan = self._midpoint(ichimoku["tenkan"])
+        kijun = self._midpoint(ichimoku["kijun"])
+        self._senkou_a_lag.append((tenkan + kijun) / 2)
+        self._senkou_b_lag.append(self._midpoint(ichimoku["senkou"]))
+        
+        self._prev_close, self._prev_high, self._prev_low = close, high, low
+        self.close = close
+        self.last_timestamp = timestamp
+        self.bar_count += 1
+    
+    def _midpoint(self, period: int) -> float:
+        highest, lowest = self._channel(period)
+        return (highest + lowest) / 2
+    
+    def _lagged(self, values: deque) -> float:
+        return values[0] if len(values) == values.maxlen else math.nan
+    
+    def indicator_values(self, indicator_name: str) -> Dict[str, float]:
+        """Latest values in the same shape as TechnicalAnalysisEngine._batch_indicator_values"""
+        if indicator_name == "rsi":
+            rs = _divide(self._rsi_gain.mean(), self._rsi_loss.mean())
+            return {"rsi": 100 - _divide(100, 1 + rs)}
+        elif indicator_name == "macd":
+            if self.bar_count < 2:
+                raise IndexError("MACD needs at least two bars")
+            return {
+                "macd": self._macd,
+                "signal": self._macd - self._histogram,
+                "histogram": self._histogram,
+                "prev_histogram": self._prev_histogram
+            }
+        elif indicator_name == "bollinger":
+            sma = self._bollinger.mean()
+            band = self._bollinger.std() * self.configs["bollinger"]["std_dev"]
+            return {"close": self.close, "upper": sma + band, "lower": sma - band, "sma": sma}
+        elif indicator_name == "stochastic":
+            return {"k": self._stochastic_k, "d": self._stochastic_d.mean()}
+        elif indicator_name == "williams_r":
+            return {"williams_r": self._williams_r}
+        elif indicator_name == "adx":
+            return {"adx": self._dx.mean(), "plus_di": self._plus_di, "minus_di": self._minus_di}
+        elif indicator_name == "atr":
+            return {"atr": self._atr.mean(), "close": self.close}
+        elif indicator_name == "obv":
+            return {
+                "obv": self._obv,
+                "obv_ma": self._obv_window.mean(),
+                "close": self.close,
+                "close_ma": self._close_window.mean()
+            }
+        elif indicator_name == "vwap":
+            return {"vwap": _divide(self._cum_price_volume, self._cum_volume), "close": self.close}
+        elif indicator_name == "ichimoku":
+            ichimoku = self.configs["ichimoku"]
+            return {
+                "close": self.close,
+                "tenkan": self._midpoint(ichimoku["tenkan"]),
+                "kijun": self._midpoint(ichimoku["kijun"]),
+                "senkou_a": self._lagged(self._senkou_a_lag),
+                "senkou_b": self._lagged(self._senkou_b_lag)
+            }
+        raise ValueError(f"Unknown indicator: {indicator_name}")
+
 class TechnicalAnalysisEngine:
     def __init__(self):
         self.analyses = {}
-        self.market_data = {}
         self.active_websockets = []
         
+        # Bar history and its incremental indicator state share the (symbol, timeframe) key
+        self.market_data: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self.indicator_states: Dict[Tuple[str, str], IncrementalIndicatorState] = {}
+        
+        # History may grow this many bars past max_history_bars before it is trimmed back and
+        # its state reseeded, so the replay cost is paid once per slack bars rather than per bar
+        self.max_history_bars = 5000
+        self.history_trim_slack = 500
+        
         # Initialize sample market data
         self._initialize_sample_data()
         
@@ -162,7 +510,7 @@ class TechnicalAnalysisEngine:
         symbols = ["AAPL", "GOOGL", "MSFT", "TSLA", "SPY", "QQQ", "BTC-USD", "ETH-USD"]
         
         for symbol in symbols:
-            self.market_data[symbol] = self._generate_sample_market_data(symbol, 500)
+            self.market_data[(symbol, "1h")] = self._generate_sample_market_data(symbol, 500)
         
         logger.info(f"Initialized market data for {len(symbols)} symbols")
     
@@ -210,14 +558,12 @@ class TechnicalAnalysisEngine:
         analysis_id = str(uuid.uuid4())
         
         # Get market data
-        if request.symbol not in self.market_data:
-            raise HTTPException(status_code=404, detail=f"No data available for {request.symbol}")
-        
-        df = self.market_data[request.symbol].copy()
+        df = self.get_market_data(request.symbol, request.timeframe).copy()
         current_price = df['close'].iloc[-1]
         
         # Calculate technical indicators
-        indicators = await self._calculate_indicators(df, request.indicators)
+        state = self.get_indicator_state(request.symbol, request.timeframe)
+        indicators = await self._calculate_indicators(df, request.indicators, state)
         
         # Detect patterns
         patterns = []
@@ -268,9 +614,61 @@ class TechnicalAnalysisEngine:
         
         return analysis
     
+    def get_market_data(self, symbol: str, timeframe: str = "1h") -> pd.DataFrame:
+        """Bar history for a stream"""
+        df = self.market_data.get((symbol, timeframe))
+        if df is None:
+            raise HTTPException(status_code=404, detail=f"No {timeframe} data available for {symbol}")
+        return df
+    
+    def get_indicator_state(self, symbol: str, timeframe: str = "1h") -> IncrementalIndicatorState:
+        """Get the incremental state for a stream, reseeding it if it fell out of sync"""
+        key = (symbol, timeframe)
+        df = self.get_market_data(symbol, timeframe)
+        state = self.indicator_states.get(key)
+        if state is None or not self._state_in_sync(state, df):
+            state = IncrementalIndicatorState.from_dataframe(df, self.indicator_configs)
+            self.indicator_states[key] = state
+        return state
+    
+    def _state_in_sync(self, state: IncrementalIndicatorState, df: pd.DataFrame) -> bool:
+        """Whether the state has folded in exactly the bars of df (by count, last close and timestamp)"""
+        if state.bar_count == 0 or state.bar_count != len(df) or state.close != df['close'].iloc[-1]:
+            return False
+        return 'timestamp' not in df or state.last_timestamp == df['timestamp'].iloc[-1]
+    
+    async def update_market_data(self, symbol: str, bars: List[Dict[str, Any]], timeframe: str = "1h"):
+        """
+        Append closed bars and advance the stream's indicator state by O(1) per bar.
+        
+        Cumulative indicators (OBV, VWAP, the adjusted EMAs) depend on the first retained bar,
+        so trimming the history reseeds the state from the trimmed frame to keep it equal
+        to a batch recompute.
+        """
+        key = (symbol, timeframe)
+        new_bars = pd.DataFrame(bars)
+        history = self.market_data.get(key)
+        state = self.indicator_states.get(key)
+        
+        if history is None:
+            df = new_bars.reset_index(drop=True)
+        else:
+            if state is not None and self._state_in_sync(state, history):
+                state.update_many(new_bars)
+            df = pd.concat([history, new_bars], ignore_index=True)
+        
+        if len(df) > self.max_history_bars + self.history_trim_slack:
+            df = df.tail(self.max_history_bars).reset_index(drop=True)
+            state = None
+        
+        self.market_data[key] = df
+        if state is None or not self._state_in_sync(state, df):
+            self.indicator_states[key] = IncrementalIndicatorState.from_dataframe(df, self.indicator_configs)
+    
     async def _calculate_indicators(self, df: pd.DataFrame, 
-                                  requested_indicators: List[str]) -> List[TechnicalIndicator]:
-        """Calculate technical indicators"""
+                                  requested_indicators: List[str],
+                                  state: Optional[IncrementalIndicatorState] = None) -> List[TechnicalIndicator]:
+        """Calculate technical indicators, from incremental state when one is provided"""
         indicators = []
         
         # Default indicators if none specified
@@ -279,38 +677,44 @@ class TechnicalAnalysisEngine:
         
         for indicator_name in requested_indicators:
             if indicator_name in self.indicator_configs:
-                indicator = await self._calculate_single_indicator(df, indicator_name)
+                indicator = await self._calculate_single_indicator(df, indicator_name, state)
                 if indicator:
                     indicators.append(indicator)
         
         return indicators
     
     async def _calculate_single_indicator(self, df: pd.DataFrame, 
-                                        indicator_name: str) -> Optional[TechnicalIndicator]:
+                                        indicator_name: str,
+                                        state: Optional[IncrementalIndicatorState] = None) -> Optional[TechnicalIndicator]:
         """Calculate a single technical indicator"""
         config = self.indicator_configs[indicator_name]
         
         try:
+            if state is not None:
+                values = state.indicator_values(indicator_name)
+            else:
+                values = self._batch_indicator_values(df, indicator_name, config)
+            
             if indicator_name == "rsi":
-                return await self._calculate_rsi(df, config)
+                return self._rsi_indicator(values, config)
             elif indicator_name == "macd":
-                return await self._calculate_macd(df, config)
+                return self._macd_indicator(values, config)
             elif indicator_name == "bollinger":
-                return await self._calculate_bollinger_bands(df, config)
+                return self._bollinger_indicator(values, config)
             elif indicator_name == "stochastic":
-                return await self._calculate_stochastic(df, config)
+                return self._stochastic_indicator(values, config)
             elif indicator_name == "williams_r":
-                return await self._calculate_williams_r(df, config)
+                return self._williams_r_indicator(values, config)
             elif indicator_name == "adx":
-                return await self._calculate_adx(df, config)
+                return self._adx_indicator(values, config)
             elif indicator_name == "atr":
-                return await self._calculate_atr(df, config)
+                return self._atr_indicator(values, config)
             elif indicator_name == "obv":
-                return await self._calculate_obv(df)
+                return self._obv_indicator(values)
             elif indicator_name == "vwap":
-                return await self._calculate_vwap(df)
+                return self._vwap_indicator(values)
             elif indicator_name == "ichimoku":
-                return await self._calculate_ichimoku(df, config)
+                return self._ichimoku_indicator(values, config)
             
         except Exception as e:
             logger.error(f"Error calculating {indicator_name}: {e}")
@@ -318,8 +722,35 @@ class TechnicalAnalysisEngine:
         
         return None
     
+    def _batch_indicator_values(self, df: pd.DataFrame, indicator_name: str, config: Dict) -> Dict[str, float]:
+        """Compute the latest values of an indicator over the full DataFrame"""
+        if indicator_name == "rsi":
+            return self._rsi_values(df, config)
+        elif indicator_name == "macd":
+            return self._macd_values(df, config)
+        elif indicator_name == "bollinger":
+            return self._bollinger_values(df, config)
+        elif indicator_name == "stochastic":
+            return self._stochastic_values(df, config)
+        elif indicator_name == "williams_r":
+            return self._williams_r_values(df, config)
+        elif indicator_name == "adx":
+            return self._adx_values(df, config)
+        elif indicator_name == "atr":
+            return self._atr_values(df, config)
+        elif indicator_name == "obv":
+            return self._obv_values(df)
+        elif indicator_name == "vwap":
+            return self._vwap_values(df)
+        elif indicator_name == "ichimoku":
+            return self._ichimoku_values(df, config)
+        raise ValueError(f"Unknown indicator: {indicator_name}")
+    
     async def _calculate_rsi(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
         """Calculate RSI indicator"""
+        return self._rsi_indicator(self._rsi_values(df, config), config)
+    
+    def _rsi_values(self, df: pd.DataFrame, config: Dict) -> Dict[str, float]:
         period = config["period"]
         
         delta = df['close'].diff()
@@ -328,7 +759,11 @@ class TechnicalAnalysisEngine:
         
         rs = gain / loss
         rsi = 100 - (100 / (1 + rs))
-        current_rsi = rsi.iloc[-1]
+        return {"rsi": rsi.iloc[-1]}
+    
+    def _rsi_indicator(self, values: Dict[str, float], config: Dict) -> TechnicalIndicator:
+        period = config["period"]
+        current_rsi = values["rsi"]
         
         # Generate signal
         if current_rsi > config["overbought"]:
@@ -353,6 +788,9 @@ class TechnicalAnalysisEngine:
     
     async def _calculate_macd(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
         """Calculate MACD indicator"""
+        return self._macd_indicator(self._macd_values(df, config), config)
+    
+    def _macd_values(self, df: pd.DataFrame, config: Dict) -> Dict[str, float]:
         fast_period = config["fast"]
         slow_period = config["slow"]
         signal_period = config["signal"]
@@ -363,20 +801,29 @@ class TechnicalAnalysisEngine:
         signal_line = macd_line.ewm(span=signal_period).mean()
         histogram = macd_line - signal_line
         
-        current_macd = macd_line.iloc[-1]
-        current_signal = signal_line.iloc[-1]
-        current_histogram = histogram.iloc[-1]
+        return {
+            "macd": macd_line.iloc[-1],
+            "signal": signal_line.iloc[-1],
+            "histogram": histogram.iloc[-1],
+            "prev_histogram": histogram.iloc[-2]
+        }
+    
+    def _macd_indicator(self, values: Dict[str, float], config: Dict) -> TechnicalIndicator:
+        current_macd = values["macd"]
+        current_signal = values["signal"]
+        current_histogram = values["histogram"]
+        prev_histogram = values["prev_histogram"]
         
         # Generate signal
-        if current_macd > current_signal and histogram.iloc[-2] <= 0:
+        if current_macd > current_signal and prev_histogram <= 0:
             signal = "BUY"
             strength = SignalStrength.STRONG
-        elif current_macd < current_signal and histogram.iloc[-2] >= 0:
+        elif current_macd < current_signal and prev_histogram >= 0:
             signal = "SELL"
             strength = SignalStrength.STRONG
         else:
             signal = "HOLD"
-            strength = SignalStrength.MODERATE if abs(current_histogram) > abs(histogram.iloc[-2]) else SignalStrength.WEAK
+            strength = SignalStrength.MODERATE if abs(current_histogram) > abs(prev_histogram) else SignalStrength.WEAK
         
         return TechnicalIndicator(
             name="MACD",
@@ -390,6 +837,9 @@ class TechnicalAnalysisEngine:
     
     async def _calculate_bollinger_bands(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
         """Calculate Bollinger Bands"""
+        return self._bollinger_indicator(self._bollinger_values(df, config), config)
+    
+    def _bollinger_values(self, df: pd.DataFrame, config: Dict) -> Dict[str, float]:
         period = config["period"]
         std_dev = config["std_dev"]
         
@@ -399,10 +849,17 @@ class TechnicalAnalysisEngine:
         upper_band = sma + (std * std_dev)
         lower_band = sma - (std * std_dev)
         
-        current_price = df['close'].iloc[-1]
-        current_upper = upper_band.iloc[-1]
-        current_lower = lower_band.iloc[-1]
-        current_sma = sma.iloc[-1]
+        return {
+            "close": df['close'].iloc[-1],
+            "upper": upper_band.iloc[-1],
+            "lower": lower_band.iloc[-1],
+            "sma": sma.iloc[-1]
+        }
+    
+    def _bollinger_indicator(self, values: Dict[str, float], config: Dict) -> TechnicalIndicator:
+        current_price = values["close"]
+        current_upper = values["upper"]
+        current_lower = values["lower"]
         
         # Calculate position relative to bands
         band_position = (current_price - current_lower) / (current_upper - current_lower)
@@ -436,6 +893,9 @@ class TechnicalAnalysisEngine:
     
     async def _calculate_stochastic(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
         """Calculate Stochastic Oscillator"""
+        return self._stochastic_indicator(self._stochastic_values(df, config), config)
+    
+    def _stochastic_values(self, df: pd.DataFrame, config: Dict) -> Dict[str, float]:
         k_period = config["k_period"]
         d_period = config["d_period"]
         
@@ -445,8 +905,11 @@ class TechnicalAnalysisEngine:
         k_percent = 100 * ((df['close'] - low_min) / (high_max - low_min))
         d_percent = k_percent.rolling(window=d_period).mean()
         
-        current_k = k_percent.iloc[-1]
-        current_d = d_percent.iloc[-1]
+        return {"k": k_percent.iloc[-1], "d": d_percent.iloc[-1]}
+    
+    def _stochastic_indicator(self, values: Dict[str, float], config: Dict) -> TechnicalIndicator:
+        current_k = values["k"]
+        current_d = values["d"]
         
         # Generate signal
         if current_k > 80 and current_d > 80:
@@ -477,13 +940,19 @@ class TechnicalAnalysisEngine:
     
     async def _calculate_williams_r(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
         """Calculate Williams %R"""
+        return self._williams_r_indicator(self._williams_r_values(df, config), config)
+    
+    def _williams_r_values(self, df: pd.DataFrame, config: Dict) -> Dict[str, float]:
         period = config["period"]
         
         high_max = df['high'].rolling(window=period).max()
         low_min = df['low'].rolling(window=period).min()
         
         williams_r = -100 * ((high_max - df['close']) / (high_max - low_min))
-        current_wr = williams_r.iloc[-1]
+        return {"williams_r": williams_r.iloc[-1]}
+    
+    def _williams_r_indicator(self, values: Dict[str, float], config: Dict) -> TechnicalIndicator:
+        current_wr = values["williams_r"]
         
         # Generate signal
         if current_wr > -20:
@@ -508,6 +977,9 @@ class TechnicalAnalysisEngine:
     
     async def _calculate_adx(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
         """Calculate Average Directional Index (ADX)"""
+        return self._adx_indicator(self._adx_values(df, config), config)
+    
+    def _adx_values(self, df: pd.DataFrame, config: Dict) -> Dict[str, float]:
         period = config["period"]
         
         # Simplified ADX calculation
@@ -517,11 +989,7 @@ class TechnicalAnalysisEngine:
         plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
         minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
         
-        tr = pd.concat([
-            df['high'] - df['low'],
-            (df['high'] - df['close'].shift()).abs(),
-            (df['low'] - df['close'].shift()).abs()
-        ], axis=1).max(axis=1)
+        tr = self._true_range(df)
         
         atr = tr.rolling(window=period).mean()
         plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
@@ -530,9 +998,12 @@ class TechnicalAnalysisEngine:
         dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
         adx = dx.rolling(window=period).mean()
         
-        current_adx = adx.iloc[-1]
-        current_plus_di = plus_di.iloc[-1]
-        current_minus_di = minus_di.iloc[-1]
+        return {"adx": adx.iloc[-1], "plus_di": plus_di.iloc[-1], "minus_di": minus_di.iloc[-1]}
+    
+    def _adx_indicator(self, values: Dict[str, float], config: Dict) -> TechnicalIndicator:
+        current_adx = values["adx"]
+        current_plus_di = values["plus_di"]
+        current_minus_di = values["minus_di"]
         
         # Generate signal based on trend strength
         if current_adx > 25:
@@ -556,19 +1027,25 @@ class TechnicalAnalysisEngine:
             description=f"ADX shows {'strong' if current_adx > 25 else 'weak'} trend strength"
         )
     
-    async def _calculate_atr(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
-        """Calculate Average True Range (ATR)"""
-        period = config["period"]
-        
-        tr = pd.concat([
+    def _true_range(self, df: pd.DataFrame) -> pd.Series:
+        return pd.concat([
             df['high'] - df['low'],
             (df['high'] - df['close'].shift()).abs(),
             (df['low'] - df['close'].shift()).abs()
         ], axis=1).max(axis=1)
-        
-        atr = tr.rolling(window=period).mean()
-        current_atr = atr.iloc[-1]
-        current_price = df['close'].iloc[-1]
+    
+    async def _calculate_atr(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
+        """Calculate Average True Range (ATR)"""
+        return self._atr_indicator(self._atr_values(df, config), config)
+    
+    def _atr_values(self, df: pd.DataFrame, config: Dict) -> Dict[str, float]:
+        period = config["period"]
+        atr = self._true_range(df).rolling(window=period).mean()
+        return {"atr": atr.iloc[-1], "close": df['close'].iloc[-1]}
+    
+    def _atr_indicator(self, values: Dict[str, float], config: Dict) -> TechnicalIndicator:
+        current_atr = values["atr"]
+        current_price = values["close"]
         
         atr_percentage = (current_atr / current_price) * 100
         
@@ -595,15 +1072,26 @@ class TechnicalAnalysisEngine:
     
     async def _calculate_obv(self, df: pd.DataFrame) -> TechnicalIndicator:
         """Calculate On-Balance Volume (OBV)"""
+        return self._obv_indicator(self._obv_values(df))
+    
+    def _obv_values(self, df: pd.DataFrame) -> Dict[str, float]:
         obv = (np.sign(df['close'].diff()) * df['volume']).fillna(0).cumsum()
-        current_obv = obv.iloc[-1]
+        obv_ma = obv.rolling(window=20).mean()
+        return {
+            "obv": obv.iloc[-1],
+            "obv_ma": obv_ma.iloc[-1],
+            "close": df['close'].iloc[-1],
+            "close_ma": df['close'].rolling(window=20).mean().iloc[-1]
+        }
+    
+    def _obv_indicator(self, values: Dict[str, float]) -> TechnicalIndicator:
+        current_obv = values["obv"]
         
         # Calculate OBV trend
-        obv_ma = obv.rolling(window=20).mean()
-        obv_trend = "rising" if obv.iloc[-1] > obv_ma.iloc[-1] else "falling"
+        obv_trend = "rising" if current_obv > values["obv_ma"] else "falling"
         
         # Generate signal based on price-volume relationship
-        price_trend = "rising" if df['close'].iloc[-1] > df['close'].rolling(window=20).mean().iloc[-1] else "falling"
+        price_trend = "rising" if values["close"] > values["close_ma"] else "falling"
         
         if obv_trend == "rising" and price_trend == "rising":
             signal = "BUY"
@@ -630,11 +1118,16 @@ class TechnicalAnalysisEngine:
     
     async def _calculate_vwap(self, df: pd.DataFrame) -> TechnicalIndicator:
         """Calculate Volume Weighted Average Price (VWAP)"""
+        return self._vwap_indicator(self._vwap_values(df))
+    
+    def _vwap_values(self, df: pd.DataFrame) -> Dict[str, float]:
         typical_price = (df['high'] + df['low'] + df['close']) / 3
         vwap = (typical_price * df['volume']).cumsum() / df['volume'].cumsum()
-        
-        current_vwap = vwap.iloc[-1]
-        current_price = df['close'].iloc[-1]
+        return {"vwap": vwap.iloc[-1], "close": df['close'].iloc[-1]}
+    
+    def _vwap_indicator(self, values: Dict[str, float]) -> TechnicalIndicator:
+        current_vwap = values["vwap"]
+        current_price = values["close"]
         
         # Generate signal based on price relative to VWAP
         if current_price > current_vwap * 1.005:  # 0.5% above VWAP
@@ -659,6 +1152,9 @@ class TechnicalAnalysisEngine:
     
     async def _calculate_ichimoku(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
         """Calculate Ichimoku Cloud"""
+        return self._ichimoku_indicator(self._ichimoku_values(df, config), config)
+    
+    def _ichimoku_values(self, df: pd.DataFrame, config: Dict) -> Dict[str, float]:
         tenkan_period = config["tenkan"]
         kijun_period = config["kijun"]
         senkou_period = config["senkou"]
@@ -681,11 +1177,20 @@ class TechnicalAnalysisEngine:
         senkou_low = df['low'].rolling(window=senkou_period).min()
         senkou_b = ((senkou_high + senkou_low) / 2).shift(kijun_period)
         
-        current_price = df['close'].iloc[-1]
-        current_tenkan = tenkan_sen.iloc[-1]
-        current_kijun = kijun_sen.iloc[-1]
-        current_senkou_a = senkou_a.iloc[-1] if not pd.isna(senkou_a.iloc[-1]) else current_price
-        current_senkou_b = senkou_b.iloc[-1] if not pd.isna(senkou_b.iloc[-1]) else current_price
+        return {
+            "close": df['close'].iloc[-1],
+            "tenkan": tenkan_sen.iloc[-1],
+            "kijun": kijun_sen.iloc[-1],
+            "senkou_a": senkou_a.iloc[-1],
+            "senkou_b": senkou_b.iloc[-1]
+        }
+    
+    def _ichimoku_indicator(self, values: Dict[str, float], config: Dict) -> TechnicalIndicator:
+        current_price = values["close"]
+        current_tenkan = values["tenkan"]
+        current_kijun = values["kijun"]
+        current_senkou_a = values["senkou_a"] if not pd.isna(values["senkou_a"]) else current_price
+        current_senkou_b = values["senkou_b"] if not pd.isna(values["senkou_b"]) else current_price
         
         # Generate signal
         cloud_top = max(current_senkou_a, current_senkou_b)
@@ -1194,15 +1699,13 @@ async def get_analysis(analysis_id: str):
     return {"analysis": asdict(technical_engine.analyses[analysis_id])}
 
 @app.get("/indicators/{symbol}")
-async def get_indicators(symbol: str, indicators: str = ""):
+async def get_indicators(symbol: str, indicators: str = "", timeframe: str = "1h"):
     """Get specific technical indicators for a symbol"""
-    if symbol not in technical_engine.market_data:
-        raise HTTPException(status_code=404, detail=f"No data available for {symbol}")
-    
+    df = technical_engine.get_market_data(symbol, timeframe)
     requested_indicators = indicators.split(",") if indicators else []
     
-    df = technical_engine.market_data[symbol]
-    calculated_indicators = await technical_engine._calculate_indicators(df, requested_indicators)
+    state = technical_engine.get_indicator_state(symbol, timeframe)
+    calculated_indicators = await technical_engine._calculate_indicators(df, requested_indicators, state)
     
     return {
         "symbol": symbol,
@@ -1213,10 +1716,7 @@ async def get_indicators(symbol: str, indicators: str = ""):
 @app.get("/patterns/{symbol}")
 async def get_patterns(symbol: str, timeframe: str = "1h"):
     """Get pattern analysis for a symbol"""
-    if symbol not in technical_engine.market_data:
-        raise HTTPException(status_code=404, detail=f"No data available for {symbol}")
-    
-    df = technical_engine.market_data[symbol]
+    df = technical_engine.get_market_data(symbol, timeframe)
     patterns = await technical_engine._detect_patterns(df, symbol, timeframe)
     
     return {
@@ -1227,12 +1727,9 @@ async def get_patterns(symbol: str, timeframe: str = "1h"):
     }
 
 @app.get("/support-resistance/{symbol}")
-async def get_support_resistance(symbol: str):
+async def get_support_resistance(symbol: str, timeframe: str = "1h"):
     """Get support and resistance levels for a symbol"""
-    if symbol not in technical_engine.market_data:
-        raise HTTPException(status_code=404, detail=f"No data available for {symbol}")
-    
-    df = technical_engine.market_data[symbol]
+    df = technical_engine.get_market_data(symbol, timeframe)
     levels = await technical_engine._calculate_support_resistance(df)
     
     return {
@@ -1262,7 +1759,7 @@ async def get_metrics():
     """Get system metrics"""
     return {
         "analyses_performed": len(technical_engine.analyses),
-        "symbols_tracked": len(technical_engine.market_data),
+        "symbols_tracked": len({symbol for symbol, _ in technical_engine.market_data}),
         "indicators_available": len(technical_engine.indicator_configs),
         "active_websockets": len(technical_engine.active_websockets),
         "cpu_usage": np.random.uniform(15, 50),
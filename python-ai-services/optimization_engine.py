@@ -7,11 +7,14 @@ Advanced caching, optimization, and performance monitoring system
 import asyncio
 import json
 import logging
+import os
+import sqlite3
+import threading
 import time
 import psutil
 import hashlib
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Tuple
 from dataclasses import dataclass, asdict
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
@@ -20,7 +23,8 @@ from pydantic import BaseModel, Field
 import uuid
 from enum import Enum
 import redis
-from collections import defaultdict, deque
+import redis.asyncio as aioredis
+from collections import defaultdict, deque, OrderedDict
 import numpy as np
 
 # Configure logging
@@ -128,6 +132,395 @@ class OptimizationRequest(BaseModel):
     metrics: List[MetricType] = Field(default=[], description="Metrics to optimize")
     constraints: Dict[str, Any] = Field(default={}, description="Optimization constraints")
 
+# Cache tiers
+# L2/L3 payloads are JSON: values read back from a shared Redis or an on-disk file must never be
+# able to run code. Non-JSON types are stored as strings, like the size estimate always did.
+def _serialize(value: Any) -> bytes:
+    return json.dumps(value, default=str, separators=(",", ":")).encode()
+
+def _deserialize(payload: bytes) -> Any:
+    return json.loads(payload)
+
+class FrequencySketch:
+    """
+    Count-min sketch of recent key popularity for TinyLFU admission.
+    4-bit style counters saturate at 15 and are halved after every
+    `sample_size` increments so stale popularity decays.
+    """
+    _SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+    _HALVE = bytes(i >> 1 for i in range(256))
+
+    def __init__(self, capacity: int):
+        self._bits = max(4, (max(capacity, 1) * 4 - 1).bit_length())
+        self._rows = [bytearray(1 << self._bits) for _ in self._SEEDS]
+        self.sample_size = max(capacity, 1) * 10
+        self._additions = 0
+
+    def _indexes(self, key: str):
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        shift = 64 - self._bits
+        return [((h * seed) & 0xFFFFFFFFFFFFFFFF) >> shift for seed in self._SEEDS]
+
+    def increment(self, key: str):
+        for row, index in zip(self._rows, self._indexes(key)):
+            if row[index] < 15:
+                row[index] += 1
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._rows = [bytearray(row.translate(self._HALVE)) for row in self._rows]
+            self._additions //= 2
+
+    def frequency(self, key: str) -> int:
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+class LRUCacheLayer:
+    """
+    In-process L1 tier: an OrderedDict kept in recency order, so hits, inserts and
+    evictions are O(1). Bounded by entry count and by bytes. With admission="tinylfu"
+    a new key only displaces the LRU victim if the frequency sketch has seen it more often.
+    """
+    type = CacheType.MEMORY
+
+    def __init__(self, max_size: int, ttl: int, max_bytes: int, admission: str = "lru"):
+        if admission not in ("lru", "tinylfu"):
+            raise ValueError(f"Unknown admission policy: {admission}")
+        self.config = {'max_size': max_size, 'ttl': ttl, 'max_bytes': max_bytes, 'admission': admission}
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'rejections': 0}
+        self.data: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.bytes_used = 0
+        self._sketch = FrequencySketch(max_size) if admission == "tinylfu" else None
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def _remove(self, key: str):
+        entry = self.data.pop(key)
+        self.bytes_used -= entry.size_bytes
+
+    async def get(self, key: str) -> Optional[Any]:
+        if self._sketch is not None:
+            self._sketch.increment(key)
+        entry = self.data.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+
+        now = time.time()
+        if entry.ttl and now > entry.created_at + entry.ttl:
+            self._remove(key)
+            self.stats['misses'] += 1
+            return None
+
+        self.data.move_to_end(key)
+        entry.last_accessed = now
+        entry.access_count += 1
+        self.stats['hits'] += 1
+        return entry.value
+
+    async def set(self, key: str, value: Any, size_bytes: int, ttl: int = None) -> bool:
+        is_update = key in self.data
+        if is_update:
+            self._remove(key)
+        if size_bytes > self.config['max_bytes']:
+            self.stats['rejections'] += 1
+            return True
+
+        while self.data and (len(self.data) >= self.config['max_size'] or
+                             self.bytes_used + size_bytes > self.config['max_bytes']):
+            victim_key = next(iter(self.data))
+            if (self._sketch is not None and not is_update and
+                    self._sketch.frequency(key) <= self._sketch.frequency(victim_key)):
+                self.stats['rejections'] += 1
+                return True
+            self._remove(victim_key)
+            self.stats['evictions'] += 1
+
+        now = time.time()
+        self.data[key] = CacheEntry(
+            key=key,
+            value=value,
+            created_at=now,
+            last_accessed=now,
+            access_count=1,
+            ttl=ttl or self.config['ttl'],
+            size_bytes=size_bytes,
+            metadata={'layer': 'l1'}
+        )
+        self.bytes_used += size_bytes
+        return True
+
+class InMemoryRedis:
+    """Local stand-in for the subset of the async Redis API used by RedisCacheLayer"""
+
+    def __init__(self):
+        self._store: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._store.get(key)
+        if item is None:
+            return None
+        payload, expires_at = item
+        if expires_at is not None and time.time() >= expires_at:
+            del self._store[key]
+            return None
+        return payload
+
+    async def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        self._store[key] = (value, time.time() + ex if ex else None)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._store.pop(key, None) is not None for key in keys)
+
+    async def dbsize(self) -> int:
+        return len(self._store)
+
+    async def ping(self) -> bool:
+        return True
+
+class RedisCacheLayer:
+    """
+    Shared L2 tier over a Redis-protocol async client (redis.asyncio or InMemoryRedis).
+    Values are stored as JSON payloads with a TTL. A local recency-ordered view of the
+    keys this process wrote gives O(1) LRU eviction against the entry and byte budgets.
+    """
+    type = CacheType.REDIS
+
+    def __init__(self, client: Any, max_size: int, ttl: int, max_bytes: int, namespace: str = "opt_cache:"):
+        self.client = client
+        self.namespace = namespace
+        self.config = {'max_size': max_size, 'ttl': ttl, 'max_bytes': max_bytes}
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'errors': 0}
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self.bytes_used = 0
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def _forget(self, key: str):
+        self.bytes_used -= self._sizes.pop(key, 0)
+
+    async def get_payload(self, key: str) -> Optional[bytes]:
+        try:
+            payload = await self.client.get(self.namespace + key)
+        except Exception as e:
+            logger.warning(f"L2 cache get failed: {e}")
+            self.stats['errors'] += 1
+            payload = None
+
+        if payload is None:
+            self._forget(key)
+            self.stats['misses'] += 1
+            return None
+        if key in self._sizes:
+            self._sizes.move_to_end(key)
+        self.stats['hits'] += 1
+        return payload
+
+    async def set_payload(self, key: str, payload: bytes, ttl: int = None) -> bool:
+        self._forget(key)
+        try:
+            victims = []
+            count, bytes_used = len(self._sizes), self.bytes_used
+            for victim_key, victim_size in self._sizes.items():
+                if count < self.config['max_size'] and bytes_used + len(payload) <= self.config['max_bytes']:
+                    break
+                victims.append(victim_key)
+                count -= 1
+                bytes_used -= victim_size
+            if victims:
+                # One round trip for every victim
+                await self.client.delete(*(self.namespace + victim_key for victim_key in victims))
+                for victim_key in victims:
+                    self._forget(victim_key)
+                self.stats['evictions'] += len(victims)
+            await self.client.set(self.namespace + key, payload, ex=ttl or self.config['ttl'])
+        except Exception as e:
+            logger.warning(f"L2 cache set failed: {e}")
+            self.stats['errors'] += 1
+            return False
+
+        self._sizes[key] = len(payload)
+        self.bytes_used += len(payload)
+        return True
+
+class SQLiteCacheLayer:
+    """
+    On-disk L3 tier backed by sqlite. last_accessed is indexed so LRU eviction steps an
+    ordered index cursor only as far as the victims it needs; entry and byte counts are
+    tracked incrementally. Blocking sqlite calls run in a worker thread, serialized by a lock.
+    """
+    type = CacheType.DISK
+
+    def __init__(self, path: str, max_size: int, ttl: int, max_bytes: int):
+        self.path = path
+        self.config = {'max_size': max_size, 'ttl': ttl, 'max_bytes': max_bytes}
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'errors': 0}
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", mode=0o700, exist_ok=True)  # Private to the service user
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, payload BLOB NOT NULL, size_bytes INTEGER NOT NULL, "
+            "expires_at REAL, last_accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_accessed ON cache_entries(last_accessed)")
+        self._count, self.bytes_used = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM cache_entries"
+        ).fetchone()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _delete(self, key: str, size_bytes: int):
+        self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        self._count -= 1
+        self.bytes_used -= size_bytes
+
+    async def get_payload(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._get_payload, key)
+
+    async def set_payload(self, key: str, payload: bytes, ttl: int = None) -> bool:
+        return await asyncio.to_thread(self._set_payload, key, payload, ttl)
+
+    def _get_payload(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT payload, size_bytes, expires_at FROM cache_entries WHERE key = ?", (key,)
+                ).fetchone()
+                now = time.time()
+                if row is not None and row[2] is not None and now > row[2]:
+                    self._delete(key, row[1])
+                    row = None
+                if row is None:
+                    self.stats['misses'] += 1
+                    return None
+                self._conn.execute("UPDATE cache_entries SET last_accessed = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as e:
+                logger.warning(f"L3 cache get failed: {e}")
+                self.stats['errors'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self.stats['hits'] += 1
+            return row[0]
+
+    def _set_payload(self, key: str, payload: bytes, ttl: int = None) -> bool:
+        with self._lock:
+            count, bytes_used = self._count, self.bytes_used
+            try:
+                self._conn.execute("BEGIN")
+                existing = self._conn.execute("SELECT size_bytes FROM cache_entries WHERE key = ?", (key,)).fetchone()
+                if existing is not None:
+                    self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                    count -= 1
+                    bytes_used -= existing[0]
+
+                victims = []
+                if count >= self.config['max_size'] or bytes_used + len(payload) > self.config['max_bytes']:
+                    # The cursor is stepped lazily, so only the victims' index entries are read
+                    cursor = self._conn.execute("SELECT key, size_bytes FROM cache_entries ORDER BY last_accessed")
+                    for victim_key, victim_size in cursor:
+                        if count < self.config['max_size'] and bytes_used + len(payload) <= self.config['max_bytes']:
+                            break
+                        victims.append((victim_key,))
+                        count -= 1
+                        bytes_used -= victim_size
+                    cursor.close()
+                    self._conn.executemany("DELETE FROM cache_entries WHERE key = ?", victims)
+
+                now = time.time()
+                self._conn.execute(
+                    "INSERT INTO cache_entries (key, payload, size_bytes, expires_at, last_accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, len(payload), now + (ttl or self.config['ttl']), now)
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                logger.warning(f"L3 cache set failed: {e}")
+                self.stats['errors'] += 1
+                return False
+
+            self._count = count + 1
+            self.bytes_used = bytes_used + len(payload)
+            self.stats['evictions'] += len(victims)
+            return True
+
+class TieredCache:
+    """L1 memory -> L2 Redis -> L3 disk; lower-tier hits are promoted, sets write through"""
+
+    def __init__(self, l1: LRUCacheLayer, l2: RedisCacheLayer, l3: SQLiteCacheLayer):
+        self.layers = {'l1': l1, 'l2': l2, 'l3': l3}
+
+    @classmethod
+    def from_environment(cls, admission: str = "lru") -> "TieredCache":
+        redis_url = os.getenv("REDIS_URL")
+        client = aioredis.from_url(redis_url) if redis_url else InMemoryRedis()
+        return cls(
+            LRUCacheLayer(max_size=1000, ttl=300, max_bytes=64 * 1024 * 1024, admission=admission),  # 5 minutes
+            RedisCacheLayer(client, max_size=10000, ttl=3600, max_bytes=256 * 1024 * 1024),  # 1 hour
+            SQLiteCacheLayer(
+                os.getenv("OPTIMIZATION_CACHE_PATH", "data/optimization_engine/cache.sqlite"),
+                max_size=100000, ttl=86400, max_bytes=1024 * 1024 * 1024  # 24 hours
+            )
+        )
+
+    async def get(self, key: str, layer: str = None) -> Optional[Any]:
+        l1, l2, l3 = self.layers['l1'], self.layers['l2'], self.layers['l3']
+        if layer == 'l1':
+            return await l1.get(key)
+        if layer:
+            payload = await self.layers[layer].get_payload(key)
+            return None if payload is None else _deserialize(payload)
+
+        # Try L1 first (fastest)
+        value = await l1.get(key)
+        if value is not None:
+            return value
+
+        # Try L2 (Redis), then L3 (disk), promoting hits upward
+        payload = await l2.get_payload(key)
+        if payload is None:
+            payload = await l3.get_payload(key)
+            if payload is None:
+                return None
+            await l2.set_payload(key, payload)
+
+        value = _deserialize(payload)
+        await l1.set(key, value, len(payload))
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int = None, layer: str = None) -> bool:
+        # Serialize once: the payload feeds L2/L3 and its length sizes the L1 entry
+        payload = _serialize(value)
+        if layer == 'l1':
+            return await self.layers['l1'].set(key, value, len(payload), ttl)
+        if layer:
+            return await self.layers[layer].set_payload(key, payload, ttl)
+
+        # Write-through to every layer
+        success = await self.layers['l1'].set(key, value, len(payload), ttl)
+        success &= await self.layers['l2'].set_payload(key, payload, ttl)
+        success &= await self.layers['l3'].set_payload(key, payload, ttl)
+        return success
+
+    def layer_stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        for name, layer in self.layers.items():
+            layer_stats = dict(layer.stats)
+            layer_stats['entries'] = len(layer)
+            layer_stats['bytes_used'] = layer.bytes_used
+            layer_stats['config'] = layer.config
+            total_ops = layer_stats['hits'] + layer_stats['misses']
+            layer_stats['hit_rate'] = layer_stats['hits'] / total_ops if total_ops > 0 else 0
+            stats[name] = layer_stats
+        return stats
+
 class PerformanceOptimizationEngine:
     def __init__(self):
         self.cache_layers = {}
@@ -154,29 +547,10 @@ class PerformanceOptimizationEngine:
     
     def _initialize_cache_layers(self):
         """Initialize multi-layer caching system"""
-        # L1 Cache: In-memory for hot data
-        self.cache_layers['l1'] = {
-            'type': CacheType.MEMORY,
-            'data': {},
-            'stats': {'hits': 0, 'misses': 0, 'evictions': 0},
-            'config': {'max_size': 1000, 'ttl': 300}  # 5 minutes
-        }
-        
-        # L2 Cache: Redis for shared cache
-        self.cache_layers['l2'] = {
-            'type': CacheType.REDIS,
-            'data': {},  # Mock Redis interface
-            'stats': {'hits': 0, 'misses': 0, 'evictions': 0},
-            'config': {'max_size': 10000, 'ttl': 3600}  # 1 hour
-        }
-        
-        # L3 Cache: Disk for large data
-        self.cache_layers['l3'] = {
-            'type': CacheType.DISK,
-            'data': {},  # Mock disk cache
-            'stats': {'hits': 0, 'misses': 0, 'evictions': 0},
-            'config': {'max_size': 100000, 'ttl': 86400}  # 24 hours
-        }
+        # L1: in-memory LRU for hot data, L2: Redis (or local stand-in) for shared cache,
+        # L3: sqlite on disk for large data
+        self.cache = TieredCache.from_environment()
+        self.cache_layers = self.cache.layers
         
         logger.info("Multi-layer cache system initialized")
     
@@ -194,121 +568,11 @@ class PerformanceOptimizationEngine:
     
     async def get_from_cache(self, key: str, layer: str = None) -> Optional[Any]:
         """Get value from cache with automatic layer traversal"""
-        cache_key = self._generate_cache_key(key)
-        
-        if layer:
-            return await self._get_from_specific_layer(cache_key, layer)
-        
-        # Try L1 first (fastest)
-        value = await self._get_from_specific_layer(cache_key, 'l1')
-        if value is not None:
-            return value
-        
-        # Try L2 (Redis)
-        value = await self._get_from_specific_layer(cache_key, 'l2')
-        if value is not None:
-            # Promote to L1
-            await self._set_to_specific_layer(cache_key, value, 'l1')
-            return value
-        
-        # Try L3 (Disk)
-        value = await self._get_from_specific_layer(cache_key, 'l3')
-        if value is not None:
-            # Promote to L2 and L1
-            await self._set_to_specific_layer(cache_key, value, 'l2')
-            await self._set_to_specific_layer(cache_key, value, 'l1')
-            return value
-        
-        return None
+        return await self.cache.get(self._generate_cache_key(key), layer)
     
     async def set_to_cache(self, key: str, value: Any, ttl: int = None, layer: str = None) -> bool:
         """Set value to cache with automatic layer distribution"""
-        cache_key = self._generate_cache_key(key)
-        
-        if layer:
-            return await self._set_to_specific_layer(cache_key, value, layer, ttl)
-        
-        # Set to all layers (write-through strategy)
-        success = True
-        success &= await self._set_to_specific_layer(cache_key, value, 'l1', ttl or 300)
-        success &= await self._set_to_specific_layer(cache_key, value, 'l2', ttl or 3600)
-        success &= await self._set_to_specific_layer(cache_key, value, 'l3', ttl or 86400)
-        
-        return success
-    
-    async def _get_from_specific_layer(self, key: str, layer: str) -> Optional[Any]:
-        """Get value from specific cache layer"""
-        cache_layer = self.cache_layers[layer]
-        
-        if key in cache_layer['data']:
-            entry = cache_layer['data'][key]
-            
-            # Check TTL
-            if entry.ttl and time.time() > entry.created_at + entry.ttl:
-                del cache_layer['data'][key]
-                cache_layer['stats']['misses'] += 1
-                return None
-            
-            # Update access statistics
-            entry.last_accessed = time.time()
-            entry.access_count += 1
-            cache_layer['stats']['hits'] += 1
-            
-            return entry.value
-        
-        cache_layer['stats']['misses'] += 1
-        return None
-    
-    async def _set_to_specific_layer(self, key: str, value: Any, layer: str, ttl: int = None) -> bool:
-        """Set value to specific cache layer"""
-        cache_layer = self.cache_layers[layer]
-        config = cache_layer['config']
-        
-        # Check size limits
-        if len(cache_layer['data']) >= config['max_size']:
-            await self._evict_cache_entries(layer)
-        
-        # Calculate entry size (simplified)
-        try:
-            size_bytes = len(json.dumps(value, default=str))
-        except:
-            size_bytes = 1024  # Default size
-        
-        # Create cache entry
-        entry = CacheEntry(
-            key=key,
-            value=value,
-            created_at=time.time(),
-            last_accessed=time.time(),
-            access_count=1,
-            ttl=ttl or config['ttl'],
-            size_bytes=size_bytes,
-            metadata={'layer': layer}
-        )
-        
-        cache_layer['data'][key] = entry
-        return True
-    
-    async def _evict_cache_entries(self, layer: str):
-        """Evict cache entries using LRU policy"""
-        cache_layer = self.cache_layers[layer]
-        
-        if not cache_layer['data']:
-            return
-        
-        # Sort by last access time (LRU)
-        sorted_entries = sorted(
-            cache_layer['data'].items(),
-            key=lambda x: x[1].last_accessed
-        )
-        
-        # Remove 10% of entries
-        evict_count = max(1, len(sorted_entries) // 10)
-        
-        for i in range(evict_count):
-            key, _ = sorted_entries[i]
-            del cache_layer['data'][key]
-            cache_layer['stats']['evictions'] += 1
+        return await self.cache.set(self._generate_cache_key(key), value, ttl, layer)
     
     def _generate_cache_key(self, key: str) -> str:
         """Generate consistent cache key"""
@@ -367,8 +631,8 @@ class PerformanceOptimizationEngine:
             metrics['p99_latency'] = np.percentile(list(self.request_latencies), 99)
         
         # Calculate cache hit rates
-        total_hits = sum(layer['stats']['hits'] for layer in self.cache_layers.values())
-        total_requests = total_hits + sum(layer['stats']['misses'] for layer in self.cache_layers.values())
+        total_hits = sum(layer.stats['hits'] for layer in self.cache_layers.values())
+        total_requests = total_hits + sum(layer.stats['misses'] for layer in self.cache_layers.values())
         
         if total_requests > 0:
             metrics['cache_hit_rate'] = total_hits / total_requests
@@ -479,7 +743,7 @@ class PerformanceOptimizationEngine:
     def _calculate_cache_efficiency(self, layer: str) -> float:
         """Calculate cache layer efficiency"""
         cache_layer = self.cache_layers[layer]
-        stats = cache_layer['stats']
+        stats = cache_layer.stats
         
         total_operations = stats['hits'] + stats['misses']
         if total_operations == 0:
@@ -720,7 +984,7 @@ class PerformanceOptimizationEngine:
                 
                 # Calculate and record cache hit rates
                 for layer_name, layer in self.cache_layers.items():
-                    stats = layer['stats']
+                    stats = layer.stats
                     total_ops = stats['hits'] + stats['misses']
                     
                     if total_ops > 0:
@@ -773,8 +1037,8 @@ class PerformanceOptimizationEngine:
             if action == "increase_cache_size":
                 # Increase cache sizes
                 multiplier = recommendation.parameters.get("l1_size_multiplier", 1.5)
-                self.cache_layers['l1']['config']['max_size'] = int(
-                    self.cache_layers['l1']['config']['max_size'] * multiplier
+                self.cache_layers['l1'].config['max_size'] = int(
+                    self.cache_layers['l1'].config['max_size'] * multiplier
                 )
                 
                 logger.info(f"Applied cache size optimization: L1 cache increased by {multiplier}x")
@@ -782,7 +1046,7 @@ class PerformanceOptimizationEngine:
             elif action == "optimize_memory":
                 # Enable compression for cache layers
                 for layer in self.cache_layers.values():
-                    layer['config']['compression'] = True
+                    layer.config['compression'] = True
                 
                 logger.info("Applied memory optimization: enabled compression")
             
@@ -819,18 +1083,7 @@ async def health_check():
 @app.get("/cache/stats")
 async def get_cache_stats():
     """Get cache statistics"""
-    stats = {}
-    
-    for layer_name, layer in optimization_engine.cache_layers.items():
-        layer_stats = layer['stats'].copy()
-        layer_stats['entries'] = len(layer['data'])
-        layer_stats['config'] = layer['config']
-        
-        # Calculate hit rate
-        total_ops = layer_stats['hits'] + layer_stats['misses']
-        layer_stats['hit_rate'] = layer_stats['hits'] / total_ops if total_ops > 0 else 0
-        
-        stats[layer_name] = layer_stats
+    stats = optimization_engine.cache.layer_stats()
     
     return {"cache_stats": stats}
 
@@ -21,14 +21,14 @@ class AlphaVantageProvider(BaseMarketDataProvider):
     """Alpha Vantage provider for premium market data"""
     
     def __init__(self, api_key: str, config: Optional[Dict[str, Any]] = None):
-        super().__init__(api_key=api_key, config=config or {})
+        config = dict(config or {})
+        # Configure rate limits (adjust based on your plan)
+        config.setdefault("requests_per_minute", 75)  # Premium plan
+        config.setdefault("requests_per_day", 75000)   # Premium plan
+        super().__init__(api_key=api_key, config=config)
         self.base_url = "https://www.alphavantage.co/query"
         self.session = None
         
-        # Configure rate limits (adjust based on your plan)
-        self.config.setdefault("requests_per_minute", 75)  # Premium plan
-        self.config.setdefault("requests_per_day", 75000)   # Premium plan
-        
     def get_provider_name(self) -> MarketDataProvider:
         return MarketDataProvider.ALPHA_VANTAGE
     
@@ -4,9 +4,11 @@ Abstract base class for all market data providers with standardized interface
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Union
-from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Union, Tuple
+from datetime import datetime
 import asyncio
+import random
+import time
 from loguru import logger
 
 from python_ai_services.models.enhanced_market_data_models import (
@@ -14,6 +16,7 @@ from python_ai_services.models.enhanced_market_data_models import (
     TechnicalIndicators, MarketOverview, ProviderStatus,
     MarketDataProvider, AssetType, TimeFrame
 )
+from python_ai_services.services.single_flight import SingleFlight
 
 class MarketDataProviderError(Exception):
     """Base exception for market data provider errors"""
@@ -27,12 +30,95 @@ class APIError(MarketDataProviderError):
     """Raised when API returns an error"""
     pass
 
+ROUTING_MODES = ("priority", "adaptive")
+
+class TokenBucket:
+    """
+    Async token bucket: holds up to `capacity` tokens, refilled continuously at `refill_rate` per second.
+    acquire() queues callers in FIFO order until tokens are available instead of failing.
+    """
+    
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = float(capacity)
+        self.refill_rate = float(refill_rate)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.waiting = 0
+        self._queue = asyncio.Lock()  # Lock waiters are woken in arrival order
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+    
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+    
+    def wait_time(self, tokens: float = 1) -> float:
+        """Seconds until `tokens` are available, ignoring queued waiters"""
+        self._refill()
+        return max(tokens - self.tokens, 0.0) / self.refill_rate if self.refill_rate > 0 else float("inf")
+    
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take tokens without waiting; never jumps ahead of queued waiters"""
+        self._refill()
+        if self.waiting or self.tokens < tokens:
+            return False
+        self.tokens -= tokens
+        return True
+    
+    def refund(self, tokens: float = 1):
+        """Return tokens that were acquired but not spent"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + tokens)
+    
+    def drain(self):
+        """Empty the bucket, e.g. after the upstream API answered 429"""
+        self._refill()
+        self.tokens = 0.0
+    
+    async def acquire(self, tokens: float = 1, timeout: Optional[float] = None):
+        """Wait for tokens; raises RateLimitError if they will not be available within `timeout` seconds"""
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket of capacity {self.capacity}")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        self.waiting += 1
+        try:
+            # The wait behind earlier callers counts against the deadline too
+            if deadline is None:
+                await self._queue.acquire()
+            else:
+                try:
+                    await asyncio.wait_for(self._queue.acquire(), max(deadline - time.monotonic(), 0.0))
+                except asyncio.TimeoutError:
+                    raise RateLimitError(f"Rate limit budget not available within {timeout}s")
+            try:
+                while True:
+                    self._refill()
+                    if self.tokens >= tokens:
+                        self.tokens -= tokens
+                        return
+                    delay = (tokens - self.tokens) / self.refill_rate if self.refill_rate > 0 else float("inf")
+                    if deadline is not None and time.monotonic() + delay > deadline:
+                        raise RateLimitError(f"Rate limit budget not available within {timeout}s")
+                    await asyncio.sleep(delay)
+            finally:
+                self._queue.release()
+        finally:
+            self.waiting -= 1
+
 class BaseMarketDataProvider(ABC):
     """
     Abstract base class for all market data providers
     Defines the standard interface that all providers must implement
     """
     
+    # Whether get_quotes() fetches several symbols in one upstream request
+    supports_batch_quotes: bool = False
+    max_batch_size: int = 100
+    
     def __init__(self, api_key: Optional[str] = None, config: Optional[Dict[str, Any]] = None):
         self.api_key = api_key
         self.config = config or {}
@@ -45,6 +131,12 @@ class BaseMarketDataProvider(ABC):
             error_count=0
         )
         
+        # Observed health, smoothed with an exponentially weighted moving average
+        self.health_ewma_alpha: float = self.config.get("health_ewma_alpha", 0.2)
+        self.error_penalty_ms: float = self.config.get("error_penalty_ms", 1000.0)
+        self.latency_ewma_ms: Optional[float] = None
+        self.error_ewma: float = 0.0
+        
     @abstractmethod
     def get_provider_name(self) -> MarketDataProvider:
         """Return the provider name enum"""
@@ -121,71 +213,75 @@ class BaseMarketDataProvider(ABC):
     
     # Rate limiting and error handling
     
-    def _setup_rate_limiter(self) -> Dict[str, Any]:
-        """Setup rate limiting configuration"""
+    def _setup_rate_limiter(self) -> Dict[str, TokenBucket]:
+        """Setup per-minute (burstable) and per-day token buckets"""
+        requests_per_minute = self.config.get("requests_per_minute", 60)
+        requests_per_day = self.config.get("requests_per_day", 1000)
         return {
-            "requests_per_minute": self.config.get("requests_per_minute", 60),
-            "requests_per_day": self.config.get("requests_per_day", 1000),
-            "last_request_time": datetime.utcnow(),
-            "request_count_minute": 0,
-            "request_count_day": 0,
-            "daily_reset_time": datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+            "minute": TokenBucket(self.config.get("burst_size", requests_per_minute), requests_per_minute / 60),
+            "day": TokenBucket(requests_per_day, requests_per_day / 86400)
         }
     
-    async def _check_rate_limit(self) -> bool:
-        """Check if request is within rate limits"""
-        now = datetime.utcnow()
-        
-        # Reset daily counter if needed
-        if now >= self.rate_limiter["daily_reset_time"] + timedelta(days=1):
-            self.rate_limiter["request_count_day"] = 0
-            self.rate_limiter["daily_reset_time"] = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # Reset minute counter if needed
-        if now >= self.rate_limiter["last_request_time"] + timedelta(minutes=1):
-            self.rate_limiter["request_count_minute"] = 0
-        
-        # Check limits
-        if self.rate_limiter["request_count_minute"] >= self.rate_limiter["requests_per_minute"]:
-            logger.warning(f"{self.get_provider_name()}: Rate limit exceeded (per minute)")
-            return False
-        
-        if self.rate_limiter["request_count_day"] >= self.rate_limiter["requests_per_day"]:
-            logger.warning(f"{self.get_provider_name()}: Rate limit exceeded (per day)")
-            return False
-        
-        return True
+    async def _acquire_rate_limit(self):
+        """Wait for a request slot in both buckets; RateLimitError if it is further away than rate_limit_max_wait_seconds"""
+        timeout = self.config.get("rate_limit_max_wait_seconds", 30.0)
+        deadline = time.monotonic() + timeout
+        minute, day = self.rate_limiter["minute"], self.rate_limiter["day"]
+        await minute.acquire(timeout=timeout)
+        try:
+            await day.acquire(timeout=max(deadline - time.monotonic(), 0.0))
+        except BaseException:
+            minute.refund()  # The request is not sent, so its minute slot is not spent
+            raise
+    
+    def budget_fraction(self) -> float:
+        """Fraction of the tighter of the two rate limit budgets still available"""
+        return min(bucket.available() / bucket.capacity for bucket in self.rate_limiter.values())
     
     async def _record_request(self, success: bool = True):
-        """Record a request for rate limiting and status tracking"""
-        now = datetime.utcnow()
-        self.rate_limiter["last_request_time"] = now
-        self.rate_limiter["request_count_minute"] += 1
-        self.rate_limiter["request_count_day"] += 1
-        
+        """Record a request for status tracking"""
         self.status.request_count += 1
-        self.status.last_update = now
+        self.status.last_update = datetime.utcnow()
+        self.status.rate_limit_remaining = int(self.rate_limiter["minute"].available())
         
         if not success:
             self.status.error_count += 1
     
+    def record_outcome(self, latency_seconds: float, success: bool):
+        """Fold one call's latency and success into the health EWMAs used for routing"""
+        alpha = self.health_ewma_alpha
+        latency_ms = latency_seconds * 1000
+        self.latency_ewma_ms = latency_ms if self.latency_ewma_ms is None else (1 - alpha) * self.latency_ewma_ms + alpha * latency_ms
+        self.error_ewma = (1 - alpha) * self.error_ewma + alpha * (0.0 if success else 1.0)
+        self.status.latency_ms = round(self.latency_ewma_ms, 2)
+    
+    def routing_score(self) -> float:
+        """
+        Lower is better: expected latency plus the error rate times a failover penalty, divided by
+        the remaining budget, plus the wait for the next token. The penalty is additive so a provider
+        that fails fast doesn't look cheap. Unmeasured providers score 0 so they get tried.
+        """
+        if self.latency_ewma_ms is None:
+            return 0.0
+        expected_ms = self.latency_ewma_ms + self.error_ewma * self.error_penalty_ms
+        wait_ms = max(bucket.wait_time() for bucket in self.rate_limiter.values()) * 1000
+        return expected_ms / max(self.budget_fraction(), 0.05) + wait_ms
+    
     async def _make_request_with_retry(
         self, 
         request_func, 
         max_retries: int = 3, 
         backoff_factor: float = 1.0
     ) -> Any:
-        """Make request with automatic retry and rate limiting"""
-        
-        if not await self._check_rate_limit():
-            raise RateLimitError(f"Rate limit exceeded for {self.get_provider_name()}")
-        
+        """Make request with rate limiting (queued) and jittered retry"""
         last_exception = None
         
         for attempt in range(max_retries):
+            await self._acquire_rate_limit()
             try:
+                result = await request_func()
                 await self._record_request(success=True)
-                return await request_func()
+                return result
                 
             except Exception as e:
                 last_exception = e
@@ -193,10 +289,13 @@ class BaseMarketDataProvider(ABC):
                 
                 logger.warning(f"{self.get_provider_name()} request failed (attempt {attempt + 1}): {e}")
                 
-                if attempt < max_retries - 1:
-                    wait_time = backoff_factor * (2 ** attempt)
-                    await asyncio.sleep(wait_time)
-                else:
+                if isinstance(e, RateLimitError):
+                    # The upstream budget is spent: make every queued caller wait for a refill, not just this one
+                    self.rate_limiter["minute"].drain()
+                elif attempt < max_retries - 1:
+                    await asyncio.sleep(random.uniform(0, backoff_factor * (2 ** attempt)))
+                
+                if attempt == max_retries - 1:
                     logger.error(f"{self.get_provider_name()} request failed after {max_retries} attempts")
         
         raise last_exception
@@ -252,12 +351,49 @@ class ProviderManager:
     """
     Manager for multiple market data providers
     Handles provider selection, failover, and load balancing
+    
+    In "priority" routing mode providers are tried primary first, then in
+    registration order. In "adaptive" mode they are tried in order of
+    routing_score(): observed latency/error EWMA and remaining rate-limit budget.
+
+    Quote requests go through three layers before reaching a provider:
+    a short TTL cache, single-flight (concurrent callers for the same symbol
+    share one in-flight request) and a micro-batching window that merges the
+    symbols requested within batch_window_seconds into one get_quotes() call
+    on providers that support multi-symbol requests.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        quote_ttl_seconds: float = 1.0,
+        batch_window_seconds: float = 0.01,
+        max_cached_quotes: int = 10000,
+        routing_mode: str = "priority"
+    ):
+        if routing_mode not in ROUTING_MODES:
+            raise ValueError(f"routing_mode must be one of {ROUTING_MODES}, got {routing_mode!r}")
+        self.routing_mode = routing_mode
         self.providers: Dict[MarketDataProvider, BaseMarketDataProvider] = {}
         self.primary_provider: Optional[MarketDataProvider] = None
         self.fallback_order: List[MarketDataProvider] = []
+        
+        self.quote_ttl_seconds = quote_ttl_seconds
+        self.batch_window_seconds = batch_window_seconds
+        self.max_cached_quotes = max_cached_quotes
+        self._quote_cache: Dict[str, Tuple[float, PriceData]] = {}
+        self._inflight_quotes: Dict[str, asyncio.Future] = {}
+        self._inflight_calls = SingleFlight()
+        self._pending_symbols: List[str] = []
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: set = set()
+        self.request_stats: Dict[str, int] = {
+            "quote_requests": 0,
+            "cache_hits": 0,
+            "coalesced": 0,          # Joined an in-flight request for the same key
+            "batched_symbols": 0,    # Symbols fetched as part of a multi-symbol request
+            "upstream_calls": 0,     # Provider method invocations (including failover attempts)
+            "upstream_symbols": 0
+        }
     
     def register_provider(self, provider: BaseMarketDataProvider, is_primary: bool = False):
         """Register a market data provider"""
@@ -273,12 +409,39 @@ class ProviderManager:
         logger.info(f"Registered provider: {provider_name}")
     
     async def get_quote(self, symbol: str) -> PriceData:
-        """Get quote with automatic failover"""
-        return await self._execute_with_failover("get_quote", symbol)
+        """Get quote with caching, request coalescing and automatic failover"""
+        self.request_stats["quote_requests"] += 1
+        
+        cached = self._quote_cache.get(symbol)
+        if cached and cached[0] > time.monotonic():
+            self.request_stats["cache_hits"] += 1
+            return cached[1]
+        
+        future = self._inflight_quotes.get(symbol)
+        if future is not None:
+            self.request_stats["coalesced"] += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._inflight_quotes[symbol] = future
+            self._pending_symbols.append(symbol)
+            if self._batch_timer is None:
+                self._batch_timer = loop.call_later(self.batch_window_seconds, self._start_quote_batch)
+        # Shield so one cancelled caller does not cancel the request for everyone sharing it
+        return await asyncio.shield(future)
     
     async def get_quotes(self, symbols: List[str]) -> List[PriceData]:
-        """Get multiple quotes with automatic failover"""
-        return await self._execute_with_failover("get_quotes", symbols)
+        """Get multiple quotes; symbols join the same batching window as concurrent get_quote calls"""
+        unique_symbols = list(dict.fromkeys(symbols))
+        results = await asyncio.gather(*(self.get_quote(symbol) for symbol in unique_symbols), return_exceptions=True)
+        
+        quotes = [result for result in results if not isinstance(result, BaseException)]
+        if unique_symbols and not quotes:
+            raise MarketDataProviderError(f"All providers failed for get_quotes: {results[-1]}")
+        for symbol, result in zip(unique_symbols, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Failed to get quote for {symbol}: {result}")
+        return quotes
     
     async def get_historical_data(
         self, 
@@ -288,21 +451,116 @@ class ProviderManager:
         end_time: Optional[datetime] = None,
         limit: Optional[int] = None
     ) -> List[OHLCV]:
-        """Get historical data with automatic failover"""
-        return await self._execute_with_failover(
-            "get_historical_data", 
-            symbol, 
-            timeframe, 
-            start_time, 
-            end_time, 
-            limit
+        """Get historical data with automatic failover; identical concurrent requests share one fetch"""
+        return await self._single_flight(
+            ("get_historical_data", symbol, timeframe, start_time, end_time, limit),
+            lambda: self._execute_with_failover("get_historical_data", symbol, timeframe, start_time, end_time, limit)
         )
     
-    async def _execute_with_failover(self, method_name: str, *args, **kwargs) -> Any:
+    def get_request_stats(self) -> Dict[str, Any]:
+        """Counters for deduplicated vs upstream requests"""
+        stats = dict(self.request_stats)
+        served_locally = stats["cache_hits"] + stats["coalesced"]
+        stats["deduplicated"] = served_locally
+        stats["dedup_ratio"] = round(served_locally / stats["quote_requests"], 4) if stats["quote_requests"] else 0.0
+        stats["cached_quotes"] = len(self._quote_cache)
+        stats["inflight_quotes"] = len(self._inflight_quotes)
+        return stats
+    
+    async def _single_flight(self, key: Tuple, fetch) -> Any:
+        """Run fetch() once for all concurrent callers with the same key"""
+        if key in self._inflight_calls:
+            self.request_stats["coalesced"] += 1
+        result, _ = await self._inflight_calls.run(key, fetch)
+        return result
+    
+    def _start_quote_batch(self):
+        task = asyncio.ensure_future(self._flush_quote_batch())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+    
+    async def _flush_quote_batch(self):
+        """Fetch every symbol queued during the batching window"""
+        symbols, self._pending_symbols = self._pending_symbols, []
+        self._batch_timer = None
+        if not symbols:
+            return
+        
+        provider = self._first_active_provider()
+        if provider is not None and provider.supports_batch_quotes and len(symbols) > 1:
+            chunks = [symbols[i:i + provider.max_batch_size] for i in range(0, len(symbols), provider.max_batch_size)]
+            await asyncio.gather(*(self._fetch_quote_chunk(chunk) for chunk in chunks))
+        else:
+            await asyncio.gather(*(self._fetch_single_quote(symbol) for symbol in symbols))
+    
+    async def _fetch_quote_chunk(self, symbols: List[str]):
+        try:
+            quotes = await self._execute_with_failover("get_quotes", symbols, symbol_count=len(symbols))
+        except Exception as e:
+            logger.warning(f"Batched quote request for {len(symbols)} symbols failed: {e}")
+            quotes = []
+        
+        quotes_by_symbol = {}
+        for quote in quotes:
+            quotes_by_symbol[quote.symbol] = quote
+            quotes_by_symbol.setdefault(self._symbol_key(quote.symbol), quote)
+        
+        missing = []
+        for symbol in symbols:
+            quote = quotes_by_symbol.get(symbol) or quotes_by_symbol.get(self._symbol_key(symbol))
+            if quote is None:
+                missing.append(symbol)
+            else:
+                self.request_stats["batched_symbols"] += 1
+                self._resolve_quote(symbol, quote)
+        
+        # Symbols the batch did not return fall back to single requests (and failover)
+        if missing:
+            await asyncio.gather(*(self._fetch_single_quote(symbol) for symbol in missing))
+    
+    async def _fetch_single_quote(self, symbol: str):
+        try:
+            self._resolve_quote(symbol, await self._execute_with_failover("get_quote", symbol))
+        except Exception as e:
+            future = self._inflight_quotes.pop(symbol, None)
+            if future is not None and not future.done():
+                future.set_exception(e)
+                future.exception()
+    
+    def _resolve_quote(self, symbol: str, quote: PriceData):
+        if len(self._quote_cache) >= self.max_cached_quotes:
+            now = time.monotonic()
+            self._quote_cache = {key: entry for key, entry in self._quote_cache.items() if entry[0] > now}
+        if self.quote_ttl_seconds > 0 and len(self._quote_cache) < self.max_cached_quotes:
+            self._quote_cache[symbol] = (time.monotonic() + self.quote_ttl_seconds, quote)
+        
+        future = self._inflight_quotes.pop(symbol, None)
+        if future is not None and not future.done():
+            future.set_result(quote)
+    
+    def _symbol_key(self, symbol: str) -> str:
+        return symbol.upper().replace("-", "").replace("_", "").replace("/", "")
+    
+    def _providers_to_try(self) -> List[MarketDataProvider]:
+        ordered = [self.primary_provider] + [p for p in self.fallback_order if p != self.primary_provider]
+        if self.routing_mode == "adaptive":
+            # Stable sort: ties (e.g. unmeasured providers) keep priority order
+            ordered = sorted(
+                (name for name in ordered if name in self.providers),
+                key=lambda name: self.providers[name].routing_score()
+            )
+        return ordered
+    
+    def _first_active_provider(self) -> Optional[BaseMarketDataProvider]:
+        for provider_name in self._providers_to_try():
+            provider = self.providers.get(provider_name)
+            if provider is not None and provider.status.is_active:
+                return provider
+        return None
+    
+    async def _execute_with_failover(self, method_name: str, *args, symbol_count: int = 1, **kwargs) -> Any:
         """Execute method with automatic provider failover"""
-        providers_to_try = [self.primary_provider] + [
-            p for p in self.fallback_order if p != self.primary_provider
-        ]
+        providers_to_try = self._providers_to_try()
         
         last_exception = None
         
@@ -315,11 +573,17 @@ class ProviderManager:
             if not provider.status.is_active:
                 continue
             
+            started = time.perf_counter()
             try:
                 method = getattr(provider, method_name)
-                return await method(*args, **kwargs)
+                self.request_stats["upstream_calls"] += 1
+                self.request_stats["upstream_symbols"] += symbol_count
+                result = await method(*args, **kwargs)
+                provider.record_outcome(time.perf_counter() - started, success=True)
+                return result
                 
             except Exception as e:
+                provider.record_outcome(time.perf_counter() - started, success=False)
                 last_exception = e
                 logger.warning(f"Provider {provider_name} failed for {method_name}: {e}")
                 continue
@@ -339,6 +603,19 @@ class ProviderManager:
         
         return results
     
+    def get_provider_health(self) -> Dict[MarketDataProvider, Dict[str, Any]]:
+        """Routing inputs per provider, in the order the next request would try them"""
+        return {
+            name: {
+                "latency_ewma_ms": self.providers[name].latency_ewma_ms,
+                "error_ewma": round(self.providers[name].error_ewma, 4),
+                "budget_fraction": round(self.providers[name].budget_fraction(), 4),
+                "routing_score": round(self.providers[name].routing_score(), 2),
+                "is_active": self.providers[name].status.is_active
+            }
+            for name in self._providers_to_try() if name in self.providers
+        }
+    
     def get_provider_status(self) -> Dict[MarketDataProvider, ProviderStatus]:
         """Get status of all providers"""
         return {name: provider.get_status() for name, provider in self.providers.items()}
\ No newline at end of file
@@ -20,15 +20,17 @@ from python_ai_services.models.enhanced_market_data_models import (
 class PolygonProvider(BaseMarketDataProvider):
     """Polygon.io provider for high-frequency market data"""
     
+    supports_batch_quotes = True
+    
     def __init__(self, api_key: str, config: Optional[Dict[str, Any]] = None):
-        super().__init__(api_key=api_key, config=config or {})
+        config = dict(config or {})
+        # Configure rate limits based on your plan
+        config.setdefault("requests_per_minute", 1000)  # Adjust based on your plan
+        config.setdefault("requests_per_day", 100000)   # Adjust based on your plan
+        super().__init__(api_key=api_key, config=config)
         self.base_url = "https://api.polygon.io"
         self.session = None
         
-        # Configure rate limits based on your plan
-        self.config.setdefault("requests_per_minute", 1000)  # Adjust based on your plan
-        self.config.setdefault("requests_per_day", 100000)   # Adjust based on your plan
-        
     def get_provider_name(self) -> MarketDataProvider:
         return MarketDataProvider.POLYGON
     
@@ -0,0 +1,131 @@
+"""
+Simulated Market Data Provider
+Offline provider with configurable latency, error rate and upstream rate limit, for exercising
+rate limiting, routing and failover without network access
+"""
+
+from typing import List, Dict, Any, Optional
+from collections import deque
+from datetime import datetime, timedelta
+from decimal import Decimal
+import asyncio
+import random
+import time
+
+from python_ai_services.models.enhanced_market_data_models import (
+    PriceData, OHLCV, OrderBookSnapshot, Trade, MarketDataProvider, AssetType, TimeFrame
+)
+from python_ai_services.providers.base_market_provider import BaseMarketDataProvider, APIError, RateLimitError
+
+
+class SimulatedMarketDataProvider(BaseMarketDataProvider):
+    """
+    Every request goes through _make_request_with_retry, so the provider's own token buckets apply.
+    The simulated upstream rejects requests beyond `upstream_requests_per_second` with a RateLimitError
+    (the 429 path) and fails a random `error_rate` share with an APIError.
+    """
+
+    def __init__(
+        self,
+        name: MarketDataProvider = MarketDataProvider.TWELVE_DATA,
+        latency_seconds: float = 0.01,
+        latency_jitter_seconds: float = 0.0,
+        error_rate: float = 0.0,
+        upstream_requests_per_second: Optional[float] = None,
+        supports_batch_quotes: bool = False,
+        seed: Optional[int] = None,
+        config: Optional[Dict[str, Any]] = None
+    ):
+        self.name = name
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.error_rate = error_rate
+        self.upstream_requests_per_second = upstream_requests_per_second
+        self.supports_batch_quotes = supports_batch_quotes
+        self.random = random.Random(seed)
+        self.prices: Dict[str, float] = {}
+        self.upstream_calls = 0
+        self.upstream_rejections = 0
+        self._recent_calls: deque = deque()
+        super().__init__(config=config)
+
+    def get_provider_name(self) -> MarketDataProvider:
+        return self.name
+
+    def get_supported_assets(self) -> List[AssetType]:
+        return [AssetType.STOCK, AssetType.CRYPTO, AssetType.FOREX]
+
+    def get_supported_timeframes(self) -> List[TimeFrame]:
+        return list(TimeFrame)
+
+    async def _simulate_upstream(self):
+        """One upstream round-trip: latency, then the upstream's own limit and random failures"""
+        async def request_func():
+            await asyncio.sleep(max(0.0, self.latency_seconds + self.random.uniform(-1, 1) * self.latency_jitter_seconds))
+            self.upstream_calls += 1
+
+            if self.upstream_requests_per_second:
+                now = time.monotonic()
+                while self._recent_calls and self._recent_calls[0] <= now - 1:
+                    self._recent_calls.popleft()
+                if len(self._recent_calls) >= self.upstream_requests_per_second:
+                    self.upstream_rejections += 1
+                    raise RateLimitError(f"{self.name.value} simulated 429")
+                self._recent_calls.append(now)
+
+            if self.random.random() < self.error_rate:
+                raise APIError(f"{self.name.value} simulated upstream error")
+
+        await self._make_request_with_retry(request_func, max_retries=1)
+
+    def _next_price(self, symbol: str) -> float:
+        price = self.prices.get(symbol, 100.0) * (1 + self.random.gauss(0, 0.001))
+        self.prices[symbol] = price
+        return price
+
+    def _price_data(self, symbol: str) -> PriceData:
+        price = Decimal(str(round(self._next_price(symbol), 4)))
+        return PriceData(
+            symbol=symbol, price=price, bid=price, ask=price, timestamp=datetime.utcnow(),
+            provider=self.name, asset_type=AssetType.STOCK
+        )
+
+    async def get_quote(self, symbol: str) -> PriceData:
+        await self._simulate_upstream()
+        return self._price_data(symbol)
+
+    async def get_quotes(self, symbols: List[str]) -> List[PriceData]:
+        if self.supports_batch_quotes:
+            await self._simulate_upstream()
+            return [self._price_data(symbol) for symbol in symbols]
+        return [await self.get_quote(symbol) for symbol in symbols]
+
+    async def get_historical_data(
+        self,
+        symbol: str,
+        timeframe: TimeFrame,
+        start_time: datetime,
+        end_time: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[OHLCV]:
+        await self._simulate_upstream()
+        bars = []
+        timestamp = start_time
+        end_time = end_time or datetime.utcnow()
+        while timestamp < end_time and (limit is None or len(bars) < limit):
+            close = Decimal(str(round(self._next_price(symbol), 4)))
+            bars.append(OHLCV(
+                symbol=symbol, timestamp=timestamp, open=close, high=close, low=close, close=close,
+                volume=Decimal("1000"), provider=self.name
+            ))
+            timestamp += timedelta(days=1)
+        return bars
+
+    async def get_orderbook(self, symbol: str, depth: int = 20) -> OrderBookSnapshot:
+        raise APIError("Order books are not simulated")
+
+    async def get_recent_trades(self, symbol: str, limit: int = 100) -> List[Trade]:
+        return []
+
+    async def search_symbols(self, query: str) -> List[Dict[str, str]]:
+        return [{"symbol": symbol} for symbol in self.prices if query.upper() in symbol]
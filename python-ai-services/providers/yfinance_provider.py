@@ -20,6 +20,8 @@ from python_ai_services.models.enhanced_market_data_models import (
 class YFinanceProvider(BaseMarketDataProvider):
     """YFinance provider for free market data"""
     
+    supports_batch_quotes = True
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         super().__init__(api_key=None, config=config or {})
         self.session = None
@@ -0,0 +1,125 @@
+"""
+Benchmark AgentSchedulerService task scheduling.
+
+Registers agents with random task types and specializations, submits tasks (a share
+of them depending on an earlier task), then times submission, one scheduling cycle
+over the whole queue, a cycle with every agent full, and releasing dependents as
+tasks complete. The original full scan is timed on a smaller sample for comparison.
+Run from the python-ai-services directory:
+
+    python scripts/benchmark_agent_scheduler.py --tasks 100000 --agents 1000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from logging import getLogger, basicConfig, INFO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+basicConfig(level=INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = getLogger(__name__)
+
+
+def full_scan_cycle(scheduler, tasks):
+    """The original cycle: every queued task checks its dependencies and scores every capable agent"""
+    load = {agent_id: len(w.active_tasks) for agent_id, w in scheduler.agent_workloads.items()}
+    agents = list(scheduler.agent_capabilities.values())
+    for task in sorted(tasks, key=lambda t: -scheduler.priority_weights[t.priority]):
+        if any(scheduler.scheduled_tasks[dep].status != "completed" for dep in task.dependencies):
+            continue
+        best, best_score = None, -1.0
+        for agent in agents:
+            if task.task_type in agent.supported_tasks and load[agent.agent_id] < agent.max_concurrent_tasks:
+                score = agent.performance_score * (1.0 - load[agent.agent_id] / agent.max_concurrent_tasks)
+                if score > best_score:
+                    best, best_score = agent.agent_id, score
+        if best is not None:
+            load[best] += 1
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100_000, help="number of queued tasks")
+    parser.add_argument("--agents", type=int, default=1000, help="number of registered agents")
+    parser.add_argument("--dependency-share", type=float, default=0.2, help="share of tasks with a dependency")
+    parser.add_argument("--scan-sample", type=int, default=2000, help="tasks used to time the original full scan")
+    args = parser.parse_args()
+
+    from loguru import logger as service_logger
+    service_logger.remove()  # Per-task info logs would dominate the timings
+
+    from services.agent_scheduler_service import (
+        AgentSchedulerService, AgentCapability, ScheduledTask, TaskType, SchedulePriority
+    )
+
+    class BenchmarkScheduler(AgentSchedulerService):
+        def _start_scheduler(self):
+            pass
+
+        async def _execute_task(self, task):
+            pass
+
+    rng = random.Random(42)
+    scheduler = BenchmarkScheduler()
+    scheduler.max_queue_size = args.tasks
+    task_types = list(TaskType)
+    capacity = -(-args.tasks // args.agents) * 2  # Room for the whole queue in one cycle
+    for i in range(args.agents):
+        await scheduler.register_agent(AgentCapability(
+            agent_id=f"agent_{i}", supported_tasks=rng.sample(task_types, 2), max_concurrent_tasks=capacity,
+            performance_score=rng.uniform(0.5, 1.5), specializations=rng.sample(["fx", "crypto", "equities"], 1)
+        ))
+
+    tasks = []
+    started = time.perf_counter()
+    for i in range(args.tasks):
+        dependencies = [tasks[rng.randrange(i)].task_id] if i and rng.random() < args.dependency_share else []
+        task = ScheduledTask(
+            task_type=rng.choice(task_types), priority=rng.choice(list(SchedulePriority)), dependencies=dependencies,
+            task_data={"required_specialization": rng.choice(["fx", "crypto", "equities"])}
+        )
+        await scheduler.submit_task(task)
+        tasks.append(task)
+    submit_seconds = time.perf_counter() - started
+
+    ready = args.tasks - len(scheduler.pending_dependencies)
+    started = time.perf_counter()
+    await scheduler._process_task_queue()
+    cycle_seconds = time.perf_counter() - started
+    assigned = args.tasks - len(scheduler.pending_tasks)
+
+    for workload in scheduler.agent_workloads.values():  # Fill every agent: a cycle should cost ~nothing
+        workload.active_tasks.extend(["busy"] * (capacity - len(workload.active_tasks)))
+    started = time.perf_counter()
+    await scheduler._process_task_queue()
+    full_cycle_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for task in tasks[:args.tasks // 2]:
+        if task.agent_id:
+            await scheduler._finish_task(task, {"success": True})
+    release_seconds = time.perf_counter() - started
+    released = args.tasks - len(scheduler.pending_dependencies) - ready
+
+    sample = tasks[:args.scan_sample]
+    started = time.perf_counter()
+    full_scan_cycle(scheduler, sample)
+    scan_per_task = (time.perf_counter() - started) / len(sample)
+
+    logger.info(f"{args.tasks:,} tasks, {args.agents:,} agents, {ready:,} ready at submit")
+    logger.info(f"submit            {submit_seconds:8.3f}s  {submit_seconds / args.tasks * 1e6:8.1f}us/task")
+    logger.info(f"cycle             {cycle_seconds:8.3f}s  {cycle_seconds / max(assigned, 1) * 1e6:8.1f}us/assignment  ({assigned:,} assigned)")
+    logger.info(f"cycle, agents full{full_cycle_seconds * 1e3:8.3f}ms")
+    logger.info(f"complete + release{release_seconds:8.3f}s  ({released:,} dependents became ready)")
+    logger.info(
+        f"original full scan {scan_per_task * 1e6:7.1f}us/task on {len(sample):,} tasks "
+        f"(~{scan_per_task * args.tasks:.1f}s per cycle at {args.tasks:,})"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
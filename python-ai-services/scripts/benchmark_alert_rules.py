@@ -0,0 +1,102 @@
+"""
+Benchmark AlertingService metric-driven rule evaluation.
+
+Creates threshold and change rules spread over metrics, agents and symbols, then
+publishes random metric updates and reports update throughput and how many rules
+each update evaluated. Also times one polling pass over every rule through the
+per-rule processors (one metric lookup per rule) against the indexed poll (one
+lookup per subscribed scope). Run from the python-ai-services directory:
+
+    python scripts/benchmark_alert_rules.py --rules 10000 --updates 100000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from logging import getLogger, basicConfig, INFO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+basicConfig(level=INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = getLogger(__name__)
+
+METRICS = ["win_rate", "drawdown", "volatility", "pnl"] + [f"metric_{i}" for i in range(16)]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rules", type=int, default=10_000, help="number of alert rules")
+    parser.add_argument("--updates", type=int, default=100_000, help="number of metric updates to publish")
+    parser.add_argument("--agents", type=int, default=200, help="distinct agent ids")
+    parser.add_argument("--symbols", type=int, default=50, help="distinct symbols")
+    args = parser.parse_args()
+
+    from loguru import logger as service_logger
+    service_logger.remove()  # Per-alert info logs would dominate the timings
+
+    from services.alerting_service import AlertingService, AlertRule, AlertCategory, AlertSeverity
+
+    class BenchmarkAlertingService(AlertingService):
+        def _start_alerting_services(self):
+            pass
+
+    rng = random.Random(42)
+    agents = [f"agent_{i}" for i in range(args.agents)]
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    service = BenchmarkAlertingService()
+
+    for i in range(args.rules):
+        metric = rng.choice(METRICS)
+        if rng.random() < 0.5:
+            condition_type, params = "threshold", {"metric": metric, "threshold": rng.uniform(0.9, 1.0), "operator": "gt"}
+        else:
+            condition_type, params = "change", {
+                "metric": metric, "change_threshold": rng.uniform(0.5, 1.0), "time_window_minutes": rng.choice([5, 15, 60])
+            }
+        await service.create_alert_rule(AlertRule(
+            name=f"rule_{i}", description="benchmark", category=AlertCategory.RISK, severity=AlertSeverity.WARNING,
+            condition_type=condition_type, condition_parameters=params,
+            target_agents=[rng.choice(agents)] if rng.random() < 0.8 else [],
+            target_symbols=[rng.choice(symbols)] if rng.random() < 0.3 else []
+        ))
+
+    updates = [
+        (rng.choice(METRICS), rng.random(), rng.choice(agents), rng.choice(symbols) if rng.random() < 0.5 else None)
+        for _ in range(args.updates)
+    ]
+    started = time.perf_counter()
+    evaluated = 0
+    for metric, value, agent_id, symbol in updates:
+        evaluated += await service.publish_metric(metric, value, agent_id, symbol)
+    publish_seconds = time.perf_counter() - started
+
+    for rule in service.alert_rules.values():  # Let every rule be evaluated in the polling comparison
+        rule.last_triggered = None
+    started = time.perf_counter()
+    for rule in service.alert_rules.values():
+        await service._check_alert_rule(rule)
+    per_rule_poll_seconds = time.perf_counter() - started
+
+    for rule in service.alert_rules.values():
+        rule.last_triggered = None
+    lookups = sum(len(scopes) for scopes in service.rule_index.values())
+    started = time.perf_counter()
+    await service._check_all_alert_rules()
+    indexed_poll_seconds = time.perf_counter() - started
+
+    stats = service.get_service_status()["rule_statistics"]["metric_index"]
+    logger.info(f"{args.rules:,} rules over {stats['metrics']} metrics / {stats['scopes']:,} scopes")
+    logger.info(
+        f"publish           {args.updates / publish_seconds:10,.0f} updates/s  "
+        f"{publish_seconds / args.updates * 1e6:6.1f}us/update  {evaluated / args.updates:.1f} rules/update  "
+        f"({stats['samples']:,} samples in {stats['windows']:,} windows, {service.alert_queue.qsize():,} alerts)"
+    )
+    logger.info(f"poll, per rule    {per_rule_poll_seconds * 1e3:8.1f}ms  ({args.rules:,} metric lookups)")
+    logger.info(f"poll, indexed     {indexed_poll_seconds * 1e3:8.1f}ms  ({lookups:,} metric lookups)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+"""
+Benchmark cold versus warm historical reads through the bar store.
+
+Uses a synthetic provider that sleeps --latency-ms per request (standing in for a
+yfinance/OpenBB download) and returns daily bars. Times a cold pass that fetches
+every symbol, a warm pass over the same ranges from the memory-mapped store, a
+pass after extending the range by one month (only the new month is fetched) and
+random sub-range reads as a backtest would issue them. Run from the
+python-ai-services directory:
+
+    python scripts/benchmark_bar_store.py --symbols 50 --years 10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from logging import getLogger, basicConfig, INFO
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.bar_store import BarStore  # noqa: E402
+
+basicConfig(level=INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = getLogger(__name__)
+
+
+class SlowProvider:
+    def __init__(self, latency_seconds):
+        self.latency_seconds = latency_seconds
+        self.requests = 0
+
+    def __call__(self, symbol, interval, start, end):
+        self.requests += 1
+        time.sleep(self.latency_seconds)
+        days = pd.bdate_range(start.tz_localize(None).normalize(), end.tz_localize(None) - pd.Timedelta(days=1))
+        rng = np.random.default_rng(abs(hash(symbol)) % 2**32)
+        close = 100 * np.cumprod(1 + rng.normal(0.0003, 0.015, len(days)))
+        return pd.DataFrame(
+            {"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close, "Volume": 1e6},
+            index=days
+        )
+
+
+def timed(label, func, count):
+    started = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - started
+    logger.info(f"{label:<26} {seconds * 1000:9.1f}ms total  {seconds / count * 1000:8.3f}ms per read")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=50, help="number of symbols")
+    parser.add_argument("--years", type=int, default=10, help="years of daily bars per symbol")
+    parser.add_argument("--latency-ms", type=float, default=200, help="simulated provider latency per request")
+    parser.add_argument("--range-reads", type=int, default=2000, help="random sub-range reads in the backtest pass")
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i:04d}" for i in range(args.symbols)]
+    end = pd.Timestamp("2024-01-01", tz="UTC")
+    start = end - pd.DateOffset(years=args.years)
+    provider = SlowProvider(args.latency_ms / 1000)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = BarStore(root)
+
+        def read_all(range_end):
+            return [store.get_bars(symbol, "1d", start, range_end, provider) for symbol in symbols]
+
+        timed("cold (fetch + persist)", lambda: read_all(end), len(symbols))
+        cold_requests = provider.requests
+        bars = timed("warm (memory-mapped)", lambda: read_all(end), len(symbols))
+        warm_requests = provider.requests - cold_requests
+
+        store = BarStore(root)  # New process view: maps are reopened from disk
+        timed("warm (reopened store)", lambda: read_all(end), len(symbols))
+
+        extended = end + pd.DateOffset(months=1)
+        timed("extend by one month", lambda: read_all(extended), len(symbols))
+        extend_requests = provider.requests - cold_requests - warm_requests
+
+        rng = np.random.default_rng(0)
+        timestamps = bars[0]["timestamp"]
+
+        def range_reads():
+            for _ in range(args.range_reads):
+                symbol = symbols[rng.integers(len(symbols))]
+                lo = int(rng.integers(len(timestamps) - 252))
+                store.read(symbol, "1d", pd.Timestamp(int(timestamps[lo]), tz="UTC"), pd.Timestamp(int(timestamps[lo + 252]), tz="UTC"))
+
+        timed("1y sub-range reads", range_reads, args.range_reads)
+
+        rows = sum(len(series["timestamp"]) for series in bars)
+        logger.info(f"universe: {args.symbols} symbols x {len(timestamps)} bars ({rows:,} rows)")
+        logger.info(f"provider requests: cold {cold_requests}, warm {warm_requests}, extend {extend_requests}")
+        logger.info(f"store stats: {store.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
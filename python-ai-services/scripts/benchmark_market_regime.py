@@ -0,0 +1,112 @@
+"""
+Benchmark MarketRegimeService indicator updates and regime sweeps.
+
+Backfills every symbol with a block of bars (vectorized ingest), streams further
+bars one at a time (incremental per-bar update), then times a regime sweep over
+all symbols. For comparison it also times the full pandas indicator recompute over
+a 500-bar window that each bar used to trigger. Run from the python-ai-services
+directory:
+
+    python scripts/benchmark_market_regime.py --symbols 1000 --bars 500 --stream 50
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from logging import getLogger, basicConfig, INFO
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+basicConfig(level=INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = getLogger(__name__)
+
+
+def make_bars(rng, count):
+    closes = 100 * np.exp(np.cumsum(rng.normal(rng.uniform(-0.01, 0.01), rng.uniform(0.002, 0.05), count)))
+    highs = closes * (1 + rng.uniform(0, 0.01, count))
+    lows = closes * (1 - rng.uniform(0, 0.01, count))
+    return [{"open": c, "high": h, "low": l, "close": c, "volume": 1000.0} for h, l, c in zip(highs, lows, closes)]
+
+
+def pandas_recompute(bars):
+    """The indicator recompute every add_market_data call used to run over the whole window"""
+    df = pd.DataFrame(bars)
+    df['sma_20'] = df['close'].rolling(window=20).mean()
+    df['sma_50'] = df['close'].rolling(window=50).mean()
+    df['ema_12'] = df['close'].ewm(span=12).mean()
+    df['ema_26'] = df['close'].ewm(span=26).mean()
+    delta = df['close'].diff()
+    rs = delta.where(delta > 0, 0).rolling(window=14).mean() / (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    df['rsi'] = 100 - (100 / (1 + rs))
+    prev_close = df['close'].shift(1)
+    df['tr'] = np.maximum(df['high'] - df['low'], np.maximum(abs(df['high'] - prev_close), abs(df['low'] - prev_close)))
+    df['atr'] = df['tr'].rolling(window=14).mean()
+    std = df['close'].rolling(window=20).std()
+    df['bb_upper'], df['bb_lower'] = df['sma_20'] + 2 * std, df['sma_20'] - 2 * std
+    df['macd'] = df['ema_12'] - df['ema_26']
+    up, down = df['high'] - df['high'].shift(1), df['low'].shift(1) - df['low']
+    dm_plus = pd.Series(np.where(up > down, np.maximum(up, 0), 0)).rolling(window=14).mean()
+    dm_minus = pd.Series(np.where(down > up, np.maximum(down, 0), 0)).rolling(window=14).mean()
+    di_plus, di_minus = 100 * dm_plus / df['atr'], 100 * dm_minus / df['atr']
+    df['adx'] = (100 * abs(di_plus - di_minus) / (di_plus + di_minus)).rolling(window=14).mean()
+    return df.iloc[-1]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=1000, help="number of symbols")
+    parser.add_argument("--bars", type=int, default=500, help="bars backfilled per symbol")
+    parser.add_argument("--stream", type=int, default=50, help="bars streamed one at a time per symbol")
+    args = parser.parse_args()
+
+    from loguru import logger as service_logger
+    service_logger.remove()  # Per-call debug logs would dominate the timings
+
+    from services.market_regime_service import MarketRegimeService
+
+    class BenchmarkRegimeService(MarketRegimeService):
+        def _start_regime_monitoring(self):
+            pass
+
+    rng = np.random.default_rng(42)
+    service = BenchmarkRegimeService()
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    series = {symbol: make_bars(rng, args.bars + args.stream) for symbol in symbols}
+
+    started = time.perf_counter()
+    for symbol in symbols:
+        await service.add_market_data(symbol, series[symbol][:args.bars])
+    backfill_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for step in range(args.bars, args.bars + args.stream):
+        for symbol in symbols:
+            await service.add_market_data(symbol, [series[symbol][step]])
+    stream_seconds = time.perf_counter() - started
+    streamed = args.symbols * args.stream
+
+    started = time.perf_counter()
+    await service._update_all_regime_detections()
+    sweep_seconds = time.perf_counter() - started
+
+    sample = series[symbols[0]][-service.buffer_capacity:]
+    started = time.perf_counter()
+    for _ in range(100):
+        pandas_recompute(sample)
+    recompute_seconds = (time.perf_counter() - started) / 100
+
+    regimes = {regime: count for regime, count in service.get_service_status()["current_regimes"].items() if count}
+    logger.info(f"{args.symbols:,} symbols, {args.bars} backfilled + {args.stream} streamed bars each")
+    logger.info(f"backfill          {args.symbols * args.bars / backfill_seconds:12,.0f} bars/s")
+    logger.info(f"stream            {streamed / stream_seconds:12,.0f} bars/s  {stream_seconds / streamed * 1e6:8.1f}us/bar")
+    logger.info(f"pandas recompute  {1 / recompute_seconds:12,.0f} bars/s  {recompute_seconds * 1e6:8.1f}us/bar (500-bar window)")
+    logger.info(f"regime sweep      {sweep_seconds * 1e3:10.1f}ms for {len(service.current_regimes):,} symbols  {regimes}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
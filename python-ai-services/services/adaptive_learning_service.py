@@ -5,7 +5,7 @@ Machine learning-driven strategy adaptation, parameter optimization, and perform
 
 import asyncio
 import uuid
-from typing import Dict, List, Optional, Any, Tuple, Set
+from typing import AsyncGenerator, Dict, List, Optional, Any, Tuple, Set
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 import json
@@ -24,8 +24,7 @@ from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.model_selection import TimeSeriesSplit, GridSearchCV
 from sklearn.preprocessing import StandardScaler, RobustScaler
 from sklearn.metrics import mean_squared_error, mean_absolute_error
-import optuna
-from scipy.optimize import differential_evolution, minimize
+from scipy.optimize import minimize
 import tensorflow as tf
 from tensorflow import keras
 
@@ -40,6 +39,7 @@ from services.performance_analytics_service import get_performance_analytics_ser
 from services.backtesting_service import get_backtesting_service
 from services.market_analysis_service import get_market_analysis_service
 from services.risk_management_service import get_risk_management_service
+from services.optimization_jobs import OptimizationJobManager, SearchParameter, evaluate_parameter_set
 from database.supabase_client import get_supabase_client
 
 
@@ -183,8 +183,13 @@ class AdaptationEvent(BaseModel):
 class StrategyOptimizer:
     """Core strategy optimization engine"""
     
-    def __init__(self):
+    # Searches that run as jobs on the worker pool instead of on the event loop
+    JOB_ALGORITHMS = (LearningAlgorithm.BAYESIAN_OPTIMIZATION, LearningAlgorithm.GENETIC_ALGORITHM)
+    
+    def __init__(self, job_manager: Optional[OptimizationJobManager] = None):
         self.optimization_cache: Dict[str, OptimizationResult] = {}
+        self.jobs = job_manager or OptimizationJobManager()
+        self.pending_searches: Dict[str, Dict[str, Any]] = {}
         
     async def optimize_strategy_parameters(
         self,
@@ -196,6 +201,104 @@ class StrategyOptimizer:
     ) -> OptimizationResult:
         """Optimize strategy parameters using specified algorithm"""
         
+        if algorithm in self.JOB_ALGORITHMS:
+            job_id = self.start_optimization(strategy, historical_data, objective, algorithm, optimization_budget)
+            return await self.complete_optimization(job_id)
+        
+        parameter_space, features, targets = self._prepare_search(strategy, historical_data, objective)
+        
+        # Perform optimization based on algorithm
+        if algorithm == LearningAlgorithm.RANDOM_FOREST:
+            result = await self._random_forest_optimization(
+                parameter_space, features, targets
+            )
+        else:
+            # Default to grid search
+            result = await self._grid_search_optimization(
+                parameter_space, features, targets
+            )
+        
+        return await self._build_optimization_result(
+            strategy, historical_data, objective, algorithm, result, optimization_budget
+        )
+    
+    def start_optimization(
+        self,
+        strategy: TradingStrategy,
+        historical_data: List[Dict[str, Any]],
+        objective: OptimizationObjective = OptimizationObjective.SHARPE_RATIO,
+        algorithm: LearningAlgorithm = LearningAlgorithm.BAYESIAN_OPTIMIZATION,
+        optimization_budget: int = 100
+    ) -> str:
+        """Submit a Bayesian or genetic search to the worker pool and return its job id"""
+        
+        parameter_space, features, targets = self._prepare_search(strategy, historical_data, objective)
+        job_id = self.jobs.submit(
+            algorithm.value,
+            [
+                SearchParameter(name, param.parameter_type, param.optimization_bounds, param.current_value)
+                for name, param in parameter_space.items()
+            ],
+            features,
+            targets,
+            optimization_budget,
+            study_prefix=f"{strategy.strategy_id}-{objective.value}"
+        )
+        self.pending_searches[job_id] = {
+            "strategy": strategy,
+            "historical_data": historical_data,
+            "objective": objective,
+            "algorithm": algorithm,
+            "budget": optimization_budget,
+            "parameter_space": parameter_space,
+            "features": features,
+            "targets": targets
+        }
+        return job_id
+    
+    async def complete_optimization(self, job_id: str) -> OptimizationResult:
+        """Wait for a submitted search and build its OptimizationResult"""
+        
+        search = self.pending_searches[job_id]
+        try:
+            outcome = await self.jobs.result(job_id)
+        finally:
+            self.pending_searches.pop(job_id, None)
+        
+        # Calculate improvement
+        best_value = outcome["best_value"]
+        baseline_performance = self._evaluate_parameter_set(
+            {name: param.current_value for name, param in search["parameter_space"].items()},
+            search["features"], search["targets"]
+        )
+        improvement = (best_value - baseline_performance) / abs(baseline_performance) * 100
+        
+        result = {
+            "best_parameters": outcome["best_parameters"],
+            "best_value": best_value,
+            "iterations": outcome["iterations"],
+            "converged": outcome["converged"],
+            "improvement": improvement
+        }
+        if search["algorithm"] == LearningAlgorithm.BAYESIAN_OPTIMIZATION:
+            result["confidence"] = min(0.95, 0.5 + (improvement / 100))
+            result["robustness"] = 0.8  # Would calculate based on parameter sensitivity
+        else:
+            result["confidence"] = 0.8 if outcome["converged"] else 0.6
+        
+        return await self._build_optimization_result(
+            search["strategy"], search["historical_data"], search["objective"],
+            search["algorithm"], result, search["budget"]
+        )
+    
+    def _prepare_search(
+        self,
+        strategy: TradingStrategy,
+        historical_data: List[Dict[str, Any]],
+        objective: OptimizationObjective
+    ) -> Tuple[Dict[str, StrategyParameters], np.ndarray, np.ndarray]:
+        """Parameter space, features and targets for a search"""
+        
         # Define parameter space for optimization
         parameter_space = self._define_parameter_space(strategy)
         
@@ -208,24 +311,18 @@ class StrategyOptimizer:
         if len(features) < 50:  # Minimum data requirement
             raise ValueError("Insufficient historical data for optimization")
         
-        # Perform optimization based on algorithm
-        if algorithm == LearningAlgorithm.BAYESIAN_OPTIMIZATION:
-            result = await self._bayesian_optimization(
-                parameter_space, features, targets, optimization_budget
-            )
-        elif algorithm == LearningAlgorithm.GENETIC_ALGORITHM:
-            result = await self._genetic_algorithm_optimization(
-                parameter_space, features, targets, optimization_budget
-            )
-        elif algorithm == LearningAlgorithm.RANDOM_FOREST:
-            result = await self._random_forest_optimization(
-                parameter_space, features, targets
-            )
-        else:
-            # Default to grid search
-            result = await self._grid_search_optimization(
-                parameter_space, features, targets
-            )
+        return parameter_space, features, targets
+    
+    async def _build_optimization_result(
+        self,
+        strategy: TradingStrategy,
+        historical_data: List[Dict[str, Any]],
+        objective: OptimizationObjective,
+        algorithm: LearningAlgorithm,
+        result: Dict[str, Any],
+        optimization_budget: int
+    ) -> OptimizationResult:
+        """Validate a search result and wrap it as an OptimizationResult"""
         
         # Validate optimization result
         validation_result = await self._validate_optimization(result, historical_data)
@@ -249,138 +346,6 @@ class StrategyOptimizer:
         
         return optimization_result
     
-    async def _bayesian_optimization(
-        self,
-        parameter_space: Dict[str, StrategyParameters],
-        features: np.ndarray,
-        targets: np.ndarray,
-        n_trials: int = 100
-    ) -> Dict[str, Any]:
-        """Bayesian optimization using Optuna"""
-        
-        def objective_function(trial):
-            # Suggest parameters based on defined space
-            suggested_params = {}
-            for param_name, param_info in parameter_space.items():
-                if param_info.parameter_type == "float":
-                    suggested_params[param_name] = trial.suggest_float(
-                        param_name, 
-                        float(param_info.optimization_bounds[0]),
-                        float(param_info.optimization_bounds[1])
-                    )
-                elif param_info.parameter_type == "int":
-                    suggested_params[param_name] = trial.suggest_int(
-                        param_name,
-                        int(param_info.optimization_bounds[0]),
-                        int(param_info.optimization_bounds[1])
-                    )
-                elif param_info.parameter_type == "categorical":
-                    suggested_params[param_name] = trial.suggest_categorical(
-                        param_name, param_info.optimization_bounds
-                    )
-            
-            # Evaluate performance with suggested parameters
-            performance = self._evaluate_parameter_set(suggested_params, features, targets)
-            return performance
-        
-        # Create Optuna study
-        study = optuna.create_study(direction="maximize")
-        study.optimize(objective_function, n_trials=n_trials)
-        
-        # Calculate improvement
-        best_value = study.best_value
-        baseline_performance = self._evaluate_parameter_set(
-            {name: param.current_value for name, param in parameter_space.items()},
-            features, targets
-        )
-        improvement = (best_value - baseline_performance) / abs(baseline_performance) * 100
-        
-        return {
-            "best_parameters": study.best_params,
-            "best_value": best_value,
-            "iterations": n_trials,
-            "converged": True,
-            "improvement": improvement,
-            "confidence": min(0.95, 0.5 + (improvement / 100)),
-            "robustness": 0.8  # Would calculate based on parameter sensitivity
-        }
-    
-    async def _genetic_algorithm_optimization(
-        self,
-        parameter_space: Dict[str, StrategyParameters],
-        features: np.ndarray,
-        targets: np.ndarray,
-        max_generations: int = 50
-    ) -> Dict[str, Any]:
-        """Genetic algorithm optimization using scipy"""
-        
-        # Convert parameter space to bounds for differential evolution
-        bounds = []
-        param_names = []
-        
-        for param_name, param_info in parameter_space.items():
-            if param_info.parameter_type in ["float", "int"]:
-                bounds.append(param_info.optimization_bounds)
-                param_names.append(param_name)
-        
-        def objective_function(x):
-            # Convert array back to parameter dictionary
-            params = {}
-            for i, param_name in enumerate(param_names):
-                param_info = parameter_space[param_name]
-                if param_info.parameter_type == "int":
-                    params[param_name] = int(round(x[i]))
-                else:
-                    params[param_name] = x[i]
-            
-            # Add categorical parameters at current values
-            for param_name, param_info in parameter_space.items():
-                if param_name not in params:
-                    params[param_name] = param_info.current_value
-            
-            # Return negative performance (since DE minimizes)
-            performance = self._evaluate_parameter_set(params, features, targets)
-            return -performance
-        
-        # Run differential evolution
-        result = differential_evolution(
-            objective_function,
-            bounds,
-            maxiter=max_generations,
-            popsize=15,
-            seed=42
-        )
-        
-        # Convert result back to parameter dictionary
-        best_params = {}
-        for i, param_name in enumerate(param_names):
-            param_info = parameter_space[param_name]
-            if param_info.parameter_type == "int":
-                best_params[param_name] = int(round(result.x[i]))
-            else:
-                best_params[param_name] = result.x[i]
-        
-        # Add categorical parameters
-        for param_name, param_info in parameter_space.items():
-            if param_name not in best_params:
-                best_params[param_name] = param_info.current_value
-        
-        best_value = -result.fun
-        baseline_performance = self._evaluate_parameter_set(
-            {name: param.current_value for name, param in parameter_space.items()},
-            features, targets
-        )
-        improvement = (best_value - baseline_performance) / abs(baseline_performance) * 100
-        
-        return {
-            "best_parameters": best_params,
-            "best_value": best_value,
-            "iterations": result.nit,
-            "converged": result.success,
-            "improvement": improvement,
-            "confidence": 0.8 if result.success else 0.6
-        }
-    
     async def _random_forest_optimization(
         self,
         parameter_space: Dict[str, StrategyParameters],
@@ -578,30 +543,7 @@ class StrategyOptimizer:
         targets: np.ndarray
     ) -> float:
         """Evaluate performance of parameter set"""
-        
-        # Simplified evaluation - would run actual backtest
-        # For now, use a synthetic performance function
-        
-        # Normalize parameters
-        param_values = list(parameters.values())
-        numeric_params = [v for v in param_values if isinstance(v, (int, float))]
-        
-        if not numeric_params:
-            return 0.0
-        
-        # Synthetic performance based on parameter values and features
-        base_performance = np.mean(targets) if len(targets) > 0 else 0.0
-        
-        # Add noise based on parameter configuration
-        param_effect = np.mean(numeric_params) * 0.1
-        feature_effect = np.mean(features) * 0.001 if len(features) > 0 else 0.0
-        
-        performance = base_performance + param_effect + feature_effect
-        
-        # Add some randomness to simulate market uncertainty
-        noise = np.random.normal(0, 0.1)
-        
-        return performance + noise
+        return evaluate_parameter_set(parameters, features, targets)
     
     def _extract_current_parameters(self, strategy: TradingStrategy) -> Dict[str, Any]:
         """Extract current parameter values from strategy"""
@@ -961,6 +903,7 @@ class AdaptiveLearningService:
         self.optimization_results: Dict[str, OptimizationResult] = {}
         self.learning_models: Dict[str, LearningModel] = {}
         self.adaptation_events: Dict[str, List[AdaptationEvent]] = defaultdict(list)
+        self.optimization_jobs: Dict[str, asyncio.Task] = {}  # Job id -> task finishing its OptimizationResult
         
         # Performance tracking
         self.strategy_performance_history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
@@ -1011,16 +954,15 @@ class AdaptiveLearningService:
             if len(historical_data) < 100:
                 raise HTTPException(status_code=400, detail="Insufficient historical data")
             
-            # Perform optimization
-            optimization_result = await self.optimizer.optimize_strategy_parameters(
-                strategy, historical_data, objective, algorithm
-            )
-            
-            # Store result
-            self.optimization_results[optimization_result.optimization_id] = optimization_result
-            
-            # Save to database
-            await self._save_optimization_result(optimization_result)
+            # Perform optimization; Bayesian and genetic searches run on the worker pool
+            if algorithm in StrategyOptimizer.JOB_ALGORITHMS:
+                job_id = self._start_optimization_job(strategy, historical_data, objective, algorithm)
+                optimization_result = await self.optimization_jobs[job_id]
+            else:
+                optimization_result = await self.optimizer.optimize_strategy_parameters(
+                    strategy, historical_data, objective, algorithm
+                )
+                await self._record_optimization_result(optimization_result)
             
             logger.info(f"Strategy optimization completed: {optimization_result.improvement_percentage:.2f}% improvement")
             
@@ -1030,6 +972,78 @@ class AdaptiveLearningService:
             logger.error(f"Failed to optimize strategy {strategy_id}: {e}")
             raise HTTPException(status_code=500, detail=f"Strategy optimization failed: {str(e)}")
     
+    async def submit_optimization(
+        self,
+        strategy_id: str,
+        objective: OptimizationObjective = OptimizationObjective.SHARPE_RATIO,
+        algorithm: LearningAlgorithm = LearningAlgorithm.BAYESIAN_OPTIMIZATION
+    ) -> str:
+        """Start a Bayesian or genetic optimization in the background and return its job id"""
+        if algorithm not in StrategyOptimizer.JOB_ALGORITHMS:
+            raise HTTPException(status_code=400, detail=f"{algorithm.value} does not run as a background job")
+        
+        strategy = await self._get_strategy_by_id(strategy_id)
+        if not strategy:
+            raise HTTPException(status_code=404, detail="Strategy not found")
+        
+        historical_data = await self._get_strategy_historical_data(strategy_id)
+        if len(historical_data) < 100:
+            raise HTTPException(status_code=400, detail="Insufficient historical data")
+        
+        try:
+            return self._start_optimization_job(strategy, historical_data, objective, algorithm)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    def get_optimization_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status, progress and best parameters so far of an optimization job"""
+        status = self.optimizer.jobs.status(job_id)
+        if status is None:
+            return None
+        task = self.optimization_jobs.get(job_id)
+        if task is not None and task.done() and not task.cancelled() and task.exception() is None:
+            status["optimization_id"] = task.result().optimization_id
+        return status
+    
+    def cancel_optimization_job(self, job_id: str) -> bool:
+        """Stop an optimization job early; its best parameters so far are still recorded"""
+        return self.optimizer.jobs.cancel(job_id)
+    
+    async def stream_optimization_progress(self, job_id: str) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield each new best value and its parameters until the job finishes"""
+        if self.optimizer.jobs.status(job_id) is None:
+            raise HTTPException(status_code=404, detail="Optimization job not found")
+        async for update in self.optimizer.jobs.stream_best(job_id):
+            yield update
+    
+    def _start_optimization_job(
+        self,
+        strategy: TradingStrategy,
+        historical_data: List[Dict[str, Any]],
+        objective: OptimizationObjective,
+        algorithm: LearningAlgorithm
+    ) -> str:
+        job_id = self.optimizer.start_optimization(strategy, historical_data, objective, algorithm)
+        self.optimization_jobs[job_id] = asyncio.create_task(self._finish_optimization_job(job_id))
+        return job_id
+    
+    async def _finish_optimization_job(self, job_id: str) -> OptimizationResult:
+        """Turn a finished job into an OptimizationResult and record it"""
+        try:
+            optimization_result = await self.optimizer.complete_optimization(job_id)
+        except Exception as e:
+            logger.error(f"Optimization job {job_id} did not produce a result: {e}")
+            raise
+        await self._record_optimization_result(optimization_result)
+        return optimization_result
+    
+    async def _record_optimization_result(self, optimization_result: OptimizationResult):
+        # Store result
+        self.optimization_results[optimization_result.optimization_id] = optimization_result
+        
+        # Save to database
+        await self._save_optimization_result(optimization_result)
+    
     async def train_adaptive_model(
         self,
         strategy_id: str,
@@ -1267,6 +1281,11 @@ class AdaptiveLearningService:
         
         return historical_data
     
+    async def shutdown(self):
+        """Stop background loops and running optimization jobs"""
+        self._shutdown = True
+        await self.optimizer.jobs.shutdown()
+    
     # Additional helper methods would be implemented here...
 
 
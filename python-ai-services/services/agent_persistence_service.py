@@ -211,6 +211,39 @@ class AgentPersistenceService:
             logger.exception(f"Supabase client error saving state for agent '{agent_id}': {e}")
             return None
 
+    async def save_agent_states_to_supabase_batch(self, records: List[Dict]) -> Optional[List[Dict]]:
+        """Upsert many agent state records in a single request. Returns the persisted rows, or None on failure."""
+        if not self.supabase_client:
+            logger.error(f"Supabase client not available. Cannot save {len(records)} agent states.")
+            return None
+        if not records:
+            return []
+        records_to_upsert = [
+            {
+                "agent_id": record["agent_id"], "strategy_type": record.get("strategy_type", "unknown"),
+                "state": record.get("state", {}), "memory_references": record.get("memory_references") or []
+            }
+            for record in records
+        ]
+        try:
+            logger.info(f"Attempting to batch save {len(records_to_upsert)} agent states to Supabase.")
+            response = await asyncio.to_thread(
+                self.supabase_client.table("agent_states")
+                .upsert(records_to_upsert, on_conflict="agent_id")
+                .execute
+            )
+            if hasattr(response, 'error') and response.error:
+                logger.error(f"Supabase API error batch saving agent states: {response.error.message} (Code: {response.error.code if hasattr(response.error, 'code') else 'N/A'})")
+                return None
+            if hasattr(response, 'data') and response.data:
+                logger.info(f"Successfully batch saved {len(response.data)} agent states to Supabase.")
+                return response.data
+            logger.warning(f"Supabase returned no data and no error for batch save of {len(records_to_upsert)} agent states. Response: {response}")
+            return None
+        except Exception as e:
+            logger.exception(f"Supabase client error batch saving {len(records_to_upsert)} agent states: {e}")
+            return None
+
     async def get_agent_state_from_supabase(self, agent_id: str) -> Optional[Dict]:
         if not self.supabase_client:
             logger.error(f"Supabase client not available. Cannot get state for agent '{agent_id}'.")
@@ -3,9 +3,11 @@ Agent Scheduler Service - Phase 5 Implementation
 Intelligent agent scheduling and workload distribution for optimal performance
 """
 import asyncio
+import heapq
+import itertools
 import json
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Any, Literal
+from typing import Dict, List, Optional, Any, Literal, Set, Tuple
 from loguru import logger
 from pydantic import BaseModel, Field
 from dataclasses import dataclass, field
@@ -92,6 +94,79 @@ class AgentWorkload:
     current_utilization: float = 0.0
     last_task_completion: Optional[datetime] = None
 
+class _AgentSelector:
+    """
+    Best-agent lookup for one scheduling cycle. Keeps a max-heap of agent scores per task type (and per
+    task type + specialization, built on first use); an agent's entries are re-pushed when its score
+    changes and stale entries are dropped lazily. Agents without free capacity leave the heaps.
+    """
+    
+    def __init__(self, scheduler: "AgentSchedulerService", now: datetime):
+        self.scheduler = scheduler
+        self.now = now
+        self.order = {agent_id: i for i, agent_id in enumerate(scheduler.agent_capabilities)}
+        self.scores: Dict[str, Optional[float]] = {}
+        self.heaps: Dict[Tuple[TaskType, Optional[str]], List[Tuple[float, int, str]]] = {}
+    
+    def _score(self, agent_id: str) -> Optional[float]:
+        if agent_id not in self.scores:
+            self.scores[agent_id] = self.scheduler._agent_base_score(agent_id, self.now)
+        return self.scores[agent_id]
+    
+    def _heap(self, task_type: TaskType, specialization: Optional[str]) -> List[Tuple[float, int, str]]:
+        key = (task_type, specialization)
+        heap = self.heaps.get(key)
+        if heap is None:
+            agent_ids = self.scheduler.agents_by_task_type.get(task_type, set())
+            if specialization is not None:
+                agent_ids = agent_ids & self.scheduler.agents_by_specialization.get(specialization, set())
+            heap = [(-score, self.order[agent_id], agent_id) for agent_id in agent_ids
+                    if (score := self._score(agent_id)) is not None]
+            heapq.heapify(heap)
+            self.heaps[key] = heap
+        return heap
+    
+    def _top(self, heap: List[Tuple[float, int, str]]) -> Optional[Tuple[float, int, str]]:
+        while heap:
+            negative_score, order, agent_id = heap[0]
+            if self.scores.get(agent_id) == -negative_score:
+                return -negative_score, order, agent_id
+            heapq.heappop(heap)
+        return None
+    
+    def best(self, task: ScheduledTask) -> Optional[Tuple[str, float]]:
+        """(agent_id, score) of the highest-scoring capable agent with free capacity"""
+        top = self._top(self._heap(task.task_type, None))
+        if top is None:
+            return None
+        candidates = [top]
+        specialization = task.task_data.get('required_specialization')
+        if specialization:
+            capability = self.scheduler.agent_capabilities[top[2]]
+            if specialization in capability.specializations:
+                candidates = [(top[0] * 1.5, top[1], top[2])]
+            else:
+                specialist = self._top(self._heap(task.task_type, specialization))
+                if specialist is not None:
+                    candidates.append((specialist[0] * 1.5, specialist[1], specialist[2]))
+        score, _, agent_id = min(candidates, key=lambda candidate: (-candidate[0], candidate[1]))
+        if task.priority in [SchedulePriority.URGENT, SchedulePriority.CRITICAL]:
+            score *= 1.3
+        return agent_id, score
+    
+    def refresh(self, agent_id: str):
+        """Re-score an agent after its workload changed"""
+        score = self.scheduler._agent_base_score(agent_id, self.now)
+        self.scores[agent_id] = score
+        if score is None:
+            return
+        capability = self.scheduler.agent_capabilities[agent_id]
+        for (task_type, specialization), heap in self.heaps.items():
+            if task_type in capability.supported_tasks and (
+                specialization is None or specialization in capability.specializations
+            ):
+                heapq.heappush(heap, (-score, self.order[agent_id], agent_id))
+
 class AgentSchedulerService:
     """
     Intelligent agent scheduler for optimal workload distribution and performance
@@ -100,10 +175,20 @@ class AgentSchedulerService:
     def __init__(self):
         self.agent_capabilities: Dict[str, AgentCapability] = {}
         self.scheduled_tasks: Dict[str, ScheduledTask] = {}
-        self.task_queue: List[ScheduledTask] = []
         self.agent_workloads: Dict[str, AgentWorkload] = {}
         self.completed_tasks: List[ScheduledTask] = []
         
+        # Task queue: pending tasks, split into those blocked on dependencies and per-type ready heaps
+        self.pending_tasks: Dict[str, ScheduledTask] = {}
+        self.ready_queues: Dict[TaskType, List[Tuple[int, int, str]]] = defaultdict(list)  # (-priority weight, seq, task_id)
+        self.pending_dependencies: Dict[str, int] = {}  # task_id -> dependencies not yet completed
+        self.dependency_graph: Dict[str, Set[str]] = defaultdict(set)  # task_id -> dependents
+        self._sequence = itertools.count()
+        
+        # Capability indexes
+        self.agents_by_task_type: Dict[TaskType, Set[str]] = defaultdict(set)
+        self.agents_by_specialization: Dict[str, Set[str]] = defaultdict(set)
+        
         # Scheduling configuration
         self.max_queue_size = 1000
         self.scheduling_interval_seconds = 10
@@ -150,7 +235,18 @@ class AgentSchedulerService:
     
     async def register_agent(self, agent_capability: AgentCapability):
         """Register an agent with its capabilities"""
+        previous = self.agent_capabilities.get(agent_capability.agent_id)
+        if previous:
+            for task_type in previous.supported_tasks:
+                self.agents_by_task_type[task_type].discard(previous.agent_id)
+            for specialization in previous.specializations:
+                self.agents_by_specialization[specialization].discard(previous.agent_id)
+        
         self.agent_capabilities[agent_capability.agent_id] = agent_capability
+        for task_type in agent_capability.supported_tasks:
+            self.agents_by_task_type[task_type].add(agent_capability.agent_id)
+        for specialization in agent_capability.specializations:
+            self.agents_by_specialization[specialization].add(agent_capability.agent_id)
         
         if agent_capability.agent_id not in self.agent_workloads:
             self.agent_workloads[agent_capability.agent_id] = AgentWorkload(
@@ -162,33 +258,65 @@ class AgentSchedulerService:
     async def submit_task(self, task: ScheduledTask) -> str:
         """Submit a new task for scheduling"""
         
-        if len(self.task_queue) >= self.max_queue_size:
+        if len(self.pending_tasks) >= self.max_queue_size:
             raise ValueError(f"Task queue is full (max {self.max_queue_size} tasks)")
         
         # Validate task
         if not await self._validate_task(task):
             raise ValueError("Invalid task configuration")
         
-        # Add to queue
+        # Add to queue; the task becomes ready once its last outstanding dependency completes
         self.scheduled_tasks[task.task_id] = task
-        self.task_queue.append(task)
-        
-        # Sort queue by priority
-        self.task_queue.sort(key=lambda t: self.priority_weights[t.priority], reverse=True)
+        self.pending_tasks[task.task_id] = task
+        outstanding = {
+            dep_id for dep_id in task.dependencies
+            if self.scheduled_tasks[dep_id].status != TaskStatus.COMPLETED
+        }
+        for dep_id in outstanding:
+            self.dependency_graph[dep_id].add(task.task_id)
+        if outstanding:
+            self.pending_dependencies[task.task_id] = len(outstanding)
+        else:
+            self._push_ready(task)
         
         logger.info(f"Submitted task {task.task_id} ({task.task_type.value}, priority: {task.priority.value})")
         return task.task_id
     
+    def _push_ready(self, task: ScheduledTask):
+        heapq.heappush(
+            self.ready_queues[task.task_type],
+            (-self.priority_weights[task.priority], next(self._sequence), task.task_id)
+        )
+    
+    def _peek_ready(self, task_type: TaskType) -> Optional[Tuple[int, int, str]]:
+        """Head of a ready queue, dropping entries for tasks that are no longer pending"""
+        queue = self.ready_queues[task_type]
+        while queue:
+            task = self.pending_tasks.get(queue[0][2])
+            if task is not None and task.status == TaskStatus.PENDING:
+                return queue[0]
+            heapq.heappop(queue)
+        return None
+    
+    def _release_dependents(self, task: ScheduledTask):
+        """Decrement the in-degree of tasks waiting on a completed task, queueing those that reach zero"""
+        for dependent_id in self.dependency_graph.pop(task.task_id, ()):
+            remaining = self.pending_dependencies.get(dependent_id)
+            if remaining is None:
+                continue
+            if remaining > 1:
+                self.pending_dependencies[dependent_id] = remaining - 1
+                continue
+            del self.pending_dependencies[dependent_id]
+            dependent = self.pending_tasks.get(dependent_id)
+            if dependent is not None and dependent.status == TaskStatus.PENDING:
+                self._push_ready(dependent)
+    
     async def _validate_task(self, task: ScheduledTask) -> bool:
         """Validate task configuration"""
         
         # Check if any agent can handle this task type
-        capable_agents = [
-            agent for agent in self.agent_capabilities.values()
-            if task.task_type in agent.supported_tasks
-        ]
-        
-        if not capable_agents:
+        if not self.agents_by_task_type.get(task.task_type):
             logger.warning(f"No agents capable of handling task type {task.task_type.value}")
             return False
         
@@ -201,71 +329,48 @@ class AgentSchedulerService:
         return True
     
     async def _process_task_queue(self):
-        """Process pending tasks in the queue"""
+        """Assign ready tasks, highest priority first, until the queues drain or capable agents are full"""
         
         processed_count = 0
+        selector = _AgentSelector(self, datetime.now(timezone.utc))
+        task_types = [task_type for task_type in list(self.ready_queues) if self._peek_ready(task_type)]
         
-        for task in self.task_queue[:]:
-            if task.status != TaskStatus.PENDING:
-                continue
-            
-            # Check dependencies
-            if not await self._dependencies_satisfied(task):
-                continue
+        while task_types:
+            # Highest priority (then oldest) ready task across the task types that still have free agents
+            task_type = min(task_types, key=self._peek_ready)
+            task = self.pending_tasks[self._peek_ready(task_type)[2]]
             
-            # Find best agent for task
-            best_agent = await self._find_best_agent(task)
-            if not best_agent:
+            best = selector.best(task)
+            if best is None:
+                task_types.remove(task_type)  # Every capable agent is at capacity
                 continue
             
-            # Assign task to agent
-            await self._assign_task_to_agent(task, best_agent.agent_id)
+            heapq.heappop(self.ready_queues[task_type])
+            del self.pending_tasks[task.task_id]
+            agent_id, _ = best
+            await self._assign_task_to_agent(task, agent_id)
+            selector.refresh(agent_id)
             processed_count += 1
             
-            # Remove from queue
-            self.task_queue.remove(task)
+            if self._peek_ready(task_type) is None:
+                task_types.remove(task_type)
         
         if processed_count > 0:
             logger.info(f"Processed {processed_count} tasks in scheduling cycle")
     
-    async def _dependencies_satisfied(self, task: ScheduledTask) -> bool:
-        """Check if all task dependencies are satisfied"""
-        
-        for dep_id in task.dependencies:
-            dep_task = self.scheduled_tasks.get(dep_id)
-            if not dep_task or dep_task.status != TaskStatus.COMPLETED:
-                return False
-        
-        return True
-    
     async def _find_best_agent(self, task: ScheduledTask) -> Optional[AgentCapability]:
-        """Find the best agent for a task using intelligent scoring"""
-        
-        capable_agents = [
-            agent for agent in self.agent_capabilities.values()
-            if task.task_type in agent.supported_tasks
-        ]
-        
-        if not capable_agents:
-            return None
+        """Find the best agent with free capacity for a task using intelligent scoring"""
         
-        best_agent = None
-        best_score = -1
-        
-        for agent in capable_agents:
-            score = await self._calculate_agent_score(agent, task)
-            if score > best_score:
-                best_score = score
-                best_agent = agent
-        
-        return best_agent
+        best = _AgentSelector(self, datetime.now(timezone.utc)).best(task)
+        return self.agent_capabilities[best[0]] if best else None
     
-    async def _calculate_agent_score(self, agent: AgentCapability, task: ScheduledTask) -> float:
-        """Calculate agent suitability score for a task"""
+    def _agent_base_score(self, agent_id: str, now: datetime) -> Optional[float]:
+        """Task-independent part of the agent score; None when the agent has no free capacity"""
         
-        workload = self.agent_workloads.get(agent.agent_id)
-        if not workload:
-            return 0.0
+        agent = self.agent_capabilities[agent_id]
+        workload = self.agent_workloads.get(agent_id)
+        if not workload or len(workload.active_tasks) >= agent.max_concurrent_tasks:
+            return None
         
         # Base score from agent performance
         score = agent.performance_score
@@ -275,17 +380,25 @@ class AgentSchedulerService:
         if utilization > self.workload_balance_threshold:
             score *= (1.0 - utilization + self.workload_balance_threshold)
         
-        # Bonus for specializations
-        if hasattr(task.task_data, 'required_specialization'):
-            required_spec = task.task_data.get('required_specialization')
-            if required_spec in agent.specializations:
-                score *= 1.5
-        
         # Recent activity bonus
-        time_since_active = (datetime.now(timezone.utc) - agent.last_active).total_seconds()
+        time_since_active = (now - agent.last_active).total_seconds()
         if time_since_active < 300:  # 5 minutes
             score *= 1.2
         
+        return score
+    
+    async def _calculate_agent_score(self, agent: AgentCapability, task: ScheduledTask) -> float:
+        """Calculate agent suitability score for a task"""
+        
+        score = self._agent_base_score(agent.agent_id, datetime.now(timezone.utc))
+        if score is None:
+            return 0.0
+        
+        # Bonus for specializations
+        required_spec = task.task_data.get('required_specialization')
+        if required_spec and required_spec in agent.specializations:
+            score *= 1.5
+        
         # Priority bonus for high-priority tasks
         if task.priority in [SchedulePriority.URGENT, SchedulePriority.CRITICAL]:
             score *= 1.3
@@ -317,26 +430,7 @@ class AgentSchedulerService:
             
             logger.info(f"Starting execution of task {task.task_id} on agent {task.agent_id}")
             
-            # Simulate task execution (in real implementation, this would call agent services)
-            execution_time = task.estimated_duration_minutes or 2  # Default 2 minutes
-            await asyncio.sleep(execution_time * 60)  # Convert to seconds for simulation
-            
-            # Mark as completed
-            task.status = TaskStatus.COMPLETED
-            task.completed_at = datetime.now(timezone.utc)
-            task.result = {
-                "success": True,
-                "execution_time_minutes": execution_time,
-                "agent_id": task.agent_id
-            }
-            
-            # Update workload
-            await self._update_agent_workload_on_completion(task)
-            
-            # Move to completed tasks
-            self.completed_tasks.append(task)
-            
-            logger.info(f"Completed task {task.task_id} successfully")
+            await self._finish_task(task, await self._run_task(task))
             
         except Exception as e:
             logger.error(f"Task {task.task_id} failed: {e}", exc_info=True)
@@ -345,6 +439,9 @@ class AgentSchedulerService:
             task.error_message = str(e)
             task.completed_at = datetime.now(timezone.utc)
             
+            # Free the failed attempt's slot first; the retry may need the same agent
+            await self._update_agent_workload_on_completion(task)
+            
             # Handle retry logic
             if task.retry_count < task.max_retries:
                 task.retry_count += 1
@@ -355,12 +452,41 @@ class AgentSchedulerService:
                 task.completed_at = None
                 
                 # Add back to queue for retry
-                self.task_queue.append(task)
+                self.pending_tasks[task.task_id] = task
+                self._push_ready(task)
                 logger.info(f"Retrying task {task.task_id} (attempt {task.retry_count + 1})")
             else:
-                await self._update_agent_workload_on_completion(task)
                 logger.error(f"Task {task.task_id} failed permanently after {task.max_retries} retries")
     
+    async def _run_task(self, task: ScheduledTask) -> Dict[str, Any]:
+        """Do the task's work and return its result"""
+        
+        # Simulate task execution (in real implementation, this would call agent services)
+        execution_time = task.estimated_duration_minutes or 2  # Default 2 minutes
+        await asyncio.sleep(execution_time * 60)  # Convert to seconds for simulation
+        
+        return {
+            "success": True,
+            "execution_time_minutes": execution_time,
+            "agent_id": task.agent_id
+        }
+    
+    async def _finish_task(self, task: ScheduledTask, result: Dict[str, Any]):
+        """Mark a task completed, free its agent slot and release tasks that depended on it"""
+        
+        task.status = TaskStatus.COMPLETED
+        task.completed_at = datetime.now(timezone.utc)
+        task.result = result
+        
+        # Update workload
+        await self._update_agent_workload_on_completion(task)
+        
+        # Move to completed tasks
+        self.completed_tasks.append(task)
+        self._release_dependents(task)
+        
+        logger.info(f"Completed task {task.task_id} successfully")
+    
     async def _update_agent_workload_on_completion(self, task: ScheduledTask):
         """Update agent workload metrics when task completes"""
         
@@ -445,9 +571,9 @@ class AgentSchedulerService:
         task.status = TaskStatus.CANCELLED
         task.completed_at = datetime.now(timezone.utc)
         
-        # Remove from queue if pending
-        if task in self.task_queue:
-            self.task_queue.remove(task)
+        # Remove from queue if pending (its ready-queue entry is skipped lazily)
+        self.pending_tasks.pop(task_id, None)
+        self.pending_dependencies.pop(task_id, None)
         
         # Update agent workload if assigned
         if task.agent_id:
@@ -465,7 +591,7 @@ class AgentSchedulerService:
         queue_by_priority = defaultdict(int)
         queue_by_type = defaultdict(int)
         
-        for task in self.task_queue:
+        for task in self.pending_tasks.values():
             queue_by_priority[task.priority.value] += 1
             queue_by_type[task.task_type.value] += 1
         
@@ -484,7 +610,9 @@ class AgentSchedulerService:
         return {
             "scheduler_status": "running" if self.scheduler_running else "stopped",
             "queue_statistics": {
-                "total_queued": len(self.task_queue),
+                "total_queued": len(self.pending_tasks),
+                "ready": len(self.pending_tasks) - len(self.pending_dependencies),
+                "waiting_on_dependencies": len(self.pending_dependencies),
                 "by_priority": dict(queue_by_priority),
                 "by_type": dict(queue_by_type)
             },
@@ -1,9 +1,12 @@
 """
 Agent State Manager for persistent storage of agent trading states
 """
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 from datetime import datetime
+from collections import defaultdict
 import asyncio # For asyncio.Lock
+import json
+import os
 from loguru import logger
 
 # Assuming AgentPersistenceService is in the same package directory
@@ -14,14 +17,41 @@ class AgentStateManager:
     """
     Service for managing agent states with multiple layers of caching and persistence.
     Orchestrates state retrieval and updates using AgentPersistenceService.
+
+    Updates are serialized per agent, so a slow write for one agent never blocks another.
+    In write-through mode (the default) every update is persisted to Supabase and Redis
+    before it returns. In write-behind mode the in-memory cache is authoritative: updates
+    are applied to it immediately, appended to a local journal, and coalesced into one
+    batched Supabase upsert per flush interval. Unflushed journal entries are replayed
+    by start() after a crash.
     """
     
-    def __init__(self, persistence_service: AgentPersistenceService, redis_realtime_ttl_seconds: int = 3600):
+    def __init__(
+        self,
+        persistence_service: AgentPersistenceService,
+        redis_realtime_ttl_seconds: int = 3600,
+        write_behind: bool = False,
+        flush_interval_seconds: float = 1.0,
+        journal_path: Optional[str] = None
+    ):
         self.persistence_service: AgentPersistenceService = persistence_service
         self.redis_realtime_ttl_seconds: int = redis_realtime_ttl_seconds
         self.in_memory_cache: Dict[str, Dict] = {}
-        self.lock: asyncio.Lock = asyncio.Lock()
-        logger.info("AgentStateManager initialized with AgentPersistenceService.")
+        self.agent_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+        # Write-behind state
+        self.write_behind: bool = write_behind
+        self.flush_interval_seconds: float = flush_interval_seconds
+        self.journal_path: Optional[str] = journal_path
+        self.dirty_agents: Set[str] = set()
+        self.flush_lock: asyncio.Lock = asyncio.Lock()
+        self.journal_lock: asyncio.Lock = asyncio.Lock() # Orders journal appends against compaction
+        self.flush_task: Optional[asyncio.Task] = None
+        self.flush_stats: Dict[str, int] = {"flushes": 0, "records_flushed": 0, "updates_coalesced": 0, "flush_failures": 0}
+        self._journal_file = None
+        self._pending_updates: int = 0
+
+        logger.info(f"AgentStateManager initialized with AgentPersistenceService (write_behind={write_behind}).")
     
     async def get_agent_state(self, agent_id: str) -> Dict:
         """
@@ -84,67 +114,109 @@ class AgentStateManager:
         memory_references: Optional[List[str]] = None
     ) -> Optional[Dict]:
         """
-        Update the agent's state in Supabase (as source of truth), then update Redis and in-memory cache.
-        Returns the persisted state record from Supabase, or None on failure.
+        Replace the agent's state. In write-through mode Supabase is updated first (as source of truth),
+        then Redis and the in-memory cache; in write-behind mode the cache is updated and the write is queued.
+        Returns the state record, or None on failure.
         """
         logger.info(f"Updating state for agent: {agent_id}. Strategy type: {strategy_type}. State preview: {str(state)[:100]}...")
         
-        async with self.lock:
-            try:
-                updated_supa_record = await self.persistence_service.save_agent_state_to_supabase(
-                    agent_id, strategy_type, state, memory_references
-                )
-                
-                if not updated_supa_record:
-                    logger.error(f"Failed to save state to Supabase for agent {agent_id}. Aborting update.")
-                    return None
-
-                redis_success = await self.persistence_service.save_realtime_state_to_redis(
-                    agent_id, updated_supa_record, self.redis_realtime_ttl_seconds
-                )
-                if not redis_success:
-                    logger.warning(f"Failed to save state to Redis for agent {agent_id}, but Supabase save was successful.")
+        async with self.agent_locks[agent_id]:
+            return await self._commit_state(
+                agent_id, state, strategy_type, memory_references,
+                journal_entry={"op": "set", "state": state, "strategy_type": strategy_type, "memory_references": memory_references}
+            )
 
-                self.in_memory_cache[agent_id] = updated_supa_record
+    async def update_state_fields(self, agent_id: str, delta: Dict[str, Any]) -> Optional[Dict]:
+        """Merge a delta of top-level fields into the agent's 'state' dictionary."""
+        logger.info(f"Attempting to update fields {list(delta)} for agent: {agent_id}.")
 
-                logger.info(f"Successfully updated state for agent: {agent_id}.")
-                return updated_supa_record
-                    
+        async with self.agent_locks[agent_id]:
+            try:
+                current_full_record = await self.get_agent_state(agent_id)
+                merged_state = {**current_full_record.get("state", {}), **delta}
+                return await self._commit_state(
+                    agent_id,
+                    merged_state,
+                    current_full_record.get("strategy_type", "unknown_on_field_update"),
+                    current_full_record.get("memory_references"),
+                    journal_entry={"op": "merge", "delta": delta}
+                )
             except Exception as e:
-                logger.exception(f"Unexpected error updating agent state for {agent_id}: {e}")
+                logger.exception(f"Error updating state fields {list(delta)} for agent {agent_id}: {e}")
                 return None
-    
+
     async def update_state_field(self, agent_id: str, field: str, value: Any) -> Optional[Dict]:
         """Update a specific field in the agent's 'state' dictionary."""
-        logger.info(f"Attempting to update field '{field}' for agent: {agent_id}.")
-        
+        return await self.update_state_fields(agent_id, {field: value})
+
+    async def _commit_state(
+        self,
+        agent_id: str,
+        state: Dict,
+        strategy_type: str,
+        memory_references: Optional[List[str]],
+        journal_entry: Dict
+    ) -> Optional[Dict]:
+        """Persist (write-through) or queue (write-behind) a new state. Caller holds the agent's lock."""
+        if self.write_behind:
+            now = datetime.utcnow().isoformat()
+            record = dict(self.in_memory_cache.get(agent_id) or {"agent_id": agent_id, "created_at": now})
+            record.pop("source", None)
+            record.update({
+                "state": state,
+                "strategy_type": strategy_type,
+                "memory_references": memory_references or [],
+                "updated_at": now
+            })
+            async with self.journal_lock:
+                try:
+                    await self._append_journal({"agent_id": agent_id, **journal_entry})
+                except Exception as e:
+                    logger.exception(f"Failed to journal state update for agent {agent_id}: {e}")
+                    return None
+
+                self.in_memory_cache[agent_id] = record
+                if agent_id in self.dirty_agents:
+                    self.flush_stats["updates_coalesced"] += 1
+                self.dirty_agents.add(agent_id)
+                self._pending_updates += 1
+            return record
+
         try:
-            current_full_record = await self.get_agent_state(agent_id)
+            updated_supa_record = await self.persistence_service.save_agent_state_to_supabase(
+                agent_id, strategy_type, state, memory_references
+            )
             
-            state_dict_to_modify = current_full_record.get("state", {}).copy()
-            strategy_type = current_full_record.get("strategy_type", "unknown_on_field_update")
-            memory_references = current_full_record.get("memory_references")
+            if not updated_supa_record:
+                logger.error(f"Failed to save state to Supabase for agent {agent_id}. Aborting update.")
+                return None
 
-            state_dict_to_modify[field] = value
-            
-            logger.debug(f"Calling update_agent_state for field update on agent {agent_id}.")
-            return await self.update_agent_state(
-                agent_id,
-                state_dict_to_modify,
-                strategy_type=strategy_type,
-                memory_references=memory_references
+            redis_success = await self.persistence_service.save_realtime_state_to_redis(
+                agent_id, updated_supa_record, self.redis_realtime_ttl_seconds
             )
-            
+            if not redis_success:
+                logger.warning(f"Failed to save state to Redis for agent {agent_id}, but Supabase save was successful.")
+
+            self.in_memory_cache[agent_id] = updated_supa_record
+
+            logger.info(f"Successfully updated state for agent: {agent_id}.")
+            return updated_supa_record
+                
         except Exception as e:
-            logger.exception(f"Error updating state field '{field}' for agent {agent_id}: {e}")
+            logger.exception(f"Unexpected error updating agent state for {agent_id}: {e}")
             return None
     
     async def delete_agent_state(self, agent_id: str) -> bool:
         """Delete the agent's state from all persistence layers and caches."""
         logger.info(f"Attempting to delete state for agent: {agent_id}.")
         
-        async with self.lock:
+        async with self.agent_locks[agent_id], self.flush_lock:
             try:
+                if self.write_behind:
+                    async with self.journal_lock:
+                        self.dirty_agents.discard(agent_id)
+                        await self._append_journal({"agent_id": agent_id, "op": "delete"})
+
                 supa_deleted = await self.persistence_service.delete_agent_state_from_supabase(agent_id)
                 redis_op_success = await self.persistence_service.delete_realtime_state_from_redis(agent_id)
 
@@ -180,31 +252,25 @@ class AgentStateManager:
             raise
             
     async def _update_decision_history(self, agent_id: str, decision: Dict):
-        """Helper to update decision history in agent's 'state' dictionary."""
+        """Helper to prepend a decision to the history in the agent's 'state' dictionary."""
         logger.debug(f"Updating decision history for agent {agent_id}.")
-        current_full_record = await self.get_agent_state(agent_id)
-
-        state_dict_to_modify = current_full_record.get("state", {}).copy()
-        strategy_type = current_full_record.get("strategy_type", "decision_history_update")
-        memory_references = current_full_record.get("memory_references")
-
-        if "decisionHistory" not in state_dict_to_modify:
-            state_dict_to_modify["decisionHistory"] = []
-
         if "timestamp" not in decision:
             decision["timestamp"] = datetime.utcnow().isoformat()
 
         max_history = 50
-        state_dict_to_modify["decisionHistory"] = [decision] + state_dict_to_modify["decisionHistory"][:max_history-1]
-
-        updated_record = await self.update_agent_state(
-            agent_id,
-            state_dict_to_modify,
-            strategy_type=strategy_type,
-            memory_references=memory_references
-        )
+        async with self.agent_locks[agent_id]:
+            current_full_record = await self.get_agent_state(agent_id)
+            decision_history = [decision] + current_full_record.get("state", {}).get("decisionHistory", [])[:max_history-1]
+
+            updated_record = await self._commit_state(
+                agent_id,
+                {**current_full_record.get("state", {}), "decisionHistory": decision_history},
+                current_full_record.get("strategy_type", "decision_history_update"),
+                current_full_record.get("memory_references"),
+                journal_entry={"op": "merge", "delta": {"decisionHistory": decision_history}}
+            )
         if not updated_record:
-             raise Exception(f"Failed to save updated decision history for agent {agent_id} via update_agent_state.")
+             raise Exception(f"Failed to save updated decision history for agent {agent_id}.")
         else:
             logger.debug(f"Decision history updated and saved for agent {agent_id}.")
             
@@ -277,4 +343,172 @@ class AgentStateManager:
                 
         except Exception as e:
             logger.exception(f"Error restoring agent checkpoint for {agent_id} from {checkpoint_id}: {e}")
-            return None
\ No newline at end of file
+            return None
+    # --- Write-behind ---
+
+    async def start(self):
+        """Replay any unflushed journal entries and start the background flush loop (write-behind mode only)."""
+        if not self.write_behind or self.flush_task is not None:
+            return
+        if self.journal_path:
+            replayed = await self._replay_journal()
+            if replayed:
+                logger.warning(f"Replayed {replayed} unflushed state updates from journal {self.journal_path}.")
+                await self.flush()
+        self.flush_task = asyncio.create_task(self._flush_loop())
+        logger.info(f"AgentStateManager write-behind started (flush interval {self.flush_interval_seconds}s).")
+
+    async def shutdown(self):
+        """Stop the flush loop and flush everything still pending."""
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            try:
+                await self.flush_task
+            except asyncio.CancelledError:
+                pass
+            self.flush_task = None
+        if self.dirty_agents:
+            await self.flush()
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            if self.dirty_agents:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.exception(f"Unexpected error in agent state flush loop: {e}")
+
+    async def flush(self) -> int:
+        """
+        Write every dirty agent's current record to Supabase in one batched upsert, then refresh Redis.
+        Agents updated while the flush is in flight stay dirty for the next one. Returns the number of records flushed.
+        """
+        async with self.flush_lock:
+            if not self.dirty_agents:
+                return 0
+
+            flushing = self.dirty_agents
+            self.dirty_agents = set()
+            self._pending_updates = 0
+            records = [self.in_memory_cache[agent_id] for agent_id in flushing if agent_id in self.in_memory_cache]
+
+            try:
+                saved_records = await self.persistence_service.save_agent_states_to_supabase_batch(records)
+            except Exception as e:
+                logger.exception(f"Unexpected error flushing {len(records)} agent states: {e}")
+                saved_records = None
+
+            if saved_records is None:
+                self.dirty_agents |= flushing
+                self.flush_stats["flush_failures"] += 1
+                logger.error(f"Failed to flush {len(records)} agent states to Supabase; they remain journaled and will be retried.")
+                return 0
+
+            redis_results = await asyncio.gather(*(
+                self.persistence_service.save_realtime_state_to_redis(
+                    record["agent_id"], record, self.redis_realtime_ttl_seconds
+                )
+                for record in records
+            ), return_exceptions=True)
+            redis_failures = sum(1 for result in redis_results if result is not True)
+            if redis_failures:
+                logger.warning(f"Failed to refresh Redis for {redis_failures} of {len(records)} flushed agent states.")
+
+            await self._compact_journal()
+            self.flush_stats["flushes"] += 1
+            self.flush_stats["records_flushed"] += len(records)
+            logger.debug(f"Flushed {len(records)} agent states to Supabase.")
+            return len(records)
+
+    def get_flush_stats(self) -> Dict[str, Any]:
+        return {
+            **self.flush_stats,
+            "dirty_agents": len(self.dirty_agents),
+            "pending_updates": self._pending_updates,
+            "write_behind": self.write_behind
+        }
+
+    async def _append_journal(self, entry: Dict):
+        """Durably append one entry to the journal. Caller holds journal_lock."""
+        if not self.journal_path:
+            return
+        line = json.dumps(entry, default=str) + "\n"
+        await asyncio.to_thread(self._write_journal_line, line)
+
+    def _write_journal_line(self, line: str):
+        if self._journal_file is None:
+            self._journal_file = open(self.journal_path, "a", encoding="utf-8")
+        self._journal_file.write(line)
+        self._journal_file.flush()
+        os.fsync(self._journal_file.fileno())
+
+    async def _compact_journal(self):
+        """Rewrite the journal so it only holds full records for agents that are still unflushed."""
+        if not self.journal_path:
+            return
+        async with self.journal_lock:
+            await self._rewrite_unflushed_journal()
+
+    async def _rewrite_unflushed_journal(self):
+        lines = [
+            json.dumps({
+                "agent_id": agent_id, "op": "set",
+                "state": self.in_memory_cache[agent_id].get("state", {}),
+                "strategy_type": self.in_memory_cache[agent_id].get("strategy_type", "unknown"),
+                "memory_references": self.in_memory_cache[agent_id].get("memory_references")
+            }, default=str) + "\n"
+            for agent_id in self.dirty_agents if agent_id in self.in_memory_cache
+        ]
+        await asyncio.to_thread(self._rewrite_journal, lines)
+
+    def _rewrite_journal(self, lines: List[str]):
+        temp_path = f"{self.journal_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            handle.writelines(lines)
+            handle.flush()
+            os.fsync(handle.fileno())
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+        os.replace(temp_path, self.journal_path)
+
+    async def _replay_journal(self) -> int:
+        if not os.path.exists(self.journal_path):
+            return 0
+        with open(self.journal_path, encoding="utf-8") as handle:
+            lines = handle.readlines()
+
+        replayed = 0
+        for line_number, line in enumerate(lines, 1):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-write; everything before it is intact
+                logger.warning(f"Skipping unreadable journal line {line_number} in {self.journal_path}.")
+                continue
+
+            agent_id = entry["agent_id"]
+            if entry["op"] == "delete":
+                self.in_memory_cache.pop(agent_id, None)
+                self.dirty_agents.discard(agent_id)
+                continue
+
+            current_full_record = await self.get_agent_state(agent_id)
+            if entry["op"] == "merge":
+                state = {**current_full_record.get("state", {}), **entry["delta"]}
+                strategy_type = current_full_record.get("strategy_type", "unknown")
+                memory_references = current_full_record.get("memory_references")
+            else:
+                state, strategy_type, memory_references = entry["state"], entry["strategy_type"], entry.get("memory_references")
+
+            record = dict(current_full_record)
+            record.pop("source", None)
+            record.update({"state": state, "strategy_type": strategy_type, "memory_references": memory_references or []})
+            self.in_memory_cache[agent_id] = record
+            self.dirty_agents.add(agent_id)
+            replayed += 1
+        return replayed
@@ -3,12 +3,14 @@ Real-time Alerting and Notification Service - Phase 5 Implementation
 Comprehensive alerting system for trading operations and risk management
 """
 import asyncio
+import bisect
 import json
+import operator
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Any, Literal, Callable
+from typing import Dict, List, Optional, Any, Literal, Callable, Tuple, Set
 from loguru import logger
 from pydantic import BaseModel, Field
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 import uuid
 from collections import defaultdict, deque
@@ -104,6 +106,60 @@ class NotificationTemplate(BaseModel):
     # Channel-specific formatting
     formatting_options: Dict[str, Any] = Field(default_factory=dict)
 
+THRESHOLD_OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    "gt": operator.gt,
+    "lt": operator.lt,
+    "gte": operator.ge,
+    "lte": operator.le,
+    "eq": lambda value, threshold: abs(value - threshold) < 0.001
+}
+
+# (agent_id, symbol) a rule listens to; None matches any agent / symbol
+RuleScope = Tuple[Optional[str], Optional[str]]
+
+@dataclass
+class CompiledRule:
+    """Metric-driven rule reduced to what evaluation needs"""
+    rule_id: str
+    metric: str
+    condition_type: str  # "threshold" or "change"
+    scopes: List[RuleScope]
+    threshold: Optional[float] = None
+    predicate: Optional[Callable[[float, float], bool]] = None
+    window_seconds: float = 0.0
+
+@dataclass
+class MetricWindow:
+    """Time-ordered samples of one metric series, shared by every rule that reads it"""
+    times: List[float] = field(default_factory=list)
+    values: List[float] = field(default_factory=list)
+    head: int = 0  # Samples before head have been pruned
+
+    def append(self, timestamp: float, value: float, retention_seconds: float):
+        if self.times and timestamp < self.times[-1]:
+            timestamp = self.times[-1]  # Keep the series ordered if a late sample arrives
+        self.times.append(timestamp)
+        self.values.append(value)
+        # Keep the newest sample at or before the retention cutoff: it is the baseline for the longest window
+        cutoff = bisect.bisect_right(self.times, timestamp - retention_seconds, self.head) - 1
+        if cutoff > self.head:
+            self.head = cutoff
+            if self.head > 1024 and self.head * 2 > len(self.times):
+                del self.times[:self.head]
+                del self.values[:self.head]
+                self.head = 0
+
+    def latest(self) -> Optional[float]:
+        return self.values[-1] if len(self.values) > self.head else None
+
+    def value_at(self, timestamp: float) -> Optional[float]:
+        """Newest value observed at or before `timestamp`"""
+        index = bisect.bisect_right(self.times, timestamp, self.head) - 1
+        return self.values[index] if index >= self.head else None
+
+    def __len__(self) -> int:
+        return len(self.times) - self.head
+
 @dataclass
 class NotificationHistory:
     """Notification delivery history"""
@@ -131,6 +187,14 @@ class AlertingService:
         self.notification_handlers: Dict[NotificationChannel, Callable] = {}
         self.alert_queue: asyncio.Queue = asyncio.Queue()
         
+        # Compiled metric rules: metric -> scope -> rule ids, and one sample window per metric series
+        self.compiled_rules: Dict[str, CompiledRule] = {}
+        self.rule_index: Dict[str, Dict[RuleScope, Set[str]]] = defaultdict(lambda: defaultdict(set))
+        self.metric_windows: Dict[Tuple[str, Optional[str], Optional[str]], MetricWindow] = {}
+        self.metric_retention_seconds: Dict[str, float] = defaultdict(float)
+        self.metric_updates = 0
+        self.rule_evaluations = 0
+        
         # Configuration
         self.max_alerts_per_minute = 100
         self.alert_retention_days = 30
@@ -206,6 +270,7 @@ class AlertingService:
             template_id="risk_limit_breach",
             category=AlertCategory.RISK,
             severity=AlertSeverity.WARNING,
+            channel=NotificationChannel.DASHBOARD,
             subject_template="Risk Limit Breach - {agent_id}",
             body_template="Agent {agent_id} has breached risk limits. Current exposure: {exposure}, Limit: {limit}"
         )
@@ -215,6 +280,7 @@ class AlertingService:
             template_id="performance_degradation",
             category=AlertCategory.PERFORMANCE,
             severity=AlertSeverity.WARNING,
+            channel=NotificationChannel.DASHBOARD,
             subject_template="Performance Degradation - {agent_id}",
             body_template="Agent {agent_id} performance has degraded. Win rate: {win_rate}, Drawdown: {drawdown}"
         )
@@ -246,10 +312,140 @@ class AlertingService:
         
         # Store rule
         self.alert_rules[rule.rule_id] = rule
+        self._index_rule(rule)
         
         logger.info(f"Created alert rule: {rule.name} ({rule.rule_id})")
         return rule.rule_id
     
+    def _compile_rule(self, rule: AlertRule) -> Optional[CompiledRule]:
+        """Compile threshold/change rules on a named metric; other rules stay on the polled processors"""
+        
+        params = rule.condition_parameters
+        metric = params.get("metric")
+        if not metric or rule.condition_type not in ("threshold", "change"):
+            return None
+        
+        scopes = [
+            (agent_id, symbol)
+            for agent_id in (rule.target_agents or [None])
+            for symbol in (rule.target_symbols or [None])
+        ]
+        if rule.condition_type == "threshold":
+            predicate = THRESHOLD_OPERATORS.get(params.get("operator", "gt"))
+            if params.get("threshold") is None or predicate is None:
+                return None
+            return CompiledRule(rule.rule_id, metric, "threshold", scopes, params["threshold"], predicate)
+        
+        if params.get("change_threshold") is None:
+            return None
+        return CompiledRule(
+            rule.rule_id, metric, "change", scopes, params["change_threshold"],
+            window_seconds=params.get("time_window_minutes", 60) * 60
+        )
+    
+    def _index_rule(self, rule: AlertRule):
+        self._unindex_rule(rule.rule_id)
+        compiled = self._compile_rule(rule)
+        if compiled is None:
+            return
+        
+        self.compiled_rules[rule.rule_id] = compiled
+        for scope in compiled.scopes:
+            self.rule_index[compiled.metric][scope].add(rule.rule_id)
+        self.metric_retention_seconds[compiled.metric] = max(
+            self.metric_retention_seconds[compiled.metric], compiled.window_seconds
+        )
+    
+    def _unindex_rule(self, rule_id: str):
+        compiled = self.compiled_rules.pop(rule_id, None)
+        if compiled is None:
+            return
+        
+        scopes = self.rule_index[compiled.metric]
+        for scope in compiled.scopes:
+            scopes[scope].discard(rule_id)
+            if not scopes[scope]:
+                del scopes[scope]
+        if not scopes:
+            del self.rule_index[compiled.metric]
+        self.metric_retention_seconds[compiled.metric] = max(
+            (self.compiled_rules[other].window_seconds
+             for rule_ids in self.rule_index.get(compiled.metric, {}).values() for other in rule_ids),
+            default=0.0
+        )
+    
+    async def delete_alert_rule(self, rule_id: str) -> bool:
+        """Delete an alert rule"""
+        
+        if self.alert_rules.pop(rule_id, None) is None:
+            return False
+        self._unindex_rule(rule_id)
+        return True
+    
+    async def publish_metric(
+        self,
+        metric: str,
+        value: float,
+        agent_id: Optional[str] = None,
+        symbol: Optional[str] = None,
+        timestamp: Optional[datetime] = None
+    ) -> int:
+        """
+        Record a metric sample and evaluate only the rules subscribed to it: rules on this metric
+        whose targets include the agent and symbol (or leave them open). Returns the rules evaluated.
+        """
+        
+        scopes = self.rule_index.get(metric)
+        if not scopes:
+            return 0
+        
+        rule_ids: Set[str] = set()
+        for scope in {(agent_id, symbol), (agent_id, None), (None, symbol), (None, None)}:
+            rule_ids.update(scopes.get(scope, ()))
+        await self._evaluate_metric_rules(metric, value, agent_id, symbol, rule_ids, timestamp)
+        return len(rule_ids)
+    
+    async def _evaluate_metric_rules(
+        self,
+        metric: str,
+        value: float,
+        agent_id: Optional[str],
+        symbol: Optional[str],
+        rule_ids: Set[str],
+        timestamp: Optional[datetime] = None
+    ):
+        """Append the sample to its series window and evaluate `rule_ids` against it"""
+        
+        wall_clock = datetime.now(timezone.utc)  # Throttling follows wall-clock time, like alert processing
+        now = (timestamp or wall_clock).timestamp()
+        window = self.metric_windows.get((metric, agent_id, symbol))
+        if window is None:
+            window = self.metric_windows[(metric, agent_id, symbol)] = MetricWindow()
+        window.append(now, value, self.metric_retention_seconds[metric])
+        self.metric_updates += 1
+        
+        baselines: Dict[float, Optional[float]] = {}  # Window length -> value at its start, shared by change rules
+        for rule_id in rule_ids:
+            rule = self.alert_rules.get(rule_id)
+            if not rule or not rule.is_active or self._is_throttled(rule, wall_clock):
+                continue
+            
+            compiled = self.compiled_rules[rule_id]
+            self.rule_evaluations += 1
+            if compiled.condition_type == "threshold":
+                if not compiled.predicate(value, compiled.threshold):
+                    continue
+                triggered, context = self._threshold_result(rule, value)
+            else:
+                if compiled.window_seconds not in baselines:
+                    baselines[compiled.window_seconds] = window.value_at(now - compiled.window_seconds)
+                triggered, context = self._change_result(rule, value, baselines[compiled.window_seconds])
+            
+            if triggered:
+                context.setdefault("agent_id", agent_id)
+                context.setdefault("symbol", symbol)
+                await self._fire_rule(rule, context)
+    
     async def trigger_alert(
         self,
         rule_id: str,
@@ -422,10 +618,21 @@ class AlertingService:
         return True
     
     async def _check_all_alert_rules(self):
-        """Check all active alert rules for trigger conditions"""
-        
-        for rule in self.alert_rules.values():
-            if not rule.is_active:
+        """Poll each subscribed metric scope once for the rules on it, then check the rules that are not metric-driven"""
+        
+        for metric, scopes in list(self.rule_index.items()):
+            for (agent_id, symbol), rule_ids in list(scopes.items()):
+                try:
+                    value = await self._get_metric_value(
+                        metric, [agent_id] if agent_id else [], [symbol] if symbol else []
+                    )
+                    if value is not None:
+                        await self._evaluate_metric_rules(metric, value, agent_id, symbol, set(rule_ids))
+                except Exception as e:
+                    logger.error(f"Error polling metric {metric} ({agent_id}, {symbol}): {e}")
+        
+        for rule in list(self.alert_rules.values()):
+            if not rule.is_active or rule.rule_id in self.compiled_rules:
                 continue
             
             try:
@@ -433,6 +640,24 @@ class AlertingService:
             except Exception as e:
                 logger.error(f"Error checking alert rule {rule.rule_id}: {e}")
     
+    def _is_throttled(self, rule: AlertRule, now: Optional[datetime] = None) -> bool:
+        if not rule.last_triggered:
+            return False
+        time_since_last = ((now or datetime.now(timezone.utc)) - rule.last_triggered).total_seconds()
+        return time_since_last < rule.notification_throttle_minutes * 60
+    
+    async def _fire_rule(self, rule: AlertRule, context: Dict[str, Any]):
+        # Throttle from now rather than from when the queued alert is processed
+        rule.last_triggered = datetime.now(timezone.utc)
+        await self.trigger_alert(
+            rule_id=rule.rule_id,
+            title=context.get("title", rule.name),
+            message=context.get("message", rule.description),
+            agent_id=context.get("agent_id"),
+            symbol=context.get("symbol"),
+            data=context.get("data", {})
+        )
+    
     async def _check_alert_rule(self, rule: AlertRule):
         """Check a specific alert rule for trigger conditions"""
         
@@ -443,23 +668,14 @@ class AlertingService:
         
         try:
             # Check throttling
-            if rule.last_triggered:
-                time_since_last = (datetime.now(timezone.utc) - rule.last_triggered).total_seconds()
-                if time_since_last < rule.notification_throttle_minutes * 60:
-                    return
+            if self._is_throttled(rule):
+                return
             
             # Process condition
             should_trigger, context = await processor(rule)
             
             if should_trigger:
-                await self.trigger_alert(
-                    rule_id=rule.rule_id,
-                    title=context.get("title", rule.name),
-                    message=context.get("message", rule.description),
-                    agent_id=context.get("agent_id"),
-                    symbol=context.get("symbol"),
-                    data=context.get("data", {})
-                )
+                await self._fire_rule(rule, context)
                 
         except Exception as e:
             logger.error(f"Error processing alert rule {rule.rule_id}: {e}")
@@ -470,7 +686,6 @@ class AlertingService:
         params = rule.condition_parameters
         metric = params.get("metric")
         threshold = params.get("threshold")
-        operator = params.get("operator", "gt")  # gt, lt, eq, gte, lte
         
         if not metric or threshold is None:
             return False, {}
@@ -481,18 +696,17 @@ class AlertingService:
         if current_value is None:
             return False, {}
         
+        return self._threshold_result(rule, current_value)
+    
+    def _threshold_result(self, rule: AlertRule, current_value: float) -> Tuple[bool, Dict[str, Any]]:
+        params = rule.condition_parameters
+        metric = params["metric"]
+        threshold = params["threshold"]
+        operator = params.get("operator", "gt")  # gt, lt, eq, gte, lte
+        
         # Check threshold
-        triggered = False
-        if operator == "gt":
-            triggered = current_value > threshold
-        elif operator == "lt":
-            triggered = current_value < threshold
-        elif operator == "gte":
-            triggered = current_value >= threshold
-        elif operator == "lte":
-            triggered = current_value <= threshold
-        elif operator == "eq":
-            triggered = abs(current_value - threshold) < 0.001
+        compare = THRESHOLD_OPERATORS.get(operator)
+        triggered = bool(compare and compare(current_value, threshold))
         
         context = {
             "title": f"{metric} threshold exceeded",
@@ -524,6 +738,16 @@ class AlertingService:
             metric, rule.target_agents, rule.target_symbols, time_window_minutes
         )
         
+        return self._change_result(rule, current_value, historical_value)
+    
+    def _change_result(
+        self, rule: AlertRule, current_value: Optional[float], historical_value: Optional[float]
+    ) -> Tuple[bool, Dict[str, Any]]:
+        params = rule.condition_parameters
+        metric = params["metric"]
+        change_threshold = params["change_threshold"]
+        time_window_minutes = params.get("time_window_minutes", 60)
+        
         if current_value is None or historical_value is None:
             return False, {}
         
@@ -680,6 +904,16 @@ class AlertingService:
         for rule in self.alert_rules.values():
             rule_stats["rules_by_category"][rule.category.value] += 1
         
+        rule_stats["compiled_rules"] = len(self.compiled_rules)
+        rule_stats["metric_index"] = {
+            "metrics": len(self.rule_index),
+            "scopes": sum(len(scopes) for scopes in self.rule_index.values()),
+            "windows": len(self.metric_windows),
+            "samples": sum(len(window) for window in self.metric_windows.values()),
+            "metric_updates": self.metric_updates,
+            "rule_evaluations": self.rule_evaluations
+        }
+        
         return {
             "service_status": "active" if self.service_active else "inactive",
             "active_alerts": len(self.active_alerts),
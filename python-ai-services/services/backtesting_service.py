@@ -4,17 +4,21 @@ Comprehensive backtesting engine with Monte Carlo simulation and walk-forward an
 """
 
 import asyncio
+import functools
+import itertools
 import uuid
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Union, AsyncGenerator
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 import json
 import logging
 import numpy as np
 import pandas as pd
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
 from contextlib import asynccontextmanager
 import multiprocessing as mp
+from multiprocessing.shared_memory import SharedMemory
+from dataclasses import dataclass
 from concurrent.futures import ProcessPoolExecutor
 
 from pydantic import BaseModel, Field
@@ -141,9 +145,28 @@ class WalkForwardResult(BaseModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
+class BatchTaskResult(BaseModel):
+    """Result of a single task in a parameter sweep or walk-forward batch"""
+    task_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    batch_id: str
+    task_type: str  # parameter_sweep, walk_forward
+    parameters: Dict[str, Any] = Field(default_factory=dict)
+    window: Optional[Dict[str, Any]] = None
+    result: Optional[BacktestResult] = None
+    in_sample_result: Optional[BacktestResult] = None
+    error: Optional[str] = None
+    completed_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
 class BacktestEngine:
     """Core backtesting engine"""
     
+    # Default momentum rule, overridable via strategy.parameters
+    MIN_HISTORY = 20
+    SHORT_WINDOW = 5
+    LONG_WINDOW = 20
+    MOMENTUM_THRESHOLD = 0.01  # 1%
+    
     def __init__(self):
         self.commission_rate = 0.001  # 0.1%
         self.slippage_rate = 0.0005   # 0.05%
@@ -165,13 +188,15 @@ class BacktestEngine:
         commission_paid = Decimal("0")
         slippage_cost = Decimal("0")
         
+        lookback = max(100, self._momentum_parameters(strategy)[1])
+        
         # Process each data point
         for i, data_point in enumerate(market_data):
             if i < request.warmup_period:
                 continue
             
             # Get historical data for signal generation
-            historical_data = market_data[max(0, i-100):i+1]
+            historical_data = market_data[max(0, i-lookback):i+1]
             
             # Generate trading signal
             signal = self._generate_signal_for_backtest(strategy, historical_data, data_point.symbol)
@@ -238,17 +263,18 @@ class BacktestEngine:
     ) -> Optional[TradingSignal]:
         """Generate trading signal for backtesting"""
         # Simplified signal generation for backtesting
-        if len(historical_data) < 20:
+        short_window, long_window, threshold = self._momentum_parameters(strategy)
+        if len(historical_data) < max(self.MIN_HISTORY, long_window):
             return None
         
         closes = [float(data.close) for data in historical_data]
         
         # Simple momentum strategy for demonstration
         if strategy.strategy_type.value == "momentum":
-            short_ma = np.mean(closes[-5:])
-            long_ma = np.mean(closes[-20:])
+            short_ma = np.mean(closes[-short_window:])
+            long_ma = np.mean(closes[-long_window:])
             
-            if short_ma > long_ma * 1.01:  # 1% threshold
+            if short_ma > long_ma * (1 + threshold):
                 return TradingSignal(
                     strategy_id=strategy.strategy_id,
                     agent_id="backtest_engine",
@@ -261,7 +287,7 @@ class BacktestEngine:
                     timeframe="1h",
                     market_condition="bullish"
                 )
-            elif short_ma < long_ma * 0.99:  # 1% threshold
+            elif short_ma < long_ma * (1 - threshold):
                 return TradingSignal(
                     strategy_id=strategy.strategy_id,
                     agent_id="backtest_engine",
@@ -277,6 +303,15 @@ class BacktestEngine:
         
         return None
     
+    def _momentum_parameters(self, strategy: TradingStrategy) -> Tuple[int, int, float]:
+        """Momentum windows and threshold, overridable via strategy parameters"""
+        parameters = strategy.parameters or {}
+        return (
+            int(parameters.get("short_window", self.SHORT_WINDOW)),
+            int(parameters.get("long_window", self.LONG_WINDOW)),
+            float(parameters.get("threshold", self.MOMENTUM_THRESHOLD))
+        )
+    
     def _execute_backtest_trade(
         self,
         signal: TradingSignal,
@@ -373,26 +408,29 @@ class BacktestEngine:
         final_capital: Decimal
     ) -> Dict[str, Any]:
         """Calculate comprehensive performance metrics"""
-        if not equity_curve:
-            return {}
-        
+        portfolio_values = np.array([point["portfolio_value"] for point in equity_curve], dtype=np.float64)
+        return self._calculate_metrics_from_values(
+            portfolio_values, trades, float((final_capital - initial_capital) / initial_capital)
+        )
+    
+    def _calculate_metrics_from_values(
+        self,
+        portfolio_values: np.ndarray,
+        trades: List[Dict[str, Any]],
+        total_return: float
+    ) -> Dict[str, Any]:
+        """Calculate performance metrics from an array of portfolio values; an empty array scores zero risk"""
         # Extract returns
-        portfolio_values = [point["portfolio_value"] for point in equity_curve]
-        returns = []
-        for i in range(1, len(portfolio_values)):
-            returns.append((portfolio_values[i] - portfolio_values[i-1]) / portfolio_values[i-1])
-        
-        # Basic metrics
-        total_return = float((final_capital - initial_capital) / initial_capital)
+        returns = np.diff(portfolio_values) / portfolio_values[:-1]
         
         # Risk metrics
-        if returns:
+        if returns.size:
             volatility = np.std(returns) * np.sqrt(252)  # Annualized
             sharpe_ratio = (np.mean(returns) * 252) / volatility if volatility > 0 else 0
             
             # Downside deviation for Sortino ratio
-            negative_returns = [r for r in returns if r < 0]
-            downside_deviation = np.std(negative_returns) * np.sqrt(252) if negative_returns else 0
+            negative_returns = returns[returns < 0]
+            downside_deviation = np.std(negative_returns) * np.sqrt(252) if negative_returns.size else 0
             sortino_ratio = (np.mean(returns) * 252) / downside_deviation if downside_deviation > 0 else 0
         else:
             volatility = 0
@@ -400,9 +438,11 @@ class BacktestEngine:
             sortino_ratio = 0
         
         # Drawdown analysis
-        running_max = np.maximum.accumulate(portfolio_values)
-        drawdowns = (np.array(portfolio_values) - running_max) / running_max
-        max_drawdown = abs(np.min(drawdowns))
+        max_drawdown = 0
+        if portfolio_values.size:
+            running_max = np.maximum.accumulate(portfolio_values)
+            drawdowns = (portfolio_values - running_max) / running_max
+            max_drawdown = abs(np.min(drawdowns))
         
         # Trade statistics
         winning_trades = [t for t in trades if t.get("pnl", 0) > 0]
@@ -417,7 +457,7 @@ class BacktestEngine:
         
         return {
             "total_return": total_return,
-            "annualized_return": total_return * 252 / len(equity_curve) if equity_curve else 0,
+            "annualized_return": total_return * 252 / len(portfolio_values) if portfolio_values.size else 0,
             "volatility": volatility,
             "sharpe_ratio": sharpe_ratio,
             "sortino_ratio": sortino_ratio,
@@ -432,73 +472,513 @@ class BacktestEngine:
         }
 
 
+@dataclass
+class BarArrays:
+    """Columnar view of a market data series"""
+    timestamps: List[datetime]
+    symbols: np.ndarray  # integer code per bar, index into symbol_names
+    symbol_names: List[str]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    
+    @classmethod
+    def from_market_data(cls, market_data: List[MarketData]) -> "BarArrays":
+        """Load bars into NumPy arrays in a single pass"""
+        n = len(market_data)
+        symbol_names, symbols = np.unique([data.symbol for data in market_data], return_inverse=True)
+        return cls(
+            timestamps=[data.timestamp for data in market_data],
+            symbols=symbols.astype(np.int32),
+            symbol_names=[str(name) for name in symbol_names],
+            open=np.fromiter((float(data.open) for data in market_data), dtype=np.float64, count=n),
+            high=np.fromiter((float(data.high) for data in market_data), dtype=np.float64, count=n),
+            low=np.fromiter((float(data.low) for data in market_data), dtype=np.float64, count=n),
+            close=np.fromiter((float(data.close) for data in market_data), dtype=np.float64, count=n),
+            volume=np.fromiter((float(data.volume) for data in market_data), dtype=np.float64, count=n)
+        )
+    
+    def __len__(self) -> int:
+        return len(self.close)
+    
+    def slice(self, start: int, end: int) -> "BarArrays":
+        """Zero-copy view over bars [start, end)"""
+        return BarArrays(
+            timestamps=self.timestamps[start:end],
+            symbols=self.symbols[start:end],
+            symbol_names=self.symbol_names,
+            open=self.open[start:end],
+            high=self.high[start:end],
+            low=self.low[start:end],
+            close=self.close[start:end],
+            volume=self.volume[start:end]
+        )
+
+
+class VectorizedBacktestEngine(BacktestEngine):
+    """
+    Columnar backtesting engine.
+    
+    Signals for every bar are computed in one vectorized pass over the close
+    array; fills are then simulated only on bars that carry a signal, and the
+    equity curve is rebuilt from the resulting capital/quantity step functions.
+    Trades and metrics match BacktestEngine.run_backtest.
+    """
+    
+    def run_backtest(
+        self,
+        strategy: TradingStrategy,
+        market_data: List[MarketData],
+        request: StrategyBacktestRequest
+    ) -> BacktestResult:
+        """Run backtest over columnar bar arrays"""
+        return self.run_backtest_arrays(strategy, BarArrays.from_market_data(market_data), request)
+    
+    def run_backtest_arrays(
+        self,
+        strategy: TradingStrategy,
+        bars: BarArrays,
+        request: StrategyBacktestRequest
+    ) -> BacktestResult:
+        """Run backtest on bars that are already loaded into arrays"""
+        start_time = datetime.now()
+        
+        n = len(bars)
+        start = min(request.warmup_period, n)
+        signals = self.generate_signals(strategy, bars.close)
+        signals[:start] = 0
+        
+        initial_capital = float(request.initial_capital)
+        capital = initial_capital
+        total_quantity = 0.0
+        open_positions: Dict[int, deque] = defaultdict(deque)
+        trade_history = []
+        trade_bars = []
+        capital_after = []
+        quantity_after = []
+        commission_paid = 0.0
+        slippage_cost = 0.0
+        
+        closes = bars.close
+        for i in np.flatnonzero(signals).tolist():
+            position_size = min(capital * 0.1, 1000.0)  # 10% or $1000 max
+            if position_size < 10.0:  # Minimum trade size
+                continue
+            
+            price = closes[i]
+            commission = position_size * request.commission
+            slippage = position_size * request.slippage
+            total_cost = commission + slippage
+            symbol_code = int(bars.symbols[i])
+            
+            if signals[i] > 0:
+                if capital < position_size + total_cost:
+                    continue
+                quantity = position_size / price
+                capital = capital - position_size - total_cost
+                total_quantity += quantity
+                position_id = str(uuid.uuid4())
+                open_positions[symbol_code].append((position_id, quantity, price))
+                trade = {
+                    "trade_id": position_id,
+                    "action": "buy",
+                    "quantity": quantity,
+                    "price": price,
+                    "timestamp": bars.timestamps[i].isoformat(),
+                    "commission": commission,
+                    "slippage": slippage,
+                    "new_capital": Decimal(str(capital))
+                }
+            else:
+                if not open_positions[symbol_code]:
+                    continue
+                position_id, quantity, entry_price = open_positions[symbol_code].popleft()
+                exit_value = quantity * price
+                capital = capital + exit_value - total_cost
+                total_quantity -= quantity
+                trade = {
+                    "trade_id": position_id,
+                    "action": "sell",
+                    "quantity": quantity,
+                    "price": price,
+                    "timestamp": bars.timestamps[i].isoformat(),
+                    "pnl": exit_value - quantity * entry_price,
+                    "commission": commission,
+                    "slippage": slippage,
+                    "new_capital": Decimal(str(capital))
+                }
+            
+            trade_history.append(trade)
+            trade_bars.append(i)
+            capital_after.append(capital)
+            quantity_after.append(total_quantity)
+            commission_paid += commission
+            slippage_cost += slippage
+        
+        # Forward-fill capital and open quantity from the trade bars to every bar
+        bar_index = np.arange(start, n)
+        last_trade = np.searchsorted(np.asarray(trade_bars, dtype=np.int64), bar_index, side="right") - 1
+        capital_curve = np.append(capital_after, initial_capital)[last_trade]
+        quantity_curve = np.append(quantity_after, 0.0)[last_trade]
+        portfolio_values = capital_curve + quantity_curve * closes[start:]
+        
+        equity_curve = [
+            {
+                "timestamp": timestamp.isoformat(),
+                "portfolio_value": portfolio_value,
+                "capital": bar_capital,
+                "unrealized_pnl": portfolio_value - initial_capital
+            }
+            for timestamp, portfolio_value, bar_capital in zip(
+                bars.timestamps[start:], portfolio_values.tolist(), capital_curve.tolist()
+            )
+        ]
+        
+        final_value = capital + total_quantity * closes[-1] if n else capital
+        performance_metrics = self._calculate_metrics_from_values(
+            portfolio_values, trade_history, (final_value - initial_capital) / initial_capital
+        )
+        
+        return BacktestResult(
+            strategy_id=strategy.strategy_id,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            initial_capital=request.initial_capital,
+            final_capital=Decimal(str(final_value)),
+            trades=trade_history,
+            equity_curve=equity_curve,
+            commission_paid=Decimal(str(commission_paid)),
+            slippage_cost=Decimal(str(slippage_cost)),
+            execution_time=(datetime.now() - start_time).total_seconds(),
+            **performance_metrics
+        )
+    
+    def generate_signals(self, strategy: TradingStrategy, closes: np.ndarray) -> np.ndarray:
+        """Compute the signal for every bar: 1 = buy, -1 = sell, 0 = none"""
+        signals = np.zeros(len(closes), dtype=np.int8)
+        short_window, long_window, threshold = self._momentum_parameters(strategy)
+        first_bar = max(self.MIN_HISTORY, long_window, short_window) - 1
+        if len(closes) <= first_bar:
+            return signals
+        
+        if strategy.strategy_type.value == "momentum":
+            windows = np.lib.stride_tricks.sliding_window_view
+            long_ma = windows(closes, long_window).mean(axis=1)[first_bar - long_window + 1:]
+            short_ma = windows(closes, short_window).mean(axis=1)[first_bar - short_window + 1:]
+            
+            buy = short_ma > long_ma * (1 + threshold)
+            sell = ~buy & (short_ma < long_ma * (1 - threshold))
+            signals[first_bar:] = buy.astype(np.int8) - sell.astype(np.int8)
+        
+        return signals
+
+
+_SHARED_HEADER_BYTES = 8   # int64 block state: 0 live, 1 released by the publisher
+_SHARED_INT_COLUMNS = 2    # timestamp (ns), symbol code
+_SHARED_FLOAT_COLUMNS = 5  # open, high, low, close, volume
+
+
+class BatchCancelled(Exception):
+    """Raised in a worker when the batch owning a shared block was finished or cancelled"""
+
+
+@dataclass
+class SharedBarArrays:
+    """Picklable handle to BarArrays published in a shared memory block"""
+    name: str
+    length: int
+    symbol_names: List[str]
+    tz_aware: bool
+    
+    @classmethod
+    def publish(cls, bars: BarArrays) -> Tuple[SharedMemory, "SharedBarArrays"]:
+        """Copy bars into a new shared memory block; the caller owns and unlinks it"""
+        n = len(bars)
+        shm = SharedMemory(create=True, size=_SHARED_HEADER_BYTES + n * 8 * (_SHARED_INT_COLUMNS + _SHARED_FLOAT_COLUMNS))
+        handle = cls(
+            name=shm.name,
+            length=n,
+            symbol_names=list(bars.symbol_names),
+            tz_aware=bool(n) and bars.timestamps[0].tzinfo is not None
+        )
+        cls._state(shm)[0] = 0
+        ints, floats = handle._views(shm)
+        if n:
+            ints[0] = pd.to_datetime(bars.timestamps, utc=handle.tz_aware).as_unit("ns").asi8
+        ints[1] = bars.symbols
+        for row, column in enumerate((bars.open, bars.high, bars.low, bars.close, bars.volume)):
+            floats[row] = column
+        del ints, floats
+        return shm, handle
+    
+    def attach(self) -> Tuple[SharedMemory, BarArrays]:
+        """Map the shared block and wrap it as BarArrays without copying"""
+        shm = SharedMemory(name=self.name)
+        ints, floats = self._views(shm)
+        timestamps = pd.to_datetime(ints[0], unit="ns", utc=self.tz_aware).to_pydatetime().tolist()
+        return shm, BarArrays(
+            timestamps=timestamps,
+            symbols=ints[1],
+            symbol_names=self.symbol_names,
+            open=floats[0],
+            high=floats[1],
+            low=floats[2],
+            close=floats[3],
+            volume=floats[4]
+        )
+    
+    @staticmethod
+    def release(shm: SharedMemory):
+        """Mark the block released so workers skip its remaining tasks and drop their mappings"""
+        SharedBarArrays._state(shm)[0] = 1
+    
+    @staticmethod
+    def is_released(shm: SharedMemory) -> bool:
+        return bool(SharedBarArrays._state(shm)[0])
+    
+    @staticmethod
+    def _state(shm: SharedMemory) -> np.ndarray:
+        return np.ndarray((1,), dtype=np.int64, buffer=shm.buf)
+    
+    def _views(self, shm: SharedMemory) -> Tuple[np.ndarray, np.ndarray]:
+        n = self.length
+        ints = np.ndarray((_SHARED_INT_COLUMNS, n), dtype=np.int64, buffer=shm.buf, offset=_SHARED_HEADER_BYTES)
+        floats = np.ndarray(
+            (_SHARED_FLOAT_COLUMNS, n), dtype=np.float64, buffer=shm.buf, offset=_SHARED_HEADER_BYTES + ints.nbytes
+        )
+        return ints, floats
+
+
+# Per-worker-process state for batch tasks
+_worker_engine: Optional[VectorizedBacktestEngine] = None
+_worker_bars: "OrderedDict[str, Tuple[SharedMemory, BarArrays]]" = OrderedDict()
+_WORKER_BARS_CACHE_SIZE = 4
+
+
+def _close_worker_bars(name: str):
+    old_shm, old_bars = _worker_bars.pop(name)
+    del old_bars
+    try:
+        old_shm.close()
+    except BufferError:
+        pass  # Views still referenced; released when collected
+
+
+def _get_worker_bars(handle: SharedBarArrays) -> BarArrays:
+    """
+    Attach to shared bars once per worker and reuse them across tasks. Attachments whose block
+    was released are closed here, and a task for a released block raises BatchCancelled.
+    """
+    for name in [name for name, (shm, _) in _worker_bars.items() if SharedBarArrays.is_released(shm)]:
+        _close_worker_bars(name)
+    
+    if handle.name in _worker_bars:
+        _worker_bars.move_to_end(handle.name)
+        return _worker_bars[handle.name][1]
+    
+    while len(_worker_bars) >= _WORKER_BARS_CACHE_SIZE:
+        _close_worker_bars(next(iter(_worker_bars)))
+    
+    try:
+        attached = handle.attach()
+    except FileNotFoundError:
+        raise BatchCancelled(f"Shared bars {handle.name} were already released")
+    if SharedBarArrays.is_released(attached[0]):
+        _worker_bars[handle.name] = attached
+        _close_worker_bars(handle.name)
+        raise BatchCancelled(f"Shared bars {handle.name} were already released")
+    _worker_bars[handle.name] = attached
+    return attached[1]
+
+
+def _get_worker_engine() -> VectorizedBacktestEngine:
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = VectorizedBacktestEngine()
+    return _worker_engine
+
+
+def _run_shared_backtest(
+    handle: SharedBarArrays,
+    strategy: TradingStrategy,
+    request: StrategyBacktestRequest,
+    start: int,
+    end: int
+) -> BacktestResult:
+    """Worker entry point: backtest bars [start, end) of a shared series"""
+    bars = _get_worker_bars(handle).slice(start, end)
+    return _get_worker_engine().run_backtest_arrays(strategy, bars, request)
+
+
+def _run_shared_walk_forward_window(
+    handle: SharedBarArrays,
+    strategy: TradingStrategy,
+    request: StrategyBacktestRequest,
+    in_sample_start: int,
+    out_sample_start: int,
+    out_sample_end: int
+) -> Tuple[BacktestResult, BacktestResult]:
+    """Worker entry point: in-sample and out-of-sample backtests for one window"""
+    in_sample = _run_shared_backtest(handle, strategy, request, in_sample_start, out_sample_start)
+    if SharedBarArrays.is_released(_worker_bars[handle.name][0]):
+        raise BatchCancelled(f"Batch for shared bars {handle.name} was cancelled")
+    
+    # Out-of-sample runs warm up on the bars preceding it
+    history_start = max(0, out_sample_start - request.warmup_period)
+    out_sample_request = request.model_copy(update={"warmup_period": out_sample_start - history_start})
+    out_sample = _run_shared_backtest(handle, strategy, out_sample_request, history_start, out_sample_end)
+    return in_sample, out_sample
+
+
 class MonteCarloSimulator:
-    """Monte Carlo simulation engine"""
+    """
+    Monte Carlo simulation engine.
+    
+    Paths are generated as 2D (paths x days) return matrices in chunks sized
+    to stay within memory_budget_mb, so the number of simulations is bounded
+    by time rather than memory. Returns are either drawn from a normal fit of
+    the historical returns ("parametric") or resampled from them in contiguous
+    blocks ("bootstrap"); antithetic variates mirror each draw around the mean.
+    """
+    
+    SIMULATION_MODES = ("parametric", "bootstrap")
+    
+    # Peak working set per path-day: the return/equity matrix, the running
+    # peak, the underwater mask and the int64 reset-day matrix, plus sampling
+    # temporaries (bootstrap indices, antithetic concatenation)
+    _BYTES_PER_PATH_DAY = 40
+    
+    def __init__(self, memory_budget_mb: float = 256.0):
+        self.memory_budget_mb = memory_budget_mb
     
     def run_simulation(
         self,
         strategy: TradingStrategy,
         historical_results: List[BacktestResult],
         num_simulations: int = 1000,
-        time_horizon_days: int = 252
+        time_horizon_days: int = 252,
+        mode: str = "parametric",
+        antithetic: bool = False,
+        block_size: int = 20,
+        benchmark_return: float = 0.0,
+        target_return: Optional[float] = None,
+        seed: Optional[int] = None
     ) -> MonteCarloResult:
         """Run Monte Carlo simulation"""
         if not historical_results:
             raise ValueError("No historical results provided for simulation")
+        if mode not in self.SIMULATION_MODES:
+            raise ValueError(f"Unknown simulation mode: {mode}")
         
         # Extract historical returns
-        all_returns = []
+        return_series = []
         for result in historical_results:
-            if result.equity_curve:
-                values = [point["portfolio_value"] for point in result.equity_curve]
-                returns = []
-                for i in range(1, len(values)):
-                    returns.append((values[i] - values[i-1]) / values[i-1])
-                all_returns.extend(returns)
-        
-        if not all_returns:
-            raise ValueError("No returns data available for simulation")
+            if len(result.equity_curve) > 1:
+                values = np.array([point["portfolio_value"] for point in result.equity_curve], dtype=np.float64)
+                return_series.append(np.diff(values) / values[:-1])
         
-        # Calculate distribution parameters
-        mean_return = np.mean(all_returns)
-        std_return = np.std(all_returns)
+        if not return_series:
+            raise ValueError("No returns data available for simulation")
+        historical_returns = np.concatenate(return_series)
         
-        # Run simulations
-        simulation_results = []
+        rng = np.random.default_rng(seed)
+        final_returns = np.empty(num_simulations)
+        max_drawdowns = np.empty(num_simulations)
+        max_durations = np.empty(num_simulations, dtype=np.int64)
         
-        for _ in range(num_simulations):
-            # Generate random returns
-            random_returns = np.random.normal(mean_return, std_return, time_horizon_days)
-            
-            # Calculate cumulative return
-            cumulative_return = np.prod(1 + random_returns) - 1
-            simulation_results.append(cumulative_return)
+        chunk_size = self._chunk_size(time_horizon_days, antithetic)
+        for chunk_start in range(0, num_simulations, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, num_simulations)
+            returns = self._sample_returns(
+                rng, historical_returns, chunk_end - chunk_start, time_horizon_days, mode, antithetic, block_size
+            )
+            final, drawdown, duration = self._path_statistics(returns)
+            final_returns[chunk_start:chunk_end] = final
+            max_drawdowns[chunk_start:chunk_end] = drawdown
+            max_durations[chunk_start:chunk_end] = duration
+            del returns
         
         # Calculate statistics
-        simulation_results = np.array(simulation_results)
-        
-        percentiles = {
-            "5th": np.percentile(simulation_results, 5),
-            "25th": np.percentile(simulation_results, 25),
-            "50th": np.percentile(simulation_results, 50),
-            "75th": np.percentile(simulation_results, 75),
-            "95th": np.percentile(simulation_results, 95)
-        }
+        p5, p25, p50, p75, p95 = np.percentile(final_returns, [5, 25, 50, 75, 95])
+        tail = final_returns[final_returns <= p5]
         
         return MonteCarloResult(
             strategy_id=strategy.strategy_id,
             num_simulations=num_simulations,
             confidence_level=0.95,
-            mean_return=float(np.mean(simulation_results)),
-            std_return=float(np.std(simulation_results)),
-            min_return=float(np.min(simulation_results)),
-            max_return=float(np.max(simulation_results)),
-            percentiles=percentiles,
-            probability_of_loss=float(np.sum(simulation_results < 0) / num_simulations),
-            var_confidence=float(np.percentile(simulation_results, 5)),
-            expected_shortfall=float(np.mean(simulation_results[simulation_results <= np.percentile(simulation_results, 5)])),
-            prob_positive_return=float(np.sum(simulation_results > 0) / num_simulations)
+            mean_return=float(np.mean(final_returns)),
+            std_return=float(np.std(final_returns)),
+            min_return=float(np.min(final_returns)),
+            max_return=float(np.max(final_returns)),
+            percentiles={"5th": float(p5), "25th": float(p25), "50th": float(p50), "75th": float(p75), "95th": float(p95)},
+            probability_of_loss=float(np.mean(final_returns < 0)),
+            var_confidence=float(p5),
+            expected_shortfall=float(np.mean(tail)) if tail.size else float(p5),
+            worst_drawdown=float(np.max(max_drawdowns)),
+            avg_drawdown=float(np.mean(max_drawdowns)),
+            max_drawdown_duration=int(np.max(max_durations)),
+            prob_positive_return=float(np.mean(final_returns > 0)),
+            prob_beat_benchmark=float(np.mean(final_returns > benchmark_return)),
+            prob_target_return=float(np.mean(final_returns >= target_return)) if target_return is not None else None
         )
+    
+    def _chunk_size(self, time_horizon_days: int, antithetic: bool) -> int:
+        """Number of paths per chunk that fits the memory budget"""
+        budget_bytes = self.memory_budget_mb * 1024 * 1024
+        chunk_size = max(2, int(budget_bytes // (max(1, time_horizon_days) * self._BYTES_PER_PATH_DAY)))
+        if antithetic:
+            chunk_size -= chunk_size % 2  # Keep antithetic pairs in the same chunk
+        return chunk_size
+    
+    def _sample_returns(
+        self,
+        rng: np.random.Generator,
+        historical_returns: np.ndarray,
+        num_paths: int,
+        time_horizon_days: int,
+        mode: str,
+        antithetic: bool,
+        block_size: int
+    ) -> np.ndarray:
+        """Draw a (num_paths, time_horizon_days) matrix of daily returns"""
+        base_paths = (num_paths + 1) // 2 if antithetic else num_paths
+        mean_return = historical_returns.mean()
+        
+        if mode == "parametric":
+            returns = rng.normal(mean_return, historical_returns.std(), (base_paths, time_horizon_days))
+        else:
+            # Moving block bootstrap keeps short-range autocorrelation of the returns
+            block = max(1, min(block_size, len(historical_returns)))
+            num_blocks = -(-time_horizon_days // block)
+            starts = rng.integers(0, len(historical_returns) - block + 1, (base_paths, num_blocks))
+            index = (starts[:, :, None] + np.arange(block)).reshape(base_paths, num_blocks * block)
+            returns = historical_returns[index[:, :time_horizon_days]]
+        
+        if antithetic:
+            returns = np.concatenate([returns, 2 * mean_return - returns])[:num_paths]
+        return returns
+    
+    def _path_statistics(self, returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Final return, max drawdown and longest underwater stretch per path (consumes returns)"""
+        # Equity curve built in place over the returns matrix
+        equity = np.add(returns, 1.0, out=returns)
+        np.cumprod(equity, axis=1, out=equity)
+        final_returns = equity[:, -1] - 1
+        
+        peak = np.maximum.accumulate(equity, axis=1)
+        np.maximum(peak, 1.0, out=peak)
+        underwater = equity < peak
+        max_drawdowns = 1 - np.min(np.divide(equity, peak, out=peak), axis=1)
+        del peak
+        
+        # Length of the current underwater run = days since the last new peak
+        days = np.arange(1, returns.shape[1] + 1)
+        last_peak = np.where(underwater, 0, days)
+        np.maximum.accumulate(last_peak, axis=1, out=last_peak)
+        max_durations = np.max(np.subtract(days, last_peak, out=last_peak), axis=1)
+        return final_returns, max_drawdowns, max_durations
 
 
 class WalkForwardAnalyzer:
@@ -591,11 +1071,20 @@ class BacktestingService:
     Advanced backtesting and strategy validation service
     """
     
-    def __init__(self):
+    # "loop" walks bars one at a time, "vectorized" runs on columnar arrays
+    ENGINE_MODES = {
+        "loop": BacktestEngine,
+        "vectorized": VectorizedBacktestEngine
+    }
+    
+    def __init__(self, engine_mode: str = "vectorized", max_workers: Optional[int] = None):
         self.supabase = get_supabase_client()
         
         # Engines
-        self.backtest_engine = BacktestEngine()
+        if engine_mode not in self.ENGINE_MODES:
+            raise ValueError(f"Unknown backtest engine mode: {engine_mode}")
+        self.engine_mode = engine_mode
+        self.backtest_engine = self.ENGINE_MODES[engine_mode]()
         self.monte_carlo_simulator = MonteCarloSimulator()
         self.walk_forward_analyzer = WalkForwardAnalyzer()
         
@@ -608,10 +1097,13 @@ class BacktestingService:
         self.strategy_performance_cache: Dict[str, Dict[str, Any]] = {}
         
         # Configuration
-        self.max_concurrent_backtests = 4
+        self.max_concurrent_backtests = max_workers or mp.cpu_count()
         self.result_retention_days = 90
         self._shutdown = False
         
+        # Long-lived worker pool shared by all backtest, simulation and batch jobs
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        
     async def initialize(self):
         """Initialize the backtesting service"""
         try:
@@ -669,7 +1161,9 @@ class BacktestingService:
         self,
         strategy_id: str,
         num_simulations: int = 1000,
-        time_horizon_days: int = 252
+        time_horizon_days: int = 252,
+        mode: str = "parametric",
+        antithetic: bool = False
     ) -> MonteCarloResult:
         """Run Monte Carlo simulation for strategy"""
         try:
@@ -691,7 +1185,7 @@ class BacktestingService:
             
             # Run simulation
             result = await self._run_monte_carlo_async(
-                strategy, historical_results, num_simulations, time_horizon_days
+                strategy, historical_results, num_simulations, time_horizon_days, mode, antithetic
             )
             
             # Store result
@@ -813,8 +1307,148 @@ class BacktestingService:
             logger.error(f"Failed to generate validation report for strategy {strategy_id}: {e}")
             return {"error": str(e)}
     
+    async def run_parameter_sweep(
+        self,
+        request: StrategyBacktestRequest,
+        parameter_grid: Dict[str, List[Any]]
+    ) -> AsyncGenerator[BatchTaskResult, None]:
+        """Backtest every parameter combination of a stored strategy, streaming results"""
+        strategy = await self._get_strategy_by_id(request.strategy_id)
+        if not strategy:
+            raise HTTPException(status_code=404, detail="Strategy not found")
+        
+        market_data = await self._get_market_data_for_backtest(request)
+        if len(market_data) < 100:
+            raise HTTPException(status_code=400, detail="Insufficient market data for backtesting")
+        
+        async for task_result in self.stream_parameter_sweep(strategy, market_data, request, parameter_grid):
+            yield task_result
+    
+    async def stream_parameter_sweep(
+        self,
+        strategy: TradingStrategy,
+        market_data: Union[List[MarketData], BarArrays],
+        request: StrategyBacktestRequest,
+        parameter_grid: Dict[str, List[Any]]
+    ) -> AsyncGenerator[BatchTaskResult, None]:
+        """
+        Fan a grid of strategy parameters out across the worker pool.
+        
+        Each combination overrides strategy.parameters; results are yielded
+        in completion order.
+        """
+        bars = market_data if isinstance(market_data, BarArrays) else BarArrays.from_market_data(market_data)
+        batch_id = str(uuid.uuid4())
+        keys = list(parameter_grid)
+        
+        tasks = []
+        for values in itertools.product(*(parameter_grid[key] for key in keys)):
+            parameters = dict(zip(keys, values))
+            candidate = strategy.model_copy(update={"parameters": {**strategy.parameters, **parameters}})
+            tasks.append((
+                BatchTaskResult(batch_id=batch_id, task_type="parameter_sweep", parameters=parameters),
+                _run_shared_backtest,
+                (candidate, request, 0, len(bars))
+            ))
+        
+        logger.info(f"Parameter sweep {batch_id}: {len(tasks)} combinations for strategy {strategy.strategy_id}")
+        async for task_result in self._stream_batch(bars, tasks):
+            yield task_result
+    
+    async def stream_walk_forward_windows(
+        self,
+        strategy: TradingStrategy,
+        market_data: Union[List[MarketData], BarArrays],
+        request: StrategyBacktestRequest,
+        window_bars: int,
+        step_bars: int
+    ) -> AsyncGenerator[BatchTaskResult, None]:
+        """
+        Backtest rolling in-sample/out-of-sample windows in parallel.
+        
+        Each window trains on window_bars bars and is evaluated on the
+        following step_bars bars; results are yielded in completion order.
+        """
+        bars = market_data if isinstance(market_data, BarArrays) else BarArrays.from_market_data(market_data)
+        batch_id = str(uuid.uuid4())
+        
+        tasks = []
+        start = 0
+        while start + window_bars < len(bars):
+            out_sample_start = start + window_bars
+            out_sample_end = min(out_sample_start + step_bars, len(bars))
+            window = {
+                "period": len(tasks) + 1,
+                "in_sample_start": bars.timestamps[start].isoformat(),
+                "in_sample_end": bars.timestamps[out_sample_start - 1].isoformat(),
+                "out_sample_start": bars.timestamps[out_sample_start].isoformat(),
+                "out_sample_end": bars.timestamps[out_sample_end - 1].isoformat()
+            }
+            tasks.append((
+                BatchTaskResult(batch_id=batch_id, task_type="walk_forward", window=window),
+                _run_shared_walk_forward_window,
+                (strategy, request, start, out_sample_start, out_sample_end)
+            ))
+            start += step_bars
+        
+        logger.info(f"Walk-forward batch {batch_id}: {len(tasks)} windows for strategy {strategy.strategy_id}")
+        async for task_result in self._stream_batch(bars, tasks):
+            yield task_result
+    
     # Async execution methods
     
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """Get the service's worker pool, starting it on first use"""
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.max_concurrent_backtests)
+            logger.info(f"Started backtest worker pool with {self.max_concurrent_backtests} workers")
+        return self._process_pool
+    
+    async def _stream_batch(
+        self,
+        bars: BarArrays,
+        tasks: List[Tuple[BatchTaskResult, Any, Tuple]]
+    ) -> AsyncGenerator[BatchTaskResult, None]:
+        """Publish bars to shared memory once and run tasks on the pool as they complete"""
+        if not tasks:
+            return
+        
+        loop = asyncio.get_running_loop()
+        executor = self._get_process_pool()
+        shm, handle = SharedBarArrays.publish(bars)
+        pending = set()
+        try:
+            for template, func, args in tasks:
+                future = loop.run_in_executor(executor, func, handle, *args)
+                pending.add(asyncio.ensure_future(self._await_batch_task(template, future)))
+            
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            # Queued tasks are dropped; ones already handed to a worker see the released flag and stop
+            SharedBarArrays.release(shm)
+            for task in pending:
+                task.cancel()
+            shm.close()
+            shm.unlink()
+    
+    async def _await_batch_task(self, template: BatchTaskResult, future: asyncio.Future) -> BatchTaskResult:
+        """Wrap a worker future so task failures are reported rather than raised"""
+        try:
+            result = await future
+            if template.task_type == "walk_forward":
+                in_sample, out_sample = result
+                update = {"in_sample_result": in_sample, "result": out_sample}
+            else:
+                update = {"result": result}
+        except Exception as e:
+            logger.error(f"Batch {template.batch_id} task {template.task_id} failed: {e}")
+            update = {"error": str(e)}
+        
+        return template.model_copy(update={**update, "completed_at": datetime.now(timezone.utc)})
+    
     async def _run_backtest_async(
         self,
         strategy: TradingStrategy,
@@ -822,29 +1456,30 @@ class BacktestingService:
         request: StrategyBacktestRequest
     ) -> BacktestResult:
         """Run backtest asynchronously"""
-        loop = asyncio.get_event_loop()
-        with ProcessPoolExecutor(max_workers=1) as executor:
-            future = loop.run_in_executor(
-                executor, self.backtest_engine.run_backtest, strategy, market_data, request
-            )
-            return await future
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_process_pool(), self.backtest_engine.run_backtest, strategy, market_data, request
+        )
     
     async def _run_monte_carlo_async(
         self,
         strategy: TradingStrategy,
         historical_results: List[BacktestResult],
         num_simulations: int,
-        time_horizon_days: int
+        time_horizon_days: int,
+        mode: str = "parametric",
+        antithetic: bool = False
     ) -> MonteCarloResult:
         """Run Monte Carlo simulation asynchronously"""
-        loop = asyncio.get_event_loop()
-        with ProcessPoolExecutor(max_workers=1) as executor:
-            future = loop.run_in_executor(
-                executor, 
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_process_pool(),
+            functools.partial(
                 self.monte_carlo_simulator.run_simulation,
-                strategy, historical_results, num_simulations, time_horizon_days
+                strategy, historical_results, num_simulations, time_horizon_days,
+                mode=mode, antithetic=antithetic
             )
-            return await future
+        )
     
     async def _run_walk_forward_async(
         self,
@@ -854,14 +1489,12 @@ class BacktestingService:
         step_size: int
     ) -> WalkForwardResult:
         """Run walk-forward analysis asynchronously"""
-        loop = asyncio.get_event_loop()
-        with ProcessPoolExecutor(max_workers=1) as executor:
-            future = loop.run_in_executor(
-                executor,
-                self.walk_forward_analyzer.run_analysis,
-                strategy, market_data, window_size, step_size
-            )
-            return await future
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_process_pool(),
+            self.walk_forward_analyzer.run_analysis,
+            strategy, market_data, window_size, step_size
+        )
     
     # Helper methods
     
@@ -1014,6 +1647,13 @@ class BacktestingService:
                 logger.error(f"Error in result cleanup loop: {e}")
                 await asyncio.sleep(86400)
     
+    async def shutdown(self):
+        """Stop background loops and the worker pool"""
+        self._shutdown = True
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+    
     # Additional helper methods would be implemented here...
     
     async def _get_strategy_by_id(self, strategy_id: str):
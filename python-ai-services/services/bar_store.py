@@ -0,0 +1,356 @@
+"""
+Bar Store
+Persistent per-provider/symbol/interval OHLCV store backed by memory-mapped NumPy column files.
+
+Each key lives in <root>/<provider>/<interval>/<symbol>/ as one raw little-endian file per column
+plus a manifest.json recording the row count, the file version and the time ranges already fetched.
+Range reads are slices of the memory maps (no copy); only ranges missing from the manifest's
+coverage are fetched from providers. Coverage is only recorded for fetches that returned bars. Bars after the last stored one are appended in place, any
+other merge writes a new file version and swaps the manifest.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+COLUMNS: Dict[str, np.dtype] = {
+    "timestamp": np.dtype("<i8"),  # UTC nanoseconds, bar open time
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+PRICE_COLUMNS = [column for column in COLUMNS if column != "timestamp"]
+
+INTERVAL_SECONDS = {
+    "1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800, "60m": 3600, "90m": 5400, "1h": 3600,
+    "4h": 14400, "1d": 86400, "5d": 432000, "1wk": 604800, "1mo": 2592000, "3mo": 7776000,
+}
+
+DEFAULT_PROVIDER = "default"
+
+TimeLike = Union[str, int, float, pd.Timestamp, Any]
+Fetcher = Callable[[str, str, pd.Timestamp, pd.Timestamp], Optional[pd.DataFrame]]
+
+
+def to_ns(value: TimeLike) -> int:
+    """UTC nanoseconds for a datetime, date string or Timestamp; naive values are taken as UTC"""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize("UTC")
+    return int(timestamp.value)
+
+
+def from_ns(value: int) -> pd.Timestamp:
+    return pd.Timestamp(value, tz="UTC")
+
+
+def _merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class BarStore:
+    """Columnar OHLCV cache that only asks providers for the ranges it doesn't have"""
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.key_locks: Dict[Tuple[str, str, str], threading.Lock] = defaultdict(threading.Lock)
+        self.locks_guard = threading.Lock()
+        self.maps: Dict[Tuple[str, str, str], Tuple[int, int, Dict[str, np.ndarray]]] = {}
+        self.stats = {"reads": 0, "warm_reads": 0, "fetches": 0, "fetched_rows": 0, "empty_fetches": 0, "appends": 0, "rewrites": 0}
+
+    # --- Layout ---
+
+    def _key_dir(self, symbol: str, interval: str, provider: str) -> Path:
+        return self.root / quote(provider, safe="") / quote(interval, safe="") / quote(symbol.upper(), safe="")
+
+    def _column_path(self, key_dir: Path, version: int, column: str) -> Path:
+        return key_dir / f"v{version}.{column}"
+
+    def _lock(self, symbol: str, interval: str, provider: str) -> threading.Lock:
+        with self.locks_guard:
+            return self.key_locks[(symbol.upper(), interval, provider)]
+
+    def _load_manifest(self, key_dir: Path) -> Dict[str, Any]:
+        try:
+            with open(key_dir / "manifest.json") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"version": 0, "rows": 0, "coverage": []}
+
+    def _save_manifest(self, key_dir: Path, manifest: Dict[str, Any]):
+        tmp_path = key_dir / "manifest.json.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, key_dir / "manifest.json")
+
+    # --- Reads ---
+
+    def _columns(self, symbol: str, interval: str, provider: str) -> Dict[str, np.ndarray]:
+        """Read-only memory maps of every column, reopened only when the manifest changes"""
+        key = (symbol.upper(), interval, provider)
+        key_dir = self._key_dir(symbol, interval, provider)
+        manifest = self._load_manifest(key_dir)
+        version, rows = manifest["version"], manifest["rows"]
+
+        cached = self.maps.get(key)
+        if cached and cached[0] == version and cached[1] == rows:
+            return cached[2]
+
+        if rows == 0:
+            columns = {column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS.items()}
+        else:
+            columns = {
+                column: np.memmap(self._column_path(key_dir, version, column), dtype=dtype, mode="r", shape=(rows,))
+                for column, dtype in COLUMNS.items()
+            }
+        self.maps[key] = (version, rows, columns)
+        return columns
+
+    def read(
+        self, symbol: str, interval: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+        provider: str = DEFAULT_PROVIDER
+    ) -> Dict[str, np.ndarray]:
+        """Bars with start <= timestamp < end as zero-copy column views"""
+        columns = self._columns(symbol, interval, provider)
+        timestamps = columns["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(timestamps, to_ns(start), side="left"))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, to_ns(end), side="left"))
+        self.stats["reads"] += 1
+        return {column: values[lo:hi] for column, values in columns.items()}
+
+    def read_frame(
+        self, symbol: str, interval: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+        provider: str = DEFAULT_PROVIDER
+    ) -> pd.DataFrame:
+        return self.to_frame(self.read(symbol, interval, start, end, provider))
+
+    @staticmethod
+    def to_frame(bars: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """yfinance-style frame (Open/High/Low/Close/Volume on a UTC DatetimeIndex)"""
+        index = pd.DatetimeIndex(pd.to_datetime(np.asarray(bars["timestamp"]), unit="ns", utc=True), name="Date")
+        return pd.DataFrame({column.title(): np.asarray(bars[column]) for column in PRICE_COLUMNS}, index=index)
+
+    def coverage(
+        self, symbol: str, interval: str, provider: str = DEFAULT_PROVIDER
+    ) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        manifest = self._load_manifest(self._key_dir(symbol, interval, provider))
+        return [(from_ns(start), from_ns(end)) for start, end in manifest["coverage"]]
+
+    def missing_ranges(
+        self, symbol: str, interval: str, start: TimeLike, end: TimeLike, provider: str = DEFAULT_PROVIDER
+    ) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """Sub-ranges of [start, end) not yet fetched for this key"""
+        start_ns, end_ns = to_ns(start), to_ns(end)
+        manifest = self._load_manifest(self._key_dir(symbol, interval, provider))
+
+        gaps = []
+        cursor = start_ns
+        for covered_start, covered_end in manifest["coverage"]:
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end_ns:
+                break
+            if covered_start > cursor:
+                gaps.append((from_ns(cursor), from_ns(covered_start)))
+            cursor = max(cursor, covered_end)
+        if cursor < end_ns:
+            gaps.append((from_ns(cursor), from_ns(end_ns)))
+        return gaps
+
+    # --- Writes ---
+
+    def _normalize(self, frame: Optional[pd.DataFrame], interval: str) -> Dict[str, np.ndarray]:
+        """Sorted, de-duplicated columns from a provider frame (any OHLCV column casing)"""
+        if frame is None or frame.empty:
+            return {column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS.items()}
+
+        lookup = {str(column).lower(): column for column in frame.columns}
+        index = frame.index
+        if not isinstance(index, pd.DatetimeIndex):
+            source = lookup.get("date") or lookup.get("timestamp") or lookup.get("datetime")
+            index = pd.DatetimeIndex(frame[source] if source is not None else index)
+
+        if INTERVAL_SECONDS.get(interval, 0) >= 86400:
+            # Daily and longer bars are keyed by their calendar date, whatever timezone the provider used
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            index = index.normalize()
+        index = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+        timestamps = index.as_unit("ns").asi8.astype(COLUMNS["timestamp"])
+
+        values = {"timestamp": timestamps}
+        for column in PRICE_COLUMNS:
+            source = lookup.get(column)
+            values[column] = (
+                frame[source].to_numpy(dtype=COLUMNS[column], na_value=np.nan) if source is not None
+                else np.full(len(frame), np.nan, dtype=COLUMNS[column])
+            )
+
+        # Keep the last bar for each timestamp, in time order
+        order = np.argsort(timestamps, kind="stable")
+        sorted_timestamps = timestamps[order]
+        keep = np.ones(len(order), dtype=bool)
+        keep[:-1] = sorted_timestamps[1:] != sorted_timestamps[:-1]
+        return {column: array[order][keep] for column, array in values.items()}
+
+    def write(
+        self,
+        symbol: str,
+        interval: str,
+        frame: Optional[pd.DataFrame],
+        covered_start: Optional[TimeLike] = None,
+        covered_end: Optional[TimeLike] = None,
+        provider: str = DEFAULT_PROVIDER
+    ) -> int:
+        """Merge provider bars into the store and record [covered_start, covered_end) as fetched"""
+        with self._lock(symbol, interval, provider):
+            return self._write(symbol, interval, provider, self._normalize(frame, interval), covered_start, covered_end)
+
+    def _write(
+        self,
+        symbol: str,
+        interval: str,
+        provider: str,
+        new: Dict[str, np.ndarray],
+        covered_start: Optional[TimeLike],
+        covered_end: Optional[TimeLike]
+    ) -> int:
+        key_dir = self._key_dir(symbol, interval, provider)
+        key_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self._load_manifest(key_dir)
+        version, rows = manifest["version"], manifest["rows"]
+        existing = self._columns(symbol, interval, provider)
+        count = len(new["timestamp"])
+
+        if count and (rows == 0 or new["timestamp"][0] > existing["timestamp"][-1]):
+            # Incremental append: extend the current files, then publish the new row count
+            for column, dtype in COLUMNS.items():
+                path = self._column_path(key_dir, version, column)
+                with open(path, "r+b" if path.exists() else "wb") as f:
+                    f.truncate(rows * dtype.itemsize)  # Drop bytes from an append that never reached the manifest
+                    f.seek(0, os.SEEK_END)
+                    f.write(np.ascontiguousarray(new[column], dtype=dtype).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            manifest["rows"] = rows + count
+            self.stats["appends"] += 1
+        elif count:
+            # Out-of-order merge: new bars win on equal timestamps; write the result as a new version
+            keep = ~np.isin(existing["timestamp"], new["timestamp"])
+            merged = {column: np.concatenate([existing[column][keep], new[column]]) for column in COLUMNS}
+            order = np.argsort(merged["timestamp"], kind="stable")
+            new_version = version + 1
+            for column, dtype in COLUMNS.items():
+                with open(self._column_path(key_dir, new_version, column), "wb") as f:
+                    f.write(np.ascontiguousarray(merged[column][order], dtype=dtype).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            manifest["version"], manifest["rows"] = new_version, len(order)
+            self.stats["rewrites"] += 1
+
+        if covered_start is not None and covered_end is not None and to_ns(covered_start) < to_ns(covered_end):
+            manifest["coverage"] = _merge_ranges(manifest["coverage"] + [[to_ns(covered_start), to_ns(covered_end)]])
+        self._save_manifest(key_dir, manifest)
+
+        if manifest["version"] != version:
+            # Open maps of the old version stay valid until their readers drop them
+            for column in COLUMNS:
+                try:
+                    self._column_path(key_dir, version, column).unlink()
+                except FileNotFoundError:
+                    pass
+        return count
+
+    # --- Read-through ---
+
+    def get_bars(
+        self,
+        symbol: str,
+        interval: str,
+        start: TimeLike,
+        end: Optional[TimeLike] = None,
+        fetch: Optional[Fetcher] = None,
+        provider: str = DEFAULT_PROVIDER
+    ) -> Dict[str, np.ndarray]:
+        """
+        Bars for [start, end), fetching only missing ranges via fetch(symbol, interval, start, end).
+        A gap counts as fetched only if the provider returned bars for it, so failed or empty
+        fetches are retried. Coverage stops one interval before now so the still-forming bar is
+        fetched again next time. Concurrent callers for the same key wait for one fetch instead
+        of repeating it.
+        """
+        end = end if end is not None else pd.Timestamp.now(tz="UTC")
+        if fetch is not None and self.missing_ranges(symbol, interval, start, end, provider):
+            with self._lock(symbol, interval, provider):
+                settled_ns = to_ns(pd.Timestamp.now(tz="UTC")) - INTERVAL_SECONDS.get(interval, 86400) * 10**9
+                for gap_start, gap_end in self.missing_ranges(symbol, interval, start, end, provider):
+                    frame = fetch(symbol, interval, gap_start, gap_end)
+                    self.stats["fetches"] += 1
+                    new = self._normalize(frame, interval)
+                    in_gap = (new["timestamp"] >= gap_start.value) & (new["timestamp"] < gap_end.value)
+                    new = {column: values[in_gap] for column, values in new.items()}
+                    count = len(new["timestamp"])
+                    self.stats["fetched_rows"] += count
+                    if count == 0:
+                        self.stats["empty_fetches"] += 1
+                        continue
+                    self._write(symbol, interval, provider, new, gap_start, min(gap_end.value, settled_ns))
+        else:
+            self.stats["warm_reads"] += 1
+        return self.read(symbol, interval, start, end, provider)
+
+    def get_frame(
+        self,
+        symbol: str,
+        interval: str,
+        start: TimeLike,
+        end: Optional[TimeLike] = None,
+        fetch: Optional[Fetcher] = None,
+        provider: str = DEFAULT_PROVIDER
+    ) -> pd.DataFrame:
+        return self.to_frame(self.get_bars(symbol, interval, start, end, fetch, provider))
+
+    def get_stats(self) -> Dict[str, Any]:
+        keys = [path for path in self.root.glob("*/*/*") if (path / "manifest.json").exists()]
+        return {**self.stats, "keys": len(keys), "open_maps": len(self.maps)}
+
+
+_default_store: Optional[BarStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_bar_store() -> Optional[BarStore]:
+    """Process-wide store under HISTORICAL_BAR_STORE_DIR; None when set to an empty string"""
+    global _default_store
+    root = os.getenv("HISTORICAL_BAR_STORE_DIR", "data/bar_store")
+    if not root:
+        return None
+    with _default_store_lock:
+        if _default_store is None or _default_store.root != Path(root):
+            try:
+                _default_store = BarStore(root)
+            except OSError as e:
+                logger.warning(f"Bar store unavailable at {root}: {e}")
+                return None
+        return _default_store
@@ -4,15 +4,22 @@ Provides real mathematical calculations and aggregations for all dashboard metri
 """
 
 import asyncio
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
+from collections import defaultdict
 import math
 from decimal import Decimal, ROUND_HALF_UP
 from dataclasses import dataclass
 
+import numpy as np
+
 from ..core.service_registry import service_registry
 from ..core.logging_config import logger
 from ..database.connection import DatabaseManager
+from .portfolio_analytics import (
+    SeriesAnalytics, compute_series_analytics, correlation_matrix,
+    portfolio_volatility, weighted_average_correlation
+)
 
 
 @dataclass
@@ -65,57 +72,50 @@ class CalculationService:
             if not historical_values or len(historical_values) < 2:
                 return self._get_default_performance_metrics()
             
-            # Calculate returns
-            returns = self._calculate_returns(historical_values)
-            
-            # Total return
-            total_return = (historical_values[-1] / historical_values[0] - 1) * 100
-            
-            # Annualized return
-            periods = len(historical_values) - 1
-            if periods > 0:
-                annualized_return = ((historical_values[-1] / historical_values[0]) ** (self.trading_days_per_year / periods) - 1) * 100
-            else:
-                annualized_return = 0
-            
-            # Volatility (annualized)
-            volatility = self._calculate_volatility(returns) * math.sqrt(self.trading_days_per_year) * 100
-            
-            # Sharpe ratio
-            sharpe_ratio = self._calculate_sharpe_ratio(returns, self.risk_free_rate)
-            
-            # Maximum drawdown
-            max_drawdown = self._calculate_max_drawdown(historical_values) * 100
-            
-            # Calmar ratio
-            calmar_ratio = annualized_return / abs(max_drawdown) if max_drawdown != 0 else 0
-            
-            # Win rate and profit factor
-            win_rate, profit_factor = self._calculate_win_metrics(returns)
-            
-            # Value at Risk
-            var_95 = self._calculate_var(returns, 0.95) * 100
-            var_99 = self._calculate_var(returns, 0.99) * 100
-            
-            return PerformanceMetrics(
-                total_return=round(total_return, 2),
-                annualized_return=round(annualized_return, 2),
-                volatility=round(volatility, 2),
-                sharpe_ratio=round(sharpe_ratio, 2),
-                max_drawdown=round(max_drawdown, 2),
-                calmar_ratio=round(calmar_ratio, 2),
-                win_rate=round(win_rate, 2),
-                profit_factor=round(profit_factor, 2),
-                var_95=round(var_95, 2),
-                var_99=round(var_99, 2)
-            )
+            analytics = self.analyze_price_matrix(np.asarray(historical_values, dtype=np.float64))
+            return self._performance_metrics_from_analytics(analytics, 0)
             
         except Exception as e:
             self.logger.error(f"Error calculating portfolio performance: {e}")
             return self._get_default_performance_metrics()
     
+    async def calculate_universe_performance(self, price_data: Dict[str, List[float]],
+                                           rolling_window: Optional[int] = None) -> Dict[str, Any]:
+        """Calculate performance metrics for many series at once, plus their return correlations"""
+        try:
+            symbols = [symbol for symbol, prices in price_data.items() if len(prices) >= 2]
+            if not symbols:
+                return {"performance": {}, "correlation": {}}
+            
+            analytics = self.analyze_price_matrix(self._price_matrix(price_data, symbols), rolling_window)
+            correlation = np.round(analytics.correlation, 3).tolist()
+            result = {
+                "performance": {
+                    symbol: self._performance_metrics_from_analytics(analytics, i) for i, symbol in enumerate(symbols)
+                },
+                "correlation": {symbol: dict(zip(symbols, row)) for symbol, row in zip(symbols, correlation)}
+            }
+            if analytics.rolling_volatility is not None:
+                latest_volatility = np.round(analytics.rolling_volatility[-1] * 100, 2).tolist()
+                result["rolling_volatility"] = dict(zip(symbols, latest_volatility))
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"Error calculating universe performance: {e}")
+            return {"performance": {}, "correlation": {}}
+    
+    def analyze_price_matrix(self, prices: np.ndarray, rolling_window: Optional[int] = None) -> SeriesAnalytics:
+        """Run the vectorized analytics kernel over a (periods x series) price matrix"""
+        return compute_series_analytics(
+            prices,
+            risk_free_rate=self.risk_free_rate,
+            periods_per_year=self.trading_days_per_year,
+            rolling_window=rolling_window
+        )
+    
     async def calculate_risk_metrics(self, positions: List[Dict[str, Any]], 
-                                   correlations: Dict[str, Dict[str, float]] = None) -> RiskMetrics:
+                                   correlations: Dict[str, Dict[str, float]] = None,
+                                   price_history: Optional[Dict[str, List[float]]] = None) -> RiskMetrics:
         """Calculate comprehensive risk metrics"""
         try:
             if not positions:
@@ -139,12 +139,18 @@ class CalculationService:
             total_margin = sum(pos.get('value', 0) for pos in positions) * 0.1  # Assume 10x leverage
             margin_utilization = margin_used / total_margin if total_margin > 0 else 0
             
+            # Return covariance/correlation of the held symbols, when their price history is available
+            analytics = None
+            held_symbols = [pos.get('symbol') for pos in positions]
+            if price_history and all(len(price_history.get(symbol) or []) >= 2 for symbol in held_symbols):
+                analytics = self.analyze_price_matrix(self._price_matrix(price_history, held_symbols))
+            
             # Portfolio VaR calculation
-            portfolio_var = self._calculate_portfolio_var(positions, correlations)
+            portfolio_var = self._calculate_portfolio_var(positions, correlations, analytics)
             daily_var = portfolio_var / math.sqrt(self.trading_days_per_year)
             
             # Correlation risk
-            correlation_risk = self._calculate_correlation_risk(positions, correlations)
+            correlation_risk = self._calculate_correlation_risk(positions, correlations, analytics)
             
             # Concentration risk
             concentration_risk = self._calculate_concentration_risk(positions)
@@ -341,21 +347,23 @@ class CalculationService:
         """Calculate correlation matrix for market data"""
         try:
             symbols = list(price_data.keys())
-            correlation_matrix = {}
-            
-            for symbol1 in symbols:
-                correlation_matrix[symbol1] = {}
-                for symbol2 in symbols:
-                    if symbol1 == symbol2:
-                        correlation_matrix[symbol1][symbol2] = 1.0
-                    else:
-                        correlation = self._calculate_correlation(
-                            price_data[symbol1], 
-                            price_data[symbol2]
-                        )
-                        correlation_matrix[symbol1][symbol2] = round(correlation, 3)
-            
-            return correlation_matrix
+            correlation_matrix_by_symbol = {
+                symbol1: {symbol2: (1.0 if symbol1 == symbol2 else 0) for symbol2 in symbols} for symbol1 in symbols
+            }
+            
+            # Only series of equal length are comparable; correlate each length group in one matrix product
+            symbols_by_length = defaultdict(list)
+            for symbol in symbols:
+                symbols_by_length[len(price_data[symbol])].append(symbol)
+            
+            for length, group in symbols_by_length.items():
+                if length < 2 or len(group) < 2:
+                    continue
+                correlations = np.round(correlation_matrix(np.array([price_data[symbol] for symbol in group], dtype=np.float64).T), 3)
+                for symbol1, row in zip(group, correlations.tolist()):
+                    correlation_matrix_by_symbol[symbol1].update(zip(group, row))
+            
+            return correlation_matrix_by_symbol
             
         except Exception as e:
             self.logger.error(f"Error calculating market correlation: {e}")
@@ -363,18 +371,29 @@ class CalculationService:
     
     # Private helper methods
     
-    def _calculate_returns(self, prices: List[float]) -> List[float]:
-        """Calculate percentage returns from price series"""
-        if len(prices) < 2:
-            return []
-        
-        returns = []
-        for i in range(1, len(prices)):
-            if prices[i-1] != 0:
-                ret = (prices[i] / prices[i-1]) - 1
-                returns.append(ret)
-        
-        return returns
+    def _price_matrix(self, price_data: Dict[str, List[float]], symbols: List[str]) -> np.ndarray:
+        """Stack price series into a (periods x symbols) matrix, aligned on their latest observation and NaN-padded"""
+        length = max(len(price_data[symbol]) for symbol in symbols)
+        matrix = np.full((length, len(symbols)), np.nan)
+        for i, symbol in enumerate(symbols):
+            series = price_data[symbol]
+            matrix[length - len(series):, i] = series
+        return matrix
+    
+    def _performance_metrics_from_analytics(self, analytics: SeriesAnalytics, column: int) -> PerformanceMetrics:
+        """Convert one column of kernel output to the percentage-based PerformanceMetrics"""
+        return PerformanceMetrics(
+            total_return=round(float(analytics.total_return[column]) * 100, 2),
+            annualized_return=round(float(analytics.annualized_return[column]) * 100, 2),
+            volatility=round(float(analytics.volatility[column]) * 100, 2),
+            sharpe_ratio=round(float(analytics.sharpe_ratio[column]), 2),
+            max_drawdown=round(float(analytics.max_drawdown[column]) * 100, 2),
+            calmar_ratio=round(float(analytics.calmar_ratio[column]), 2),
+            win_rate=round(float(analytics.win_rate[column]) * 100, 2),
+            profit_factor=round(float(analytics.profit_factor[column]), 2),
+            var_95=round(float(analytics.var_95[column]) * 100, 2),
+            var_99=round(float(analytics.var_99[column]) * 100, 2)
+        )
     
     def _calculate_volatility(self, returns: List[float]) -> float:
         """Calculate volatility (standard deviation) of returns"""
@@ -385,83 +404,41 @@ class CalculationService:
         variance = sum((r - mean_return) ** 2 for r in returns) / (len(returns) - 1)
         return math.sqrt(variance)
     
-    def _calculate_sharpe_ratio(self, returns: List[float], risk_free_rate: float) -> float:
-        """Calculate Sharpe ratio"""
-        if not returns:
-            return 0
-        
-        mean_return = sum(returns) / len(returns)
-        excess_return = mean_return - (risk_free_rate / self.trading_days_per_year)
-        volatility = self._calculate_volatility(returns)
-        
-        return (excess_return / volatility) if volatility != 0 else 0
-    
-    def _calculate_max_drawdown(self, prices: List[float]) -> float:
-        """Calculate maximum drawdown"""
-        if len(prices) < 2:
-            return 0
-        
-        peak = prices[0]
-        max_dd = 0
-        
-        for price in prices:
-            if price > peak:
-                peak = price
-            else:
-                drawdown = (peak - price) / peak
-                max_dd = max(max_dd, drawdown)
-        
-        return max_dd
-    
-    def _calculate_var(self, returns: List[float], confidence: float) -> float:
-        """Calculate Value at Risk"""
-        if not returns:
-            return 0
-        
-        sorted_returns = sorted(returns)
-        index = int((1 - confidence) * len(sorted_returns))
-        return sorted_returns[index] if index < len(sorted_returns) else 0
-    
-    def _calculate_win_metrics(self, returns: List[float]) -> Tuple[float, float]:
-        """Calculate win rate and profit factor"""
-        if not returns:
-            return 0, 0
-        
-        winning_trades = [r for r in returns if r > 0]
-        losing_trades = [r for r in returns if r < 0]
-        
-        win_rate = (len(winning_trades) / len(returns)) * 100
-        
-        total_gains = sum(winning_trades)
-        total_losses = abs(sum(losing_trades))
-        
-        profit_factor = (total_gains / total_losses) if total_losses != 0 else float('inf')
-        
-        return win_rate, profit_factor
-    
     def _calculate_portfolio_var(self, positions: List[Dict[str, Any]], 
-                                correlations: Dict[str, Dict[str, float]] = None) -> float:
+                                correlations: Dict[str, Dict[str, float]] = None,
+                                analytics: Optional[SeriesAnalytics] = None) -> float:
         """Calculate portfolio Value at Risk"""
-        # Simplified VaR calculation
         total_value = sum(pos.get('value', 0) for pos in positions)
-        
-        # Assume 2% daily volatility for simplification
-        portfolio_volatility = 0.02
-        confidence_level = 0.95
         z_score = 1.645  # 95% confidence
         
-        var = total_value * portfolio_volatility * z_score
+        if analytics is not None and total_value > 0:
+            # Annualized volatility of the value-weighted portfolio from the return covariance
+            weights = np.array([pos.get('value', 0) for pos in positions], dtype=np.float64) / total_value
+            portfolio_volatility_annual = portfolio_volatility(weights, analytics.covariance) * math.sqrt(self.trading_days_per_year)
+            return total_value * portfolio_volatility_annual * z_score
+        
+        # Simplified VaR: assume 2% volatility
+        portfolio_volatility_assumed = 0.02
+        
+        var = total_value * portfolio_volatility_assumed * z_score
         return var
     
     def _calculate_correlation_risk(self, positions: List[Dict[str, Any]], 
-                                  correlations: Dict[str, Dict[str, float]] = None) -> float:
-        """Calculate correlation risk score"""
-        if not correlations or len(positions) < 2:
+                                  correlations: Dict[str, Dict[str, float]] = None,
+                                  analytics: Optional[SeriesAnalytics] = None) -> float:
+        """Calculate correlation risk score (value-weighted average pairwise correlation)"""
+        if len(positions) < 2 or (not correlations and analytics is None):
             return 0.5  # Medium risk
         
-        # Simplified correlation risk calculation
-        avg_correlation = 0.6  # Assume moderate correlation
-        return min(avg_correlation, 1.0)
+        weights = np.array([pos.get('value', 0) for pos in positions], dtype=np.float64)
+        if analytics is not None:
+            correlation = analytics.correlation
+        else:
+            symbols = [pos.get('symbol') for pos in positions]
+            correlation = np.array([
+                [1.0 if a == b else correlations.get(a, {}).get(b, 0.6) for b in symbols] for a in symbols
+            ])  # Pairs missing from the supplied matrix assume moderate correlation
+        return min(weighted_average_correlation(weights, correlation), 1.0)
     
     def _calculate_concentration_risk(self, positions: List[Dict[str, Any]]) -> float:
         """Calculate concentration risk (Herfindahl index)"""
@@ -499,24 +476,6 @@ class CalculationService:
         
         return min(risk_score, 1.0)
     
-    def _calculate_correlation(self, series1: List[float], series2: List[float]) -> float:
-        """Calculate correlation coefficient between two series"""
-        if len(series1) != len(series2) or len(series1) < 2:
-            return 0
-        
-        n = len(series1)
-        mean1 = sum(series1) / n
-        mean2 = sum(series2) / n
-        
-        numerator = sum((series1[i] - mean1) * (series2[i] - mean2) for i in range(n))
-        
-        sum_sq1 = sum((x - mean1) ** 2 for x in series1)
-        sum_sq2 = sum((x - mean2) ** 2 for x in series2)
-        
-        denominator = math.sqrt(sum_sq1 * sum_sq2)
-        
-        return numerator / denominator if denominator != 0 else 0
-    
     def _calculate_profit_trajectory(self, current: float, target: float, time_progress: float) -> float:
         """Calculate profit goal trajectory score"""
         if target == 0:
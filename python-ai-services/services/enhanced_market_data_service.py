@@ -317,6 +317,7 @@ class EnhancedMarketDataService:
                     "error_count": status.error_count,
                     "status_message": status.status_message
                 }
+            result["request_stats"] = self.provider_manager.get_request_stats()
             
             return result
             
@@ -0,0 +1,210 @@
+"""
+Entity Similarity Index
+Type-partitioned matrices of L2-normalized entity embeddings for KnowledgeGraphService. Top-k search
+is one matrix product per partition; nodes are added and removed in place without refitting.
+"""
+
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+
+class _Partition:
+    """
+    Embedding rows for one entity type. Added blocks are buffered and stacked on the next search;
+    removed rows are masked and physically dropped once they exceed `compact_ratio` of the matrix.
+    """
+
+    def __init__(self, dense: bool, compact_ratio: float, ann_threshold: Optional[int]):
+        self.dense = dense
+        self.compact_ratio = compact_ratio
+        self.ann_threshold = ann_threshold
+        self.matrix = None
+        self.node_ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.alive = np.zeros(0, dtype=bool)
+        self.pending: List[Any] = []  # Row blocks not yet stacked into the matrix
+        self.pending_alive: List[bool] = []  # One flag per pending row
+        self.removed = 0
+        self.ann = None
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def extend(self, node_ids: List[str], block):
+        for node_id in node_ids:
+            if node_id in self.positions:
+                self.remove(node_id)
+            self.positions[node_id] = len(self.node_ids)
+            self.node_ids.append(node_id)
+            self.pending_alive.append(True)
+        self.pending.append(block)
+
+    def remove(self, node_id: str) -> bool:
+        position = self.positions.pop(node_id, None)
+        if position is None:
+            return False
+        if position < len(self.alive):
+            self.alive[position] = False
+            if self.ann is not None:
+                self.ann.mark_deleted(position)
+        else:
+            self.pending_alive[position - len(self.alive)] = False
+        self.removed += 1
+        return True
+
+    def _flush(self):
+        if self.pending:
+            start = len(self.alive)
+            block = np.vstack(self.pending) if self.dense else sp.vstack(self.pending, format="csr")
+            live = np.array(self.pending_alive, dtype=bool)
+            if self.matrix is None:
+                self.matrix = block
+            else:
+                self.matrix = np.vstack([self.matrix, block]) if self.dense else sp.vstack([self.matrix, block], format="csr")
+            self.alive = np.concatenate([self.alive, live])
+            self.pending, self.pending_alive = [], []
+            if self.ann is not None and live.any():
+                labels = start + np.flatnonzero(live)
+                self.ann.resize_index(len(self.alive))
+                self.ann.add_items(self.matrix[labels], labels)
+        if self.removed and self.removed > self.compact_ratio * max(len(self.alive), 1):
+            self._compact()
+
+    def _compact(self):
+        keep = np.flatnonzero(self.alive)
+        self.matrix = self.matrix[keep]
+        self.node_ids = [self.node_ids[i] for i in keep]
+        self.positions = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.alive = np.ones(len(keep), dtype=bool)
+        self.removed = 0
+        self.ann = None  # Labels are positions: rebuild on the next search
+
+    def _build_ann(self):
+        self.ann = hnswlib.Index(space="ip", dim=self.matrix.shape[1])
+        self.ann.init_index(max_elements=max(len(self.alive), 1), ef_construction=200, M=16)
+        labels = np.flatnonzero(self.alive)
+        self.ann.add_items(self.matrix[labels], labels)
+
+    def search(self, query, limit: int) -> List[Tuple[str, float]]:
+        self._flush()
+        live = len(self.positions)
+        if self.matrix is None or live == 0 or limit <= 0:
+            return []
+        k = min(limit, live)
+
+        if self.dense and hnswlib is not None and self.ann_threshold is not None and live >= self.ann_threshold:
+            if self.ann is None:
+                self._build_ann()
+            self.ann.set_ef(max(50, 2 * k))
+            labels, distances = self.ann.knn_query(query.reshape(1, -1), k=k)
+            return [(self.node_ids[label], float(1 - distance)) for label, distance in zip(labels[0], distances[0])]
+
+        scores = self.matrix @ (query if self.dense else query.T)
+        scores = np.asarray(scores.todense() if sp.issparse(scores) else scores, dtype=np.float64).ravel()
+        scores[~self.alive] = -np.inf
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.node_ids[i], float(scores[i])) for i in top]
+
+
+class EntityIndex:
+    """
+    Cosine top-k over entity embeddings, partitioned by entity type.
+
+    Vectors may be sparse rows (TF-IDF) or, with `dense=True`, dense arrays; both are L2-normalized
+    on insert so a dot product is the cosine. Dense partitions of at least `ann_threshold` rows are
+    served from an HNSW index when hnswlib is installed, and by exact matrix product otherwise.
+    """
+
+    def __init__(self, dense: bool = False, ann_threshold: Optional[int] = 50000, compact_ratio: float = 0.25):
+        self.dense = dense
+        self.ann_threshold = ann_threshold
+        self.compact_ratio = compact_ratio
+        self.partitions: Dict[str, _Partition] = {}
+        self.node_types: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.node_types)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.node_types
+
+    def clear(self):
+        self.partitions.clear()
+        self.node_types.clear()
+
+    def _normalize(self, vectors):
+        if self.dense:
+            return normalize(np.atleast_2d(np.asarray(vectors, dtype=np.float32)))
+        return normalize(sp.csr_matrix(vectors))
+
+    def _partition(self, node_type: str) -> _Partition:
+        if node_type not in self.partitions:
+            self.partitions[node_type] = _Partition(self.dense, self.compact_ratio, self.ann_threshold)
+        return self.partitions[node_type]
+
+    def add(self, node_id: str, node_type: str, vector):
+        """Insert or replace one entity's embedding"""
+        self.add_many([node_id], [node_type], vector)
+
+    def add_many(self, node_ids: List[str], node_types: Iterable[str], vectors):
+        """Insert or replace embeddings; `vectors` has one row per node id"""
+        rows = self._normalize(vectors)
+        by_type: Dict[str, List[int]] = {}
+        for i, (node_id, node_type) in enumerate(zip(node_ids, node_types)):
+            previous = self.node_types.get(node_id)
+            if previous is not None and previous != node_type:
+                self.partitions[previous].remove(node_id)
+            self.node_types[node_id] = node_type
+            by_type.setdefault(node_type, []).append(i)
+        for node_type, indices in by_type.items():
+            self._partition(node_type).extend([node_ids[i] for i in indices], rows[indices])
+
+    def remove(self, node_id: str) -> bool:
+        node_type = self.node_types.pop(node_id, None)
+        if node_type is None:
+            return False
+        return self.partitions[node_type].remove(node_id)
+
+    def search(self, query, node_type: Optional[str] = None, limit: int = 10) -> List[Tuple[str, float]]:
+        """(node_id, cosine) pairs, best first, from one type's partition or across all of them"""
+        query = self._normalize(query)
+        query = query[0] if self.dense else query
+        if node_type is not None:
+            partition = self.partitions.get(node_type)
+            return partition.search(query, limit) if partition else []
+        candidates = [hit for partition in self.partitions.values() for hit in partition.search(query, limit)]
+        return heapq.nlargest(limit, candidates, key=lambda hit: hit[1])
+
+    def memory_bytes(self) -> int:
+        """Bytes held by stacked embedding matrices (pending rows excluded)"""
+        total = 0
+        for partition in self.partitions.values():
+            matrix = partition.matrix
+            if matrix is None:
+                continue
+            if sp.issparse(matrix):
+                total += matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+            else:
+                total += matrix.nbytes
+        return total
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entities": len(self.node_types),
+            "dense": self.dense,
+            "ann_available": hnswlib is not None,
+            "partitions": {
+                node_type: {"entities": len(partition), "rows": len(partition.alive) + len(partition.pending)}
+                for node_type, partition in self.partitions.items()
+            }
+        }
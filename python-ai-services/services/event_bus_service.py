@@ -1,19 +1,218 @@
-from collections import defaultdict
-from typing import Dict, List, Callable, Awaitable
+from collections import defaultdict, deque, OrderedDict
+from typing import Dict, List, Callable, Awaitable, Optional, Hashable, Any, Tuple
 import asyncio
+import time
 # Assuming Event model is in a sibling 'models' package
 from ..models.event_bus_models import Event
 from loguru import logger
 
-class EventBusService:
+DISPATCH_MODES = ("gather", "queued")
+OVERFLOW_POLICIES = ("drop_oldest", "block", "coalesce")
+
+
+class _TopicTrie:
+    """
+    Character trie over subscription patterns.
+    A pattern ending in '*' matches every event type with that prefix ('*' alone matches all);
+    any other pattern matches its event type exactly. Lookups are O(len(event_type)).
+    """
+
+    class _Node:
+        __slots__ = ("children", "exact", "prefix")
+
+        def __init__(self):
+            self.children: Dict[str, "_TopicTrie._Node"] = {}
+            self.exact: List[Any] = []
+            self.prefix: List[Any] = []
+
+    def __init__(self):
+        self._root = self._Node()
+
+    def _walk(self, key: str, create: bool) -> Optional["_TopicTrie._Node"]:
+        node = self._root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = self._Node()
+            node = child
+        return node
+
+    def add(self, pattern: str, item: Any):
+        is_prefix = pattern.endswith("*")
+        node = self._walk(pattern[:-1] if is_prefix else pattern, create=True)
+        (node.prefix if is_prefix else node.exact).append(item)
+
+    def remove(self, pattern: str, item: Any) -> bool:
+        is_prefix = pattern.endswith("*")
+        node = self._walk(pattern[:-1] if is_prefix else pattern, create=False)
+        bucket = None if node is None else (node.prefix if is_prefix else node.exact)
+        if not bucket or item not in bucket:
+            return False
+        bucket.remove(item)
+        return True
+
+    def match(self, event_type: str) -> List[Any]:
+        node = self._root
+        matched = list(node.prefix)
+        for char in event_type:
+            node = node.children.get(char)
+            if node is None:
+                return matched
+            matched.extend(node.prefix)
+        matched.extend(node.exact)
+        return matched
+
+
+class _TopicMetrics:
+    __slots__ = ("published", "dispatched", "errors", "total_latency", "max_latency")
+
     def __init__(self):
+        self.published = 0
+        self.dispatched = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record_dispatch(self, latency: float, failed: bool):
+        self.dispatched += 1
+        self.errors += failed
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "published": self.published,
+            "dispatched": self.dispatched,
+            "errors": self.errors,
+            "avg_dispatch_latency_ms": (self.total_latency / self.dispatched * 1000) if self.dispatched else 0.0,
+            "max_dispatch_latency_ms": self.max_latency * 1000
+        }
+
+
+class _Subscription:
+    """
+    A subscriber in queued mode: a bounded queue drained by its own consumer task,
+    so a slow callback only delays its own backlog.
+    """
+
+    def __init__(self, pattern: str, callback: Callable[[Event], Awaitable[None]], max_queue_size: int,
+                 overflow_policy: str, coalesce_key: Optional[Callable[[Event], Hashable]]):
+        self.pattern = pattern
+        self.callback = callback
+        self.callback_name = getattr(callback, '__name__', repr(callback))
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.coalesce_key = coalesce_key or (lambda event: event.message_type)
+        # (event, enqueued_at) pairs; coalescing keeps one pending entry per key in arrival order
+        self._queue = OrderedDict() if overflow_policy == "coalesce" else deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.consumer_task: Optional[asyncio.Task] = None
+        self.max_queue_depth = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    async def put(self, event: Event):
+        item = (event, time.perf_counter())
+        if self.overflow_policy == "coalesce":
+            key = self.coalesce_key(event)
+            if key in self._queue:
+                self._queue[key] = item  # Newer value replaces the pending one in place
+                self.coalesced += 1
+                return
+            if len(self._queue) >= self.max_queue_size:
+                self._queue.popitem(last=False)
+                self.dropped += 1
+            self._queue[key] = item
+        elif self.overflow_policy == "block":
+            while len(self._queue) >= self.max_queue_size:
+                self._not_full.clear()
+                await self._not_full.wait()
+            self._queue.append(item)
+        else:
+            if len(self._queue) >= self.max_queue_size:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(item)
+
+        self._idle.clear()
+        self._not_empty.set()
+        if len(self._queue) > self.max_queue_depth:
+            self.max_queue_depth = len(self._queue)
+
+    async def get(self) -> Tuple[Event, float]:
+        while not self._queue:
+            self._not_empty.clear()
+            self._idle.set()
+            await self._not_empty.wait()
+        item = self._queue.popitem(last=False)[1] if self.overflow_policy == "coalesce" else self._queue.popleft()
+        self._not_full.set()
+        return item
+
+    async def wait_idle(self):
+        await self._idle.wait()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "pattern": self.pattern,
+            "callback": self.callback_name,
+            "overflow_policy": self.overflow_policy,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "max_queue_size": self.max_queue_size,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced
+        }
+
+
+class EventBusService:
+    """
+    In-process publish/subscribe bus.
+
+    dispatch_mode="gather" (default) awaits every matching subscriber inside publish().
+    dispatch_mode="queued" gives each subscriber a bounded queue and a dedicated consumer task;
+    publish() only enqueues, and the overflow policy decides what happens when a queue is full:
+    "drop_oldest", "block" (publisher waits: backpressure) or "coalesce" (one pending event per key).
+
+    Event types may be subscribed exactly or by prefix with a trailing '*' (e.g. "Market*", "*").
+    """
+
+    def __init__(self, dispatch_mode: str = "gather", max_queue_size: int = 1000,
+                 overflow_policy: str = "drop_oldest"):
+        if dispatch_mode not in DISPATCH_MODES:
+            raise ValueError(f"Unknown dispatch mode '{dispatch_mode}'. Expected one of {DISPATCH_MODES}.")
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow_policy}'. Expected one of {OVERFLOW_POLICIES}.")
+
+        self.dispatch_mode = dispatch_mode
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
         self._subscribers: Dict[str, List[Callable[[Event], Awaitable[None]]]] = defaultdict(list)
-        logger.info("EventBusService initialized.")
+        self._index = _TopicTrie()
+        self._match_cache: Dict[str, List[Any]] = {}
+        self._subscriptions: List[_Subscription] = []
+        self._topic_metrics: Dict[str, _TopicMetrics] = defaultdict(_TopicMetrics)
+        logger.info(f"EventBusService initialized in '{dispatch_mode}' dispatch mode.")
 
-    async def subscribe(self, event_type: str, callback: Callable[[Event], Awaitable[None]]):
+    async def subscribe(self, event_type: str, callback: Callable[[Event], Awaitable[None]],
+                        max_queue_size: Optional[int] = None, overflow_policy: Optional[str] = None,
+                        coalesce_key: Optional[Callable[[Event], Hashable]] = None):
         """
-        Subscribes a callback to a specific event type.
+        Subscribes a callback to a specific event type, or to every event type with a
+        given prefix when event_type ends in '*'.
         The callback must be an awaitable (async function).
+        Queue settings only apply in queued mode and default to the bus-wide settings;
+        coalesce_key defaults to the event's message_type.
         """
         # It's good practice to ensure the callback is awaitable if type hints specify Awaitable
         if not asyncio.iscoroutinefunction(callback):
@@ -23,68 +222,133 @@ class EventBusService:
             # If a synchronous function is passed that needs to be awaited, it would need to be run in an executor.
             # However, the type hint Callable[[Event], Awaitable[None]] implies it's already awaitable.
 
+        overflow_policy = overflow_policy or self.overflow_policy
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow_policy}'. Expected one of {OVERFLOW_POLICIES}.")
+
         logger.debug(f"New subscription for event type '{event_type}' by callback: {getattr(callback, '__name__', repr(callback))}")
         self._subscribers[event_type].append(callback)
 
+        if self.dispatch_mode == "queued":
+            subscription = _Subscription(
+                event_type, callback, max_queue_size or self.max_queue_size, overflow_policy, coalesce_key
+            )
+            subscription.consumer_task = asyncio.create_task(self._consume(subscription))
+            self._subscriptions.append(subscription)
+            self._index.add(event_type, subscription)
+        else:
+            self._index.add(event_type, callback)
+        self._match_cache.clear()
+
+    async def unsubscribe(self, event_type: str, callback: Callable[[Event], Awaitable[None]]) -> bool:
+        """Removes a callback's subscription for event_type. Returns False if it was not subscribed."""
+        if callback not in self._subscribers.get(event_type, []):
+            return False
+        self._subscribers[event_type].remove(callback)
+        if not self._subscribers[event_type]:
+            del self._subscribers[event_type]
+
+        if self.dispatch_mode == "queued":
+            subscription = next(
+                s for s in self._subscriptions if s.pattern == event_type and s.callback is callback
+            )
+            self._subscriptions.remove(subscription)
+            self._index.remove(event_type, subscription)
+            subscription.consumer_task.cancel()
+        else:
+            self._index.remove(event_type, callback)
+        self._match_cache.clear()
+        return True
+
+    def _match(self, event_type: str) -> List[Any]:
+        matched = self._match_cache.get(event_type)
+        if matched is None:
+            matched = self._match_cache[event_type] = self._index.match(event_type)
+        return matched
+
     async def publish(self, event: Event):
         """
-        Publishes an event to all subscribed awaitable callbacks for its message_type.
-        Executes callbacks concurrently and gathers results.
+        Publishes an event to all subscribers whose pattern matches its message_type.
+        In gather mode callbacks run concurrently and are awaited here; in queued mode the
+        event is only enqueued for each subscriber's consumer task.
         """
         event_type = event.message_type
-        logger.info(f"Publishing event ID {event.event_id} of type '{event_type}' from agent {event.publisher_agent_id}. Payload keys: {list(event.payload.keys())}")
+        logger.debug(f"Publishing event ID {event.event_id} of type '{event_type}' from agent {event.publisher_agent_id}. Payload keys: {list(event.payload.keys())}")
+        self._topic_metrics[event_type].published += 1
 
-        subscribers_for_type = self._subscribers.get(event_type, [])
+        subscribers_for_type = self._match(event_type)
         if not subscribers_for_type:
             logger.debug(f"No subscribers for event type '{event_type}'. Event ID {event.event_id} not dispatched to any callback.")
             return
 
+        if self.dispatch_mode == "queued":
+            for subscription in subscribers_for_type:
+                await subscription.put(event)
+            return
+
+        started = time.perf_counter()
+        callbacks = []
         tasks = []
         for callback in subscribers_for_type:
-            try:
-                # Ensure the callback is indeed awaitable before adding to tasks
-                if asyncio.iscoroutinefunction(callback):
-                    tasks.append(callback(event))
-                else:
-                    # This case should ideally not happen if subscribers adhere to the type hint.
-                    # If it does, logging it is important. Running a sync function directly in gather()
-                    # without being wrapped would block if it's IO-bound or long-running.
-                    # For now, we'll log a warning and skip if not an async function,
-                    # or the user must ensure their sync callable returns an Awaitable (e.g. a completed Future).
-                    logger.error(f"Callback {getattr(callback, '__name__', repr(callback))} for event type '{event_type}' is not an async function as expected. Skipping.")
-            except Exception as e_cb_setup: # Should not happen if callback is just a function reference
-                 logger.error(f"Error setting up callback {getattr(callback, '__name__', repr(callback))} for event {event.event_id}: {e_cb_setup}", exc_info=True)
-
+            if asyncio.iscoroutinefunction(callback):
+                callbacks.append(callback)
+                tasks.append(callback(event))
+            else:
+                # Running a sync function directly in gather() would block if it's IO-bound or long-running.
+                logger.error(f"Callback {getattr(callback, '__name__', repr(callback))} for event type '{event_type}' is not an async function as expected. Skipping.")
 
         if not tasks:
             logger.debug(f"No valid async subscribers to execute for event type '{event_type}'. Event ID {event.event_id}.")
             return
 
         results = await asyncio.gather(*tasks, return_exceptions=True)
+        latency = time.perf_counter() - started
 
-        for i, result in enumerate(results):
-            # Need to map result back to the original callback for logging, if tasks list was filtered.
-            # Assuming tasks list directly corresponds to subscribers_for_type if no filtering happened.
-            # If tasks list could be shorter due to filtering non-async callbacks, this mapping needs care.
-            # For this version, assuming tasks correspond 1:1 with subscribers_for_type that were async.
-            # A more robust way would be to store (callback, task) tuples if filtering happens.
-
-            # Get the callback that corresponds to this result.
-            # This assumes tasks were appended in the same order as subscribers_for_type and none were skipped.
-            # If non-async functions were skipped, this index might be wrong.
-            # For simplicity, let's find the callback that was actually used to create the task.
-            # This is tricky as tasks don't directly store the original coroutine function reference in an obvious public way.
-            # A better approach for error reporting would be to wrap each callback call.
-
-            # Simplified error reporting for now:
-            original_callback_ref = subscribers_for_type[i] # This assumes no filtering of non-async subscribers occurred.
-                                                            # If filtering did occur, this could point to the wrong callback.
-                                                            # A more robust approach would be to iterate over (callback, task_result) pairs.
-                                                            # For now, this is a known simplification.
-
-            if isinstance(result, Exception):
-                callback_name = getattr(original_callback_ref, '__name__', repr(original_callback_ref))
+        for callback, result in zip(callbacks, results):
+            failed = isinstance(result, Exception)
+            self._topic_metrics[event_type].record_dispatch(latency, failed)
+            if failed:
+                callback_name = getattr(callback, '__name__', repr(callback))
                 logger.error(f"Error in subscriber '{callback_name}' for event type '{event_type}' (Event ID: {event.event_id}): {result}", exc_info=result)
 
         logger.debug(f"Finished publishing event ID {event.event_id} to {len(tasks)} subscriber(s).")
 
+    async def _consume(self, subscription: _Subscription):
+        """Consumer task for one queued-mode subscription"""
+        while True:
+            event, enqueued_at = await subscription.get()
+            failed = False
+            try:
+                if asyncio.iscoroutinefunction(subscription.callback):
+                    await subscription.callback(event)
+                else:
+                    logger.error(f"Callback {subscription.callback_name} for event type '{event.message_type}' is not an async function as expected. Skipping.")
+                    failed = True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failed = True
+                logger.error(f"Error in subscriber '{subscription.callback_name}' for event type '{event.message_type}' (Event ID: {event.event_id}): {e}", exc_info=e)
+            self._topic_metrics[event.message_type].record_dispatch(time.perf_counter() - enqueued_at, failed)
+
+    async def drain(self):
+        """Waits until every queued-mode subscriber has processed its backlog."""
+        while any(s.queue_depth or not s._idle.is_set() for s in self._subscriptions):
+            await asyncio.gather(*(s.wait_idle() for s in self._subscriptions))
+
+    async def shutdown(self, drain: bool = True):
+        """Stops the consumer tasks, optionally after processing pending events."""
+        if drain:
+            await self.drain()
+        tasks = [s.consumer_task for s in self._subscriptions if s.consumer_task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-topic publish/dispatch counters and latency, plus per-subscriber queue depth."""
+        return {
+            "dispatch_mode": self.dispatch_mode,
+            "topics": {topic: metrics.as_dict() for topic, metrics in self._topic_metrics.items()},
+            "subscribers": [subscription.as_dict() for subscription in self._subscriptions]
+        }
@@ -0,0 +1,173 @@
+"""
+Knowledge Graph Snapshots
+Compact on-disk form of a typed networkx DiGraph for fast restarts: CSR adjacency with edge
+relationship codes, and per-node-type attribute columns (numeric columns as arrays, the rest JSON).
+
+Layout under the snapshot directory:
+    graph.npz      indptr/indices/relationship codes and numeric columns
+    graph.json     node ids per type, relationship names, JSON columns and caller metadata
+
+graph.json is replaced last and names the id stored in graph.npz, so a crash between the two writes
+leaves a snapshot that fails validation instead of a mismatched one.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import networkx as nx
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+MISSING_INT = np.iinfo(np.int64).min
+
+
+def _column_kind(values: List[Any]) -> str:
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, (int, np.integer)) and not isinstance(value, bool) for value in present):
+        return "int"
+    if present and all(isinstance(value, (int, float, np.number)) and not isinstance(value, bool) for value in present):
+        return "float"
+    return "json"
+
+
+def save_graph_snapshot(graph: nx.DiGraph, directory: Union[str, Path], metadata: Optional[Dict[str, Any]] = None) -> int:
+    """Write `graph` (nodes carrying a 'type' attribute) to `directory`; returns bytes written"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    by_type: Dict[str, List[str]] = {}
+    for node_id, data in graph.nodes(data=True):
+        by_type.setdefault(data.get("type", "unknown"), []).append(node_id)
+    order = [node_id for node_ids in by_type.values() for node_id in node_ids]
+    position = {node_id: i for i, node_id in enumerate(order)}
+
+    # CSR adjacency over the type-grouped node order
+    relationships: Dict[str, int] = {}
+    indptr = np.zeros(len(order) + 1, dtype=np.int64)
+    indices, codes = [], []
+    for i, node_id in enumerate(order):
+        for successor, edge in graph.adj[node_id].items():
+            indices.append(position[successor])
+            codes.append(relationships.setdefault(edge.get("relationship", "unknown"), len(relationships)))
+        indptr[i + 1] = len(indices)
+    snapshot_id = time.time_ns()
+    arrays = {
+        "snapshot_id": np.array([snapshot_id], dtype=np.int64),
+        "indptr": indptr,
+        "indices": np.asarray(indices, dtype=np.int64),
+        "relationships": np.asarray(codes, dtype=np.int16)
+    }
+
+    # Attribute columns per node type
+    columns: Dict[str, Dict[str, Any]] = {}
+    for node_type, node_ids in by_type.items():
+        keys = sorted({key for node_id in node_ids for key in graph.nodes[node_id] if key != "type"})
+        type_columns = columns[node_type] = {}
+        for key in keys:
+            values = [graph.nodes[node_id].get(key) for node_id in node_ids]
+            missing = [i for i, node_id in enumerate(node_ids) if key not in graph.nodes[node_id]]
+            kind = _column_kind(values)
+            if kind == "int":
+                arrays[f"{node_type}/{key}"] = np.array([MISSING_INT if v is None else v for v in values], dtype=np.int64)
+            elif kind == "float":
+                arrays[f"{node_type}/{key}"] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+                # NaN marks a missing value; remember which NaNs were real so they survive the round trip
+                real_nan = [i for i, v in enumerate(values) if v is not None and v != v]
+                if real_nan:
+                    type_columns[f"{key}#nan"] = {"kind": "nan_positions", "values": real_nan}
+            else:
+                type_columns[key] = {"kind": "json", "values": values}
+            if kind != "json":
+                type_columns[key] = {"kind": kind}
+            if missing:
+                type_columns[key]["missing"] = missing
+
+    array_path = directory / "graph.npz"
+    manifest_path = directory / "graph.json"
+    with open(array_path.with_suffix(".npz.tmp"), "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(array_path.with_suffix(".npz.tmp"), array_path)
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "snapshot_id": snapshot_id,
+        "saved_at": time.time(),
+        "nodes": {node_type: node_ids for node_type, node_ids in by_type.items()},
+        "edge_count": len(indices),
+        "relationships": [name for name, _ in sorted(relationships.items(), key=lambda item: item[1])],
+        "columns": columns,
+        "metadata": metadata or {}
+    }
+    tmp_manifest = manifest_path.with_suffix(".json.tmp")
+    with open(tmp_manifest, "w") as f:
+        json.dump(manifest, f, default=str)
+    os.replace(tmp_manifest, manifest_path)
+    return array_path.stat().st_size + manifest_path.stat().st_size
+
+
+def load_graph_snapshot(directory: Union[str, Path]) -> Optional[Tuple[nx.DiGraph, Dict[str, Any]]]:
+    """(graph, metadata) from a snapshot written by save_graph_snapshot, or None if absent or invalid"""
+    directory = Path(directory)
+    manifest_path = directory / "graph.json"
+    array_path = directory / "graph.npz"
+    if not manifest_path.exists() or not array_path.exists():
+        return None
+
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get("version") != SNAPSHOT_VERSION:
+            return None
+        with np.load(array_path) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable knowledge graph snapshot in {directory}: {e}")
+        return None
+
+    order = [node_id for node_ids in manifest["nodes"].values() for node_id in node_ids]
+    indptr, indices, codes = arrays["indptr"], arrays["indices"], arrays["relationships"]
+    if (
+        int(arrays["snapshot_id"][0]) != manifest.get("snapshot_id")
+        or len(indptr) != len(order) + 1
+        or indptr[-1] != len(indices)
+        or len(indices) != manifest["edge_count"]
+    ):
+        logger.warning(f"Knowledge graph snapshot in {directory} is incomplete; ignoring it")
+        return None
+
+    graph = nx.DiGraph()
+    for node_type, node_ids in manifest["nodes"].items():
+        attributes = [{"type": node_type} for _ in node_ids]
+        columns = manifest["columns"].get(node_type, {})
+        for key, column in columns.items():
+            kind = column["kind"]
+            if kind == "nan_positions":
+                continue
+            if kind == "json":
+                values = column["values"]
+            else:
+                raw = arrays[f"{node_type}/{key}"]
+                if kind == "int":
+                    values = [None if v == MISSING_INT else int(v) for v in raw]
+                else:
+                    real_nan = set(columns.get(f"{key}#nan", {}).get("values", []))
+                    values = [float(v) if v == v or i in real_nan else None for i, v in enumerate(raw)]
+            missing = set(column.get("missing", ()))
+            for i, (attrs, value) in enumerate(zip(attributes, values)):
+                if i not in missing:
+                    attrs[key] = value
+        graph.add_nodes_from(zip(node_ids, attributes))
+
+    relationships = manifest["relationships"]
+    sources = np.repeat(np.arange(len(order)), np.diff(indptr))
+    graph.add_edges_from(
+        (order[source], order[target], {"relationship": relationships[code]})
+        for source, target, code in zip(sources, indices, codes)
+    )
+    return graph, manifest["metadata"]
@@ -11,15 +11,42 @@ import pandas as pd
 import yfinance as yf
 from decimal import Decimal
 
+from .bar_store import BarStore, get_default_bar_store
+
 logger = logging.getLogger(__name__)
 
+# Calendar days covered by each yfinance period served from the bar store
+PERIOD_DAYS = {
+    "1d": 1, "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183,
+    "1y": 366, "2y": 731, "5y": 1827, "10y": 3653
+}
+
 class HistoricalDataService:
     """Service for fetching and managing historical market data"""
     
-    def __init__(self, market_data_service=None):
+    def __init__(self, market_data_service=None, bar_store: Optional[BarStore] = None):
         self.market_data_service = market_data_service
+        self.bar_store = bar_store
         self.cache = {}
         self.cache_duration = timedelta(hours=1)
+    
+    def _period_start(self, period: str, end: datetime) -> Optional[datetime]:
+        """Start of a yfinance period ending at `end`, or None for periods the store can't bound ("max")"""
+        if period == "ytd":
+            return end.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        days = PERIOD_DAYS.get(period)
+        return end - timedelta(days=days) if days else None
+    
+    @staticmethod
+    def _fetch_yfinance(symbol: str, interval: str, start, end) -> pd.DataFrame:
+        """Bar store fetcher: one yfinance request for [start, end)"""
+        return yf.Ticker(symbol).history(start=start.to_pydatetime(), end=end.to_pydatetime(), interval=interval)
+    
+    async def _get_from_store(self, symbol: str, start: datetime, end: datetime, interval: str) -> pd.DataFrame:
+        """Read through the bar store, fetching only the missing ranges (file and network I/O off the loop)"""
+        return await asyncio.to_thread(
+            self.bar_store.get_frame, symbol, interval, start, end, self._fetch_yfinance, "yfinance"
+        )
         
     async def get_historical_data(
         self, 
@@ -44,9 +71,14 @@ class HistoricalDataService:
                 if datetime.now(timezone.utc) - cached_time < self.cache_duration:
                     return cached_data
             
-            # Fetch from Yahoo Finance
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period=period, interval=interval)
+            end_date = datetime.now(timezone.utc)
+            start_date = self._period_start(period, end_date)
+            if self.bar_store is not None and start_date is not None:
+                data = await self._get_from_store(symbol, start_date, end_date, interval)
+            else:
+                # Fetch from Yahoo Finance
+                ticker = yf.Ticker(symbol)
+                data = ticker.history(period=period, interval=interval)
             
             if data.empty:
                 logger.warning(f"No historical data found for {symbol}")
@@ -72,8 +104,11 @@ class HistoricalDataService:
             end_date = datetime.now(timezone.utc)
             start_date = end_date - timedelta(days=days)
             
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(start=start_date, end=end_date)
+            if self.bar_store is not None:
+                data = await self._get_from_store(symbol, start_date, end_date, "1d")
+            else:
+                ticker = yf.Ticker(symbol)
+                data = ticker.history(start=start_date, end=end_date)
             
             if data.empty:
                 return []
@@ -165,10 +200,11 @@ class HistoricalDataService:
             "service": "historical_data_service",
             "status": "running",
             "cache_size": len(self.cache),
+            "bar_store": self.bar_store.get_stats() if self.bar_store is not None else None,
             "last_health_check": datetime.now(timezone.utc).isoformat()
         }
 
 # Factory function for service registry
 def create_historical_data_service():
     """Factory function to create HistoricalDataService instance"""
-    return HistoricalDataService()
\ No newline at end of file
+    return HistoricalDataService(bar_store=get_default_bar_store())
\ No newline at end of file
@@ -4,45 +4,107 @@ Builds relationships between strategies, trades, agents, and market conditions
 """
 
 import asyncio
-from typing import Dict, List, Any, Optional, Tuple, Set
+from typing import Dict, List, Any, Optional, Tuple, Set, Callable
 from datetime import datetime, timedelta
+from pathlib import Path
+import itertools
 import json
+import logging
+import os
+import sys
+import time
 import numpy as np
 from collections import defaultdict
 import networkx as nx
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
 from core.service_registry import ServiceRegistry
+from services.entity_index import EntityIndex
+from services.graph_snapshot import save_graph_snapshot, load_graph_snapshot
 from database.async_pool import db_pool
 from models.farm_models import (
     StrategyArchiveData, TradeArchiveData, 
     AgentDecisionData, AgentMemoryData
 )
 
+logger = logging.getLogger(__name__)
+
 
 class KnowledgeGraphService:
     """
     Builds and queries a knowledge graph of trading relationships
+    
+    Entity text is embedded with TF-IDF, or with `embed_texts` (a function returning one dense vector
+    per text) when given, into a type-partitioned EntityIndex. Entities added after the build are
+    embedded with the fitted vocabulary; the vectorizer is refit once they exceed `refit_ratio` of
+    the entities it was fitted on.
+    
+    After the first full build, refresh() loads only rows changed since per-table watermarks and
+    applies them as graph deltas. The graph is snapshotted to `snapshot_dir` after each build so a
+    restart loads the snapshot and refreshes from its watermarks instead of rebuilding. Deleted rows
+    are only dropped by a full rebuild (initialize(full_rebuild=True)).
     """
     
-    def __init__(self):
+    WATERMARK_TABLES = ('strategies', 'trades', 'decisions')
+    
+    def __init__(
+        self,
+        embed_texts: Optional[Callable[[List[str]], np.ndarray]] = None,
+        snapshot_dir: Optional[str] = None
+    ):
         self.service_registry = ServiceRegistry()
         self.graph = nx.DiGraph()
-        self.entity_embeddings = {}
+        self.embed_texts = embed_texts
+        self.entity_index = EntityIndex(dense=embed_texts is not None)
         self.vectorizer = TfidfVectorizer(max_features=1000)
+        self.refit_ratio = 0.5
+        self._fitted_documents = 0
+        self._documents_since_fit = 0
         self._initialized = False
         
-    async def initialize(self):
-        """Initialize the knowledge graph from archived data"""
-        if self._initialized:
+        # Incremental builds: high-water mark of each source table's change column
+        if snapshot_dir is None:
+            snapshot_dir = os.getenv("KNOWLEDGE_GRAPH_SNAPSHOT_DIR", "data/knowledge_graph")
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        self.watermarks: Dict[str, Optional[datetime]] = {table: None for table in self.WATERMARK_TABLES}
+        self.build_metrics: Dict[str, Any] = {
+            'mode': None,
+            'builds': 0,
+            'last_build_seconds': 0.0,
+            'last_rows_applied': {},
+            'snapshot_load_seconds': None,
+            'snapshot_save_seconds': None,
+            'snapshot_bytes': 0
+        }
+        self._build_lock = asyncio.Lock()
+        self._memory_estimate: Optional[Tuple[Tuple[int, int, int], int]] = None  # (graph version, bytes)
+        
+    async def initialize(self, full_rebuild: bool = False):
+        """Initialize the knowledge graph from the latest snapshot plus changes, or from archived data"""
+        if self._initialized and not full_rebuild:
             return
             
-        await self._build_graph()
+        async with self._build_lock:
+            if full_rebuild or not await self._load_snapshot():
+                await self._build_graph()
+            else:
+                await self._apply_changes()
         self._initialized = True
         
+    async def refresh(self) -> Dict[str, int]:
+        """Apply rows changed since the watermarks as graph deltas; returns rows applied per table"""
+        async with self._build_lock:
+            if not self._initialized:
+                await self._build_graph()
+                self._initialized = True
+            else:
+                await self._apply_changes()
+        return self.build_metrics['last_rows_applied']
+        
     async def _build_graph(self):
         """Build the knowledge graph from Trading Farm Brain data"""
+        started = time.perf_counter()
+        self.graph = nx.DiGraph()
         async with db_pool.get_connection() as conn:
             # Load all entities
             strategies = await self._load_strategies(conn)
@@ -62,45 +124,174 @@ class KnowledgeGraphService:
             # Create embeddings for similarity search
             await self._create_embeddings()
             
-    async def _load_strategies(self, conn) -> List[Dict]:
-        """Load all archived strategies"""
-        query = """
-            SELECT strategy_id, strategy_name, strategy_type, 
-                   parameters, performance_metrics, created_at
-            FROM farm_strategy_archive
-            ORDER BY created_at DESC
-        """
-        rows = await conn.fetch(query)
+        self.watermarks = {table: None for table in self.WATERMARK_TABLES}
+        self._advance_watermarks(strategies, trades, decisions)
+        self._record_build('full', started, strategies, trades, decisions, agents)
+        await self._save_snapshot()
+        
+    async def _apply_changes(self):
+        """Load rows changed since the watermarks and merge them into the graph"""
+        started = time.perf_counter()
+        async with db_pool.get_connection() as conn:
+            strategies = await self._load_strategies(conn, since=self.watermarks['strategies'])
+            trades = await self._load_trades(conn, since=self.watermarks['trades'])
+            decisions = await self._load_decisions(conn, since=self.watermarks['decisions'])
+            
+            # Agent nodes are aggregates: recompute only the agents the new rows touch
+            agent_ids = sorted({row['agent_id'] for row in trades + decisions if row.get('agent_id')})
+            agents = await self._load_agents(conn, agent_ids=agent_ids) if agent_ids else []
+            
+            await self._build_strategy_nodes(strategies)
+            await self._build_trade_nodes(trades)
+            await self._build_decision_nodes(decisions)
+            await self._build_agent_nodes(agents)
+            
+            await self._build_trade_relationships(trades)
+            await self._build_decision_relationships(
+                conn, decisions_since=self.watermarks['decisions'], trades_since=self.watermarks['trades']
+            )
+            
+        changed = (
+            [f"strategy_{row['strategy_id']}" for row in strategies]
+            + [f"trade_{row['trade_id']}" for row in trades]
+            + [f"decision_{row['decision_id']}" for row in decisions]
+            + [f"agent_{row['agent_id']}" for row in agents]
+        )
+        await self.index_entities(changed)
+        
+        self._advance_watermarks(strategies, trades, decisions)
+        self._record_build('incremental', started, strategies, trades, decisions, agents)
+        if changed:
+            await self._save_snapshot()
+            
+    def _advance_watermarks(self, strategies: List[Dict], trades: List[Dict], decisions: List[Dict]):
+        for table, rows in (('strategies', strategies), ('trades', trades), ('decisions', decisions)):
+            changed_at = [row['changed_at'] for row in rows if row.get('changed_at')]
+            if changed_at:
+                latest = max(changed_at)
+                current = self.watermarks[table]
+                self.watermarks[table] = latest if current is None else max(current, latest)
+                
+    def _record_build(self, mode: str, started: float, strategies, trades, decisions, agents):
+        self.build_metrics.update(
+            mode=mode,
+            builds=self.build_metrics['builds'] + 1,
+            last_build_seconds=round(time.perf_counter() - started, 3),
+            last_rows_applied={
+                'strategies': len(strategies), 'trades': len(trades),
+                'decisions': len(decisions), 'agents': len(agents)
+            }
+        )
+        logger.info(f"Knowledge graph {mode} build: {self.build_metrics['last_rows_applied']} "
+                    f"in {self.build_metrics['last_build_seconds']}s")
+        
+    async def _save_snapshot(self):
+        if self.snapshot_dir is None:
+            return
+        started = time.perf_counter()
+        metadata = {'watermarks': {table: mark.isoformat() if mark else None for table, mark in self.watermarks.items()}}
+        try:
+            self.build_metrics['snapshot_bytes'] = await asyncio.to_thread(
+                save_graph_snapshot, self.graph, self.snapshot_dir, metadata
+            )
+            self.build_metrics['snapshot_save_seconds'] = round(time.perf_counter() - started, 3)
+        except OSError as e:
+            logger.warning(f"Could not save knowledge graph snapshot to {self.snapshot_dir}: {e}")
+            
+    async def _load_snapshot(self) -> bool:
+        """Replace the graph with the saved snapshot; False when there is none"""
+        if self.snapshot_dir is None:
+            return False
+        started = time.perf_counter()
+        loaded = await asyncio.to_thread(load_graph_snapshot, self.snapshot_dir)
+        if loaded is None:
+            return False
+            
+        self.graph, metadata = loaded
+        saved_marks = metadata.get('watermarks', {})
+        self.watermarks = {
+            table: datetime.fromisoformat(saved_marks[table]) if saved_marks.get(table) else None
+            for table in self.WATERMARK_TABLES
+        }
+        await self._create_embeddings()
+        self.build_metrics['snapshot_load_seconds'] = round(time.perf_counter() - started, 3)
+        logger.info(f"Loaded knowledge graph snapshot ({self.graph.number_of_nodes()} nodes) "
+                    f"in {self.build_metrics['snapshot_load_seconds']}s")
+        return True
+            
+    async def _load_strategies(self, conn, since: Optional[datetime] = None) -> List[Dict]:
+        """Load archived strategies, or those changed at or after `since`"""
+        if since is None:
+            query = """
+                SELECT strategy_id, strategy_name, strategy_type, 
+                       parameters, performance_metrics, created_at,
+                       COALESCE(updated_at, created_at) AS changed_at
+                FROM farm_strategy_archive
+                ORDER BY created_at DESC
+            """
+            rows = await conn.fetch(query)
+        else:
+            query = """
+                SELECT strategy_id, strategy_name, strategy_type, 
+                       parameters, performance_metrics, created_at,
+                       COALESCE(updated_at, created_at) AS changed_at
+                FROM farm_strategy_archive
+                WHERE COALESCE(updated_at, created_at) >= $1
+                ORDER BY changed_at
+            """
+            rows = await conn.fetch(query, since)
         return [dict(row) for row in rows]
         
-    async def _load_trades(self, conn) -> List[Dict]:
-        """Load all archived trades"""
-        query = """
-            SELECT trade_id, strategy_id, agent_id, symbol, 
-                   entry_price, exit_price, net_pnl, trade_metadata,
-                   entry_time, exit_time
-            FROM farm_trade_archive
-            ORDER BY entry_time DESC
-            LIMIT 10000
-        """
-        rows = await conn.fetch(query)
+    async def _load_trades(self, conn, since: Optional[datetime] = None) -> List[Dict]:
+        """Load archived trades, or those archived at or after `since`"""
+        if since is None:
+            query = """
+                SELECT trade_id, strategy_id, agent_id, symbol, 
+                       entry_price, exit_price, net_pnl, trade_metadata,
+                       entry_time, exit_time, created_at AS changed_at
+                FROM farm_trade_archive
+                ORDER BY entry_time DESC
+                LIMIT 10000
+            """
+            rows = await conn.fetch(query)
+        else:
+            query = """
+                SELECT trade_id, strategy_id, agent_id, symbol, 
+                       entry_price, exit_price, net_pnl, trade_metadata,
+                       entry_time, exit_time, created_at AS changed_at
+                FROM farm_trade_archive
+                WHERE created_at >= $1
+                ORDER BY created_at
+            """
+            rows = await conn.fetch(query, since)
         return [dict(row) for row in rows]
         
-    async def _load_decisions(self, conn) -> List[Dict]:
-        """Load all agent decisions"""
-        query = """
-            SELECT decision_id, agent_id, decision_type, symbol,
-                   confidence_score, reasoning, decision_metadata,
-                   decision_time
-            FROM farm_agent_decisions
-            ORDER BY decision_time DESC
-            LIMIT 10000
-        """
-        rows = await conn.fetch(query)
+    async def _load_decisions(self, conn, since: Optional[datetime] = None) -> List[Dict]:
+        """Load agent decisions, or those recorded at or after `since`"""
+        if since is None:
+            query = """
+                SELECT decision_id, agent_id, decision_type, symbol,
+                       confidence_score, reasoning, decision_metadata,
+                       decision_time, created_at AS changed_at
+                FROM farm_agent_decisions
+                ORDER BY decision_time DESC
+                LIMIT 10000
+            """
+            rows = await conn.fetch(query)
+        else:
+            query = """
+                SELECT decision_id, agent_id, decision_type, symbol,
+                       confidence_score, reasoning, decision_metadata,
+                       decision_time, created_at AS changed_at
+                FROM farm_agent_decisions
+                WHERE created_at >= $1
+                ORDER BY created_at
+            """
+            rows = await conn.fetch(query, since)
         return [dict(row) for row in rows]
         
-    async def _load_agents(self, conn) -> List[Dict]:
-        """Load unique agents"""
+    async def _load_agents(self, conn, agent_ids: Optional[List[str]] = None) -> List[Dict]:
+        """Load unique agents, or only `agent_ids`"""
         query = """
             SELECT DISTINCT agent_id, 
                    COUNT(DISTINCT trade_id) as trade_count,
@@ -108,9 +299,13 @@ class KnowledgeGraphService:
                    AVG(confidence_score) as avg_confidence
             FROM farm_trade_archive t
             LEFT JOIN farm_agent_decisions d ON t.agent_id = d.agent_id
+            {where}
             GROUP BY agent_id
         """
-        rows = await conn.fetch(query)
+        if agent_ids is None:
+            rows = await conn.fetch(query.format(where=""))
+        else:
+            rows = await conn.fetch(query.format(where="WHERE t.agent_id = ANY($1::text[])"), agent_ids)
         return [dict(row) for row in rows]
         
     async def _build_strategy_nodes(self, strategies: List[Dict]):
@@ -192,6 +387,28 @@ class KnowledgeGraphService:
                 self.graph.add_edge(agent_node, trade_node, relationship='performed')
                 
         # Decision -> Trade relationships
+        await self._build_decision_relationships(conn)
+        
+    async def _build_trade_relationships(self, trades: List[Dict]):
+        """Strategy -> Trade and Agent -> Trade edges for newly loaded trades"""
+        for trade in trades:
+            trade_node = f"trade_{trade['trade_id']}"
+            strategy_node = f"strategy_{trade['strategy_id']}"
+            agent_node = f"agent_{trade['agent_id']}"
+            
+            if trade['strategy_id'] is not None and self.graph.has_node(strategy_node) and self.graph.has_node(trade_node):
+                self.graph.add_edge(strategy_node, trade_node, relationship='executed')
+                
+            if self.graph.has_node(agent_node) and self.graph.has_node(trade_node):
+                self.graph.add_edge(agent_node, trade_node, relationship='performed')
+                
+    async def _build_decision_relationships(
+        self,
+        conn,
+        decisions_since: Optional[datetime] = None,
+        trades_since: Optional[datetime] = None
+    ):
+        """Decision -> Trade edges, optionally only where either side changed since the watermarks"""
         query = """
             SELECT d.decision_id, t.trade_id
             FROM farm_agent_decisions d
@@ -199,7 +416,14 @@ class KnowledgeGraphService:
                 AND d.symbol = t.symbol
                 AND ABS(EXTRACT(EPOCH FROM (t.entry_time - d.decision_time))) < 300
         """
-        rows = await conn.fetch(query)
+        if decisions_since is None and trades_since is None:
+            rows = await conn.fetch(query)
+        else:
+            query += """
+            WHERE d.created_at >= COALESCE($1::timestamptz, '-infinity')
+               OR t.created_at >= COALESCE($2::timestamptz, '-infinity')
+            """
+            rows = await conn.fetch(query, decisions_since, trades_since)
         for row in rows:
             decision_node = f"decision_{row['decision_id']}"
             trade_node = f"trade_{row['trade_id']}"
@@ -207,51 +431,87 @@ class KnowledgeGraphService:
             if self.graph.has_node(decision_node) and self.graph.has_node(trade_node):
                 self.graph.add_edge(decision_node, trade_node, relationship='resulted_in')
                 
+    @staticmethod
+    def _node_text(data: Dict) -> str:
+        """Text representation of a node for embedding"""
+        text_parts = [data['type']]
+        
+        if data['type'] == 'strategy':
+            text_parts.extend([
+                data.get('name', ''),
+                data.get('strategy_type', ''),
+                json.dumps(data.get('parameters', {}))
+            ])
+        elif data['type'] == 'trade':
+            text_parts.extend([
+                data.get('symbol', ''),
+                f"pnl_{data.get('pnl', 0)}",
+                json.dumps(data.get('metadata', {}))
+            ])
+        elif data['type'] == 'decision':
+            text_parts.extend([
+                data.get('decision_type', ''),
+                data.get('symbol', ''),
+                data.get('reasoning', ''),
+                f"confidence_{data.get('confidence', 0)}"
+            ])
+        elif data['type'] == 'agent':
+            text_parts.extend([
+                data.get('agent_id', ''),
+                f"trades_{data.get('trade_count', 0)}",
+                f"pnl_{data.get('total_pnl', 0)}"
+            ])
+            
+        return ' '.join(str(part) for part in text_parts)
+        
+    def _embed(self, texts: List[str], fit: bool = False):
+        if self.embed_texts is not None:
+            return np.asarray(self.embed_texts(texts), dtype=np.float32)
+        if fit:
+            return self.vectorizer.fit_transform(texts)
+        return self.vectorizer.transform(texts)
+        
     async def _create_embeddings(self):
-        """Create text embeddings for nodes"""
-        texts = []
-        node_ids = []
+        """Create text embeddings for all nodes, refitting the vectorizer"""
+        node_ids = list(self.graph.nodes)
+        self.entity_index.clear()
+        self._fitted_documents = len(node_ids)
+        self._documents_since_fit = 0
         
-        for node_id, data in self.graph.nodes(data=True):
-            # Create text representation of node
-            text_parts = [data['type']]
-            
-            if data['type'] == 'strategy':
-                text_parts.extend([
-                    data.get('name', ''),
-                    data.get('strategy_type', ''),
-                    json.dumps(data.get('parameters', {}))
-                ])
-            elif data['type'] == 'trade':
-                text_parts.extend([
-                    data.get('symbol', ''),
-                    f"pnl_{data.get('pnl', 0)}",
-                    json.dumps(data.get('metadata', {}))
-                ])
-            elif data['type'] == 'decision':
-                text_parts.extend([
-                    data.get('decision_type', ''),
-                    data.get('symbol', ''),
-                    data.get('reasoning', ''),
-                    f"confidence_{data.get('confidence', 0)}"
-                ])
-            elif data['type'] == 'agent':
-                text_parts.extend([
-                    data.get('agent_id', ''),
-                    f"trades_{data.get('trade_count', 0)}",
-                    f"pnl_{data.get('total_pnl', 0)}"
-                ])
-                
-            text = ' '.join(str(part) for part in text_parts)
-            texts.append(text)
-            node_ids.append(node_id)
+        if node_ids:
+            texts = [self._node_text(self.graph.nodes[node_id]) for node_id in node_ids]
+            types = [self.graph.nodes[node_id]['type'] for node_id in node_ids]
+            self.entity_index.add_many(node_ids, types, self._embed(texts, fit=True))
             
-        if texts:
-            # Create TF-IDF embeddings
-            embeddings = self.vectorizer.fit_transform(texts)
+    def _embeddings_stale(self) -> bool:
+        if self.embed_texts is not None:
+            return False
+        return self._documents_since_fit > self.refit_ratio * max(self._fitted_documents, 1)
+        
+    async def index_entities(self, node_ids: List[str]):
+        """Embed graph nodes that were added or changed since the last build, without refitting"""
+        node_ids = [node_id for node_id in node_ids if node_id in self.graph]
+        if not node_ids:
+            return
+        if self.embed_texts is None and not hasattr(self.vectorizer, 'vocabulary_'):
+            await self._create_embeddings()
+            return
             
-            for i, node_id in enumerate(node_ids):
-                self.entity_embeddings[node_id] = embeddings[i]
+        texts = [self._node_text(self.graph.nodes[node_id]) for node_id in node_ids]
+        types = [self.graph.nodes[node_id]['type'] for node_id in node_ids]
+        self.entity_index.add_many(node_ids, types, self._embed(texts))
+        self._documents_since_fit += len(node_ids)
+        
+    async def add_entity(self, node_id: str, node_type: str, **attributes):
+        """Add or update a node and its embedding"""
+        self.graph.add_node(node_id, type=node_type, **attributes)
+        await self.index_entities([node_id])
+        
+    async def remove_entity(self, node_id: str):
+        """Remove a node, its relationships and its embedding"""
+        if node_id in self.graph:
+            self.graph.remove_node(node_id)
+        self.entity_index.remove(node_id)
                 
     async def search_similar_entities(
         self, 
@@ -260,27 +520,18 @@ class KnowledgeGraphService:
         limit: int = 10
     ) -> List[Dict[str, Any]]:
         """Search for entities similar to the query"""
-        if not self.entity_embeddings:
+        if self._embeddings_stale():
+            await self._create_embeddings()
+        if not len(self.entity_index):
             return []
             
-        # Transform query to embedding
-        query_embedding = self.vectorizer.transform([query])
-        
-        # Calculate similarities
-        similarities = []
-        for node_id, embedding in self.entity_embeddings.items():
-            if entity_type and not node_id.startswith(entity_type):
-                continue
-                
-            similarity = cosine_similarity(query_embedding, embedding)[0][0]
-            similarities.append((node_id, similarity))
-            
-        # Sort by similarity
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        # Top-k by cosine within the entity type's partition (or across all types)
+        query_embedding = self._embed([query])
+        matches = self.entity_index.search(query_embedding, entity_type, limit)
         
         # Return top results with node data
         results = []
-        for node_id, score in similarities[:limit]:
+        for node_id, score in matches:
             node_data = dict(self.graph.nodes[node_id])
             node_data['similarity_score'] = score
             node_data['node_id'] = node_id
@@ -500,6 +751,56 @@ class KnowledgeGraphService:
             }
         return {}
         
+    def _graph_memory_bytes(self, sample_size: int = 1000) -> int:
+        """
+        Approximate in-memory size of the networkx graph, extrapolated from nodes and edges taken at an
+        even stride through insertion order. Deterministic, and cached until the graph changes.
+        """
+        node_count = self.graph.number_of_nodes()
+        if node_count == 0:
+            return 0
+        edge_count = self.graph.number_of_edges()
+        version = (self.build_metrics['builds'], node_count, edge_count)
+        if self._memory_estimate is not None and self._memory_estimate[0] == version:
+            return self._memory_estimate[1]
+            
+        def deep_size(value) -> int:
+            size = sys.getsizeof(value)
+            if isinstance(value, dict):
+                size += sum(deep_size(k) + deep_size(v) for k, v in value.items())
+            elif isinstance(value, (list, tuple, set)):
+                size += sum(deep_size(item) for item in value)
+            return size
+            
+        def spread(view, count: int) -> list:
+            step = max(1, count // sample_size)
+            return list(itertools.islice(view, 0, step * sample_size, step))
+            
+        nodes = spread(self.graph.nodes, node_count)
+        per_node = sum(
+            deep_size(node_id) + deep_size(self.graph.nodes[node_id])
+            + sys.getsizeof(self.graph.adj[node_id]) + sys.getsizeof(self.graph.pred[node_id])
+            for node_id in nodes
+        ) / len(nodes)
+        
+        per_edge = 0.0
+        if edge_count:
+            edges = spread(self.graph.edges, edge_count)
+            per_edge = sum(deep_size(self.graph.edges[edge]) for edge in edges) / len(edges)
+        estimate = int(node_count * per_node + edge_count * per_edge)
+        self._memory_estimate = (version, estimate)
+        return estimate
+        
+    def get_build_metrics(self) -> Dict[str, Any]:
+        """Build timings, rows applied, watermarks and memory footprint"""
+        return {
+            **self.build_metrics,
+            'watermarks': {table: mark.isoformat() if mark else None for table, mark in self.watermarks.items()},
+            'graph_memory_bytes': self._graph_memory_bytes(),
+            'index_memory_bytes': self.entity_index.memory_bytes(),
+            'snapshot_dir': str(self.snapshot_dir) if self.snapshot_dir else None
+        }
+        
     async def get_graph_statistics(self) -> Dict[str, Any]:
         """Get overall knowledge graph statistics"""
         stats = {
@@ -508,7 +809,8 @@ class KnowledgeGraphService:
             'node_types': {},
             'relationship_types': {},
             'connected_components': nx.number_weakly_connected_components(self.graph),
-            'average_degree': sum(dict(self.graph.degree()).values()) / self.graph.number_of_nodes() if self.graph.number_of_nodes() > 0 else 0
+            'average_degree': sum(dict(self.graph.degree()).values()) / self.graph.number_of_nodes() if self.graph.number_of_nodes() > 0 else 0,
+            'build': self.get_build_metrics()
         }
         
         # Count node types
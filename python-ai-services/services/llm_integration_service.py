@@ -6,12 +6,10 @@ Supports multiple LLM providers with unified interface and intelligent routing
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, AsyncIterator, Callable, Iterator
 from datetime import datetime, timezone, timedelta
-from dataclasses import dataclass, asdict
-from enum import Enum
+from dataclasses import dataclass
 import json
-import hashlib
 from decimal import Decimal
 
 import openai
@@ -26,37 +24,14 @@ import os
 from ..core.service_registry import get_registry
 from ..core.llm_router import LLMRouter
 from ..models.llm_models import (
-    LLMRequest, LLMResponse, ConversationContext, 
+    LLMProvider, LLMTaskType, LLMRequest, LLMResponse, ConversationContext, 
     AgentCommunication, TradingDecision, MarketAnalysis
 )
+from .llm_response_cache import LLMResponseCache, request_cache_key
+from .llm_scheduler import LLMScheduler, estimate_request_tokens, estimate_text_tokens
 
 logger = logging.getLogger(__name__)
 
-class LLMProvider(Enum):
-    """Supported LLM providers"""
-    OPENAI_GPT4 = "openai_gpt4"
-    OPENAI_GPT35 = "openai_gpt35"
-    ANTHROPIC_CLAUDE = "anthropic_claude"
-    HUGGINGFACE_LOCAL = "huggingface_local"
-    GOOGLE_GEMINI = "google_gemini"
-    GEMINI_FLASH = "gemini_flash"
-    OPENROUTER_GPT4 = "openrouter_gpt4"
-    OPENROUTER_CLAUDE = "openrouter_claude"
-    OPENROUTER_LLAMA = "openrouter_llama"
-    OPENROUTER_MISTRAL = "openrouter_mistral"
-
-class LLMTaskType(Enum):
-    """Types of LLM tasks"""
-    MARKET_ANALYSIS = "market_analysis"
-    TRADING_DECISION = "trading_decision"
-    RISK_ASSESSMENT = "risk_assessment"
-    PORTFOLIO_OPTIMIZATION = "portfolio_optimization"
-    AGENT_COMMUNICATION = "agent_communication"
-    GOAL_PLANNING = "goal_planning"
-    STRATEGY_GENERATION = "strategy_generation"
-    PERFORMANCE_ANALYSIS = "performance_analysis"
-    NATURAL_LANGUAGE_QUERY = "natural_language_query"
-
 @dataclass
 class LLMConfig:
     """LLM provider configuration"""
@@ -70,6 +45,7 @@ class LLMConfig:
     cost_per_token: float
     rate_limit_rpm: int
     rate_limit_tpm: int
+    max_concurrency: int = 4
 
 @dataclass
 class AgentPersonality:
@@ -102,7 +78,7 @@ class LLMIntegrationService:
     Phase 10: Multi-provider support with intelligent routing and agent communication
     """
     
-    def __init__(self, redis_client=None):
+    def __init__(self, redis_client=None, response_cache: Optional[LLMResponseCache] = None):
         self.registry = get_registry()
         self.redis = redis_client
         
@@ -131,13 +107,26 @@ class LLMIntegrationService:
         # Rate limiting
         self.rate_limiters: Dict[LLMProvider, Dict[str, Any]] = {}
         
-        # Caching
-        self.response_cache: Dict[str, Dict[str, Any]] = {}
-        self.cache_ttl = 300  # 5 minutes
+        # Caching: bounded in-process tier with in-flight dedup, Redis (if configured) behind it
+        self.cache_ttl = int(os.getenv("LLM_CACHE_TTL_SECONDS", "300"))
+        similarity_threshold = os.getenv("LLM_CACHE_SIMILARITY_THRESHOLD")
+        self.response_cache = response_cache or LLMResponseCache(
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=self.cache_ttl,
+            similarity_threshold=float(similarity_threshold) if similarity_threshold else None
+        )
+        self.cache_savings: Dict[str, Any] = {
+            "hits": {"exact": 0, "similar": 0, "coalesced": 0, "redis": 0},
+            "tokens_saved": 0,
+            "cost_saved": 0.0
+        }
         
         # Initialize LLM router
         self.router = LLMRouter()
         
+        # Provider calls run through per-provider concurrency/TPM lanes; outcomes feed the router
+        self.scheduler = LLMScheduler(self._scheduler_limits, self._record_provider_outcome)
+        
         logger.info("LLMIntegrationService Phase 10 initialized")
     
     async def initialize(self):
@@ -440,21 +429,33 @@ class LLMIntegrationService:
     ) -> LLMResponse:
         """Process an LLM request with intelligent provider selection"""
         try:
-            # Check cache first
-            cache_key = self._generate_cache_key(request)
-            cached_response = await self._get_cached_response(cache_key)
-            if cached_response:
-                logger.info(f"Returning cached response for request {request.request_id}")
-                return cached_response
-            
-            # Select optimal provider
-            provider = await self._select_optimal_provider(request, preferred_provider, agent_id)
+            cache_key = request_cache_key(request)
+            served_from_redis = False
+            
+            async def compute() -> LLMResponse:
+                nonlocal served_from_redis
+                cached_response = await self._get_cached_response(cache_key)
+                if cached_response:
+                    served_from_redis = True
+                    return cached_response
+                
+                # Select optimal provider and process request once its lane admits it
+                provider = await self._select_optimal_provider(request, preferred_provider, agent_id)
+                response = await self.scheduler.submit(
+                    provider, request, lambda: self._process_with_provider(provider, request)
+                )
+                await self._cache_response(cache_key, response)
+                return response
             
-            # Process request
-            response = await self._process_with_provider(provider, request)
+            # Identical concurrent requests share one provider call
+            response, lookup = await self.response_cache.get_or_compute(request, compute, cache_key)
+            provider = response.provider
             
-            # Cache response
-            await self._cache_response(cache_key, response)
+            if lookup or served_from_redis:
+                cache_source = lookup.source if lookup else "redis"
+                logger.info(f"Returning {cache_source} cached response for request {request.request_id}")
+                await self._track_usage(provider, request, response, cache_source=cache_source)
+                return response
             
             # Track usage and performance
             await self._track_usage(provider, request, response)
@@ -690,23 +691,12 @@ class LLMIntegrationService:
             else:
                 model = self.providers[LLMProvider.GEMINI_FLASH]
             
-            # Prepare the prompt
-            prompt = request.prompt
-            if request.system_prompt:
-                prompt = f"{request.system_prompt}\n\n{prompt}"
-            if request.context:
-                context_str = json.dumps(request.context, indent=2)
-                prompt = f"Context: {context_str}\n\n{prompt}"
-            
             # Generate response
             response = await asyncio.get_event_loop().run_in_executor(
                 None, 
                 lambda: model.generate_content(
-                    prompt,
-                    generation_config=genai.GenerationConfig(
-                        max_output_tokens=request.max_tokens or 4096,
-                        temperature=request.temperature or 0.7,
-                    )
+                    self._gemini_prompt(request),
+                    generation_config=self._gemini_generation_config(request)
                 )
             )
             
@@ -714,7 +704,7 @@ class LLMIntegrationService:
             
             return {
                 'content': content,
-                'tokens_used': len(content.split()) * 1.3,  # Approximate token count
+                'tokens_used': int(len(content.split()) * 1.3),  # Approximate token count
                 'confidence_score': 0.85,
                 'metadata': {
                     'model': model_name,
@@ -727,40 +717,63 @@ class LLMIntegrationService:
             logger.error(f"Gemini processing failed: {e}")
             raise
     
+    def _gemini_prompt(self, request: LLMRequest) -> str:
+        prompt = request.prompt
+        if request.system_prompt:
+            prompt = f"{request.system_prompt}\n\n{prompt}"
+        if request.context:
+            context_str = json.dumps(request.context, indent=2)
+            prompt = f"Context: {context_str}\n\n{prompt}"
+        return prompt
+    
+    def _gemini_generation_config(self, request: LLMRequest):
+        return genai.GenerationConfig(
+            max_output_tokens=request.max_tokens or 4096,
+            temperature=request.temperature or 0.7,
+        )
+    
+    def _openrouter_messages(self, request: LLMRequest) -> List[Dict[str, str]]:
+        messages = [
+            {"role": "system", "content": request.system_prompt or "You are a helpful AI assistant for trading analysis."},
+            {"role": "user", "content": request.prompt}
+        ]
+        
+        if request.context:
+            context_message = f"Context: {json.dumps(request.context, indent=2)}"
+            messages.insert(-1, {"role": "user", "content": context_message})
+        return messages
+    
+    def _openrouter_payload(self, request: LLMRequest, config: LLMConfig, stream: bool = False) -> Dict[str, Any]:
+        return {
+            "model": config.model_name,
+            "messages": self._openrouter_messages(request),
+            "max_tokens": request.max_tokens or config.max_tokens,
+            "temperature": request.temperature or config.temperature,
+            "top_p": 1,
+            "frequency_penalty": 0,
+            "presence_penalty": 0,
+            "stream": stream
+        }
+    
+    def _openrouter_headers(self, config: LLMConfig) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {config.api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://cival-trading-platform.com",
+            "X-Title": "Cival Trading Platform"
+        }
+    
     async def _process_openrouter(self, request: LLMRequest, provider: LLMProvider) -> Dict[str, Any]:
         """Process request with OpenRouter"""
         try:
             config = self.provider_configs[provider]
             
-            # Prepare messages
-            messages = [
-                {"role": "system", "content": request.system_prompt or "You are a helpful AI assistant for trading analysis."},
-                {"role": "user", "content": request.prompt}
-            ]
-            
-            if request.context:
-                context_message = f"Context: {json.dumps(request.context, indent=2)}"
-                messages.insert(-1, {"role": "user", "content": context_message})
-            
             # Make API call to OpenRouter
             async with httpx.AsyncClient() as client:
                 response = await client.post(
                     f"{config.endpoint}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {config.api_key}",
-                        "Content-Type": "application/json",
-                        "HTTP-Referer": "https://cival-trading-platform.com",
-                        "X-Title": "Cival Trading Platform"
-                    },
-                    json={
-                        "model": config.model_name,
-                        "messages": messages,
-                        "max_tokens": request.max_tokens or config.max_tokens,
-                        "temperature": request.temperature or config.temperature,
-                        "top_p": 1,
-                        "frequency_penalty": 0,
-                        "presence_penalty": 0
-                    },
+                    headers=self._openrouter_headers(config),
+                    json=self._openrouter_payload(request, config),
                     timeout=config.timeout
                 )
                 
@@ -791,6 +804,139 @@ class LLMIntegrationService:
             logger.error(f"OpenRouter processing failed for {provider}: {e}")
             raise
     
+    # --- Streaming ---
+    
+    async def stream_llm_request(
+        self,
+        request: LLMRequest,
+        preferred_provider: Optional[LLMProvider] = None,
+        agent_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield response text as the provider produces it. Goes through the same cache and scheduler
+        as process_llm_request; a cached response is yielded as a single chunk.
+        """
+        cache_key = request_cache_key(request)
+        lookup = self.response_cache.get(request, cache_key)
+        if lookup:
+            await self._track_usage(lookup.response.provider, request, lookup.response, cache_source=lookup.source)
+            yield lookup.response.content
+            return
+        
+        provider = await self._select_optimal_provider(request, preferred_provider, agent_id)
+        start_time = datetime.now(timezone.utc)
+        chunks = []
+        async for chunk in self.scheduler.stream(provider, request, lambda: self._stream_with_provider(provider, request)):
+            chunks.append(chunk)
+            yield chunk
+        
+        content = "".join(chunks)
+        response = LLMResponse(
+            request_id=request.request_id,
+            provider=provider,
+            content=content,
+            tokens_used=estimate_request_tokens(request, 0) + estimate_text_tokens(content),
+            processing_time=(datetime.now(timezone.utc) - start_time).total_seconds(),
+            confidence_score=0.8,
+            metadata={'streamed': True},
+            timestamp=datetime.now(timezone.utc)
+        )
+        self.response_cache.put(request, response, cache_key)
+        await self._cache_response(cache_key, response)
+        await self._track_usage(provider, request, response)
+    
+    async def _stream_with_provider(self, provider: LLMProvider, request: LLMRequest) -> AsyncIterator[str]:
+        """Native streaming where the provider supports it, else the whole response as one chunk"""
+        if provider in [LLMProvider.GOOGLE_GEMINI, LLMProvider.GEMINI_FLASH]:
+            async for chunk in self._stream_gemini(request, provider):
+                yield chunk
+        elif provider in [LLMProvider.OPENROUTER_GPT4, LLMProvider.OPENROUTER_CLAUDE,
+                          LLMProvider.OPENROUTER_LLAMA, LLMProvider.OPENROUTER_MISTRAL]:
+            async for chunk in self._stream_openrouter(request, provider):
+                yield chunk
+        else:
+            response = await self._process_with_provider(provider, request)
+            yield response.content
+    
+    async def _iterate_in_thread(self, make_iterator: Callable[[], Iterator[Any]]) -> AsyncIterator[Any]:
+        """Drive a blocking iterator in the default executor, yielding its items on the event loop"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        
+        def produce():
+            try:
+                for item in make_iterator():
+                    loop.call_soon_threadsafe(queue.put_nowait, item)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+        
+        producer = loop.run_in_executor(None, produce)
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await producer
+    
+    async def _stream_gemini(self, request: LLMRequest, provider: LLMProvider) -> AsyncIterator[str]:
+        model = self.providers[provider]
+        chunks = self._iterate_in_thread(lambda: model.generate_content(
+            self._gemini_prompt(request),
+            generation_config=self._gemini_generation_config(request),
+            stream=True
+        ))
+        async for chunk in chunks:
+            if chunk.text:
+                yield chunk.text
+    
+    async def _stream_openrouter(self, request: LLMRequest, provider: LLMProvider) -> AsyncIterator[str]:
+        config = self.provider_configs[provider]
+        async with httpx.AsyncClient() as client:
+            async with client.stream(
+                "POST",
+                f"{config.endpoint}/chat/completions",
+                headers=self._openrouter_headers(config),
+                json=self._openrouter_payload(request, config, stream=True),
+                timeout=config.timeout
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise Exception(f"OpenRouter API error: {response.status_code} - {body.decode(errors='replace')}")
+                
+                # Server-sent events: "data: {json}" lines, terminated by "data: [DONE]"
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: "):]
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or [{}]
+                    content = choices[0].get("delta", {}).get("content")
+                    if content:
+                        yield content
+    
+    # --- Scheduling ---
+    
+    def _scheduler_limits(self, provider: LLMProvider):
+        """(max concurrent requests, tokens per minute) for a provider's scheduler lane"""
+        config = self.provider_configs.get(provider)
+        if config is None:
+            return 4, 30000
+        return config.max_concurrency, config.rate_limit_tpm
+    
+    async def _record_provider_outcome(
+        self, provider: LLMProvider, latency: float, success: bool, tokens: int, queue_wait: float = 0.0
+    ):
+        """Feed measured service latency and success into routing; queue wait is tracked apart from it"""
+        config = self.provider_configs.get(provider)
+        cost = tokens * config.cost_per_token if config else 0.0
+        await self.router.update_performance(provider, latency, success, cost, queue_wait)
+    
     async def start_agent_conversation(
         self,
         conversation_id: str,
@@ -992,48 +1138,50 @@ class LLMIntegrationService:
             logger.error(f"Failed to generate trading analysis: {e}")
             raise
     
-    async def _generate_cache_key(self, request: LLMRequest) -> str:
-        """Generate cache key for request"""
-        content = f"{request.task_type.value}:{request.prompt}:{json.dumps(request.context, sort_keys=True)}"
-        return hashlib.md5(content.encode()).hexdigest()
-    
     async def _get_cached_response(self, cache_key: str) -> Optional[LLMResponse]:
-        """Get cached response if available"""
+        """Get response shared through Redis (by other workers) if available"""
         try:
             if self.redis:
                 cached_data = await self.redis.get(f"llm_cache:{cache_key}")
                 if cached_data:
-                    data = json.loads(cached_data)
-                    return LLMResponse(**data)
+                    return LLMResponse.model_validate_json(cached_data)
             
-            return self.response_cache.get(cache_key)
+            return None
             
         except Exception as e:
             logger.error(f"Failed to get cached response: {e}")
             return None
     
     async def _cache_response(self, cache_key: str, response: LLMResponse):
-        """Cache response"""
+        """Share response through Redis; the in-process cache stores it itself"""
         try:
-            response_data = asdict(response)
-            response_data['timestamp'] = response.timestamp.isoformat()
-            
             if self.redis:
                 await self.redis.setex(
                     f"llm_cache:{cache_key}",
                     self.cache_ttl,
-                    json.dumps(response_data, default=str)
+                    response.model_dump_json()
                 )
             
-            # Also cache in memory
-            self.response_cache[cache_key] = response
-            
         except Exception as e:
             logger.error(f"Failed to cache response: {e}")
     
-    async def _track_usage(self, provider: LLMProvider, request: LLMRequest, response: LLMResponse):
-        """Track usage statistics"""
+    async def _track_usage(
+        self,
+        provider: LLMProvider,
+        request: LLMRequest,
+        response: LLMResponse,
+        cache_source: Optional[str] = None
+    ):
+        """Track usage statistics; cache hits are recorded as savings instead of usage"""
         try:
+            if cache_source:
+                config = self.provider_configs.get(provider)
+                self.cache_savings["hits"][cache_source] += 1
+                self.cache_savings["tokens_saved"] += response.tokens_used
+                if config:
+                    self.cache_savings["cost_saved"] += response.tokens_used * config.cost_per_token
+                return
+            
             # Update token usage
             self.token_usage[provider.value] = self.token_usage.get(provider.value, 0) + response.tokens_used
             
@@ -1114,17 +1262,9 @@ class LLMIntegrationService:
                 await asyncio.sleep(600)  # Check every 10 minutes
                 
                 # Clean up in-memory cache
-                current_time = datetime.now(timezone.utc)
-                keys_to_remove = []
-                
-                for key, response in self.response_cache.items():
-                    if (current_time - response.timestamp).total_seconds() > self.cache_ttl:
-                        keys_to_remove.append(key)
-                
-                for key in keys_to_remove:
-                    del self.response_cache[key]
+                removed = self.response_cache.purge_expired()
                 
-                logger.info(f"Cleaned up {len(keys_to_remove)} cache entries")
+                logger.info(f"Cleaned up {removed} cache entries")
                 
             except Exception as e:
                 logger.error(f"Error in cache cleanup: {e}")
@@ -1140,6 +1280,9 @@ class LLMIntegrationService:
             "total_token_usage": sum(self.token_usage.values()),
             "total_costs": sum(self.cost_tracking.values()),
             "cache_size": len(self.response_cache),
+            "cache": self.response_cache.get_stats(),
+            "cache_savings": self.cache_savings,
+            "scheduler": self.scheduler.get_stats(),
             "last_health_check": datetime.now(timezone.utc).isoformat()
         }
 
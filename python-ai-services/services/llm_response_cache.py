@@ -0,0 +1,240 @@
+"""
+LLM Response Cache
+Bounded TTL cache for LLM responses with single-flight dedup of identical in-flight requests and
+an optional similarity tier that serves near-duplicate prompts (TF-IDF cosine by default).
+"""
+
+import hashlib
+import json
+import logging
+import math
+import re
+import time
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from ..models.llm_models import LLMRequest, LLMResponse, LLMTaskType
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+
+
+def request_cache_key(request: LLMRequest) -> str:
+    """Exact key: task type, system prompt, prompt and canonical context"""
+    content = json.dumps(
+        [request.task_type.value, request.system_prompt, request.prompt, request.context],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def similarity_text(request: LLMRequest) -> str:
+    return f"{request.prompt}\n{json.dumps(request.context, sort_keys=True, default=str)}"
+
+
+@dataclass
+class CacheEntry:
+    response: LLMResponse
+    expires_at: float
+    bucket: Tuple[str, Optional[str]]
+    terms: Optional[Dict[str, float]] = None  # Sublinear term frequencies for the similarity tier
+
+
+@dataclass
+class CacheLookup:
+    """Where a cached response came from: "exact", "similar" or "coalesced" """
+    response: LLMResponse
+    source: str
+    similarity: float = 1.0
+
+
+class LLMResponseCache:
+    """
+    LRU map of exact request keys to responses, each with a TTL, capped at `max_entries`.
+
+    When `similarity_threshold` is set, requests of a task type in `similarity_task_types` also match
+    cached responses for the same task type and system prompt whose prompt+context text has TF-IDF
+    cosine >= the threshold. Numbers are tokens, so prompts embedding different market data score
+    lower; keep the threshold high. `embed` may replace TF-IDF with any function returning a sparse
+    {feature: weight} vector (e.g. from an embedding model).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 300.0,
+        similarity_threshold: Optional[float] = None,
+        similarity_task_types: Iterable[LLMTaskType] = (LLMTaskType.MARKET_ANALYSIS,),
+        embed: Optional[Callable[[str], Dict[str, float]]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if similarity_threshold is not None and not 0 < similarity_threshold <= 1:
+            raise ValueError("similarity_threshold must be in (0, 1]")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.similarity_task_types = set(similarity_task_types)
+        self.embed = embed
+        self.clock = clock
+
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.buckets: Dict[Tuple[str, Optional[str]], Dict[str, CacheEntry]] = defaultdict(dict)
+        self.document_frequency: Counter = Counter()
+        self.inflight = SingleFlight()
+        self.stats = {
+            "lookups": 0, "exact_hits": 0, "similar_hits": 0, "coalesced": 0,
+            "misses": 0, "evictions": 0, "expirations": 0
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # --- Similarity ---
+
+    def _uses_similarity(self, request: LLMRequest) -> bool:
+        return self.similarity_threshold is not None and request.task_type in self.similarity_task_types
+
+    @staticmethod
+    def _bucket(request: LLMRequest) -> Tuple[str, Optional[str]]:
+        return request.task_type.value, request.system_prompt
+
+    @staticmethod
+    def _term_frequencies(text: str) -> Dict[str, float]:
+        counts = Counter(TOKEN_PATTERN.findall(text.lower()))
+        return {term: 1 + math.log(count) for term, count in counts.items()}
+
+    def _weights(self, terms: Dict[str, float]) -> Dict[str, float]:
+        if self.embed is not None:
+            return terms
+        documents = sum(len(bucket) for bucket in self.buckets.values()) + 1
+        return {term: tf * (1 + math.log(documents / (1 + self.document_frequency[term]))) for term, tf in terms.items()}
+
+    @staticmethod
+    def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+        if len(a) > len(b):
+            a, b = b, a
+        dot = sum(weight * b.get(term, 0.0) for term, weight in a.items())
+        norm = math.sqrt(sum(w * w for w in a.values())) * math.sqrt(sum(w * w for w in b.values()))
+        return dot / norm if norm else 0.0
+
+    def _find_similar(self, request: LLMRequest) -> Optional[Tuple[CacheEntry, float]]:
+        bucket = self.buckets.get(self._bucket(request))
+        if not bucket:
+            return None
+        text = similarity_text(request)
+        query = self._weights(self.embed(text) if self.embed else self._term_frequencies(text))
+        now = self.clock()
+        best, best_score = None, 0.0
+        for entry in bucket.values():
+            if entry.expires_at <= now:
+                continue
+            score = self._cosine(query, self._weights(entry.terms))
+            if score > best_score:
+                best, best_score = entry, score
+        if best is not None and best_score >= self.similarity_threshold:
+            return best, best_score
+        return None
+
+    # --- Entries ---
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        bucket = self.buckets.get(entry.bucket)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self.buckets[entry.bucket]
+        if entry.terms is not None and self.embed is None:
+            for term in entry.terms:
+                self.document_frequency[term] -= 1
+                if self.document_frequency[term] <= 0:
+                    del self.document_frequency[term]
+
+    def get(self, request: LLMRequest, key: Optional[str] = None) -> Optional[CacheLookup]:
+        """Exact hit, else (if enabled) the most similar live entry above the threshold"""
+        key = key or request_cache_key(request)
+        self.stats["lookups"] += 1
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry.expires_at > self.clock():
+                self.entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return CacheLookup(entry.response, "exact")
+            self._remove(key)
+            self.stats["expirations"] += 1
+
+        if self._uses_similarity(request):
+            match = self._find_similar(request)
+            if match is not None:
+                entry, score = match
+                self.stats["similar_hits"] += 1
+                return CacheLookup(entry.response, "similar", score)
+        return None
+
+    def put(self, request: LLMRequest, response: LLMResponse, key: Optional[str] = None):
+        key = key or request_cache_key(request)
+        self._remove(key)
+        entry = CacheEntry(response=response, expires_at=self.clock() + self.ttl_seconds, bucket=self._bucket(request))
+        if self._uses_similarity(request):
+            text = similarity_text(request)
+            entry.terms = self.embed(text) if self.embed else self._term_frequencies(text)
+            if self.embed is None:
+                self.document_frequency.update(entry.terms.keys())
+            self.buckets[entry.bucket][key] = entry
+        self.entries[key] = entry
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+            self.stats["evictions"] += 1
+
+    def purge_expired(self) -> int:
+        now = self.clock()
+        expired = [key for key, entry in self.entries.items() if entry.expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        self.stats["expirations"] += len(expired)
+        return len(expired)
+
+    # --- Single flight ---
+
+    async def get_or_compute(
+        self,
+        request: LLMRequest,
+        compute: Callable[[], Awaitable[LLMResponse]],
+        key: Optional[str] = None
+    ) -> Tuple[LLMResponse, Optional[CacheLookup]]:
+        """
+        Cached response, or the result of one `compute()` shared by every concurrent caller with the
+        same key. Returns (response, lookup) where lookup is None for the caller that computed it.
+        Failures reach every waiter and are not cached. A cancelled caller, the first one included,
+        leaves the computation running for the others; it is cancelled only once all have gone.
+        """
+        key = key or request_cache_key(request)
+        lookup = self.get(request, key)
+        if lookup is not None:
+            return lookup.response, lookup
+
+        async def compute_and_store() -> LLMResponse:
+            response = await compute()
+            self.put(request, response, key)
+            return response
+
+        if key in self.inflight:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+        response, shared = await self.inflight.run(key, compute_and_store)
+        return response, CacheLookup(response, "coalesced") if shared else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "inflight": len(self.inflight),
+            "similarity_threshold": self.similarity_threshold
+        }
@@ -0,0 +1,248 @@
+"""
+LLM Request Scheduler
+Per-provider lanes that cap concurrent requests and tokens per minute, dispatch queued requests by
+priority, and report each call's latency, queue wait and token usage back to the caller (for LLMRouter).
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from ..models.llm_models import LLMProvider, LLMRequest, LLMTaskType
+
+logger = logging.getLogger(__name__)
+
+# Default urgency (LLMRequest.priority scale, higher first) when a request doesn't set its own
+TASK_PRIORITY: Dict[LLMTaskType, int] = {
+    LLMTaskType.RISK_ASSESSMENT: 9,
+    LLMTaskType.TRADING_DECISION: 8,
+    LLMTaskType.PORTFOLIO_OPTIMIZATION: 6,
+    LLMTaskType.MARKET_ANALYSIS: 5,
+    LLMTaskType.STRATEGY_GENERATION: 4,
+    LLMTaskType.PERFORMANCE_ANALYSIS: 4,
+    LLMTaskType.GOAL_PLANNING: 4,
+    LLMTaskType.NATURAL_LANGUAGE_QUERY: 3,
+    LLMTaskType.AGENT_COMMUNICATION: 2,
+}
+
+DEFAULT_OUTPUT_TOKENS = 512
+
+
+def request_priority(request: LLMRequest) -> int:
+    """The request's own priority if it set one, else its task type's default"""
+    if "priority" in request.model_fields_set:
+        return request.priority
+    return TASK_PRIORITY.get(request.task_type, request.priority)
+
+
+def estimate_text_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def estimate_request_tokens(request: LLMRequest, default_output_tokens: int = DEFAULT_OUTPUT_TOKENS) -> int:
+    """Prompt tokens (about 4 characters each) plus the output budget"""
+    prompt = f"{request.system_prompt or ''}{request.prompt}{json.dumps(request.context, default=str) if request.context else ''}"
+    return estimate_text_tokens(prompt) + (request.max_tokens or default_output_tokens)
+
+
+@dataclass(order=True)
+class _QueuedRequest:
+    sort_key: Tuple[int, int]
+    tokens: int = field(compare=False)
+    granted: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+class ProviderLane:
+    """Concurrency slots, a refilling tokens-per-minute budget and a priority queue for one provider"""
+
+    def __init__(self, provider: LLMProvider, max_concurrency: int, tokens_per_minute: int):
+        self.provider = provider
+        self.max_concurrency = max(1, max_concurrency)
+        self.tokens_per_minute = max(1, tokens_per_minute)
+        self.tokens = float(self.tokens_per_minute)
+        self.updated = time.monotonic()
+        self.active = 0
+        self.queue: List[_QueuedRequest] = []
+        self.sequence = itertools.count()
+        self.wakeup: Optional[asyncio.TimerHandle] = None
+        self.stats = {"completed": 0, "failed": 0, "tokens_used": 0, "max_queue_wait": 0.0, "total_queue_wait": 0.0}
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.tokens_per_minute, self.tokens + (now - self.updated) * self.tokens_per_minute / 60)
+        self.updated = now
+
+    def reservation(self, request: LLMRequest) -> int:
+        """Tokens held while the request runs; one larger than the budget waits for a full bucket"""
+        return min(estimate_request_tokens(request), self.tokens_per_minute)
+
+    async def acquire(self, priority: int, tokens: int) -> float:
+        """Wait for a slot and budget; returns seconds spent queued"""
+        loop = asyncio.get_running_loop()
+        entry = _QueuedRequest(
+            sort_key=(-priority, next(self.sequence)),
+            tokens=tokens,
+            granted=loop.create_future(),
+            enqueued_at=time.monotonic()
+        )
+        heapq.heappush(self.queue, entry)
+        self.dispatch()
+        try:
+            await entry.granted
+        except asyncio.CancelledError:
+            if entry.granted.done() and not entry.granted.cancelled():
+                self.release(entry.tokens, 0)  # Granted just as the caller gave up
+            else:
+                entry.granted.cancel()
+                self.dispatch()
+            raise
+        waited = time.monotonic() - entry.enqueued_at
+        self.stats["total_queue_wait"] += waited
+        self.stats["max_queue_wait"] = max(self.stats["max_queue_wait"], waited)
+        return waited
+
+    def release(self, reserved_tokens: int, used_tokens: Optional[int]):
+        """Free the slot and settle the reservation against actual usage (unknown usage keeps it)"""
+        self.active -= 1
+        if used_tokens is not None:
+            self._refill()
+            self.tokens += reserved_tokens - used_tokens  # May go negative: the overrun delays later requests
+            self.stats["tokens_used"] += used_tokens
+        self.dispatch()
+
+    def dispatch(self):
+        """Grant queued requests in priority order while slots and budget allow; strict priority, no skipping"""
+        if self.wakeup is not None:
+            self.wakeup.cancel()
+            self.wakeup = None
+        self._refill()
+        while self.queue and self.active < self.max_concurrency:
+            head = self.queue[0]
+            if head.granted.done():  # Cancelled while queued
+                heapq.heappop(self.queue)
+                continue
+            if self.tokens < head.tokens:
+                wait = (head.tokens - self.tokens) * 60 / self.tokens_per_minute
+                self.wakeup = asyncio.get_running_loop().call_later(wait, self.dispatch)
+                return
+            heapq.heappop(self.queue)
+            self.tokens -= head.tokens
+            self.active += 1
+            head.granted.set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._refill()
+        finished = self.stats["completed"] + self.stats["failed"]
+        return {
+            "active": self.active,
+            "queued": sum(1 for entry in self.queue if not entry.granted.done()),
+            "max_concurrency": self.max_concurrency,
+            "tokens_per_minute": self.tokens_per_minute,
+            "tokens_available": round(self.tokens, 1),
+            "completed": self.stats["completed"],
+            "failed": self.stats["failed"],
+            "tokens_used": self.stats["tokens_used"],
+            "avg_queue_wait": round(self.stats["total_queue_wait"] / finished, 4) if finished else 0.0,
+            "max_queue_wait": round(self.stats["max_queue_wait"], 4)
+        }
+
+
+class LLMScheduler:
+    """
+    Runs provider calls through per-provider lanes. `limits_for(provider)` gives (max_concurrency,
+    tokens_per_minute) when a lane is first used; `on_complete(provider, latency_seconds, success,
+    tokens, queue_wait_seconds)` runs after every call. Latency is measured from dispatch, so it is
+    the provider's service time; time spent queued in the lane is reported separately.
+    """
+
+    def __init__(
+        self,
+        limits_for: Callable[[LLMProvider], Tuple[int, int]],
+        on_complete: Optional[Callable[[LLMProvider, float, bool, int, float], Awaitable[None]]] = None
+    ):
+        self.limits_for = limits_for
+        self.on_complete = on_complete
+        self.lanes: Dict[LLMProvider, ProviderLane] = {}
+        self.pending_reports: Set[asyncio.Task] = set()
+
+    def lane(self, provider: LLMProvider) -> ProviderLane:
+        if provider not in self.lanes:
+            max_concurrency, tokens_per_minute = self.limits_for(provider)
+            self.lanes[provider] = ProviderLane(provider, max_concurrency, tokens_per_minute)
+        return self.lanes[provider]
+
+    async def _report(self, provider: LLMProvider, latency: float, success: bool, tokens: int, queue_wait: float):
+        if self.on_complete is None:
+            return
+        try:
+            await self.on_complete(provider, latency, success, tokens, queue_wait)
+        except Exception as e:
+            logger.error(f"LLM scheduler completion callback failed: {e}")
+
+    def _report_later(self, provider: LLMProvider, latency: float, success: bool, tokens: int, queue_wait: float):
+        """Report from code that must not await, such as a closing async generator"""
+        if self.on_complete is None:
+            return
+        task = asyncio.get_running_loop().create_task(self._report(provider, latency, success, tokens, queue_wait))
+        self.pending_reports.add(task)
+        task.add_done_callback(self.pending_reports.discard)
+
+    async def submit(
+        self,
+        provider: LLMProvider,
+        request: LLMRequest,
+        call: Callable[[], Awaitable[Any]],
+        tokens_used: Callable[[Any], Optional[int]] = lambda result: getattr(result, "tokens_used", None)
+    ) -> Any:
+        """Run `call` once the provider's lane admits this request"""
+        lane = self.lane(provider)
+        reserved = lane.reservation(request)
+        queue_wait = await lane.acquire(request_priority(request), reserved)
+        dispatched = time.monotonic()
+        used = None
+        try:
+            result = await call()
+            used = tokens_used(result)
+        except BaseException:
+            lane.stats["failed"] += 1
+            lane.release(reserved, None)
+            await self._report(provider, time.monotonic() - dispatched, False, 0, queue_wait)
+            raise
+        lane.stats["completed"] += 1
+        lane.release(reserved, used)
+        await self._report(provider, time.monotonic() - dispatched, True, used or 0, queue_wait)
+        return result
+
+    async def stream(
+        self,
+        provider: LLMProvider,
+        request: LLMRequest,
+        call: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """Yield chunks from `call()` once admitted; the slot is held until the stream ends"""
+        lane = self.lane(provider)
+        reserved = lane.reservation(request)
+        queue_wait = await lane.acquire(request_priority(request), reserved)
+        dispatched = time.monotonic()
+        output_tokens = 0
+        success = False
+        try:
+            async for chunk in call():
+                output_tokens += estimate_text_tokens(chunk)
+                yield chunk
+            success = True
+        finally:
+            used = max(0, estimate_request_tokens(request) - (request.max_tokens or DEFAULT_OUTPUT_TOKENS)) + output_tokens
+            lane.stats["completed" if success else "failed"] += 1
+            lane.release(reserved, used)
+            # A generator being closed (GeneratorExit) must not await, so the report runs as its own task
+            self._report_later(provider, time.monotonic() - dispatched, success, used if success else 0, queue_wait)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {provider.value: lane.get_stats() for provider, lane in self.lanes.items()}
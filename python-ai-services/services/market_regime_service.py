@@ -3,16 +3,17 @@ Market Regime Detection Service - Phase 5 Implementation
 Advanced market regime detection using machine learning and technical indicators
 """
 import numpy as np
-import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Any, Literal, Tuple
 from loguru import logger
 from pydantic import BaseModel, Field
-from dataclasses import dataclass
 from enum import Enum
 import asyncio
 from collections import deque
 import json
+import math
 
 class MarketRegime(str, Enum):
     """Market regime classifications"""
@@ -65,20 +66,227 @@ class RegimeChange(BaseModel):
     confidence: float
     trigger_indicators: List[str] = Field(default_factory=list)
 
-@dataclass
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+INDICATOR_NAMES = ['sma_20', 'sma_50', 'ema_12', 'ema_26', 'rsi', 'atr', 'bb_upper', 'bb_lower', 'macd', 'adx']
+
+def _divide(numerator: float, denominator: float) -> float:
+    """Float division with NumPy semantics: x/0 is ±inf and 0/0 is NaN"""
+    if denominator == 0:
+        if numerator == 0 or numerator != numerator:
+            return math.nan
+        return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+    return numerator / denominator
+
+class _RollingMean:
+    """
+    Mean of the last `size` values with a running sum. NaN until the window is full or while it
+    holds a non-finite value, like pandas rolling().mean(); the sum is recomputed periodically so
+    floating-point drift cannot accumulate.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque([math.nan] * size, maxlen=size)
+        self.total = 0.0
+        self.missing = size
+        self.pushes = 0
+
+    def push(self, value: float) -> float:
+        oldest = self.values[0]
+        if math.isfinite(oldest):
+            self.total -= oldest
+        else:
+            self.missing -= 1
+        self.values.append(value)
+        if math.isfinite(value):
+            self.total += value
+        else:
+            self.missing += 1
+        self.pushes += 1
+        if self.pushes % (64 * self.size) == 0:
+            self._resync()
+        return self.total / self.size if self.missing == 0 else math.nan
+
+    def push_many(self, values: np.ndarray) -> np.ndarray:
+        """Means after each of `values`, computed over (previous window + values) at once"""
+        history = np.fromiter(self.values, dtype=np.float64, count=self.size)[1:]
+        windows = sliding_window_view(np.concatenate([history, values]), self.size)
+        with np.errstate(invalid="ignore"):
+            means = np.where(np.isfinite(windows).all(axis=1), windows.mean(axis=1), np.nan)
+        self.values.extend(values[-self.size:].tolist())
+        self._resync()
+        return means
+
+    def window(self) -> np.ndarray:
+        return np.fromiter(self.values, dtype=np.float64, count=self.size)
+
+    def _resync(self):
+        finite = [value for value in self.values if math.isfinite(value)]
+        self.total = math.fsum(finite)
+        self.missing = self.size - len(finite)
+
+class _AdjustedEMA:
+    """pandas ewm(span=span).mean() (adjust=True) carried forward as a weighted sum and weight total"""
+
+    def __init__(self, span: int):
+        self.decay = 1.0 - 2.0 / (span + 1)
+        self.weighted_sum = 0.0
+        self.weight_total = 0.0
+
+    def push(self, value: float) -> float:
+        self.weighted_sum = value + self.decay * self.weighted_sum
+        self.weight_total = 1.0 + self.decay * self.weight_total
+        return self.weighted_sum / self.weight_total
+
+    def push_many(self, values: np.ndarray) -> np.ndarray:
+        coefficients = [1.0, -self.decay]
+        sums, _ = lfilter([1.0], coefficients, values, zi=[self.decay * self.weighted_sum])
+        totals, _ = lfilter([1.0], coefficients, np.ones(len(values)), zi=[self.decay * self.weight_total])
+        self.weighted_sum, self.weight_total = float(sums[-1]), float(totals[-1])
+        return sums / totals
+
+class RegimeIndicatorState:
+    """
+    Incremental state behind INDICATOR_NAMES for one symbol. update() advances one bar in O(1);
+    update_many() advances a block of bars with array operations and leaves the same state, so the
+    two can be mixed freely. Values match the pandas formulas over the full bar history.
+    """
+
+    def __init__(self):
+        self.previous_high = math.nan
+        self.previous_low = math.nan
+        self.previous_close = math.nan
+        self.close_20 = _RollingMean(20)
+        self.close_50 = _RollingMean(50)
+        self.ema_12 = _AdjustedEMA(12)
+        self.ema_26 = _AdjustedEMA(26)
+        self.gain_14 = _RollingMean(14)
+        self.loss_14 = _RollingMean(14)
+        self.true_range_14 = _RollingMean(14)
+        self.dm_plus_14 = _RollingMean(14)
+        self.dm_minus_14 = _RollingMean(14)
+        self.dx_14 = _RollingMean(14)
+
+    def update(self, high: float, low: float, close: float) -> List[float]:
+        """Indicator values for the new bar, in INDICATOR_NAMES order"""
+        previous_close = self.previous_close
+        if previous_close != previous_close:
+            true_range, delta = math.nan, math.nan
+        else:
+            true_range = max(high - low, abs(high - previous_close), abs(low - previous_close))
+            delta = close - previous_close
+        up_move = high - self.previous_high
+        down_move = self.previous_low - low
+        dm_plus = max(up_move, 0.0) if up_move > down_move else 0.0
+        dm_minus = max(down_move, 0.0) if down_move > up_move else 0.0
+        self.previous_high, self.previous_low, self.previous_close = high, low, close
+
+        sma_20 = self.close_20.push(close)
+        sma_50 = self.close_50.push(close)
+        ema_12 = self.ema_12.push(close)
+        ema_26 = self.ema_26.push(close)
+
+        gain = self.gain_14.push(delta if delta > 0 else 0.0)
+        loss = self.loss_14.push(-delta if delta < 0 else 0.0)
+        rsi = 100 - 100 / (1 + _divide(gain, loss))
+
+        atr = self.true_range_14.push(true_range)
+        if sma_20 == sma_20:
+            std = math.sqrt(math.fsum((value - sma_20) ** 2 for value in self.close_20.values) / 19)
+            bb_upper, bb_lower = sma_20 + 2 * std, sma_20 - 2 * std
+        else:
+            bb_upper = bb_lower = math.nan
+
+        di_plus = 100 * _divide(self.dm_plus_14.push(dm_plus), atr)
+        di_minus = 100 * _divide(self.dm_minus_14.push(dm_minus), atr)
+        dx = 100 * _divide(abs(di_plus - di_minus), di_plus + di_minus)
+        adx = self.dx_14.push(dx)
+
+        return [sma_20, sma_50, ema_12, ema_26, rsi, atr, bb_upper, bb_lower, ema_12 - ema_26, adx]
+
+    def update_many(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+        """Indicator rows for a block of new bars, shape (bars, len(INDICATOR_NAMES))"""
+        previous_high = np.concatenate([[self.previous_high], high[:-1]])
+        previous_low = np.concatenate([[self.previous_low], low[:-1]])
+        previous_close = np.concatenate([[self.previous_close], close[:-1]])
+        self.previous_high, self.previous_low, self.previous_close = float(high[-1]), float(low[-1]), float(close[-1])
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            true_range = np.maximum(high - low, np.maximum(np.abs(high - previous_close), np.abs(low - previous_close)))
+            delta = close - previous_close
+            up_move = high - previous_high
+            down_move = previous_low - low
+            dm_plus = np.where(up_move > down_move, np.maximum(up_move, 0.0), 0.0)
+            dm_minus = np.where(down_move > up_move, np.maximum(down_move, 0.0), 0.0)
+
+            close_history = np.concatenate([self.close_20.window()[1:], close])
+            sma_20 = self.close_20.push_many(close)
+            sma_50 = self.close_50.push_many(close)
+            ema_12 = self.ema_12.push_many(close)
+            ema_26 = self.ema_26.push_many(close)
+
+            gain = self.gain_14.push_many(np.where(delta > 0, delta, 0.0))
+            loss = self.loss_14.push_many(np.where(delta < 0, -delta, 0.0))
+            rsi = 100 - 100 / (1 + gain / loss)
+
+            atr = self.true_range_14.push_many(true_range)
+            std = sliding_window_view(close_history, 20).std(axis=1, ddof=1)
+            bb_upper, bb_lower = sma_20 + 2 * std, sma_20 - 2 * std
+
+            di_plus = 100 * (self.dm_plus_14.push_many(dm_plus) / atr)
+            di_minus = 100 * (self.dm_minus_14.push_many(dm_minus) / atr)
+            dx = 100 * np.abs(di_plus - di_minus) / (di_plus + di_minus)
+            adx = self.dx_14.push_many(dx)
+
+        return np.column_stack([sma_20, sma_50, ema_12, ema_26, rsi, atr, bb_upper, bb_lower, ema_12 - ema_26, adx])
+
 class MarketData:
-    """Market data structure for regime analysis"""
-    symbol: str
-    prices: deque  # OHLCV data
-    volumes: deque
-    timestamps: deque
-    indicators: Dict[str, deque]
+    """
+    The last `capacity` bars of one symbol with their indicator values, in a mirrored NumPy ring:
+    each row is written at i and i + capacity, so the newest n rows are always one contiguous slice.
+    """
+
+    COLUMNS = {name: i for i, name in enumerate(BAR_COLUMNS + INDICATOR_NAMES)}
+
+    def __init__(self, symbol: str, capacity: int = 500):
+        self.symbol = symbol
+        self.capacity = capacity
+        self.rows = np.full((2 * capacity, len(self.COLUMNS)), np.nan)
+        self.timestamps = np.empty(2 * capacity, dtype=object)
+        self.end = 0  # Ring position after the newest row
+        self.count = 0
+        self.indicator_state = RegimeIndicatorState()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, rows: np.ndarray, timestamps: List[Any]):
+        rows, timestamps = rows[-self.capacity:], timestamps[-self.capacity:]
+        positions = (self.end + np.arange(len(rows))) % self.capacity
+        self.rows[positions] = rows
+        self.rows[positions + self.capacity] = rows
+        self.timestamps[positions] = timestamps
+        self.timestamps[positions + self.capacity] = timestamps
+        self.end = (self.end + len(rows)) % self.capacity
+        self.count = min(self.capacity, self.count + len(rows))
+
+    def tail(self, n: int, column: Optional[str] = None) -> np.ndarray:
+        """View of the newest n rows (oldest first), or of one column of them"""
+        n = min(n, self.count)
+        stop = self.end + self.capacity
+        block = self.rows[stop - n:stop]
+        return block if column is None else block[:, self.COLUMNS[column]]
+
+    def latest_indicators(self) -> np.ndarray:
+        return self.tail(1)[0, len(BAR_COLUMNS):]
 
 class MarketRegimeService:
     """
     Advanced market regime detection using multiple technical indicators and ML
     """
     
+    REGIME_CODES = list(MarketRegime)
+    
     def __init__(self):
         self.regime_history: Dict[str, List[RegimeDetection]] = {}
         self.current_regimes: Dict[str, RegimeDetection] = {}
@@ -100,6 +308,9 @@ class MarketRegimeService:
             "volume_spike": 2.0
         }
         
+        self.buffer_capacity = 500
+        self.batch_ingest_threshold = 32  # Bars per call above which indicators are computed vectorized
+        
         # Start background monitoring
         self.monitoring_active = True
         self._start_regime_monitoring()
@@ -123,105 +334,26 @@ class MarketRegimeService:
     async def add_market_data(self, symbol: str, ohlcv_data: List[Dict[str, Any]]):
         """Add market data for regime analysis"""
         
+        if not ohlcv_data:
+            return
         if symbol not in self.market_data:
-            self.market_data[symbol] = MarketData(
-                symbol=symbol,
-                prices=deque(maxlen=500),  # Keep last 500 data points
-                volumes=deque(maxlen=500),
-                timestamps=deque(maxlen=500),
-                indicators={}
-            )
+            self.market_data[symbol] = MarketData(symbol, capacity=self.buffer_capacity)  # Keep last 500 data points
         
         market_data = self.market_data[symbol]
-        
-        for data_point in ohlcv_data:
-            # Add OHLCV data
-            market_data.prices.append({
-                'open': data_point.get('open', 0),
-                'high': data_point.get('high', 0),
-                'low': data_point.get('low', 0),
-                'close': data_point.get('close', 0)
-            })
-            market_data.volumes.append(data_point.get('volume', 0))
-            market_data.timestamps.append(data_point.get('timestamp', datetime.now(timezone.utc)))
-        
-        # Calculate indicators after adding data
-        await self._calculate_indicators(symbol)
+        now = datetime.now(timezone.utc)
+        bars = np.array([[data_point.get(column, 0) for column in BAR_COLUMNS] for data_point in ohlcv_data], dtype=np.float64)
+        timestamps = [data_point.get('timestamp', now) for data_point in ohlcv_data]
+        
+        # Indicators advance with each bar; large backfills are computed as one array operation
+        state = market_data.indicator_state
+        if len(bars) >= self.batch_ingest_threshold:
+            indicators = state.update_many(bars[:, 1], bars[:, 2], bars[:, 3])
+        else:
+            indicators = np.array([state.update(high, low, close) for high, low, close in bars[:, 1:4].tolist()])
+        market_data.append(np.hstack([bars, indicators]), timestamps)
         
         logger.debug(f"Added {len(ohlcv_data)} data points for {symbol}")
     
-    async def _calculate_indicators(self, symbol: str):
-        """Calculate technical indicators for regime detection"""
-        
-        market_data = self.market_data[symbol]
-        if len(market_data.prices) < self.lookback_periods["short"]:
-            return  # Not enough data
-        
-        prices = list(market_data.prices)
-        volumes = list(market_data.volumes)
-        
-        # Convert to pandas for easier calculation
-        df = pd.DataFrame(prices)
-        df['volume'] = volumes
-        
-        # Initialize indicator storage
-        for indicator in ['sma_20', 'sma_50', 'ema_12', 'ema_26', 'rsi', 'atr', 'bb_upper', 'bb_lower', 'macd', 'adx']:
-            if indicator not in market_data.indicators:
-                market_data.indicators[indicator] = deque(maxlen=500)
-        
-        # Calculate Moving Averages
-        df['sma_20'] = df['close'].rolling(window=20).mean()
-        df['sma_50'] = df['close'].rolling(window=50).mean()
-        df['ema_12'] = df['close'].ewm(span=12).mean()
-        df['ema_26'] = df['close'].ewm(span=26).mean()
-        
-        # RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
-        
-        # ATR (Average True Range)
-        df['prev_close'] = df['close'].shift(1)
-        df['tr'] = np.maximum(
-            df['high'] - df['low'],
-            np.maximum(
-                abs(df['high'] - df['prev_close']),
-                abs(df['low'] - df['prev_close'])
-            )
-        )
-        df['atr'] = df['tr'].rolling(window=14).mean()
-        
-        # Bollinger Bands
-        bb_period = 20
-        bb_std = 2
-        df['bb_middle'] = df['close'].rolling(window=bb_period).mean()
-        bb_std_dev = df['close'].rolling(window=bb_period).std()
-        df['bb_upper'] = df['bb_middle'] + (bb_std_dev * bb_std)
-        df['bb_lower'] = df['bb_middle'] - (bb_std_dev * bb_std)
-        
-        # MACD
-        df['macd'] = df['ema_12'] - df['ema_26']
-        df['macd_signal'] = df['macd'].ewm(span=9).mean()
-        
-        # ADX (Directional Movement Index)
-        df['dm_plus'] = np.where((df['high'] - df['high'].shift(1)) > (df['low'].shift(1) - df['low']),
-                                np.maximum(df['high'] - df['high'].shift(1), 0), 0)
-        df['dm_minus'] = np.where((df['low'].shift(1) - df['low']) > (df['high'] - df['high'].shift(1)),
-                                 np.maximum(df['low'].shift(1) - df['low'], 0), 0)
-        
-        df['di_plus'] = 100 * (df['dm_plus'].rolling(window=14).mean() / df['atr'])
-        df['di_minus'] = 100 * (df['dm_minus'].rolling(window=14).mean() / df['atr'])
-        df['dx'] = 100 * abs(df['di_plus'] - df['di_minus']) / (df['di_plus'] + df['di_minus'])
-        df['adx'] = df['dx'].rolling(window=14).mean()
-        
-        # Store latest values
-        latest_row = df.iloc[-1]
-        for indicator in market_data.indicators.keys():
-            if indicator in latest_row and not pd.isna(latest_row[indicator]):
-                market_data.indicators[indicator].append(float(latest_row[indicator]))
-    
     async def detect_regime(self, symbol: str, timeframe: str = "1d") -> Optional[RegimeDetection]:
         """Detect current market regime for a symbol"""
         
@@ -229,227 +361,164 @@ class MarketRegimeService:
             logger.warning(f"No market data available for {symbol}")
             return None
         
-        market_data = self.market_data[symbol]
-        if len(market_data.prices) < self.lookback_periods["medium"]:
+        if len(self.market_data[symbol]) < self.lookback_periods["medium"]:
             logger.warning(f"Insufficient data for regime detection: {symbol}")
             return None
         
-        # Get recent price data
-        recent_prices = list(market_data.prices)[-self.lookback_periods["medium"]:]
-        recent_indicators = {
-            key: list(values)[-self.lookback_periods["medium"]:] if values else []
-            for key, values in market_data.indicators.items()
-        }
-        
-        # Calculate regime features
-        regime_features = await self._calculate_regime_features(recent_prices, recent_indicators)
-        
-        # Classify regime
-        regime, confidence = await self._classify_regime(regime_features)
-        
-        # Determine confidence level
-        confidence_level = self._get_confidence_level(confidence)
-        
-        # Calculate additional metrics
-        trend_strength = regime_features.get('trend_strength', 0.0)
-        volatility_level = regime_features.get('volatility_level', 0.0)
-        momentum_score = regime_features.get('momentum_score', 0.0)
-        volume_profile = regime_features.get('volume_profile', 'normal')
-        
-        # Create detection result
-        detection = RegimeDetection(
-            symbol=symbol,
-            regime=regime,
-            confidence=confidence,
-            confidence_level=confidence_level,
-            timeframe=timeframe,
-            trend_strength=trend_strength,
-            volatility_level=volatility_level,
-            momentum_score=momentum_score,
-            volume_profile=volume_profile,
-            indicators=regime_features.get('raw_indicators', {}),
-            data_points_used=len(recent_prices)
-        )
-        
-        # Calculate regime duration if this is a continuation
-        if symbol in self.current_regimes:
-            previous = self.current_regimes[symbol]
-            if previous.regime == regime:
-                time_diff = detection.detection_time - previous.detection_time
-                detection.regime_duration_days = time_diff.total_seconds() / 86400  # Convert to days
-        
-        # Check for regime changes
-        await self._check_regime_change(symbol, detection)
-        
-        # Store current regime
-        self.current_regimes[symbol] = detection
-        
-        # Add to history
-        if symbol not in self.regime_history:
-            self.regime_history[symbol] = []
-        self.regime_history[symbol].append(detection)
-        
-        # Keep only recent history (last 100 detections)
-        if len(self.regime_history[symbol]) > 100:
-            self.regime_history[symbol] = self.regime_history[symbol][-100:]
-        
-        logger.debug(f"Detected regime for {symbol}: {regime.value} (confidence: {confidence:.3f})")
-        return detection
+        detections = await self.detect_regimes([symbol], timeframe)
+        return detections.get(symbol)
     
-    async def _calculate_regime_features(self, prices: List[Dict], indicators: Dict[str, List]) -> Dict[str, Any]:
-        """Calculate features used for regime classification"""
-        
-        closes = [p['close'] for p in prices]
-        highs = [p['high'] for p in prices]
-        lows = [p['low'] for p in prices]
-        
-        features = {}
-        
-        # Trend features
-        if len(closes) >= 20:
-            sma_20 = np.mean(closes[-20:])
-            sma_50 = np.mean(closes[-50:]) if len(closes) >= 50 else sma_20
+    async def detect_regimes(self, symbols: List[str], timeframe: str = "1d") -> Dict[str, RegimeDetection]:
+        """Detect the current regime of every symbol with enough data, classifying them together"""
+        
+        lookback = self.lookback_periods["medium"]
+        symbols = [s for s in symbols if s in self.market_data and len(self.market_data[s]) >= lookback]
+        if not symbols:
+            return {}
+        
+        # One row per symbol: recent closes and the latest indicator values
+        buffers = [self.market_data[symbol] for symbol in symbols]
+        closes = np.stack([data.tail(lookback, 'close') for data in buffers])
+        indicators = np.stack([data.latest_indicators() for data in buffers])
+        
+        features = self._calculate_regime_features(closes, indicators)
+        regimes, confidences = self._classify_regimes(features)
+        
+        detections = {}
+        for i, symbol in enumerate(symbols):
+            regime = self.REGIME_CODES[regimes[i]]
+            confidence = float(confidences[i])
+            detection = RegimeDetection(
+                symbol=symbol,
+                regime=regime,
+                confidence=confidence,
+                confidence_level=self._get_confidence_level(confidence),
+                timeframe=timeframe,
+                trend_strength=float(features['trend_strength'][i]),
+                volatility_level=float(features['volatility_level'][i]),
+                momentum_score=float(features['momentum_score'][i]),
+                volume_profile='normal',  # Placeholder until volume data is integrated
+                indicators={
+                    name: float(value) if value == value else 0.0
+                    for name, value in zip(INDICATOR_NAMES, indicators[i].tolist())
+                },
+                data_points_used=lookback
+            )
             
-            current_price = closes[-1]
-            trend_strength = (current_price - sma_50) / sma_50 if sma_50 > 0 else 0
+            # Calculate regime duration if this is a continuation
+            if symbol in self.current_regimes:
+                previous = self.current_regimes[symbol]
+                if previous.regime == regime:
+                    time_diff = detection.detection_time - previous.detection_time
+                    detection.regime_duration_days = time_diff.total_seconds() / 86400  # Convert to days
             
-            # Trend direction consistency
-            price_changes = np.diff(closes[-20:])
-            positive_changes = np.sum(price_changes > 0)
-            trend_consistency = positive_changes / len(price_changes) if len(price_changes) > 0 else 0.5
+            # Check for regime changes
+            await self._check_regime_change(symbol, detection)
             
-            features['trend_strength'] = trend_strength
-            features['trend_consistency'] = trend_consistency
-            features['price_vs_sma20'] = (current_price - sma_20) / sma_20 if sma_20 > 0 else 0
-            features['sma20_vs_sma50'] = (sma_20 - sma_50) / sma_50 if sma_50 > 0 else 0
-        
-        # Volatility features
-        if len(closes) >= 20:
-            returns = np.diff(np.log(closes[-20:]))
-            volatility = np.std(returns) * np.sqrt(252)  # Annualized volatility
+            # Store current regime
+            self.current_regimes[symbol] = detection
             
-            # ATR-based volatility
-            if 'atr' in indicators and indicators['atr']:
-                atr_volatility = indicators['atr'][-1] / closes[-1] if closes[-1] > 0 else 0
-                features['atr_volatility'] = atr_volatility
+            # Add to history
+            if symbol not in self.regime_history:
+                self.regime_history[symbol] = []
+            self.regime_history[symbol].append(detection)
             
-            features['volatility_level'] = volatility
-            features['volatility_percentile'] = self._calculate_percentile(volatility, returns)
-        
-        # Momentum features
-        if 'rsi' in indicators and indicators['rsi']:
-            rsi = indicators['rsi'][-1]
-            features['rsi'] = rsi
-            features['rsi_momentum'] = (rsi - 50) / 50  # Normalized momentum
-        
-        if 'macd' in indicators and indicators['macd']:
-            macd = indicators['macd'][-1]
-            features['macd'] = macd
-            features['momentum_score'] = np.tanh(macd / closes[-1]) if closes[-1] > 0 else 0
-        
-        # ADX for trend strength
-        if 'adx' in indicators and indicators['adx']:
-            adx = indicators['adx'][-1]
-            features['adx'] = adx
-            features['trend_strength_adx'] = min(adx / 50, 1.0)  # Normalized ADX
-        
-        # Bollinger Bands position
-        if 'bb_upper' in indicators and 'bb_lower' in indicators:
-            if indicators['bb_upper'] and indicators['bb_lower']:
-                bb_upper = indicators['bb_upper'][-1]
-                bb_lower = indicators['bb_lower'][-1]
-                bb_position = (closes[-1] - bb_lower) / (bb_upper - bb_lower) if bb_upper > bb_lower else 0.5
-                features['bb_position'] = bb_position
-        
-        # Volume analysis
-        if len(prices) >= 20:
-            # This would require volume data integration
-            features['volume_profile'] = 'normal'  # Placeholder
-        
-        # Raw indicators for storage
-        features['raw_indicators'] = {
-            key: values[-1] if values else 0 
-            for key, values in indicators.items()
-        }
+            # Keep only recent history (last 100 detections)
+            if len(self.regime_history[symbol]) > 100:
+                self.regime_history[symbol] = self.regime_history[symbol][-100:]
+            
+            logger.debug(f"Detected regime for {symbol}: {regime.value} (confidence: {confidence:.3f})")
+            detections[symbol] = detection
         
-        return features
-    
-    def _calculate_percentile(self, value: float, data_series: np.ndarray) -> float:
-        """Calculate percentile of value within data series"""
-        if len(data_series) == 0:
-            return 0.5
-        return (np.sum(data_series <= value) / len(data_series))
+        return detections
     
-    async def _classify_regime(self, features: Dict[str, Any]) -> Tuple[MarketRegime, float]:
-        """Classify market regime based on calculated features"""
-        
-        # Get key features with defaults
-        trend_strength = features.get('trend_strength', 0.0)
-        volatility_level = features.get('volatility_level', 0.0)
-        trend_consistency = features.get('trend_consistency', 0.5)
-        momentum_score = features.get('momentum_score', 0.0)
-        adx = features.get('adx', 20.0)
-        rsi = features.get('rsi', 50.0)
-        
-        # Regime classification logic
-        confidence_factors = []
-        
-        # High volatility regimes
-        if volatility_level > self.regime_thresholds['volatility_high']:
-            if abs(trend_strength) > 0.3:
-                regime = MarketRegime.VOLATILE
-                confidence_factors.append(min(volatility_level / self.regime_thresholds['volatility_high'], 1.0))
-            else:
-                regime = MarketRegime.RANGING
-                confidence_factors.append(0.6)
-        
-        # Low volatility regimes
-        elif volatility_level < self.regime_thresholds['volatility_low']:
-            regime = MarketRegime.LOW_VOLATILITY
-            confidence_factors.append(1.0 - volatility_level / self.regime_thresholds['volatility_low'])
-        
-        # Trending regimes
-        elif abs(trend_strength) > self.regime_thresholds['trend_strength'] and adx > 25:
-            if trend_strength > 0:
-                regime = MarketRegime.TRENDING_UP
-            else:
-                regime = MarketRegime.TRENDING_DOWN
+    def _calculate_regime_features(self, closes: np.ndarray, indicators: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Classification features per symbol from `closes` (symbols x lookback) and the latest
+        `indicators` (symbols x INDICATOR_NAMES); missing indicators take their neutral defaults
+        """
+        
+        column = {name: indicators[:, i] for i, name in enumerate(INDICATOR_NAMES)}
+        current_price = closes[:, -1]
+        sma_50 = closes[:, -50:].mean(axis=1)
+        
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # Trend features
+            trend_strength = np.where(sma_50 > 0, (current_price - sma_50) / sma_50, 0.0)
+            trend_consistency = (np.diff(closes[:, -20:], axis=1) > 0).mean(axis=1)
             
-            confidence_factors.append(min(abs(trend_strength) / self.regime_thresholds['trend_strength'], 1.0))
-            confidence_factors.append(min(adx / 50, 1.0))
-            confidence_factors.append(abs(trend_consistency - 0.5) * 2)  # Distance from neutral
-        
-        # Breakout/Breakdown detection
-        elif abs(momentum_score) > self.regime_thresholds['momentum_strong']:
-            if momentum_score > 0 and rsi > 70:
-                regime = MarketRegime.BREAKOUT
-            elif momentum_score < 0 and rsi < 30:
-                regime = MarketRegime.BREAKDOWN
-            else:
-                regime = MarketRegime.VOLATILE
+            # Volatility features: annualized volatility of the last 19 log returns
+            returns = np.diff(np.log(closes[:, -20:]), axis=1)
+            volatility_level = returns.std(axis=1) * np.sqrt(252)
             
-            confidence_factors.append(min(abs(momentum_score) / self.regime_thresholds['momentum_strong'], 1.0))
-        
-        # Recovery regime
-        elif trend_strength > 0.2 and rsi > 40 and rsi < 60 and momentum_score > 0.1:
-            regime = MarketRegime.RECOVERY
-            confidence_factors.append(0.7)
-        
-        # Ranging market
-        elif abs(trend_strength) < 0.2 and volatility_level < 0.5:
-            regime = MarketRegime.RANGING
-            confidence_factors.append(1.0 - abs(trend_strength) / 0.2)
-        
-        # Default to undetermined
-        else:
-            regime = MarketRegime.UNDETERMINED
-            confidence_factors.append(0.3)
-        
-        # Calculate overall confidence
-        confidence = np.mean(confidence_factors) if confidence_factors else 0.5
-        confidence = max(0.1, min(0.95, confidence))  # Bound between 0.1 and 0.95
+            # Momentum features
+            macd = column['macd']
+            momentum_score = np.where(
+                np.isnan(macd), 0.0, np.where(current_price > 0, np.tanh(macd / current_price), 0.0)
+            )
         
-        return regime, confidence
+        return {
+            'trend_strength': trend_strength,
+            'trend_consistency': trend_consistency,
+            'volatility_level': volatility_level,
+            'momentum_score': momentum_score,
+            'rsi': np.where(np.isnan(column['rsi']), 50.0, column['rsi']),
+            'adx': np.where(np.isnan(column['adx']), 20.0, column['adx'])
+        }
+    
+    def _classify_regimes(self, features: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Regime codes (indices into REGIME_CODES) and confidences for every symbol. Conditions are
+        checked in priority order and the first match wins, as in a chain of if/elif branches.
+        """
+        
+        thresholds = self.regime_thresholds
+        trend_strength = features['trend_strength']
+        volatility_level = features['volatility_level']
+        trend_consistency = features['trend_consistency']
+        momentum_score = features['momentum_score']
+        adx = features['adx']
+        rsi = features['rsi']
+        
+        high_volatility = volatility_level > thresholds['volatility_high']
+        trending = (np.abs(trend_strength) > thresholds['trend_strength']) & (adx > 25)
+        strong_momentum = np.abs(momentum_score) > thresholds['momentum_strong']
+        
+        with np.errstate(invalid="ignore", divide="ignore"):
+            momentum_confidence = np.minimum(np.abs(momentum_score) / thresholds['momentum_strong'], 1.0)
+            trend_confidence = (
+                np.minimum(np.abs(trend_strength) / thresholds['trend_strength'], 1.0)
+                + np.minimum(adx / 50, 1.0)
+                + np.abs(trend_consistency - 0.5) * 2  # Distance from neutral
+            ) / 3
+            branches = [
+                # High volatility regimes
+                (high_volatility & (np.abs(trend_strength) > 0.3), MarketRegime.VOLATILE,
+                 np.minimum(volatility_level / thresholds['volatility_high'], 1.0)),
+                (high_volatility, MarketRegime.RANGING, 0.6),
+                # Low volatility regimes
+                (volatility_level < thresholds['volatility_low'], MarketRegime.LOW_VOLATILITY,
+                 1.0 - volatility_level / thresholds['volatility_low']),
+                # Trending regimes
+                (trending & (trend_strength > 0), MarketRegime.TRENDING_UP, trend_confidence),
+                (trending, MarketRegime.TRENDING_DOWN, trend_confidence),
+                # Breakout/Breakdown detection
+                (strong_momentum & (momentum_score > 0) & (rsi > 70), MarketRegime.BREAKOUT, momentum_confidence),
+                (strong_momentum & (momentum_score < 0) & (rsi < 30), MarketRegime.BREAKDOWN, momentum_confidence),
+                (strong_momentum, MarketRegime.VOLATILE, momentum_confidence),
+                # Recovery regime
+                ((trend_strength > 0.2) & (rsi > 40) & (rsi < 60) & (momentum_score > 0.1), MarketRegime.RECOVERY, 0.7),
+                # Ranging market
+                ((np.abs(trend_strength) < 0.2) & (volatility_level < 0.5), MarketRegime.RANGING,
+                 1.0 - np.abs(trend_strength) / 0.2)
+            ]
+        
+        conditions = [condition for condition, _, _ in branches]
+        regimes = np.select(conditions, [self.REGIME_CODES.index(regime) for _, regime, _ in branches],
+                            default=self.REGIME_CODES.index(MarketRegime.UNDETERMINED))
+        confidences = np.select(conditions, [np.broadcast_to(confidence, trend_strength.shape) for _, _, confidence in branches],
+                                default=0.3)
+        return regimes, np.clip(confidences, 0.1, 0.95)  # Bound between 0.1 and 0.95
     
     def _get_confidence_level(self, confidence: float) -> RegimeConfidence:
         """Convert numeric confidence to categorical level"""
@@ -520,13 +589,12 @@ class MarketRegimeService:
         return triggers
     
     async def _update_all_regime_detections(self):
-        """Update regime detections for all tracked symbols"""
+        """Update regime detections for all tracked symbols in one vectorized sweep"""
         
-        for symbol in self.market_data.keys():
-            try:
-                await self.detect_regime(symbol)
-            except Exception as e:
-                logger.error(f"Error updating regime for {symbol}: {e}")
+        try:
+            await self.detect_regimes(list(self.market_data.keys()))
+        except Exception as e:
+            logger.error(f"Error updating regimes for {len(self.market_data)} symbols: {e}")
     
     async def get_regime_for_symbol(self, symbol: str) -> Optional[RegimeDetection]:
         """Get current regime for a specific symbol"""
@@ -560,7 +628,7 @@ class MarketRegimeService:
             "current_regimes": regime_summary,
             "total_regime_changes": len(self.regime_changes),
             "detection_coverage": {
-                symbol: len(data.prices) for symbol, data in self.market_data.items()
+                symbol: len(data) for symbol, data in self.market_data.items()
             },
             "last_update": datetime.now(timezone.utc).isoformat()
         }
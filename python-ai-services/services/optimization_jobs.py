@@ -0,0 +1,537 @@
+"""
+Strategy Optimization Jobs
+Runs parameter searches on a process pool so they never block the event loop. Features and targets
+are published once per job to shared memory. Bayesian searches spread trials over several workers
+sharing one Optuna study on disk, which also makes them resumable, and score trials fold by fold so
+the pruner can stop bad ones early. Differential evolution runs in one worker and checkpoints its
+best member each generation.
+
+Studies live under `storage_dir` (OPTIMIZATION_STUDY_DIR, default data/optimization_studies):
+    <study>.journal      Optuna journal of every trial of a Bayesian study
+    <study>.de.json      best member and completed generations of a differential evolution run
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import multiprocessing as mp
+import os
+import queue
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.optimize import differential_evolution
+
+try:
+    import optuna
+except ImportError:
+    optuna = None
+
+logger = logging.getLogger(__name__)
+
+BAYESIAN_OPTIMIZATION = "bayesian_optimization"
+GENETIC_ALGORITHM = "genetic_algorithm"
+
+
+class JobStatus(str, Enum):
+    """Optimization job lifecycle"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+
+@dataclass
+class SearchParameter:
+    """One searchable parameter, in a form worker processes can unpickle without the service"""
+    name: str
+    parameter_type: str  # int, float, categorical
+    bounds: Any
+    current_value: Any
+
+
+@dataclass
+class SearchJob:
+    """Everything a worker needs to run its share of a search"""
+    job_id: str
+    algorithm: str
+    study_name: str
+    storage_dir: str
+    parameters: List[SearchParameter]
+    budget: int  # Trials for Bayesian searches, generations for differential evolution
+    evaluation_folds: int = 4
+
+
+def evaluate_parameter_set(parameters: Dict[str, Any], features: np.ndarray, targets: np.ndarray) -> float:
+    """Evaluate performance of parameter set"""
+
+    # Simplified evaluation - would run actual backtest
+    # For now, use a synthetic performance function
+
+    # Normalize parameters
+    param_values = list(parameters.values())
+    numeric_params = [v for v in param_values if isinstance(v, (int, float))]
+
+    if not numeric_params:
+        return 0.0
+
+    # Synthetic performance based on parameter values and features
+    base_performance = np.mean(targets) if len(targets) > 0 else 0.0
+
+    # Add noise based on parameter configuration
+    param_effect = np.mean(numeric_params) * 0.1
+    feature_effect = np.mean(features) * 0.001 if len(features) > 0 else 0.0
+
+    performance = base_performance + param_effect + feature_effect
+
+    # Add some randomness to simulate market uncertainty
+    noise = np.random.normal(0, 0.1)
+
+    return performance + noise
+
+
+def fold_scores(parameters: Dict[str, Any], features: np.ndarray, targets: np.ndarray, folds: int):
+    """Running mean of the score over consecutive time folds; the last value is the trial's score"""
+    total = 0.0
+    for step, rows in enumerate(np.array_split(np.arange(len(targets)), max(1, min(folds, len(targets))))):
+        total += evaluate_parameter_set(parameters, features[rows], targets[rows])
+        yield total / (step + 1)
+
+
+@dataclass
+class SharedArrays:
+    """Picklable handle to named float64 arrays published in one shared memory block"""
+    name: str
+    layout: Dict[str, Tuple[Tuple[int, ...], int]]  # Array name -> (shape, byte offset)
+
+    @classmethod
+    def publish(cls, arrays: Dict[str, np.ndarray]) -> Tuple[SharedMemory, "SharedArrays"]:
+        """Copy arrays into a new shared memory block; the caller owns and unlinks it"""
+        arrays = {key: np.ascontiguousarray(value, dtype=np.float64) for key, value in arrays.items()}
+        layout, offset = {}, 0
+        for key, value in arrays.items():
+            layout[key] = (value.shape, offset)
+            offset += value.nbytes
+        shm = SharedMemory(create=True, size=max(1, offset))
+        handle = cls(name=shm.name, layout=layout)
+        views = handle._views(shm)
+        for key, value in arrays.items():
+            views[key][...] = value
+        del views
+        return shm, handle
+
+    def attach(self) -> Tuple[SharedMemory, Dict[str, np.ndarray]]:
+        """Map the shared block and return read-only views of its arrays without copying"""
+        shm = SharedMemory(name=self.name)
+        views = self._views(shm)
+        for view in views.values():
+            view.flags.writeable = False
+        return shm, views
+
+    def _views(self, shm: SharedMemory) -> Dict[str, np.ndarray]:
+        return {
+            key: np.ndarray(shape, dtype=np.float64, buffer=shm.buf, offset=offset)
+            for key, (shape, offset) in self.layout.items()
+        }
+
+
+def _close_shared(shm: SharedMemory):
+    try:
+        shm.close()
+    except BufferError:
+        pass  # Views still referenced; released when collected
+
+
+def _study_storage(path: Path):
+    """Journal-file storage: safe for several processes appending trials to one study"""
+    journal = getattr(optuna.storages, "journal", None)
+    backend = getattr(journal, "JournalFileBackend", None) or optuna.storages.JournalFileStorage
+    return optuna.storages.JournalStorage(backend(str(path)))
+
+
+def _suggest(trial, parameters: List[SearchParameter]) -> Dict[str, Any]:
+    suggested = {}
+    for parameter in parameters:
+        if parameter.parameter_type == "float":
+            suggested[parameter.name] = trial.suggest_float(parameter.name, float(parameter.bounds[0]), float(parameter.bounds[1]))
+        elif parameter.parameter_type == "int":
+            suggested[parameter.name] = trial.suggest_int(parameter.name, int(parameter.bounds[0]), int(parameter.bounds[1]))
+        elif parameter.parameter_type == "categorical":
+            suggested[parameter.name] = trial.suggest_categorical(parameter.name, parameter.bounds)
+    return suggested
+
+
+def _run_bayesian_worker(job: SearchJob, handle: SharedArrays, progress, cancel) -> Dict[str, Any]:
+    """Worker entry point: run trials of a shared study until it holds `budget` finished trials"""
+    np.random.seed()  # Forked workers would otherwise share one noise sequence
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    finished_states = (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+    study = optuna.create_study(
+        study_name=job.study_name,
+        storage=_study_storage(Path(job.storage_dir) / f"{job.study_name}.journal"),
+        direction="maximize",
+        pruner=optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=1),
+        load_if_exists=True
+    )
+    shm, arrays = handle.attach()
+    features, targets = arrays["features"], arrays["targets"]
+
+    def objective(trial) -> float:
+        score = 0.0
+        for step, score in enumerate(fold_scores(_suggest(trial, job.parameters), features, targets, job.evaluation_folds)):
+            trial.report(score, step)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+        return score
+
+    def report(study, trial):
+        if trial.state in finished_states:
+            progress.put({
+                "job_id": job.job_id,
+                "trial": trial.number,
+                "pruned": trial.state == optuna.trial.TrialState.PRUNED,
+                "value": trial.value,
+                "parameters": trial.params
+            })
+        if cancel.is_set():
+            study.stop()
+
+    try:
+        finished = len(study.get_trials(deepcopy=False, states=finished_states))
+        if finished < job.budget and not cancel.is_set():
+            study.optimize(
+                objective,
+                n_trials=job.budget - finished,
+                callbacks=[optuna.study.MaxTrialsCallback(job.budget, states=finished_states), report]
+            )
+    finally:
+        del features, targets, arrays
+        _close_shared(shm)
+
+    trials = study.get_trials(deepcopy=False, states=finished_states)
+    completed = [trial for trial in trials if trial.state == optuna.trial.TrialState.COMPLETE]
+    best = max(completed, key=lambda trial: trial.value) if completed else None
+    return {
+        "best_value": best.value if best else None,
+        "best_parameters": best.params if best else {},
+        "iterations": len(trials),
+        "trials_pruned": len(trials) - len(completed),
+        "converged": len(trials) >= job.budget
+    }
+
+
+def _run_evolution_worker(job: SearchJob, handle: SharedArrays, progress, cancel) -> Dict[str, Any]:
+    """Worker entry point: differential evolution, resuming from the study's checkpoint if present"""
+    np.random.seed()
+    checkpoint_path = Path(job.storage_dir) / f"{job.study_name}.de.json"
+    checkpoint = json.loads(checkpoint_path.read_text()) if checkpoint_path.exists() else {}
+    generations = checkpoint.get("generations", 0)
+    best = {"value": checkpoint.get("best_value", -math.inf), "x": checkpoint.get("best_x")}
+
+    numeric = [parameter for parameter in job.parameters if parameter.parameter_type in ("float", "int")]
+
+    def to_parameters(x) -> Dict[str, Any]:
+        # Categorical parameters stay at their current values
+        parameters = {parameter.name: parameter.current_value for parameter in job.parameters}
+        for parameter, value in zip(numeric, x):
+            parameters[parameter.name] = int(round(value)) if parameter.parameter_type == "int" else float(value)
+        return parameters
+
+    if generations >= job.budget or cancel.is_set():
+        return {
+            "best_value": best["value"] if best["x"] is not None else None,
+            "best_parameters": to_parameters(best["x"]) if best["x"] is not None else {},
+            "iterations": generations,
+            "converged": checkpoint.get("converged", False)
+        }
+
+    shm, arrays = handle.attach()
+    features, targets = arrays["features"], arrays["targets"]
+
+    def objective(x) -> float:
+        performance = evaluate_parameter_set(to_parameters(x), features, targets)
+        if performance > best["value"]:
+            best["value"], best["x"] = float(performance), [float(value) for value in x]
+        return -performance  # Differential evolution minimizes
+
+    def report_best():
+        progress.put({
+            "job_id": job.job_id,
+            "generation": generations,
+            "value": best["value"],
+            "parameters": to_parameters(best["x"])
+        })
+
+    def checkpoint_generation(xk, convergence=None) -> bool:
+        nonlocal generations
+        generations += 1
+        checkpoint_path.write_text(json.dumps({"generations": generations, "best_value": best["value"], "best_x": best["x"]}))
+        report_best()
+        return cancel.is_set()  # True stops the search
+
+    try:
+        result = differential_evolution(
+            objective,
+            [parameter.bounds for parameter in numeric],
+            maxiter=job.budget - generations,
+            popsize=15,
+            seed=42 + generations,
+            x0=best["x"],
+            callback=checkpoint_generation,
+            polish=False  # Every evaluation happens inside a generation, so the last report is the best
+        )
+    finally:
+        del features, targets, arrays
+        _close_shared(shm)
+    report_best()  # Evaluations after the last callback can still have improved the best
+
+    converged = bool(result.success) and not cancel.is_set()
+    checkpoint_path.write_text(json.dumps({
+        "generations": generations, "best_value": best["value"], "best_x": best["x"], "converged": converged
+    }))
+    return {
+        "best_value": best["value"],
+        "best_parameters": to_parameters(best["x"]),
+        "iterations": generations,
+        "converged": converged
+    }
+
+
+@dataclass
+class OptimizationJob:
+    """Parent-side state of one submitted search"""
+    job: SearchJob
+    shm: SharedMemory
+    cancel_event: Any
+    status: JobStatus = JobStatus.QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    trials_completed: int = 0
+    trials_pruned: int = 0
+    best_value: Optional[float] = None
+    best_parameters: Dict[str, Any] = field(default_factory=dict)
+    history: List[Dict[str, Any]] = field(default_factory=list)  # Each improvement of the best value
+    outcome: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    exception: Optional[BaseException] = None
+    task: Optional[asyncio.Task] = None
+
+
+class OptimizationJobManager:
+    """
+    Submit, inspect, cancel and follow parameter searches running on a worker pool. Workers report
+    finished trials (or generations) on a managed queue; the best value so far is folded in whenever
+    a job's status or progress stream is read.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, trial_workers: int = 2, storage_dir: Optional[str] = None):
+        self.max_workers = max_workers or mp.cpu_count()
+        self.trial_workers = trial_workers
+        self.storage_dir = Path(storage_dir or os.getenv("OPTIMIZATION_STUDY_DIR", "data/optimization_studies"))
+        self.jobs: Dict[str, OptimizationJob] = {}
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._progress = None
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """Get the worker pool and progress queue, starting them on first use"""
+        if self._process_pool is None:
+            self._manager = mp.Manager()
+            self._progress = self._manager.Queue()
+            self._process_pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            logger.info(f"Started optimization worker pool with {self.max_workers} workers")
+        return self._process_pool
+
+    def submit(
+        self,
+        algorithm: str,
+        parameters: List[SearchParameter],
+        features: np.ndarray,
+        targets: np.ndarray,
+        budget: int,
+        study_prefix: str = "study",
+        evaluation_folds: int = 4
+    ) -> str:
+        """
+        Start a search and return its job id. The study is named after `study_prefix` and a digest
+        of the search space and data, so resubmitting an interrupted search resumes its study.
+        """
+        if algorithm == BAYESIAN_OPTIMIZATION:
+            if optuna is None:
+                raise ValueError("Bayesian optimization requires optuna to be installed")
+            worker, workers = _run_bayesian_worker, max(1, min(self.trial_workers, budget))
+        elif algorithm == GENETIC_ALGORITHM:
+            worker, workers = _run_evolution_worker, 1
+        else:
+            raise ValueError(f"Unsupported optimization algorithm: {algorithm}")
+
+        features = np.asarray(features, dtype=np.float64)
+        targets = np.asarray(targets, dtype=np.float64)
+        digest = hashlib.sha1(repr((algorithm, parameters, budget, evaluation_folds)).encode())
+        digest.update(features.tobytes())
+        digest.update(targets.tobytes())
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_process_pool()
+        job = SearchJob(
+            job_id=str(uuid.uuid4()),
+            algorithm=algorithm,
+            study_name=f"{study_prefix}-{algorithm}-{digest.hexdigest()[:12]}",
+            storage_dir=str(self.storage_dir),
+            parameters=list(parameters),
+            budget=budget,
+            evaluation_folds=evaluation_folds
+        )
+        shm, handle = SharedArrays.publish({"features": features, "targets": targets})
+        record = OptimizationJob(job=job, shm=shm, cancel_event=self._manager.Event())
+        futures = [
+            loop.run_in_executor(executor, worker, job, handle, self._progress, record.cancel_event)
+            for _ in range(workers)
+        ]
+        record.status = JobStatus.RUNNING
+        record.task = asyncio.create_task(self._watch(record, futures))
+        self.jobs[job.job_id] = record
+        logger.info(f"Submitted {algorithm} job {job.job_id} for study {job.study_name} on {workers} workers")
+        return job.job_id
+
+    async def _watch(self, record: OptimizationJob, futures: List[asyncio.Future]):
+        """Wait for a job's workers, then merge their outcomes and release the shared block"""
+        try:
+            outcomes = await asyncio.gather(*futures, return_exceptions=True)
+        finally:
+            record.shm.close()
+            record.shm.unlink()
+        self._drain_progress()
+        record.finished_at = time.time()
+
+        failures = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        if failures:
+            record.status = JobStatus.FAILED
+            record.exception = failures[0]
+            record.error = str(failures[0])
+            logger.error(f"Optimization job {record.job.job_id} failed: {record.error}")
+            return
+
+        finished = [outcome for outcome in outcomes if outcome["best_value"] is not None]
+        best = max(finished, key=lambda outcome: outcome["best_value"]) if finished else outcomes[0]
+        record.outcome = {
+            **best,
+            "iterations": max(outcome["iterations"] for outcome in outcomes),
+            "trials_pruned": max(outcome.get("trials_pruned", 0) for outcome in outcomes),
+            "converged": all(outcome["converged"] for outcome in outcomes),
+            "study_name": record.job.study_name
+        }
+        if best["best_value"] is not None:
+            self._record_best(record, best["best_value"], best["best_parameters"])
+        cancelled = record.cancel_event.is_set() and not record.outcome["converged"]
+        record.status = JobStatus.CANCELLED if cancelled else JobStatus.COMPLETED
+
+    def _drain_progress(self):
+        """Fold queued worker reports into their jobs"""
+        if self._progress is None:
+            return
+        while True:
+            try:
+                update = self._progress.get_nowait()
+            except (queue.Empty, OSError, EOFError):
+                return
+            record = self.jobs.get(update["job_id"])
+            if record is None:
+                continue
+            if "trial" in update:
+                record.trials_completed += 1
+                record.trials_pruned += update["pruned"]
+            else:
+                record.trials_completed = update["generation"]
+            if update["value"] is not None:
+                self._record_best(record, update["value"], update["parameters"])
+
+    @staticmethod
+    def _record_best(record: OptimizationJob, value: float, parameters: Dict[str, Any]):
+        """Keep an improvement of the job's best value and add it to the history stream_best follows"""
+        if record.best_value is not None and value <= record.best_value:
+            return
+        record.best_value, record.best_parameters = value, parameters
+        record.history.append({
+            "value": value,
+            "parameters": parameters,
+            "iteration": record.trials_completed,
+            "time": time.time()
+        })
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        record = self.jobs.get(job_id)
+        if record is None:
+            return None
+        self._drain_progress()
+        end = record.finished_at or time.time()
+        return {
+            "job_id": job_id,
+            "algorithm": record.job.algorithm,
+            "study_name": record.job.study_name,
+            "status": record.status.value,
+            "budget": record.job.budget,
+            "trials_completed": record.trials_completed,
+            "trials_pruned": record.trials_pruned,
+            "best_value": record.best_value,
+            "best_parameters": record.best_parameters,
+            "elapsed_seconds": round(end - record.submitted_at, 3),
+            "error": record.error
+        }
+
+    def cancel(self, job_id: str) -> bool:
+        """Ask a job's workers to stop after their current trial; the best result so far is kept"""
+        record = self.jobs.get(job_id)
+        if record is None or record.status != JobStatus.RUNNING:
+            return False
+        record.cancel_event.set()
+        logger.info(f"Cancelling optimization job {job_id}")
+        return True
+
+    async def result(self, job_id: str) -> Dict[str, Any]:
+        """Wait for a job and return its merged outcome; a cancelled job returns its best so far"""
+        record = self.jobs[job_id]
+        await asyncio.shield(record.task)
+        if record.status == JobStatus.FAILED:
+            raise record.exception
+        if record.outcome["best_value"] is None:
+            raise ValueError(f"Optimization job {job_id} was cancelled before any trial completed")
+        return record.outcome
+
+    async def stream_best(self, job_id: str, poll_interval: float = 0.5) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield each improvement of a job's best value until the job finishes"""
+        record = self.jobs[job_id]
+        sent = 0
+        while True:
+            done = record.task.done()
+            self._drain_progress()
+            while sent < len(record.history):
+                yield record.history[sent]
+                sent += 1
+            if done:
+                return
+            await asyncio.wait([record.task], timeout=poll_interval)
+
+    async def shutdown(self):
+        """Cancel running jobs and stop the worker pool"""
+        for record in self.jobs.values():
+            if record.status == JobStatus.RUNNING:
+                record.cancel_event.set()
+        tasks = [record.task for record in self.jobs.values() if record.task is not None]
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+            self._manager.shutdown()
+            self._manager = self._progress = None
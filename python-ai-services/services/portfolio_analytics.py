@@ -0,0 +1,205 @@
+"""
+Portfolio Analytics Kernel
+Vectorized per-series and cross-series metrics over a (periods x series) price matrix
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+@dataclass
+class SeriesAnalytics:
+    """
+    Metrics for every column of a price matrix, as fractions (not percentages).
+    Per-series arrays have one entry per column; cross-series matrices are (series x series).
+    """
+    total_return: np.ndarray
+    annualized_return: np.ndarray
+    volatility: np.ndarray              # Annualized standard deviation of period returns
+    sharpe_ratio: np.ndarray            # Per-period excess return over per-period volatility
+    max_drawdown: np.ndarray
+    calmar_ratio: np.ndarray
+    win_rate: np.ndarray
+    profit_factor: np.ndarray
+    var_95: np.ndarray
+    var_99: np.ndarray
+    observations: np.ndarray            # Number of valid returns per series
+    covariance: np.ndarray              # Of period returns
+    correlation: np.ndarray             # Of period returns
+    rolling_volatility: Optional[np.ndarray] = None  # (periods - window) x series, annualized
+    rolling_sharpe: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.total_return)
+
+
+def period_returns(prices: np.ndarray) -> np.ndarray:
+    """Simple returns down each column; NaN where the previous price is zero or missing"""
+    prices = np.asarray(prices, dtype=np.float64)
+    previous = prices[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = prices[1:] / previous - 1
+    returns[previous == 0] = np.nan
+    return returns
+
+
+def correlation_matrix(matrix: np.ndarray) -> np.ndarray:
+    """
+    Pearson correlation between the columns of a matrix in one BLAS call.
+    Missing values contribute no deviation; constant columns correlate 0 with everything but themselves.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    deviations = matrix - np.nanmean(matrix, axis=0)
+    deviations[np.isnan(deviations)] = 0.0
+    scatter = deviations.T @ deviations
+    norms = np.sqrt(np.diag(scatter))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = scatter / np.outer(norms, norms)
+    correlation[~np.isfinite(correlation)] = 0.0
+    np.fill_diagonal(correlation, 1.0)
+    return correlation
+
+
+def max_drawdowns(prices: np.ndarray) -> np.ndarray:
+    """Largest peak-to-trough decline of each column"""
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(prices) < 2:
+        return np.zeros(prices.shape[1])
+    peaks = np.fmax.accumulate(prices, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdowns = (peaks - prices) / peaks
+    drawdowns[~np.isfinite(drawdowns)] = 0.0
+    return np.maximum(drawdowns.max(axis=0), 0.0)
+
+
+def historical_var(returns: np.ndarray, counts: np.ndarray, confidence: float) -> np.ndarray:
+    """Empirical VaR: the int((1 - confidence) * n)-th smallest valid return of each column"""
+    sorted_returns = np.sort(returns, axis=0)  # NaNs sort to the end
+    index = ((1 - confidence) * counts).astype(np.int64)
+    valid = index < counts
+    var = np.zeros(returns.shape[1])
+    columns = np.nonzero(valid)[0]
+    var[columns] = sorted_returns[index[columns], columns]
+    return var
+
+
+def rolling_moments(returns: np.ndarray, window: int):
+    """Rolling mean and sample standard deviation of each column from cumulative sums"""
+    filled = np.nan_to_num(returns)
+    counts = np.cumsum(~np.isnan(returns), axis=0, dtype=np.float64)
+    sums = np.cumsum(filled, axis=0)
+    squares = np.cumsum(filled * filled, axis=0)
+    for cumulative in (counts, sums, squares):
+        cumulative[window:] = cumulative[window:] - cumulative[:-window]
+    counts, sums, squares = counts[window - 1:], sums[window - 1:], squares[window - 1:]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = sums / counts
+        variance = (squares - sums * mean) / (counts - 1)
+    variance[~np.isfinite(variance) | (variance < 0)] = 0.0
+    return np.nan_to_num(mean), np.sqrt(variance)
+
+
+def compute_series_analytics(
+    prices: np.ndarray,
+    risk_free_rate: float = 0.05,
+    periods_per_year: int = 252,
+    rolling_window: Optional[int] = None
+) -> SeriesAnalytics:
+    """
+    Compute performance, risk and cross-series metrics for every column of `prices` in one pass.
+    A 1-D input is treated as a single series. Columns may contain NaN for missing prices.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.ndim == 1:
+        prices = prices[:, None]
+    if len(prices) < 2:
+        raise ValueError("At least two price observations are required")
+
+    returns = period_returns(prices)
+    valid = ~np.isnan(returns)
+    counts = valid.sum(axis=0)
+    filled = np.where(valid, returns, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(counts > 0, filled.sum(axis=0) / counts, 0.0)
+        deviations = np.where(valid, returns - mean, 0.0)
+        variance = np.where(counts > 1, (deviations * deviations).sum(axis=0) / (counts - 1), 0.0)
+        volatility = np.sqrt(variance)
+        sharpe = np.where(volatility > 0, (mean - risk_free_rate / periods_per_year) / volatility, 0.0)
+
+        # First and last observed price per column, so NaN-padded series of different lengths line up
+        observed = ~np.isnan(prices)
+        columns = np.arange(prices.shape[1])
+        first = observed.argmax(axis=0)
+        last = len(prices) - 1 - observed[::-1].argmax(axis=0)
+        growth = prices[last, columns] / prices[first, columns]
+        periods = np.maximum(last - first, 1)
+        total_return = np.nan_to_num(growth - 1)
+        annualized_return = np.nan_to_num(np.power(growth, periods_per_year / periods) - 1)
+
+        max_drawdown = max_drawdowns(prices)
+        calmar = np.where(max_drawdown > 0, annualized_return / max_drawdown, 0.0)
+
+        gains = np.where(returns > 0, returns, 0.0).sum(axis=0)
+        losses = -np.where(returns < 0, returns, 0.0).sum(axis=0)
+        win_rate = np.where(counts > 0, (returns > 0).sum(axis=0) / counts, 0.0)
+        profit_factor = np.where(counts == 0, 0.0, np.where(losses > 0, gains / losses, np.inf))
+
+        # Pairwise over the periods both series observed, so ragged NaN-padded columns are
+        # centered on and normalized by their overlap rather than the full length.
+        # overlap_sums[i, j] is the sum of series i's deviations over the periods j observed.
+        observed_returns = valid.astype(np.float64)
+        overlap = observed_returns.T @ observed_returns
+        overlap_sums = deviations.T @ observed_returns
+        overlap_means = overlap_sums / np.maximum(overlap, 1)
+        cross = deviations.T @ deviations - overlap_sums * overlap_means.T
+        squares = (deviations * deviations).T @ observed_returns - overlap_sums * overlap_means
+        covariance = np.where(overlap > 1, cross / (overlap - 1), 0.0)
+        correlation = cross / np.sqrt(squares * squares.T)
+    correlation[~np.isfinite(correlation)] = 0.0
+    np.fill_diagonal(correlation, 1.0)
+
+    rolling_volatility = rolling_sharpe = None
+    if rolling_window and rolling_window > 1 and len(returns) >= rolling_window:
+        rolling_mean, rolling_std = rolling_moments(returns, rolling_window)
+        rolling_volatility = rolling_std * np.sqrt(periods_per_year)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rolling_sharpe = np.where(
+                rolling_std > 0, (rolling_mean - risk_free_rate / periods_per_year) / rolling_std, 0.0
+            )
+
+    return SeriesAnalytics(
+        total_return=total_return,
+        annualized_return=annualized_return,
+        volatility=volatility * np.sqrt(periods_per_year),
+        sharpe_ratio=sharpe,
+        max_drawdown=max_drawdown,
+        calmar_ratio=calmar,
+        win_rate=win_rate,
+        profit_factor=profit_factor,
+        var_95=historical_var(returns, counts, 0.95),
+        var_99=historical_var(returns, counts, 0.99),
+        observations=counts,
+        covariance=covariance,
+        correlation=correlation,
+        rolling_volatility=rolling_volatility,
+        rolling_sharpe=rolling_sharpe
+    )
+
+
+def portfolio_volatility(weights: np.ndarray, covariance: np.ndarray) -> float:
+    """Standard deviation of a weighted portfolio: sqrt(w' Σ w)"""
+    weights = np.asarray(weights, dtype=np.float64)
+    return float(np.sqrt(max(weights @ covariance @ weights, 0.0)))
+
+
+def weighted_average_correlation(weights: np.ndarray, correlation: np.ndarray) -> float:
+    """Average absolute off-diagonal correlation, weighted by w_i * w_j"""
+    weights = np.abs(np.asarray(weights, dtype=np.float64))
+    pair_weights = np.outer(weights, weights)
+    np.fill_diagonal(pair_weights, 0.0)
+    total = pair_weights.sum()
+    return float((pair_weights * np.abs(correlation)).sum() / total) if total > 0 else 0.0
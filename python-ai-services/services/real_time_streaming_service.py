@@ -1,13 +1,18 @@
 """
 Real-time WebSocket Streaming Service
 High-performance real-time market data streaming with AG-UI Protocol v2 integration
+
+Price ticks are published into per-symbol channels (pushed by an upstream feed via publish_tick, or
+by the polling loop). Each client gets its own writer that conflates ticks to at most
+`max_client_update_rate` frames per second per symbol and sends only the fields that changed since
+the client's last frame, with a full keyframe every `keyframe_interval` frames.
 """
 
 import asyncio
 import json
 import websockets
 from typing import Dict, List, Set, Any, Optional, Callable
-from datetime import datetime
+from datetime import datetime, timezone
 from decimal import Decimal
 from loguru import logger
 import weakref
@@ -23,9 +28,26 @@ class WebSocketConnection:
     def __init__(self, websocket, client_id: str):
         self.websocket = websocket
         self.client_id = client_id
-        self.subscriptions: Set[str] = set()
+        self.subscriptions: Set[str] = set()  # "symbol:data_types" keys
+        self.symbols: Set[str] = set()
         self.last_ping = datetime.utcnow()
         self.is_alive = True
+        
+        # Conflation state: symbols with unsent ticks, and the fields this client last saw per symbol
+        self.dirty_symbols: Dict[str, None] = {}
+        self.sent_fields: Dict[str, Dict[str, Any]] = {}
+        self.frames_since_keyframe: Dict[str, int] = {}
+        self.has_updates = asyncio.Event()
+        self.writer_task: Optional[asyncio.Task] = None
+    
+    def mark_dirty(self, symbol: str):
+        self.dirty_symbols[symbol] = None
+        self.has_updates.set()
+    
+    def forget_symbol(self, symbol: str):
+        self.dirty_symbols.pop(symbol, None)
+        self.sent_fields.pop(symbol, None)
+        self.frames_since_keyframe.pop(symbol, None)
     
     async def send_message(self, message: Dict[str, Any]):
         """Send message to client with error handling"""
@@ -51,6 +73,38 @@ class WebSocketConnection:
         finally:
             self.is_alive = False
 
+class SymbolChannel:
+    """Latest published quote for one symbol, plus the bar the ticks currently fall in"""
+    
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.fields: Dict[str, Any] = {}
+        self.sequence = 0
+        self.bar_start: Optional[int] = None
+    
+    def publish(self, fields: Dict[str, Any], bar_start: int) -> bool:
+        """Store the tick; returns True when it opens a new bar (the previous one closed)"""
+        self.fields = fields
+        self.sequence += 1
+        closed = self.bar_start is not None and bar_start > self.bar_start
+        if self.bar_start is None or bar_start > self.bar_start:
+            self.bar_start = bar_start
+        return closed
+
+def price_fields(price_data: PriceData) -> Dict[str, Any]:
+    return {
+        "price": float(price_data.price),
+        "change": float(price_data.change or 0),
+        "change_percent": float(price_data.change_percent or 0),
+        "volume": float(price_data.volume or 0),
+        "bid": float(price_data.bid or 0),
+        "ask": float(price_data.ask or 0),
+        "high_24h": float(price_data.high_24h or 0),
+        "low_24h": float(price_data.low_24h or 0),
+        "provider": price_data.provider.value,
+        "timestamp": price_data.timestamp.isoformat()
+    }
+
 class RealTimeStreamingService:
     """
     Real-time WebSocket Streaming Service
@@ -65,6 +119,12 @@ class RealTimeStreamingService:
         self.server = None
         self.is_running = False
         
+        # Event-driven price path
+        self.channels: Dict[str, SymbolChannel] = {}
+        self.closed_bars: Dict[str, None] = {}  # Symbols whose bar closed since the last signal pass
+        self.bars_closed = asyncio.Event()
+        self.stream_stats = {"ticks": 0, "keyframes": 0, "deltas": 0, "conflated": 0}
+        
         # Event handlers
         self.event_handlers: Dict[str, List[Callable]] = {
             "price_update": [],
@@ -79,7 +139,12 @@ class RealTimeStreamingService:
             "signal_check_interval": 10.0,  # seconds
             "heartbeat_interval": 30.0,    # seconds
             "max_connections": 1000,
-            "max_subscriptions_per_client": 50
+            "max_subscriptions_per_client": 50,
+            "price_source": "poll",          # "poll" quotes every price_update_interval, or "push" via publish_tick
+            "max_client_update_rate": 4.0,  # frames per second per client and symbol
+            "keyframe_interval": 20,        # frames between full keyframes
+            "signal_bar_seconds": 60,       # signals are recomputed when a bar of this length closes
+            "max_concurrent_signal_checks": 8
         }
     
     async def start_server(self, host: str = "localhost", port: int = 8001):
@@ -98,7 +163,8 @@ class RealTimeStreamingService:
             self.is_running = True
             
             # Start background tasks
-            asyncio.create_task(self._price_streaming_loop())
+            if self.stream_config["price_source"] == "poll":
+                asyncio.create_task(self._price_streaming_loop())
             asyncio.create_task(self._signal_monitoring_loop())
             asyncio.create_task(self._heartbeat_loop())
             asyncio.create_task(self._cleanup_loop())
@@ -123,6 +189,7 @@ class RealTimeStreamingService:
             for task in self.active_streams.values():
                 task.cancel()
             self.active_streams.clear()
+            self.bars_closed.set()  # Let the signal loop observe is_running
             
             # Stop server
             if self.server:
@@ -154,6 +221,7 @@ class RealTimeStreamingService:
             # Create connection
             connection = WebSocketConnection(websocket, client_id)
             self.connections[client_id] = connection
+            connection.writer_task = asyncio.create_task(self._client_writer_loop(connection))
             
             logger.info(f"New WebSocket connection: {client_id}")
             
@@ -167,6 +235,10 @@ class RealTimeStreamingService:
                     "update_intervals": {
                         "price": self.stream_config["price_update_interval"],
                         "signals": self.stream_config["signal_check_interval"]
+                    },
+                    "price_frames": {
+                        "max_rate": self.stream_config["max_client_update_rate"],
+                        "keyframe_interval": self.stream_config["keyframe_interval"]
                     }
                 }
             })
@@ -209,6 +281,8 @@ class RealTimeStreamingService:
             await self._handle_ping(connection)
         elif message_type == "get_status":
             await self._handle_get_status(connection)
+        elif message_type == "resync":
+            self._handle_resync(connection, data)
         else:
             await connection.send_message({
                 "type": "error",
@@ -236,11 +310,17 @@ class RealTimeStreamingService:
             for symbol in symbols:
                 subscription_key = f"{symbol}:{':'.join(data_types)}"
                 connection.subscriptions.add(subscription_key)
+                connection.symbols.add(symbol)
                 
                 # Track symbol subscriptions
                 if symbol not in self.symbol_subscriptions:
                     self.symbol_subscriptions[symbol] = set()
                 self.symbol_subscriptions[symbol].add(connection.client_id)
+                
+                # Start the client from a keyframe of the latest known quote
+                connection.forget_symbol(symbol)
+                if symbol in self.channels:
+                    connection.mark_dirty(symbol)
             
             await connection.send_message({
                 "type": "subscription_success",
@@ -269,12 +349,11 @@ class RealTimeStreamingService:
                 subscriptions_to_remove = [sub for sub in connection.subscriptions if sub.startswith(f"{symbol}:")]
                 for sub in subscriptions_to_remove:
                     connection.subscriptions.discard(sub)
+                connection.symbols.discard(symbol)
                 
                 # Remove from symbol subscriptions
-                if symbol in self.symbol_subscriptions:
-                    self.symbol_subscriptions[symbol].discard(connection.client_id)
-                    if not self.symbol_subscriptions[symbol]:
-                        del self.symbol_subscriptions[symbol]
+                self._remove_subscriber(symbol, connection.client_id)
+                connection.forget_symbol(symbol)
             
             await connection.send_message({
                 "type": "unsubscription_success",
@@ -295,6 +374,14 @@ class RealTimeStreamingService:
             "timestamp": datetime.utcnow().isoformat()
         })
     
+    def _handle_resync(self, connection: WebSocketConnection, data: Dict[str, Any]):
+        """Client lost track of a symbol's state: send keyframes on its next frames"""
+        symbols = data.get("symbols") or list(connection.sent_fields.keys())
+        for symbol in symbols:
+            connection.sent_fields.pop(symbol, None)
+            if symbol in self.channels and symbol in connection.symbols:
+                connection.mark_dirty(symbol)
+    
     async def _handle_get_status(self, connection: WebSocketConnection):
         """Handle status request"""
         try:
@@ -316,12 +403,12 @@ class RealTimeStreamingService:
         try:
             if client_id in self.connections:
                 connection = self.connections[client_id]
+                if connection.writer_task and connection.writer_task is not asyncio.current_task():
+                    connection.writer_task.cancel()
                 
                 # Remove from symbol subscriptions
-                for symbol, clients in list(self.symbol_subscriptions.items()):
-                    clients.discard(client_id)
-                    if not clients:
-                        del self.symbol_subscriptions[symbol]
+                for symbol in connection.symbols:
+                    self._remove_subscriber(symbol, client_id)
                 
                 # Remove connection
                 del self.connections[client_id]
@@ -331,6 +418,17 @@ class RealTimeStreamingService:
         except Exception as e:
             logger.error(f"Error cleaning up connection {client_id}: {e}")
     
+    def _remove_subscriber(self, symbol: str, client_id: str):
+        """Drop one client from a symbol; the symbol's channel goes with its last subscriber"""
+        clients = self.symbol_subscriptions.get(symbol)
+        if clients is None:
+            return
+        clients.discard(client_id)
+        if not clients:
+            del self.symbol_subscriptions[symbol]
+            self.channels.pop(symbol, None)
+            self.closed_bars.pop(symbol, None)
+    
     # Background streaming loops
     
     async def _price_streaming_loop(self):
@@ -345,12 +443,11 @@ class RealTimeStreamingService:
                 symbols_to_update = list(self.symbol_subscriptions.keys())
                 
                 if symbols_to_update:
-                    # Get price updates
+                    # Get price updates; client writers send whatever changed
                     quotes = await self.market_data_service.get_multiple_quotes(symbols_to_update)
                     
-                    # Broadcast updates
                     for quote in quotes:
-                        await self._broadcast_price_update(quote)
+                        self.publish_tick(quote)
                 
                 await asyncio.sleep(self.stream_config["price_update_interval"])
                 
@@ -359,30 +456,17 @@ class RealTimeStreamingService:
                 await asyncio.sleep(5)
     
     async def _signal_monitoring_loop(self):
-        """Background loop for monitoring trading signals"""
+        """Recompute signals for subscribed symbols whose bar closed, at most once per signal_check_interval"""
         while self.is_running:
             try:
-                if not self.symbol_subscriptions:
-                    await asyncio.sleep(10)
-                    continue
+                await self.bars_closed.wait()
+                self.bars_closed.clear()
+                if not self.is_running:
+                    break
                 
-                # Check for signals on subscribed symbols
-                symbols_to_check = list(self.symbol_subscriptions.keys())
-                
-                for symbol in symbols_to_check:
-                    try:
-                        signals = await self.market_data_service.generate_trading_signals(symbol)
-                        
-                        for signal in signals:
-                            if signal.confidence >= Decimal("0.6"):  # Only high-confidence signals
-                                await self._broadcast_trading_signal(signal)
-                        
-                        # Small delay between symbols
-                        await asyncio.sleep(0.1)
-                        
-                    except Exception as e:
-                        logger.warning(f"Error checking signals for {symbol}: {e}")
-                        continue
+                symbols_to_check = [symbol for symbol in self.closed_bars if symbol in self.symbol_subscriptions]
+                self.closed_bars.clear()
+                await self._check_signals(symbols_to_check)
                 
                 await asyncio.sleep(self.stream_config["signal_check_interval"])
                 
@@ -390,6 +474,45 @@ class RealTimeStreamingService:
                 logger.error(f"Error in signal monitoring loop: {e}")
                 await asyncio.sleep(10)
     
+    async def _check_signals(self, symbols: List[str]):
+        """Generate and broadcast high-confidence signals for symbols, a bounded number at a time"""
+        semaphore = asyncio.Semaphore(self.stream_config["max_concurrent_signal_checks"])
+        
+        async def check(symbol: str):
+            async with semaphore:
+                try:
+                    signals = await self.market_data_service.generate_trading_signals(symbol)
+                    
+                    for signal in signals:
+                        if signal.confidence >= Decimal("0.6"):  # Only high-confidence signals
+                            await self._broadcast_trading_signal(signal)
+                except Exception as e:
+                    logger.warning(f"Error checking signals for {symbol}: {e}")
+        
+        await asyncio.gather(*(check(symbol) for symbol in symbols))
+    
+    async def _client_writer_loop(self, connection: WebSocketConnection):
+        """Send one conflated frame per dirty symbol, then wait out the client's rate interval"""
+        while connection.is_alive:
+            try:
+                await connection.has_updates.wait()
+                connection.has_updates.clear()
+                
+                symbols = list(connection.dirty_symbols)
+                connection.dirty_symbols.clear()
+                for symbol in symbols:
+                    message = self._price_frame(connection, symbol)
+                    if message is not None and not await connection.send_message(message):
+                        return
+                
+                await asyncio.sleep(1.0 / self.stream_config["max_client_update_rate"])
+                
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in price writer for {connection.client_id}: {e}")
+                await asyncio.sleep(1)
+    
     async def _heartbeat_loop(self):
         """Background loop for heartbeat/ping"""
         while self.is_running:
@@ -449,44 +572,72 @@ class RealTimeStreamingService:
                 logger.error(f"Error in cleanup loop: {e}")
                 await asyncio.sleep(60)
     
-    # Broadcasting methods
+    # Publishing and broadcasting methods
     
-    async def _broadcast_price_update(self, price_data: PriceData):
-        """Broadcast price update to subscribed clients"""
+    def publish_tick(self, price_data: PriceData):
+        """
+        Publish a quote into its symbol's channel (upstream feeds call this in push mode). Subscribed
+        clients are flagged for their next frame and a bar close queues a signal recompute. Quotes for
+        symbols nobody subscribes to are dropped, so channels only exist for subscribed symbols.
+        """
         try:
             symbol = price_data.symbol
-            
             if symbol not in self.symbol_subscriptions:
                 return
-            
-            message = {
-                "type": "price_update",
-                "symbol": symbol,
-                "data": {
-                    "price": float(price_data.price),
-                    "change": float(price_data.change or 0),
-                    "change_percent": float(price_data.change_percent or 0),
-                    "volume": float(price_data.volume or 0),
-                    "bid": float(price_data.bid or 0),
-                    "ask": float(price_data.ask or 0),
-                    "high_24h": float(price_data.high_24h or 0),
-                    "low_24h": float(price_data.low_24h or 0),
-                    "provider": price_data.provider.value,
-                    "timestamp": price_data.timestamp.isoformat()
-                },
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
-            # Send to all subscribed clients
-            client_ids = self.symbol_subscriptions[symbol].copy()
-            for client_id in client_ids:
-                if client_id in self.connections:
-                    connection = self.connections[client_id]
-                    if connection.is_alive:
-                        await connection.send_message(message)
+            channel = self.channels.get(symbol)
+            if channel is None:
+                channel = self.channels[symbol] = SymbolChannel(symbol)
+            
+            timestamp = price_data.timestamp
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            bar_seconds = self.stream_config["signal_bar_seconds"]
+            bar_start = int(timestamp.timestamp() // bar_seconds) * bar_seconds
+            
+            self.stream_stats["ticks"] += 1
+            if channel.publish(price_fields(price_data), bar_start):
+                self.closed_bars[symbol] = None
+                self.bars_closed.set()
+            
+            for client_id in self.symbol_subscriptions.get(symbol, ()):
+                connection = self.connections.get(client_id)
+                if connection is not None and connection.is_alive:
+                    if symbol in connection.dirty_symbols:
+                        self.stream_stats["conflated"] += 1
+                    connection.mark_dirty(symbol)
             
         except Exception as e:
-            logger.error(f"Error broadcasting price update for {price_data.symbol}: {e}")
+            logger.error(f"Error publishing tick for {price_data.symbol}: {e}")
+    
+    def _price_frame(self, connection: WebSocketConnection, symbol: str) -> Optional[Dict[str, Any]]:
+        """Keyframe (all fields) or delta (changed fields only) against what this client last saw"""
+        channel = self.channels.get(symbol)
+        if channel is None or symbol not in connection.symbols:
+            return None
+        
+        previous = connection.sent_fields.get(symbol)
+        frames = connection.frames_since_keyframe.get(symbol, 0)
+        if previous is None or frames + 1 >= self.stream_config["keyframe_interval"]:
+            frame_type, data = "key", channel.fields
+            connection.frames_since_keyframe[symbol] = 0
+            self.stream_stats["keyframes"] += 1
+        else:
+            data = {field: value for field, value in channel.fields.items() if previous.get(field) != value}
+            if not data:
+                return None
+            frame_type = "delta"
+            connection.frames_since_keyframe[symbol] = frames + 1
+            self.stream_stats["deltas"] += 1
+        connection.sent_fields[symbol] = channel.fields
+        
+        return {
+            "type": "price_update",
+            "symbol": symbol,
+            "frame": frame_type,
+            "seq": channel.sequence,
+            "data": data,
+            "timestamp": datetime.utcnow().isoformat()
+        }
     
     async def _broadcast_trading_signal(self, signal: TradingSignal):
         """Broadcast trading signal to subscribed clients"""
@@ -560,6 +711,9 @@ class RealTimeStreamingService:
             "subscribed_symbols": len(self.symbol_subscriptions),
             "total_subscriptions": sum(len(clients) for clients in self.symbol_subscriptions.values()),
             "server_running": self.is_running,
+            "price_source": self.stream_config["price_source"],
+            "channels": len(self.channels),
+            "price_frames": dict(self.stream_stats),
             "timestamp": datetime.utcnow().isoformat()
         }
     
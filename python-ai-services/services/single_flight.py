@@ -0,0 +1,54 @@
+"""
+Single-flight execution of concurrent identical calls.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Runs one call per key for every concurrent caller with that key.
+
+    The call runs in its own task, which every caller (the first one included) awaits
+    through asyncio.shield. A cancelled caller therefore never cancels the shared work or
+    strands the other callers; the task itself is cancelled only once every caller has
+    gone. Results and exceptions reach every caller and nothing is kept once the task is done.
+    """
+
+    def __init__(self):
+        self.inflight: Dict[Hashable, asyncio.Task] = {}
+        self._callers: Dict[asyncio.Task, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.inflight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.inflight
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Result of call() shared under key, and whether this caller joined a call already in flight"""
+        task = self.inflight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self.inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        self._callers[task] = self._callers.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task), shared
+        finally:
+            self._callers[task] -= 1
+            if self._callers[task] == 0:
+                del self._callers[task]
+                if not task.done():
+                    # Nobody is waiting for the result any more; later callers start afresh
+                    self._finish(key, task)
+                    task.cancel()
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        if task.done() and not task.cancelled():
+            task.exception()  # Mark retrieved; callers that were waiting still see it
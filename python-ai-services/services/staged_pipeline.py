@@ -0,0 +1,224 @@
+"""
+Staged Async Pipeline
+Bounded asyncio queues between stages, a configurable number of workers per stage that process
+micro-batches, and per-stage throughput/latency metrics. A full first queue blocks submit(), which
+is the backpressure signal to producers.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# A stage handler takes a batch and returns (outputs, [(input item, error message)]), with one output per
+# input that did not fail, in input order
+StageHandler = Callable[[List[Any]], Awaitable[Tuple[List[Any], List[Tuple[Any, str]]]]]
+
+
+@dataclass
+class PipelineStage:
+    """One stage: its batch handler, worker count and maximum batch size"""
+    name: str
+    handler: StageHandler
+    parallelism: int = 1
+    batch_size: int = 100
+
+
+@dataclass
+class _Envelope:
+    item: Any
+    done: asyncio.Future
+    submitted_at: float
+    stage_entered_at: float
+
+
+@dataclass
+class _StageStats:
+    records_in: int = 0
+    records_out: int = 0
+    errors: int = 0
+    batches: int = 0
+    busy_seconds: float = 0.0
+    active_workers: int = 0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=2048))  # Queue wait + service, per record
+    completions: Deque[Tuple[float, int]] = field(default_factory=lambda: deque(maxlen=512))  # (time, records) per batch
+
+
+class StagedPipeline:
+    """
+    Runs items through `stages` in order. submit() returns a future resolving to (item, None) when the
+    last stage emits it, or (item, error) when a stage rejects it or its handler raises.
+    """
+
+    def __init__(self, stages: List[PipelineStage], queue_size: int = 1000, throughput_window: float = 60.0):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.throughput_window = throughput_window
+        self.queues: List[asyncio.Queue] = []
+        self.workers: List[asyncio.Task] = []
+        self.stats: Dict[str, _StageStats] = {stage.name: _StageStats() for stage in stages}
+        self.started_at: Optional[float] = None
+        self.end_to_end: Deque[float] = deque(maxlen=2048)
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self.workers)
+
+    def start(self):
+        if self.is_running:
+            return
+        self.queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        self.started_at = time.monotonic()
+        for index, stage in enumerate(self.stages):
+            for worker in range(max(1, stage.parallelism)):
+                self.workers.append(asyncio.create_task(
+                    self._worker(index), name=f"pipeline-{stage.name}-{worker}"
+                ))
+
+    async def stop(self):
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def submit(self, item: Any) -> asyncio.Future:
+        """Enqueue an item, waiting while the first stage's queue is full"""
+        self.start()
+        now = time.monotonic()
+        envelope = _Envelope(item, asyncio.get_running_loop().create_future(), now, now)
+        await self.queues[0].put(envelope)
+        return envelope.done
+
+    async def run(self, items: List[Any]) -> List[Tuple[Any, Optional[str]]]:
+        """Submit items (with backpressure) and wait for all of them; results keep input order"""
+        futures = [await self.submit(item) for item in items]
+        return list(await asyncio.gather(*futures))
+
+    async def _take_batch(self, queue: asyncio.Queue, batch_size: int) -> List[_Envelope]:
+        batch = [await queue.get()]
+        while len(batch) < batch_size:
+            try:
+                batch.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _worker(self, index: int):
+        stage = self.stages[index]
+        queue = self.queues[index]
+        while True:
+            batch = await self._take_batch(queue, stage.batch_size)
+            forwarded: Set[int] = set()
+            try:
+                await self._process_batch(index, batch, forwarded)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep the worker alive and settle every envelope this stage still owns
+                logger.error(f"Pipeline stage {stage.name} could not route a batch of {len(batch)}: {e}")
+                for envelope in batch:
+                    if id(envelope) not in forwarded and not envelope.done.done():
+                        self.stats[stage.name].errors += 1
+                        envelope.done.set_result((envelope.item, f"Stage {stage.name} failed: {e}"))
+
+    async def _process_batch(self, index: int, batch: List[_Envelope], forwarded: Set[int]):
+        """Run one batch through a stage and route each envelope onward; ids of forwarded envelopes go in `forwarded`"""
+        stage = self.stages[index]
+        stats = self.stats[stage.name]
+        queue = self.queues[index]
+        next_queue = self.queues[index + 1] if index + 1 < len(self.queues) else None
+
+        stats.records_in += len(batch)
+        stats.active_workers += 1
+        started = time.monotonic()
+        try:
+            outputs, failures = await stage.handler([envelope.item for envelope in batch])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Pipeline stage {stage.name} failed on a batch of {len(batch)}: {e}")
+            outputs, failures = [], [(envelope.item, str(e)) for envelope in batch]
+        finally:
+            stats.active_workers -= 1
+            for _ in batch:
+                queue.task_done()
+
+        finished = time.monotonic()
+        stats.batches += 1
+        stats.busy_seconds += finished - started
+        stats.completions.append((finished, len(batch)))
+        stats.latencies.extend(finished - envelope.stage_entered_at for envelope in batch)
+
+        # Failures are matched to inputs by identity; outputs by position among the rest
+        envelopes = {id(envelope.item): envelope for envelope in batch}
+        failed_ids = set()
+        for item, error in failures:
+            envelope = envelopes.get(id(item))
+            if envelope is not None and not envelope.done.done():
+                failed_ids.add(id(item))
+                envelope.done.set_result((item, error))
+        stats.errors += len(failed_ids)
+
+        remaining = [envelope for envelope in batch if id(envelope.item) not in failed_ids]
+        for envelope in remaining[len(outputs):]:
+            stats.errors += 1
+            envelope.done.set_result((envelope.item, f"Stage {stage.name} produced no output"))
+        stats.records_out += len(outputs)
+        for envelope, output in zip(remaining, outputs):
+            envelope.item = output
+            envelope.stage_entered_at = finished
+            if next_queue is None:
+                self.end_to_end.append(finished - envelope.submitted_at)
+                if not envelope.done.done():
+                    envelope.done.set_result((output, None))
+            else:
+                await next_queue.put(envelope)  # Blocks while the next stage is saturated
+                forwarded.add(id(envelope))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        elapsed = max(now - self.started_at, 1e-9) if self.started_at else None
+        stages = {}
+        for index, stage in enumerate(self.stages):
+            stats = self.stats[stage.name]
+            window_start = now - self.throughput_window
+            recent = sum(count for finished, count in stats.completions if finished >= window_start)
+            stages[stage.name] = {
+                "parallelism": stage.parallelism,
+                "batch_size": stage.batch_size,
+                "queue_depth": self.queues[index].qsize() if self.queues else 0,
+                "active_workers": stats.active_workers,
+                "records_in": stats.records_in,
+                "records_out": stats.records_out,
+                "errors": stats.errors,
+                "batches": stats.batches,
+                "throughput_per_second": round(recent / min(self.throughput_window, elapsed), 2) if elapsed else 0.0,
+                "utilization": round(stats.busy_seconds / (elapsed * stage.parallelism), 4) if elapsed else 0.0,
+                "latency_ms": self._latency_summary(stats.latencies)
+            }
+        return {
+            "running": self.is_running,
+            "queue_size": self.queue_size,
+            "queued": sum(queue.qsize() for queue in self.queues),
+            "end_to_end_latency_ms": self._latency_summary(self.end_to_end),
+            "stages": stages
+        }
+
+    @staticmethod
+    def _latency_summary(samples: Deque[float]) -> Dict[str, float]:
+        if not samples:
+            return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+        latencies = np.fromiter(samples, dtype=np.float64) * 1000
+        return {
+            "p50": round(float(np.percentile(latencies, 50)), 3),
+            "p95": round(float(np.percentile(latencies, 95)), 3),
+            "max": round(float(latencies.max()), 3)
+        }
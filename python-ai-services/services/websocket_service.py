@@ -5,7 +5,8 @@ Provides real-time data streaming for the dashboard
 
 import asyncio
 import json
-from typing import Dict, List, Optional, Any, Set, Callable
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Set, Callable, Union
 from datetime import datetime, timedelta
 import uuid
 from dataclasses import dataclass, asdict
@@ -15,6 +16,16 @@ from fastapi import WebSocket, WebSocketDisconnect
 from ..core.service_registry import service_registry
 from ..core.logging_config import logger
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 
 class EventType(Enum):
     """WebSocket event types"""
@@ -66,6 +77,30 @@ class EventType(Enum):
     ERROR = "error"
 
 
+# Event types whose latest message supersedes earlier ones, so a slow client may skip to it.
+# Every other event (executions, order status, alerts, decisions, transactions) is discrete
+# and is delivered in order without coalescing.
+COALESCED_EVENT_TYPES = frozenset(event.value for event in (
+    EventType.PRICE_UPDATE, EventType.MARKET_SUMMARY, EventType.ORDER_BOOK_UPDATE,
+    EventType.PORTFOLIO_UPDATE, EventType.BALANCE_UPDATE, EventType.PNL_UPDATE,
+    EventType.AGENT_STATUS, EventType.GOAL_PROGRESS, EventType.FARM_STATUS,
+    EventType.VAULT_BALANCE, EventType.RISK_METRICS, EventType.SYSTEM_STATUS,
+))
+
+# Payload fields naming the one entity a snapshot describes; snapshots of different entities
+# never replace each other. Payloads without any of them are whole snapshots of the event type.
+COALESCE_ENTITY_FIELDS = ("symbol", "agent_id", "vault_id", "farm_id", "goal_id")
+
+
+def coalesce_key(message: "WebSocketMessage") -> str:
+    """Key under which a snapshot message supersedes earlier ones: event type plus entity, if any"""
+    for field_name in COALESCE_ENTITY_FIELDS:
+        entity = message.data.get(field_name) if isinstance(message.data, dict) else None
+        if entity is not None:
+            return f"{message.event_type}:{field_name}={entity}"
+    return message.event_type
+
+
 @dataclass
 class WebSocketMessage:
     """WebSocket message structure"""
@@ -79,22 +114,148 @@ class WebSocketMessage:
             self.id = str(uuid.uuid4())
 
 
+def available_encodings() -> List[str]:
+    """Wire encodings a client can negotiate"""
+    return ["json", "msgpack"] if msgpack is not None else ["json"]
+
+
+def encode_message(message: WebSocketMessage, encoding: str = "json") -> Union[str, bytes]:
+    """Encode a message for the wire: text for json, binary for msgpack"""
+    payload = asdict(message)
+    if encoding == "msgpack":
+        return msgpack.packb(payload, default=str, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(payload, default=str)
+
+
+class ConnectionSendBuffer:
+    """
+    Outbound frames for one connection, drained by a dedicated sender task.
+    Snapshot frames (COALESCED_EVENT_TYPES) are keyed by event type and entity
+    (coalesce_key), so while a slow client is still sending, a newer snapshot of the
+    same entity replaces the pending one and moves to the back of the queue instead
+    of queueing behind it. Discrete events and direct messages get unique keys and are
+    never coalesced. Once max_pending frames are waiting the oldest snapshot is dropped;
+    if only discrete frames are pending the client cannot keep up without losing
+    events, so it is disconnected instead.
+    """
+    
+    def __init__(self, connection_id: str, websocket: WebSocket, encoding: str = "json", max_pending: int = 256):
+        self.connection_id = connection_id
+        self.websocket = websocket
+        self.encoding = encoding
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[str, Union[str, bytes]]" = OrderedDict()
+        self._snapshot_keys: Set[str] = set()
+        self._wakeup = asyncio.Event()
+        self._on_error: Optional[Callable[[str], None]] = None
+        self.task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.overflowed = False
+    
+    def start(self, on_error: Callable[[str], None]):
+        self._on_error = on_error
+        self.task = asyncio.create_task(self._run(on_error))
+    
+    def enqueue(self, key: str, frame: Union[str, bytes], coalesce: bool = False):
+        """Queue a frame; with coalesce, a pending frame under the same key is replaced"""
+        if self.overflowed:
+            return
+        if coalesce and key in self._pending:
+            self._pending[key] = frame
+            self._pending.move_to_end(key)  # Delivered in the order of the latest updates
+            self.coalesced += 1
+            return
+        
+        if len(self._pending) >= self.max_pending and not self._drop_oldest_snapshot():
+            self._overflow()
+            return
+        self._pending[key] = frame
+        if coalesce:
+            self._snapshot_keys.add(key)
+        self._wakeup.set()
+    
+    def _drop_oldest_snapshot(self) -> bool:
+        key = next((key for key in self._pending if key in self._snapshot_keys), None)
+        if key is None:
+            return False
+        del self._pending[key]
+        self._snapshot_keys.discard(key)
+        self.dropped += 1
+        return True
+    
+    def _overflow(self):
+        logger.warning(
+            f"Connection {self.connection_id} has {len(self._pending)} undelivered events pending; disconnecting"
+        )
+        self.overflowed = True
+        self._pending.clear()
+        self._snapshot_keys.clear()
+        if self._on_error is not None:
+            self._on_error(self.connection_id)
+        asyncio.ensure_future(self._close_websocket())
+    
+    async def _close_websocket(self):
+        try:
+            await self.websocket.close(code=1013)  # Try again later
+        except Exception as e:
+            logger.debug(f"Error closing overflowed connection {self.connection_id}: {e}")
+    
+    async def _run(self, on_error: Callable[[str], None]):
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            
+            key, frame = self._pending.popitem(last=False)
+            self._snapshot_keys.discard(key)
+            try:
+                if isinstance(frame, bytes):
+                    await self.websocket.send_bytes(frame)
+                else:
+                    await self.websocket.send_text(frame)
+                self.sent += 1
+            except Exception as e:
+                logger.error(f"Error sending to connection {self.connection_id}: {e}")
+                on_error(self.connection_id)
+                return
+    
+    def close(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+    
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+
 class ConnectionManager:
     """Manages WebSocket connections"""
     
-    def __init__(self):
+    def __init__(self, max_pending_per_connection: int = 256):
         self.active_connections: Dict[str, WebSocket] = {}
         self.subscriptions: Dict[str, Set[str]] = {}  # connection_id -> event_types
         self.event_subscribers: Dict[str, Set[str]] = {}  # event_type -> connection_ids
+        self.send_buffers: Dict[str, ConnectionSendBuffer] = {}
+        self.max_pending_per_connection = max_pending_per_connection
         
-    async def connect(self, websocket: WebSocket, connection_id: str = None) -> str:
+    async def connect(self, websocket: WebSocket, connection_id: str = None, encoding: str = "json") -> str:
         """Accept and track new WebSocket connection"""
         if connection_id is None:
             connection_id = str(uuid.uuid4())
+        if encoding not in available_encodings():
+            encoding = "json"
             
         await websocket.accept()
         self.active_connections[connection_id] = websocket
         self.subscriptions[connection_id] = set()
+        buffer = ConnectionSendBuffer(connection_id, websocket, encoding, self.max_pending_per_connection)
+        buffer.start(self.disconnect)
+        self.send_buffers[connection_id] = buffer
         
         logger.info(f"WebSocket connection established: {connection_id}")
         
@@ -117,6 +278,9 @@ class ConnectionManager:
                         self.event_subscribers[event_type].discard(connection_id)
                 del self.subscriptions[connection_id]
             
+            buffer = self.send_buffers.pop(connection_id, None)
+            if buffer is not None:
+                buffer.close()
             del self.active_connections[connection_id]
             logger.info(f"WebSocket connection closed: {connection_id}")
     
@@ -149,19 +313,43 @@ class ConnectionManager:
         logger.info(f"Connection {connection_id} unsubscribed from: {event_types}")
         return True
     
+    def set_encoding(self, connection_id: str, encoding: str) -> bool:
+        """Switch the wire encoding used for a connection's subsequent messages"""
+        buffer = self.send_buffers.get(connection_id)
+        if buffer is None or encoding not in available_encodings():
+            return False
+        buffer.encoding = encoding
+        return True
+    
     async def send_to_connection(self, connection_id: str, message: WebSocketMessage):
-        """Send message to specific connection"""
-        if connection_id in self.active_connections:
-            try:
-                websocket = self.active_connections[connection_id]
-                await websocket.send_text(json.dumps(asdict(message)))
-            except Exception as e:
-                logger.error(f"Error sending to connection {connection_id}: {e}")
-                self.disconnect(connection_id)
+        """Queue message for a specific connection"""
+        buffer = self.send_buffers.get(connection_id)
+        if buffer is None:
+            return
+        try:
+            buffer.enqueue(message.id, encode_message(message, buffer.encoding))
+        except Exception as e:
+            logger.error(f"Error encoding message for connection {connection_id}: {e}")
+    
+    def _fan_out(self, connection_ids: List[str], message: WebSocketMessage):
+        """Encode message once per wire encoding and queue the shared frame on each connection"""
+        frames: Dict[str, Union[str, bytes]] = {}
+        coalesce = message.event_type in COALESCED_EVENT_TYPES
+        for connection_id in connection_ids:
+            buffer = self.send_buffers.get(connection_id)
+            if buffer is None:
+                continue
+            frame = frames.get(buffer.encoding)
+            if frame is None:
+                frame = frames[buffer.encoding] = encode_message(message, buffer.encoding)
+            if coalesce:
+                buffer.enqueue(coalesce_key(message), frame, coalesce=True)
+            else:
+                buffer.enqueue(message.id, frame)
     
     async def broadcast_to_subscribers(self, event_type: str, data: Dict[str, Any]):
         """Broadcast message to all subscribers of an event type"""
-        if event_type not in self.event_subscribers:
+        if not self.event_subscribers.get(event_type):
             return
         
         message = WebSocketMessage(
@@ -170,27 +358,20 @@ class ConnectionManager:
             timestamp=datetime.now().isoformat()
         )
         
-        # Send to all subscribers
-        subscribers = list(self.event_subscribers[event_type])
-        tasks = []
-        
-        for connection_id in subscribers:
-            tasks.append(self.send_to_connection(connection_id, message))
-        
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            self._fan_out(list(self.event_subscribers[event_type]), message)
+        except Exception as e:
+            logger.error(f"Error broadcasting {event_type}: {e}")
     
     async def broadcast_to_all(self, message: WebSocketMessage):
         """Broadcast message to all active connections"""
         if not self.active_connections:
             return
         
-        tasks = []
-        for connection_id in list(self.active_connections.keys()):
-            tasks.append(self.send_to_connection(connection_id, message))
-        
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            self._fan_out(list(self.active_connections.keys()), message)
+        except Exception as e:
+            logger.error(f"Error broadcasting {message.event_type}: {e}")
     
     def get_connection_count(self) -> int:
         """Get number of active connections"""
@@ -202,6 +383,16 @@ class ConnectionManager:
         for event_type, subscribers in self.event_subscribers.items():
             stats[event_type] = len(subscribers)
         return stats
+    
+    def get_send_buffer_stats(self) -> Dict[str, int]:
+        """Get outbound frame statistics across connections"""
+        buffers = list(self.send_buffers.values())
+        return {
+            'frames_sent': sum(b.sent for b in buffers),
+            'frames_pending': sum(b.pending for b in buffers),
+            'frames_coalesced': sum(b.coalesced for b in buffers),
+            'frames_dropped': sum(b.dropped for b in buffers)
+        }
 
 
 class WebSocketService:
@@ -238,7 +429,8 @@ class WebSocketService:
     
     async def handle_websocket(self, websocket: WebSocket):
         """Handle WebSocket connection lifecycle"""
-        connection_id = await self.connection_manager.connect(websocket)
+        encoding = websocket.query_params.get("encoding", "json")
+        connection_id = await self.connection_manager.connect(websocket, encoding=encoding)
         
         try:
             while True:
@@ -283,6 +475,17 @@ class WebSocketService:
                 timestamp=datetime.now().isoformat()
             ))
             
+        elif message_type == "set_encoding":
+            encoding = message.get("encoding", "json")
+            # Acknowledge in the current encoding, then switch
+            await self.connection_manager.send_to_connection(connection_id, WebSocketMessage(
+                event_type="encoding_response",
+                data={"encoding": encoding, "available_encodings": available_encodings(),
+                      "success": encoding in available_encodings()},
+                timestamp=datetime.now().isoformat()
+            ))
+            self.connection_manager.set_encoding(connection_id, encoding)
+            
         elif message_type == "ping":
             await self.connection_manager.send_to_connection(connection_id, WebSocketMessage(
                 event_type="pong",
@@ -513,6 +716,7 @@ class WebSocketService:
         return {
             'active_connections': self.connection_manager.get_connection_count(),
             'subscription_stats': self.connection_manager.get_subscription_stats(),
+            'send_buffer_stats': self.connection_manager.get_send_buffer_stats(),
             'active_update_tasks': len([task for task in self.update_tasks.values() if not task.done()]),
             'supported_events': [event.value for event in EventType]
         }
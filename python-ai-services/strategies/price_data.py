@@ -0,0 +1,44 @@
+import pandas as pd
+from datetime import timedelta
+from logging import getLogger
+from typing import Optional
+
+from ..services.bar_store import get_default_bar_store
+
+logger = getLogger(__name__)
+
+def fetch_price_history(
+    obb,
+    symbol: str,
+    start_date: str,
+    end_date: str,
+    data_provider: str = "yfinance",
+    interval: str = "1d"
+) -> Optional[pd.DataFrame]:
+    """
+    OHLCV for [start_date, end_date] (both inclusive, as OpenBB takes them) read through the local
+    bar store, so repeated backtests only ask OpenBB for dates not fetched before. Falls back to a
+    direct OpenBB call when the store is disabled. Returns None if OpenBB returned no data object.
+    """
+    def fetch(symbol, interval, start, end):
+        data_obb = obb.equity.price.historical(
+            symbol=symbol,
+            start_date=start.date().isoformat(),
+            end_date=(end - timedelta(days=1)).date().isoformat(),
+            provider=data_provider,
+            interval=interval
+        )
+        if not data_obb or not hasattr(data_obb, 'to_df'):
+            return None
+        return data_obb.to_df()
+
+    store = get_default_bar_store()
+    end_exclusive = pd.Timestamp(end_date) + timedelta(days=1)
+    if store is None:
+        return fetch(symbol, interval, pd.Timestamp(start_date), end_exclusive)
+
+    try:
+        return store.get_frame(symbol, interval, start_date, end_exclusive, fetch, provider=data_provider)
+    except Exception as e:
+        logger.warning(f"Bar store read failed for {symbol}, fetching directly: {e}")
+        return fetch(symbol, interval, pd.Timestamp(start_date), end_exclusive)
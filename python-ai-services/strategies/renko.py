@@ -9,6 +9,8 @@ try:
 except ImportError:
     obb = None
 
+from .price_data import fetch_price_history
+
 logger = getLogger(__name__)
 
 # Default parameters for Renko
@@ -140,11 +142,10 @@ def get_renko_signals(
         return None
 
     try:
-        price_obb = obb.equity.price.historical(symbol=symbol, start_date=start_date, end_date=end_date, provider=data_provider, interval="1d")
-        if not price_obb or not hasattr(price_obb, 'to_df'):
+        price_df_orig = fetch_price_history(obb, symbol, start_date, end_date, data_provider)
+        if price_df_orig is None:
             logger.warning(f"No data or unexpected data object returned for {symbol}")
             return None
-        price_df_orig = price_obb.to_df()
         if price_df_orig.empty:
             logger.warning(f"No data for {symbol} from {start_date} to {end_date}")
             return None
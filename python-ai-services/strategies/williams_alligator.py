@@ -9,6 +9,8 @@ try:
 except ImportError:
     obb = None
 
+from .price_data import fetch_price_history
+
 logger = getLogger(__name__)
 
 # Default parameters for Williams Alligator
@@ -41,14 +43,10 @@ def get_williams_alligator_signals(
         return None
 
     try:
-        data_obb = obb.equity.price.historical(
-            symbol=symbol, start_date=start_date, end_date=end_date, provider=data_provider, interval="1d"
-        )
-        if not data_obb or not hasattr(data_obb, 'to_df'):
+        price_data = fetch_price_history(obb, symbol, start_date, end_date, data_provider)
+        if price_data is None:
             logger.warning(f"No data or unexpected data object returned for {symbol} from {start_date} to {end_date} by provider {data_provider}")
             return None
-
-        price_data = data_obb.to_df()
         if price_data.empty:
             logger.warning(f"No data returned (empty DataFrame) for {symbol} from {start_date} to {end_date} by provider {data_provider}")
             return None
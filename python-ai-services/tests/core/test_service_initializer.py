@@ -0,0 +1,133 @@
+import pytest
+import asyncio
+import importlib
+import threading
+
+from python_ai_services.core.service_initializer import ServiceInitializer, ServiceSpec
+from python_ai_services.core.service_registry import ServiceRegistry
+
+# The package re-exports the global ServiceInitializer instance under the module's name
+si_module = importlib.import_module("python_ai_services.core.service_initializer")
+
+# --- Fixtures ---
+
+@pytest.fixture
+def registry(monkeypatch):
+    fresh_registry = ServiceRegistry()
+    monkeypatch.setattr(si_module, "registry", fresh_registry)
+    monkeypatch.setattr(si_module.db_manager, "is_initialized", lambda: True)
+    monkeypatch.setattr(ServiceInitializer, "_register_connections", lambda self: None)
+    return fresh_registry
+
+@pytest.fixture
+def initializer(registry):
+    initializer = ServiceInitializer()
+    initializer.service_specs.clear()
+    return initializer
+
+# --- Helpers ---
+
+def slow_service(name: str, delay: float = 0.05, fail: bool = False):
+    async def create():
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} exploded")
+        return {"name": name}
+    return create
+
+def rendezvous_services(count: int):
+    """Factories that only finish once all `count` of them are running at the same time"""
+    running = 0
+    everyone = asyncio.Event()
+
+    def service(name: str):
+        async def create():
+            nonlocal running
+            running += 1
+            if running == count:
+                everyone.set()
+            await asyncio.wait_for(everyone.wait(), timeout=5)  # Started one at a time: fails instead
+            return {"name": name}
+        return create
+    return service
+
+# --- Tests ---
+
+def test_default_specs_resolve_in_dependency_order():
+    order = ServiceInitializer().initialization_order
+
+    assert len(order) == 18
+    assert order.index("market_data") < order.index("portfolio_tracker") < order.index("risk_management")
+    assert order.index("market_data") < order.index("trading_engine")
+
+def test_cycles_and_unknown_dependencies_are_rejected(initializer):
+    initializer.register_spec(ServiceSpec("a", slow_service("a"), ["b"]))
+    initializer.register_spec(ServiceSpec("b", slow_service("b"), ["a"]))
+    with pytest.raises(ValueError, match="cycle"):
+        initializer._resolve_order()
+
+    initializer.service_specs.clear()
+    initializer.register_spec(ServiceSpec("a", slow_service("a"), ["missing"]))
+    with pytest.raises(ValueError, match="unknown"):
+        initializer._resolve_order()
+
+@pytest.mark.asyncio
+async def test_independent_services_start_concurrently(initializer, registry):
+    service = rendezvous_services(3)
+    for name in ("a", "b", "c"):
+        initializer.register_spec(ServiceSpec(name, service(name)))
+    initializer.register_spec(ServiceSpec("d", slow_service("d", delay=0), ["a", "b"]))
+
+    results = await initializer.initialize_all_services()
+
+    assert set(results.values()) == {"initialized"}  # a, b and c were all running at once
+    report = registry.get_startup_report()
+    assert report["services"]["d"]["start_offset_ms"] >= report["services"]["a"]["duration_ms"]
+    assert registry.get_service("d") == {"name": "d"}
+
+@pytest.mark.asyncio
+async def test_sync_constructors_run_off_the_event_loop(initializer):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def blocking_service(name):
+        def create():
+            barrier.wait()  # A slow constructor; on the event loop the first one would block the rest
+            return {"name": name}
+        return create
+
+    for name in ("a", "b", "c"):
+        initializer.register_spec(ServiceSpec(name, blocking_service(name)))
+
+    results = await initializer.initialize_all_services()
+
+    assert set(results.values()) == {"initialized"}
+
+@pytest.mark.asyncio
+async def test_failures_skip_dependents_and_critical_failure_stops_startup(initializer, registry):
+    initializer.register_spec(ServiceSpec("flaky", slow_service("flaky", fail=True)))
+    initializer.register_spec(ServiceSpec("needs_flaky", slow_service("needs_flaky"), ["flaky"]))
+    initializer.register_spec(ServiceSpec("core", slow_service("core", delay=0.01, fail=True), critical=True))
+    initializer.register_spec(ServiceSpec("after_core", slow_service("after_core"), ["core"]))
+    initializer.register_spec(ServiceSpec("independent", slow_service("independent")))
+
+    results = await initializer.initialize_all_services()
+
+    assert results["flaky"] == "failed: flaky exploded"
+    assert results["needs_flaky"].startswith("skipped - critical service core failed")
+    assert results["after_core"].startswith("skipped")
+    assert results["independent"] == "initialized"  # Already running when core failed
+    assert registry.get_startup_report()["services"]["after_core"]["status"].startswith("skipped")
+
+@pytest.mark.asyncio
+async def test_lazy_services_are_built_on_first_use(initializer, registry):
+    calls = []
+    initializer.register_spec(ServiceSpec("heavy", lambda: calls.append("heavy") or {"name": "heavy"}, lazy=True))
+
+    results = await initializer.initialize_all_services()
+
+    assert results["heavy"] == "registered - loads on first use"
+    assert calls == []
+    assert registry.get_service("heavy") == {"name": "heavy"}
+    assert registry.get_service("heavy") == {"name": "heavy"}
+    assert calls == ["heavy"]
+    assert registry.get_startup_report()["services"]["heavy"]["lazy"] is True
@@ -0,0 +1,127 @@
+import pytest
+import asyncio
+import importlib
+
+import numpy as np
+
+# --- Fixtures ---
+
+@pytest.fixture(scope="module")
+def mm():
+    """Import the server module inside a loop; its global instance starts background tasks on creation"""
+    async def import_module():
+        module = importlib.import_module("python_ai_services.mcp_servers.market_microstructure")
+        module.microstructure.processing_active = False
+        await asyncio.sleep(0)
+        return module
+    return asyncio.run(import_module())
+
+@pytest.fixture
+def microstructure(mm):
+    engine = mm.microstructure
+    engine.l2_books.clear()
+    engine.order_book_snapshots.clear()
+    return engine
+
+# --- Helpers ---
+
+def naive_depth(bids: dict, asks: dict, mid_price: float) -> dict:
+    """The original list-scan depth calculation over {price: size} books"""
+    bid_levels = sorted(bids.items(), reverse=True)
+    ask_levels = sorted(asks.items())
+    depth = {"bbo": (bid_levels[0][1] if bid_levels else 0) + (ask_levels[0][1] if ask_levels else 0)}
+    for bps in [5, 10, 25, 50]:
+        price_range = mid_price * (bps / 10000)
+        depth[f"{bps}bps"] = (
+            sum(size for price, size in bid_levels if price >= mid_price - price_range) +
+            sum(size for price, size in ask_levels if price <= mid_price + price_range)
+        )
+    return depth
+
+# --- Tests ---
+
+def test_diffs_match_naive_book(mm):
+    rng = np.random.default_rng(3)
+    book = mm.L2OrderBook("TEST")
+    bids, asks = {}, {}
+
+    for step in range(2000):
+        is_bid = rng.random() < 0.5
+        levels = bids if is_bid else asks
+        price = round((100 - rng.integers(1, 200) * 0.01) if is_bid else (100 + rng.integers(1, 200) * 0.01), 2)
+        size = 0.0 if (levels and rng.random() < 0.3) else float(rng.integers(1, 500))
+        if size == 0.0:
+            price = list(levels)[rng.integers(len(levels))]
+            del levels[price]
+        else:
+            levels[price] = size
+
+        level = {"price": price, "size": size, "orders": 1}
+        book.apply_update(mm.OrderBookUpdate(
+            symbol="TEST", bids=[level] if is_bid else [], asks=[] if is_bid else [level], is_snapshot=False
+        ))
+
+        if step % 50 == 0 and bids and asks:
+            np.testing.assert_array_equal(book.bids.prices(), sorted(bids, reverse=True))
+            np.testing.assert_array_equal(book.asks.prices(), sorted(asks))
+            mid_price = (max(bids) + min(asks)) / 2
+            assert book.depth(mid_price) == naive_depth(bids, asks, mid_price)
+
+def test_cached_levels_follow_diffs_without_changing_earlier_views(mm):
+    rng = np.random.default_rng(7)
+    side = mm.OrderBookSide(is_bid=True)
+    side.replace([{"price": 100 - i * 0.01, "size": 10.0} for i in range(50)], "t0")
+    first = side.levels()
+
+    for step in range(500):
+        price = round(100 - rng.integers(0, 80) * 0.01, 2)
+        size = 0.0 if rng.random() < 0.3 else float(rng.integers(1, 500))
+        side.apply(price, size, 2, f"t{step + 1}")
+        if step % 25 == 0:
+            rebuilt = [(p, s) for p, s in zip(side.prices().tolist(), side.sizes().tolist())]
+            assert [(level.price, level.size) for level in side.levels()] == rebuilt
+
+    assert len(first) == 50 and all(level.timestamp == "t0" and level.size == 10.0 for level in first)
+
+def test_snapshot_replaces_book_and_drops_empty_levels(mm):
+    book = mm.L2OrderBook("TEST")
+    book.apply_update(mm.OrderBookUpdate(symbol="TEST", bids=[{"price": 99.0, "size": 5}], asks=[{"price": 101.0, "size": 5}]))
+    book.apply_update(mm.OrderBookUpdate(
+        symbol="TEST",
+        bids=[{"price": 98.0, "size": 1}, {"price": 99.5, "size": 2}, {"price": 99.0, "size": 0}, {"price": 98.0, "size": 3}],
+        asks=[{"price": 100.5, "size": 4, "orders": 7}]
+    ))
+
+    assert book.bids.prices().tolist() == [99.5, 98.0]
+    assert book.bids.sizes().tolist() == [2.0, 3.0]
+    assert book.asks.levels()[0].orders == 7
+    assert book.imbalance() == pytest.approx((2 - 4) / 6)
+    assert book.bids.top_size(5) == 5.0
+
+def test_history_ring_buffer_keeps_most_recent_in_order(mm):
+    history = mm.OrderBookHistory(capacity=4)
+    for i in range(7):
+        history.append(str(i), 100.0 + i, 0.01 * i, 0.0, {"bbo": float(i)})
+
+    assert len(history) == 4
+    assert history.column("mid_price").tolist() == [103.0, 104.0, 105.0, 106.0]
+    assert history.column("bbo", last=2).tolist() == [5.0, 6.0]
+    assert history.timestamps(last=3) == ["4", "5", "6"]
+
+@pytest.mark.asyncio
+async def test_update_order_book_applies_diffs(mm, microstructure):
+    await microstructure.update_order_book(mm.OrderBookUpdate(
+        symbol="TEST",
+        bids=[{"price": 99.9, "size": 100}, {"price": 99.8, "size": 200}],
+        asks=[{"price": 100.1, "size": 150}, {"price": 100.2, "size": 250}]
+    ))
+    order_book = await microstructure.update_order_book(mm.OrderBookUpdate(
+        symbol="TEST", bids=[{"price": 99.9, "size": 0}], asks=[{"price": 100.05, "size": 50}], is_snapshot=False
+    ))
+
+    assert [level.price for level in order_book.bids] == [99.8]
+    assert [level.price for level in order_book.asks] == [100.05, 100.1, 100.2]
+    assert order_book.mid_price == pytest.approx((99.8 + 100.05) / 2)
+    assert order_book.depth["bbo"] == 250
+    assert order_book.imbalance == pytest.approx((200 - 50) / 250)
+    assert microstructure.order_book_snapshots["TEST"].column("spread").tolist() == pytest.approx([0.2, 0.25])
@@ -0,0 +1,97 @@
+import pytest
+import importlib
+
+# --- Fixtures ---
+
+START = 1_700_000_000.0
+
+@pytest.fixture(scope="module")
+def om():
+    return importlib.import_module("python_ai_services.mcp_servers.order_management")
+
+@pytest.fixture
+def service(om):
+    service = om.OrderManagementService(clock=om.SimulatedClock(START))
+    service.market_data_cache["AAPL"] = {"price": 100.0, "bid": 99.95, "ask": 100.05, "volatility": 0.2}
+    return service
+
+# --- Helpers ---
+
+async def submit(om, service, **fields):
+    request = om.AdvancedOrderRequest(**{"symbol": "AAPL", "side": "buy", **fields})
+    return await service.submit_advanced_order(request)
+
+def filled(service, order):
+    return [s for s in service.order_slices[order.id] if s.status == "filled"]
+
+# --- Tests ---
+
+@pytest.mark.asyncio
+async def test_twap_slices_run_at_their_due_times(om, service):
+    order = await submit(om, service, quantity=1000, strategy="twap", time_window=10)
+
+    await service.run_due()
+    assert len(filled(service, order)) == 1 and len(service.schedule) == 9
+
+    service.clock.advance(59.9)
+    assert await service.run_due() == 0
+
+    service.clock.advance(0.1)
+    assert await service.run_due() == 1
+
+    for _ in range(8):
+        service.clock.advance(60)
+        assert await service.run_due() == 1
+    assert order.status == om.ExecutionStatus.COMPLETED and order.remaining_quantity == 0
+    assert service.get_scheduler_stats()["scheduling_lag_ms"]["max"] == pytest.approx(0.0, abs=1e-3)
+
+@pytest.mark.asyncio
+async def test_late_dispatch_is_reported_as_lag(om, service):
+    await submit(om, service, quantity=1000, strategy="twap", time_window=10)
+    await service.run_due()
+
+    service.clock.advance(150)  # Slices due at +60s and +120s run together
+    assert await service.run_due() == 2
+
+    stats = service.get_scheduler_stats()
+    assert stats["scheduling_lag_ms"]["max"] == pytest.approx(90_000)
+    assert stats["scheduled"] == 7 and stats["next_due_in_seconds"] == pytest.approx(30)
+
+@pytest.mark.asyncio
+async def test_due_work_runs_in_priority_order_through_registered_handlers(om, service):
+    dispatched = []
+
+    async def record(order):
+        dispatched.append(order.priority)
+    service.register_strategy(om.OrderStrategy.IMMEDIATE, record)
+
+    for priority in ["low", "normal", "urgent", "high"]:
+        await submit(om, service, quantity=100, strategy="immediate", priority=priority)
+    await service.run_due()
+
+    assert dispatched == [om.OrderPriority.URGENT, om.OrderPriority.HIGH, om.OrderPriority.NORMAL, om.OrderPriority.LOW]
+
+@pytest.mark.asyncio
+async def test_sniper_fires_on_market_data_trigger(om, service):
+    order = await submit(om, service, quantity=500, strategy="sniper", target_price=95.0)
+    await service.run_due()
+    assert order.status == om.ExecutionStatus.ACTIVE and order.id in service.price_watchers["AAPL"]
+
+    service.market_data_cache["AAPL"].update(price=94.0, ask=94.05)
+    service.on_market_data("AAPL")
+    await service.run_due()
+
+    assert order.status == om.ExecutionStatus.COMPLETED and order.avg_fill_price == pytest.approx(94.05)
+
+@pytest.mark.asyncio
+async def test_iceberg_refills_until_done_and_cancel_stops_slices(om, service):
+    iceberg = await submit(om, service, quantity=1000, strategy="iceberg", max_slice_size=100)
+    twap = await submit(om, service, quantity=1000, strategy="twap", time_window=10)
+    await service.run_due()
+
+    assert iceberg.status == om.ExecutionStatus.COMPLETED and len(filled(service, iceberg)) == 10
+
+    await service.cancel_advanced_order(twap.id)
+    service.clock.advance(600)
+    assert await service.run_due() == 0
+    assert len(filled(service, twap)) == 1
@@ -0,0 +1,139 @@
+import pytest
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from python_ai_services.mcp_servers.technical_analysis_engine import (
+    TechnicalAnalysisEngine, IncrementalIndicatorState, AnalysisRequest
+)
+
+ALL_INDICATORS = ["rsi", "macd", "bollinger", "stochastic", "williams_r", "adx", "atr", "obv", "vwap", "ichimoku"]
+
+# --- Fixtures ---
+
+@pytest.fixture(scope="module")
+def engine() -> TechnicalAnalysisEngine:
+    return TechnicalAnalysisEngine()
+
+@pytest.fixture
+def bars() -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.01, 400))
+    start = datetime(2024, 1, 1)
+    return pd.DataFrame({
+        "timestamp": [start + timedelta(hours=i) for i in range(len(closes))],
+        "open": np.roll(closes, 1),
+        "high": closes * (1 + np.abs(rng.normal(0, 0.004, len(closes)))),
+        "low": closes * (1 - np.abs(rng.normal(0, 0.004, len(closes)))),
+        "close": closes,
+        "volume": rng.integers(1_000, 50_000, len(closes)).astype(float)
+    })
+
+def assert_values_match(actual: dict, expected: dict, context: str):
+    assert actual.keys() == expected.keys()
+    for key, expected_value in expected.items():
+        actual_value = actual[key]
+        if pd.isna(expected_value):
+            assert math.isnan(actual_value), f"{context} {key}: expected NaN, got {actual_value}"
+        else:
+            assert actual_value == pytest.approx(float(expected_value), rel=1e-9, abs=1e-9), f"{context} {key}"
+
+# --- Parity tests ---
+
+@pytest.mark.parametrize("indicator_name", ALL_INDICATORS)
+def test_incremental_values_match_batch_at_every_bar(engine: TechnicalAnalysisEngine, bars: pd.DataFrame, indicator_name: str):
+    state = IncrementalIndicatorState(engine.indicator_configs)
+    config = engine.indicator_configs[indicator_name]
+
+    for i in range(len(bars)):
+        row = bars.iloc[i]
+        state.update(row["high"], row["low"], row["close"], row["volume"], row["timestamp"])
+        if i < 1 or (i > 60 and i % 7):
+            continue  # Check the warm-up region densely and the rest on a stride
+        expected = engine._batch_indicator_values(bars.iloc[:i + 1], indicator_name, config)
+        assert_values_match(state.indicator_values(indicator_name), expected, f"{indicator_name}@{i}")
+
+def test_incremental_handles_flat_prices(engine: TechnicalAnalysisEngine, bars: pd.DataFrame):
+    flat = bars.copy()
+    flat.loc[100:, ["open", "high", "low", "close"]] = 123.0
+
+    state = IncrementalIndicatorState.from_dataframe(flat, engine.indicator_configs)
+
+    for indicator_name in ALL_INDICATORS:
+        expected = engine._batch_indicator_values(flat, indicator_name, engine.indicator_configs[indicator_name])
+        assert_values_match(state.indicator_values(indicator_name), expected, indicator_name)
+
+@pytest.mark.asyncio
+async def test_indicators_from_state_match_batch_indicators(engine: TechnicalAnalysisEngine, bars: pd.DataFrame):
+    state = IncrementalIndicatorState.from_dataframe(bars, engine.indicator_configs)
+
+    batch = await engine._calculate_indicators(bars, ALL_INDICATORS)
+    incremental = await engine._calculate_indicators(bars, ALL_INDICATORS, state)
+
+    assert [(i.name, i.value, i.signal, i.strength) for i in incremental] == [
+        (i.name, i.value, i.signal, i.strength) for i in batch
+    ]
+
+# --- Engine integration ---
+
+@pytest.mark.asyncio
+async def test_update_market_data_advances_state_without_reseeding(bars: pd.DataFrame):
+    engine = TechnicalAnalysisEngine()
+    engine.market_data[("TEST", "1h")] = bars.iloc[:300].reset_index(drop=True)
+    state = engine.get_indicator_state("TEST")
+
+    new_bars = bars.iloc[300:].to_dict("records")
+    for bar in new_bars:
+        await engine.update_market_data("TEST", [bar])
+
+    assert engine.get_indicator_state("TEST") is state
+    assert state.bar_count == len(bars)
+    for indicator_name in ALL_INDICATORS:
+        expected = engine._batch_indicator_values(bars, indicator_name, engine.indicator_configs[indicator_name])
+        assert_values_match(state.indicator_values(indicator_name), expected, indicator_name)
+
+    analysis = await engine.perform_technical_analysis(AnalysisRequest(symbol="TEST", include_patterns=False))
+    assert {indicator.name for indicator in analysis.indicators} == {"RSI", "MACD", "Bollinger Bands", "Stochastic", "ADX"}
+
+@pytest.mark.asyncio
+async def test_state_reseeds_when_market_data_is_replaced(bars: pd.DataFrame):
+    engine = TechnicalAnalysisEngine()
+    engine.market_data[("TEST", "1h")] = bars.iloc[:200].reset_index(drop=True)
+    first = engine.get_indicator_state("TEST")
+
+    engine.market_data[("TEST", "1h")] = bars
+    second = engine.get_indicator_state("TEST")
+
+    assert second is not first
+    assert second.bar_count == len(bars)
+
+@pytest.mark.asyncio
+async def test_trimmed_history_reseeds_state_to_match_batch(bars: pd.DataFrame):
+    engine = TechnicalAnalysisEngine()
+    engine.max_history_bars, engine.history_trim_slack = 250, 50
+    await engine.update_market_data("TEST", bars.iloc[:200].to_dict("records"))
+
+    for bar in bars.iloc[200:].to_dict("records"):
+        await engine.update_market_data("TEST", [bar])
+
+    df = engine.get_market_data("TEST")
+    state = engine.get_indicator_state("TEST")
+    assert len(df) <= 300 and df["timestamp"].iloc[-1] == bars["timestamp"].iloc[-1]
+    assert state.bar_count == len(df)
+    for indicator_name in ALL_INDICATORS:
+        expected = engine._batch_indicator_values(df, indicator_name, engine.indicator_configs[indicator_name])
+        assert_values_match(state.indicator_values(indicator_name), expected, indicator_name)
+
+@pytest.mark.asyncio
+async def test_streams_are_keyed_by_timeframe_and_need_no_timestamps(bars: pd.DataFrame):
+    engine = TechnicalAnalysisEngine()
+    untimed = bars.drop(columns="timestamp")
+    await engine.update_market_data("TEST", untimed.iloc[:300].to_dict("records"), timeframe="4h")
+    state = engine.get_indicator_state("TEST", "4h")
+
+    await engine.update_market_data("TEST", untimed.iloc[300:].to_dict("records"), timeframe="4h")
+
+    assert engine.get_indicator_state("TEST", "4h") is state and state.bar_count == len(bars)
+    assert ("TEST", "1h") not in engine.market_data and ("TEST", "1h") not in engine.indicator_states
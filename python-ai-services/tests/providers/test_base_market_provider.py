@@ -0,0 +1,165 @@
+import pytest
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+from python_ai_services.providers.base_market_provider import (
+    BaseMarketDataProvider, ProviderManager, MarketDataProviderError
+)
+from python_ai_services.models.enhanced_market_data_models import (
+    PriceData, MarketDataProvider, AssetType, TimeFrame
+)
+
+# --- Helpers ---
+
+class FakeProvider(BaseMarketDataProvider):
+    """In-memory provider that records every upstream call"""
+
+    def __init__(self, name=MarketDataProvider.YFINANCE, batch=True, delay=0.01, unknown=()):
+        self.name = name
+        self.supports_batch_quotes = batch
+        self.delay = delay
+        self.unknown = set(unknown)
+        self.calls = []
+        super().__init__()
+
+    def get_provider_name(self):
+        return self.name
+
+    def get_supported_assets(self):
+        return [AssetType.STOCK]
+
+    def get_supported_timeframes(self):
+        return [TimeFrame.D1]
+
+    def _quote(self, symbol):
+        return PriceData(
+            symbol=symbol.replace("-", ""), price=Decimal("100"), timestamp=datetime.utcnow(),
+            provider=self.name, asset_type=AssetType.STOCK
+        )
+
+    async def get_quote(self, symbol):
+        self.calls.append(("get_quote", symbol))
+        await asyncio.sleep(self.delay)
+        if symbol in self.unknown:
+            raise ValueError(f"unknown symbol {symbol}")
+        return self._quote(symbol)
+
+    async def get_quotes(self, symbols):
+        self.calls.append(("get_quotes", tuple(symbols)))
+        await asyncio.sleep(self.delay)
+        return [self._quote(symbol) for symbol in symbols if symbol not in self.unknown]
+
+    async def get_historical_data(self, symbol, timeframe, start_time, end_time=None, limit=None):
+        self.calls.append(("get_historical_data", symbol))
+        await asyncio.sleep(self.delay)
+        return []
+
+    async def get_orderbook(self, symbol, depth=20):
+        raise NotImplementedError
+
+    async def get_recent_trades(self, symbol, limit=100):
+        return []
+
+    async def search_symbols(self, query):
+        return []
+
+# --- Tests ---
+
+@pytest.mark.asyncio
+async def test_concurrent_quotes_are_coalesced_and_batched():
+    provider = FakeProvider()
+    manager = ProviderManager()
+    manager.register_provider(provider)
+
+    symbols = ["AAPL", "MSFT", "BTC-USD"] * 40  # 40 agents asking for the same three symbols
+    quotes = await asyncio.gather(*(manager.get_quote(symbol) for symbol in symbols))
+
+    assert [quote.symbol for quote in quotes[:3]] == ["AAPL", "MSFT", "BTCUSD"]
+    assert provider.calls == [("get_quotes", ("AAPL", "MSFT", "BTC-USD"))]
+    stats = manager.get_request_stats()
+    assert stats["quote_requests"] == 120
+    assert stats["coalesced"] == 117
+    assert stats["upstream_calls"] == 1 and stats["batched_symbols"] == 3
+
+@pytest.mark.asyncio
+async def test_quotes_are_served_from_ttl_cache():
+    provider = FakeProvider()
+    manager = ProviderManager(quote_ttl_seconds=0.05)
+    manager.register_provider(provider)
+
+    await manager.get_quote("AAPL")
+    await manager.get_quote("AAPL")
+    assert len(provider.calls) == 1
+    assert manager.get_request_stats()["cache_hits"] == 1
+
+    await asyncio.sleep(0.06)
+    await manager.get_quote("AAPL")
+    assert len(provider.calls) == 2
+
+@pytest.mark.asyncio
+async def test_providers_without_batch_support_get_one_request_per_unique_symbol():
+    provider = FakeProvider(batch=False)
+    manager = ProviderManager()
+    manager.register_provider(provider)
+
+    quotes = await manager.get_quotes(["AAPL", "MSFT", "AAPL"])
+
+    assert len(quotes) == 2
+    assert sorted(provider.calls) == [("get_quote", "AAPL"), ("get_quote", "MSFT")]
+
+@pytest.mark.asyncio
+async def test_symbols_missing_from_batch_fall_back_to_failover():
+    primary = FakeProvider(unknown={"XYZ"})
+    fallback = FakeProvider(name=MarketDataProvider.POLYGON)
+    manager = ProviderManager()
+    manager.register_provider(primary, is_primary=True)
+    manager.register_provider(fallback)
+
+    quotes = await manager.get_quotes(["AAPL", "XYZ"])
+
+    assert sorted(quote.symbol for quote in quotes) == ["AAPL", "XYZ"]
+    assert fallback.calls == [("get_quote", "XYZ")]
+
+@pytest.mark.asyncio
+async def test_failures_propagate_to_every_waiter_and_are_not_cached():
+    provider = FakeProvider(batch=False, unknown={"BAD"})
+    manager = ProviderManager()
+    manager.register_provider(provider)
+
+    results = await asyncio.gather(*(manager.get_quote("BAD") for _ in range(5)), return_exceptions=True)
+    assert all(isinstance(result, MarketDataProviderError) for result in results)
+    assert len(provider.calls) == 1
+
+    with pytest.raises(MarketDataProviderError):
+        await manager.get_quote("BAD")
+    assert len(provider.calls) == 2
+
+@pytest.mark.asyncio
+async def test_identical_historical_requests_share_one_fetch():
+    provider = FakeProvider()
+    manager = ProviderManager()
+    manager.register_provider(provider)
+    start = datetime(2024, 1, 1)
+
+    await asyncio.gather(*(manager.get_historical_data("AAPL", TimeFrame.D1, start) for _ in range(10)))
+    await manager.get_historical_data("AAPL", TimeFrame.H1, start)
+
+    assert provider.calls.count(("get_historical_data", "AAPL")) == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_strand_joined_callers():
+    provider = FakeProvider(delay=0.05)
+    manager = ProviderManager()
+    manager.register_provider(provider)
+    start = datetime(2024, 1, 1)
+
+    leader = asyncio.ensure_future(manager.get_historical_data("AAPL", TimeFrame.D1, start))
+    await asyncio.sleep(0)
+    followers = [asyncio.ensure_future(manager.get_historical_data("AAPL", TimeFrame.D1, start)) for _ in range(3)]
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await asyncio.wait_for(asyncio.gather(*followers), timeout=1) == [[], [], []]
+    assert leader.cancelled()
+    assert provider.calls.count(("get_historical_data", "AAPL")) == 1
@@ -0,0 +1,139 @@
+import pytest
+import asyncio
+import time
+
+from python_ai_services.providers.base_market_provider import ProviderManager, TokenBucket, RateLimitError
+from python_ai_services.providers.simulated_provider import SimulatedMarketDataProvider
+from python_ai_services.models.enhanced_market_data_models import MarketDataProvider
+
+# --- Helpers ---
+
+def make_manager(*providers, routing_mode="adaptive"):
+    # Caching and batching off so every call reaches a provider
+    manager = ProviderManager(quote_ttl_seconds=0, batch_window_seconds=0, routing_mode=routing_mode)
+    for provider in providers:
+        manager.register_provider(provider)
+    return manager
+
+def served_by(quotes):
+    counts = {}
+    for quote in quotes:
+        counts[quote.provider] = counts.get(quote.provider, 0) + 1
+    return counts
+
+# --- Token bucket ---
+
+@pytest.mark.asyncio
+async def test_token_bucket_queues_waiters_in_order_at_the_refill_rate():
+    bucket = TokenBucket(capacity=5, refill_rate=100)
+    order = []
+
+    async def request(i):
+        await bucket.acquire()
+        order.append(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(request(i) for i in range(25)))
+    elapsed = time.perf_counter() - started
+
+    assert order == list(range(25))
+    assert 0.18 <= elapsed < 0.5  # 5 from the burst, 20 more at 100/s
+    assert not bucket.try_acquire()
+
+@pytest.mark.asyncio
+async def test_token_bucket_times_out_instead_of_waiting_forever():
+    bucket = TokenBucket(capacity=1, refill_rate=1)
+    await bucket.acquire()
+
+    with pytest.raises(RateLimitError):
+        await bucket.acquire(timeout=0.05)
+    assert bucket.waiting == 0
+
+@pytest.mark.asyncio
+async def test_token_bucket_deadline_covers_the_wait_behind_earlier_callers():
+    bucket = TokenBucket(capacity=1, refill_rate=10)
+    await bucket.acquire()
+    ahead = asyncio.ensure_future(bucket.acquire())  # Holds the queue for ~100ms
+    await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    with pytest.raises(RateLimitError):
+        await bucket.acquire(timeout=0.02)
+    assert time.perf_counter() - started < 0.06
+
+    await ahead
+    assert bucket.waiting == 0
+
+@pytest.mark.asyncio
+async def test_minute_token_is_refunded_when_the_daily_budget_times_out():
+    provider = SimulatedMarketDataProvider(
+        latency_seconds=0, config={"requests_per_minute": 60, "requests_per_day": 1, "rate_limit_max_wait_seconds": 0.01}
+    )
+    await provider._acquire_rate_limit()
+    minute_tokens = provider.rate_limiter["minute"].available()
+
+    with pytest.raises(RateLimitError):
+        await provider._acquire_rate_limit()
+    assert provider.rate_limiter["minute"].available() >= minute_tokens
+
+@pytest.mark.asyncio
+async def test_provider_bursts_queue_instead_of_failing():
+    provider = SimulatedMarketDataProvider(
+        latency_seconds=0, upstream_requests_per_second=50,
+        config={"requests_per_minute": 2400, "burst_size": 5}  # 40/s locally, under the upstream's 50/s
+    )
+
+    quotes = await asyncio.gather(*(provider.get_quote("AAPL") for _ in range(25)))
+
+    assert len(quotes) == 25
+    assert provider.upstream_rejections == 0
+    assert provider.status.error_count == 0
+
+# --- Routing ---
+
+@pytest.mark.asyncio
+async def test_adaptive_routing_prefers_the_faster_provider():
+    slow = SimulatedMarketDataProvider(MarketDataProvider.POLYGON, latency_seconds=0.03, seed=1)
+    fast = SimulatedMarketDataProvider(MarketDataProvider.FINNHUB, latency_seconds=0.002, seed=2)
+    manager = make_manager(slow, fast)
+
+    quotes = [await manager.get_quote("AAPL") for _ in range(20)]
+
+    assert served_by(quotes) == {MarketDataProvider.POLYGON: 1, MarketDataProvider.FINNHUB: 19}
+    assert list(manager.get_provider_health()) == [MarketDataProvider.FINNHUB, MarketDataProvider.POLYGON]
+
+@pytest.mark.asyncio
+async def test_priority_routing_keeps_fixed_order():
+    slow = SimulatedMarketDataProvider(MarketDataProvider.POLYGON, latency_seconds=0.01)
+    fast = SimulatedMarketDataProvider(MarketDataProvider.FINNHUB, latency_seconds=0.001)
+    manager = make_manager(slow, fast, routing_mode="priority")
+
+    quotes = [await manager.get_quote("AAPL") for _ in range(5)]
+
+    assert served_by(quotes) == {MarketDataProvider.POLYGON: 5}
+
+@pytest.mark.asyncio
+async def test_adaptive_routing_moves_away_from_erroring_provider():
+    flaky = SimulatedMarketDataProvider(MarketDataProvider.POLYGON, latency_seconds=0.001, error_rate=1.0)
+    steady = SimulatedMarketDataProvider(MarketDataProvider.FINNHUB, latency_seconds=0.005)
+    manager = make_manager(flaky, steady)
+
+    quotes = [await manager.get_quote("AAPL") for _ in range(20)]
+
+    assert served_by(quotes) == {MarketDataProvider.FINNHUB: 20}  # Failover covers the early attempts
+    assert flaky.upstream_calls < 5
+    assert manager.get_provider_health()[MarketDataProvider.POLYGON]["error_ewma"] > 0.1
+
+@pytest.mark.asyncio
+async def test_adaptive_routing_spreads_load_when_budget_runs_low():
+    fast = SimulatedMarketDataProvider(
+        MarketDataProvider.POLYGON, latency_seconds=0.001, config={"requests_per_minute": 6, "burst_size": 4}
+    )
+    backup = SimulatedMarketDataProvider(MarketDataProvider.FINNHUB, latency_seconds=0.004)
+    manager = make_manager(fast, backup)
+
+    quotes = [await manager.get_quote("AAPL") for _ in range(12)]
+
+    counts = served_by(quotes)
+    assert counts[MarketDataProvider.POLYGON] <= 4  # Never waits on an empty bucket while the backup has budget
+    assert counts[MarketDataProvider.FINNHUB] >= 8
@@ -0,0 +1,163 @@
+import pytest
+import asyncio
+import random
+
+from python_ai_services.services.agent_scheduler_service import (
+    AgentSchedulerService, AgentCapability, ScheduledTask, TaskType, TaskStatus, SchedulePriority
+)
+
+# --- Fixtures ---
+
+class QuietScheduler(AgentSchedulerService):
+    """No background loops and no simulated execution; tests complete tasks explicitly"""
+
+    def _start_scheduler(self):
+        pass
+
+    async def _execute_task(self, task):
+        pass
+
+class FlakyScheduler(AgentSchedulerService):
+    """Real execution path whose first `failures` attempts raise"""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def _start_scheduler(self):
+        pass
+
+    async def _run_task(self, task):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("agent unavailable")
+        return {"success": True}
+
+@pytest.fixture
+def scheduler():
+    return QuietScheduler()
+
+# --- Helpers ---
+
+async def add_agent(scheduler, agent_id, tasks, max_tasks=3, score=1.0, specializations=()):
+    await scheduler.register_agent(AgentCapability(
+        agent_id=agent_id, supported_tasks=list(tasks), max_concurrent_tasks=max_tasks,
+        performance_score=score, specializations=list(specializations)
+    ))
+
+async def add_task(scheduler, task_type=TaskType.ANALYSIS, priority=SchedulePriority.MEDIUM, dependencies=(), **task_data):
+    task = ScheduledTask(task_type=task_type, priority=priority, dependencies=list(dependencies), task_data=task_data)
+    await scheduler.submit_task(task)
+    return task
+
+def reference_assignments(agents, tasks, weights):
+    """The original full scan: every task in priority order, every capable agent with a free slot scored"""
+    load = {agent.agent_id: 0 for agent in agents}
+    assignments = []
+    for task in sorted(tasks, key=lambda t: -weights[t.priority]):  # Stable: FIFO within a priority
+        best, best_score = None, -1.0
+        for agent in agents:
+            if task.task_type not in agent.supported_tasks or load[agent.agent_id] >= agent.max_concurrent_tasks:
+                continue
+            utilization = load[agent.agent_id] / agent.max_concurrent_tasks
+            score = agent.performance_score
+            if utilization > 0.7:
+                score *= (1.0 - utilization + 0.7)
+            score *= 1.2
+            if task.task_data.get("required_specialization") in agent.specializations:
+                score *= 1.5
+            if score > best_score:
+                best, best_score = agent.agent_id, score
+        if best is not None:
+            load[best] += 1
+            assignments.append((task.task_id, best))
+    return assignments
+
+# --- Tests ---
+
+@pytest.mark.asyncio
+async def test_assignments_match_full_scan(scheduler):
+    rng = random.Random(11)
+    types = list(TaskType)
+    for i in range(40):
+        await add_agent(
+            scheduler, f"agent_{i}", rng.sample(types, rng.randint(1, 3)), max_tasks=rng.randint(1, 4),
+            score=round(rng.uniform(0.5, 1.5), 3), specializations=rng.sample(["fx", "crypto", "equities"], rng.randint(0, 2))
+        )
+    tasks = []
+    for _ in range(300):
+        task_type = rng.choice([t for t in types if scheduler.agents_by_task_type.get(t)])
+        spec = rng.choice([None, "fx", "crypto"])
+        tasks.append(await add_task(scheduler, task_type, rng.choice(list(SchedulePriority)),
+                                    **({"required_specialization": spec} if spec else {})))
+
+    await scheduler._process_task_queue()
+
+    expected = reference_assignments(list(scheduler.agent_capabilities.values()), tasks, scheduler.priority_weights)
+    actual = [(t.task_id, t.agent_id) for t in sorted(
+        (t for t in tasks if t.agent_id), key=lambda t: t.scheduled_at
+    )]
+    assert sorted(actual) == sorted(expected)
+    assert len(scheduler.pending_tasks) == len(tasks) - len(expected)
+
+@pytest.mark.asyncio
+async def test_dependents_become_ready_when_last_dependency_completes(scheduler):
+    await add_agent(scheduler, "a1", [TaskType.ANALYSIS, TaskType.TRADING], max_tasks=10)
+    first = await add_task(scheduler)
+    second = await add_task(scheduler)
+    trade = await add_task(scheduler, TaskType.TRADING, dependencies=[first.task_id, second.task_id])
+
+    await scheduler._process_task_queue()
+    assert trade.status == TaskStatus.PENDING and scheduler.pending_dependencies[trade.task_id] == 2
+
+    await scheduler._finish_task(first, {"success": True})
+    await scheduler._process_task_queue()
+    assert trade.status == TaskStatus.PENDING and scheduler.pending_dependencies[trade.task_id] == 1
+
+    await scheduler._finish_task(second, {"success": True})
+    await scheduler._process_task_queue()
+    assert trade.status == TaskStatus.SCHEDULED and trade.agent_id == "a1"
+
+    late = await add_task(scheduler, TaskType.TRADING, dependencies=[first.task_id])  # Already satisfied
+    assert late.task_id not in scheduler.pending_dependencies
+
+@pytest.mark.asyncio
+async def test_full_agents_leave_tasks_queued_and_urgent_goes_first(scheduler):
+    await add_agent(scheduler, "a1", [TaskType.ANALYSIS], max_tasks=1)
+    low = await add_task(scheduler, priority=SchedulePriority.LOW)
+    critical = await add_task(scheduler, priority=SchedulePriority.CRITICAL)
+
+    await scheduler._process_task_queue()
+    assert critical.agent_id == "a1" and low.status == TaskStatus.PENDING
+
+    await scheduler._finish_task(critical, {"success": True})
+    await scheduler._process_task_queue()
+    assert low.agent_id == "a1"
+    assert scheduler.get_scheduler_status()["queue_statistics"]["total_queued"] == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_tasks_are_skipped(scheduler):
+    await add_agent(scheduler, "a1", [TaskType.ANALYSIS], max_tasks=5)
+    cancelled = await add_task(scheduler, priority=SchedulePriority.URGENT)
+    kept = await add_task(scheduler)
+
+    await scheduler.cancel_task(cancelled.task_id)
+    await scheduler._process_task_queue()
+
+    assert cancelled.agent_id is None and kept.agent_id == "a1"
+    assert scheduler.agent_workloads["a1"].active_tasks == [kept.task_id]
+
+@pytest.mark.asyncio
+async def test_failed_attempt_frees_its_slot_for_the_retry():
+    scheduler = FlakyScheduler(failures=1)
+    await add_agent(scheduler, "a1", [TaskType.ANALYSIS], max_tasks=1)
+    task = await add_task(scheduler)
+
+    await scheduler._process_task_queue()
+    await asyncio.sleep(0.01)  # The first attempt fails and is queued again
+    assert task.status == TaskStatus.PENDING and scheduler.agent_workloads["a1"].active_tasks == []
+
+    await scheduler._process_task_queue()
+    await asyncio.sleep(0.01)
+    assert task.status == TaskStatus.COMPLETED and task.retry_count == 1
+    assert scheduler.agent_workloads["a1"].active_tasks == []
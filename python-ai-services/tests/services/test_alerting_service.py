@@ -0,0 +1,106 @@
+import pytest
+from datetime import datetime, timezone, timedelta
+
+from python_ai_services.services.alerting_service import (
+    AlertingService, AlertRule, AlertCategory, AlertSeverity, MetricWindow
+)
+
+# --- Fixtures ---
+
+class QuietAlertingService(AlertingService):
+    """No background loops; triggered alerts stay on the queue for inspection"""
+
+    def _start_alerting_services(self):
+        pass
+
+@pytest.fixture
+def service():
+    return QuietAlertingService()
+
+# --- Helpers ---
+
+async def add_rule(service, condition_type="threshold", agents=(), symbols=(), **params):
+    rule = AlertRule(
+        name=f"{condition_type} rule", description="test", category=AlertCategory.RISK,
+        severity=AlertSeverity.WARNING, condition_type=condition_type, condition_parameters=params,
+        target_agents=list(agents), target_symbols=list(symbols)
+    )
+    await service.create_alert_rule(rule)
+    return rule
+
+def queued(service):
+    alerts = []
+    while not service.alert_queue.empty():
+        alerts.append(service.alert_queue.get_nowait())
+    return alerts
+
+# --- Tests ---
+
+@pytest.mark.asyncio
+async def test_update_evaluates_only_matching_scopes(service):
+    any_agent = await add_rule(service, metric="drawdown", threshold=0.1)
+    agent_1 = await add_rule(service, agents=["a1"], metric="drawdown", threshold=0.1)
+    agent_1_aapl = await add_rule(service, agents=["a1"], symbols=["AAPL"], metric="drawdown", threshold=0.1)
+    await add_rule(service, agents=["a2"], metric="drawdown", threshold=0.1)
+    await add_rule(service, metric="pnl", operator="lt", threshold=0)
+
+    assert await service.publish_metric("drawdown", 0.2, agent_id="a1", symbol="MSFT") == 2
+    assert {alert.rule_id for alert in queued(service)} == {any_agent.rule_id, agent_1.rule_id}
+
+    assert await service.publish_metric("drawdown", 0.2, agent_id="a1", symbol="AAPL") == 3
+    assert [alert.rule_id for alert in queued(service)] == [agent_1_aapl.rule_id]  # Others are throttled
+    assert await service.publish_metric("volatility", 1.0) == 0
+
+@pytest.mark.asyncio
+async def test_threshold_operators_and_alert_context(service):
+    rule = await add_rule(service, agents=["a1"], metric="win_rate", operator="lte", threshold=0.4)
+
+    await service.publish_metric("win_rate", 0.5, agent_id="a1")
+    assert queued(service) == []
+
+    await service.publish_metric("win_rate", 0.4, agent_id="a1", symbol="BTC")
+    [alert] = queued(service)
+    assert alert.rule_id == rule.rule_id and alert.agent_id == "a1" and alert.symbol == "BTC"
+    assert alert.data == {"metric": "win_rate", "current_value": 0.4, "threshold": 0.4, "operator": "lte"}
+
+@pytest.mark.asyncio
+async def test_change_rules_share_the_series_window(service):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    fast = await add_rule(service, "change", metric="pnl", change_threshold=0.5, time_window_minutes=5)
+    slow = await add_rule(service, "change", metric="pnl", change_threshold=0.5, time_window_minutes=60)
+
+    for minute, value in [(0, 100.0), (30, 120.0), (56, 130.0), (61, 160.0)]:
+        await service.publish_metric("pnl", value, timestamp=start + timedelta(minutes=minute))
+
+    # At +61m: the 5m window starts at 130 (+23%), the 60m window at 100 (+60%)
+    [alert] = queued(service)
+    assert alert.rule_id == slow.rule_id and alert.data["historical_value"] == 100.0
+    assert len(service.metric_windows) == 1
+
+@pytest.mark.asyncio
+async def test_polling_fetches_each_scope_once_and_deleting_unindexes(service):
+    calls = []
+
+    async def get_metric_value(metric, agents, symbols):
+        calls.append((metric, tuple(agents), tuple(symbols)))
+        return 0.9
+    service._get_metric_value = get_metric_value
+
+    rules = [await add_rule(service, metric="drawdown", threshold=0.5) for _ in range(50)]
+    await add_rule(service, agents=["a1"], metric="drawdown", threshold=0.5)
+    await service._check_all_alert_rules()
+
+    assert sorted(calls) == [("drawdown", (), ()), ("drawdown", ("a1",), ())]
+    assert len(queued(service)) == 51
+
+    for rule in rules:
+        await service.delete_alert_rule(rule.rule_id)
+    assert list(service.rule_index["drawdown"]) == [("a1", None)]
+
+def test_window_keeps_baseline_for_longest_window():
+    window = MetricWindow()
+    for t in range(0, 5000):
+        window.append(float(t), float(t), retention_seconds=600)
+
+    assert window.value_at(4999 - 600) == 4399.0 and window.value_at(100) is None
+    assert len(window) == 601 and len(window.times) < 5000
@@ -0,0 +1,277 @@
+import pytest
+import pytest_asyncio
+from unittest.mock import patch
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+from typing import List
+
+import numpy as np
+
+from python_ai_services.services.backtesting_service import (
+    BacktestEngine, VectorizedBacktestEngine, BarArrays, BacktestingService, SharedBarArrays,
+    MonteCarloSimulator, BatchCancelled, _get_worker_bars, _worker_bars
+)
+from python_ai_services.models.trading_strategy_models import (
+    TradingStrategy, StrategyType, StrategyBacktestRequest, MarketData, RiskLevel
+)
+
+# --- Fixtures ---
+
+@pytest_asyncio.fixture
+async def backtesting_service():
+    with patch("python_ai_services.services.backtesting_service.get_supabase_client", return_value=None):
+        service = BacktestingService(max_workers=2)
+    yield service
+    await service.shutdown()
+
+# --- Helpers ---
+
+def create_market_data(num_bars: int, seed: int = 7, symbol: str = "BTCUSD") -> List[MarketData]:
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.01, num_bars))
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        MarketData(
+            symbol=symbol,
+            timestamp=start + timedelta(hours=i),
+            open=Decimal(str(round(close, 6))),
+            high=Decimal(str(round(close * 1.005, 6))),
+            low=Decimal(str(round(close * 0.995, 6))),
+            close=Decimal(str(round(close, 6))),
+            volume=Decimal("1000")
+        )
+        for i, close in enumerate(closes)
+    ]
+
+def create_strategy(strategy_type: StrategyType = StrategyType.MOMENTUM) -> TradingStrategy:
+    return TradingStrategy(
+        name="Parity Momentum",
+        description="Backtest engine parity test",
+        strategy_type=strategy_type,
+        max_position_size=Decimal("1000"),
+        max_portfolio_allocation=0.1,
+        risk_level=RiskLevel.MODERATE
+    )
+
+def create_request(warmup_period: int = 100) -> StrategyBacktestRequest:
+    return StrategyBacktestRequest(
+        strategy_id="parity",
+        start_date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        end_date=datetime(2024, 6, 1, tzinfo=timezone.utc),
+        initial_capital=Decimal("100000"),
+        warmup_period=warmup_period
+    )
+
+# --- Tests ---
+
+def test_bar_arrays_from_market_data():
+    market_data = create_market_data(50)
+    bars = BarArrays.from_market_data(market_data)
+
+    assert len(bars) == 50
+    assert bars.symbol_names == ["BTCUSD"]
+    assert bars.close.dtype == np.float64
+    assert bars.close[10] == float(market_data[10].close)
+    assert bars.timestamps[-1] == market_data[-1].timestamp
+
+def test_vectorized_signals_match_loop_signals():
+    market_data = create_market_data(600)
+    strategy = create_strategy()
+    loop_engine = BacktestEngine()
+    engine = VectorizedBacktestEngine()
+
+    signals = engine.generate_signals(strategy, BarArrays.from_market_data(market_data).close)
+
+    for i in range(len(market_data)):
+        signal = loop_engine._generate_signal_for_backtest(
+            strategy, market_data[max(0, i - 100):i + 1], "BTCUSD"
+        )
+        expected = 0 if signal is None else (1 if signal.signal_type == "buy" else -1)
+        assert signals[i] == expected, f"signal mismatch at bar {i}"
+
+@pytest.mark.parametrize("warmup_period", [0, 25, 100])
+def test_vectorized_backtest_matches_loop(warmup_period: int):
+    market_data = create_market_data(1500)
+    strategy = create_strategy()
+    request = create_request(warmup_period)
+
+    expected = BacktestEngine().run_backtest(strategy, market_data, request)
+    result = VectorizedBacktestEngine().run_backtest(strategy, market_data, request)
+
+    assert result.total_trades == expected.total_trades > 0
+    assert result.winning_trades == expected.winning_trades
+    assert result.losing_trades == expected.losing_trades
+    assert [t["action"] for t in result.trades] == [t["action"] for t in expected.trades]
+    assert [t["timestamp"] for t in result.trades] == [t["timestamp"] for t in expected.trades]
+    assert [t["trade_id"] for t in result.trades if t["action"] == "sell"] == [
+        t["trade_id"] for t in result.trades if t["action"] == "buy"
+    ][:sum(1 for t in result.trades if t["action"] == "sell")]
+
+    assert len(result.equity_curve) == len(expected.equity_curve)
+    np.testing.assert_allclose(
+        [p["portfolio_value"] for p in result.equity_curve],
+        [p["portfolio_value"] for p in expected.equity_curve],
+        rtol=1e-9
+    )
+    assert float(result.final_capital) == pytest.approx(float(expected.final_capital), rel=1e-9)
+    assert float(result.commission_paid) == pytest.approx(float(expected.commission_paid), rel=1e-9)
+    for metric in ("total_return", "volatility", "sharpe_ratio", "sortino_ratio", "max_drawdown", "profit_factor"):
+        assert getattr(result, metric) == pytest.approx(getattr(expected, metric), rel=1e-6, abs=1e-12)
+
+def test_vectorized_backtest_non_momentum_strategy_has_no_trades():
+    market_data = create_market_data(300)
+    strategy = create_strategy(StrategyType.MEAN_REVERSION)
+    request = create_request()
+
+    expected = BacktestEngine().run_backtest(strategy, market_data, request)
+    result = VectorizedBacktestEngine().run_backtest(strategy, market_data, request)
+
+    assert result.total_trades == expected.total_trades == 0
+    assert float(result.final_capital) == pytest.approx(float(expected.final_capital))
+    assert len(result.equity_curve) == len(expected.equity_curve) == 200
+
+def test_empty_bars_give_a_zero_trade_result():
+    strategy = create_strategy()
+    request = create_request()
+
+    expected = BacktestEngine().run_backtest(strategy, [], request)
+    result = VectorizedBacktestEngine().run_backtest(strategy, [], request)
+
+    assert result.total_trades == expected.total_trades == 0
+    assert result.final_capital == expected.final_capital == request.initial_capital
+    assert result.equity_curve == expected.equity_curve == []
+
+def test_momentum_parameters_apply_to_both_engines():
+    market_data = create_market_data(800)
+    strategy = create_strategy().model_copy(
+        update={"parameters": {"short_window": 10, "long_window": 40, "threshold": 0.005}}
+    )
+    request = create_request()
+
+    expected = BacktestEngine().run_backtest(strategy, market_data, request)
+    result = VectorizedBacktestEngine().run_backtest(strategy, market_data, request)
+
+    assert result.total_trades == expected.total_trades > 0
+    assert [t["timestamp"] for t in result.trades] == [t["timestamp"] for t in expected.trades]
+
+def test_shared_bar_arrays_round_trip():
+    bars = BarArrays.from_market_data(create_market_data(100))
+    shm, handle = SharedBarArrays.publish(bars)
+    try:
+        attached_shm, attached = handle.attach()
+        np.testing.assert_array_equal(attached.close, bars.close)
+        np.testing.assert_array_equal(attached.symbols, bars.symbols)
+        assert attached.timestamps == bars.timestamps
+        del attached
+        attached_shm.close()
+    finally:
+        shm.close()
+        shm.unlink()
+
+def test_released_shared_bars_stop_worker_tasks_and_leave_the_cache():
+    bars = BarArrays.from_market_data(create_market_data(100))
+    shm, handle = SharedBarArrays.publish(bars)
+    try:
+        assert _get_worker_bars(handle).close[-1] == bars.close[-1]
+        assert handle.name in _worker_bars
+
+        SharedBarArrays.release(shm)
+
+        with pytest.raises(BatchCancelled):
+            _get_worker_bars(handle)
+        assert handle.name not in _worker_bars
+    finally:
+        shm.close()
+        shm.unlink()
+
+@pytest.mark.asyncio
+async def test_parameter_sweep_streams_every_combination(backtesting_service: BacktestingService):
+    market_data = create_market_data(1000)
+    strategy = create_strategy()
+    request = create_request()
+    grid = {"short_window": [3, 5], "long_window": [20, 30], "threshold": [0.01]}
+
+    results = [r async for r in backtesting_service.stream_parameter_sweep(strategy, market_data, request, grid)]
+
+    assert len(results) == 4
+    assert len({r.batch_id for r in results}) == 1
+    assert all(r.error is None for r in results)
+    assert sorted((r.parameters["short_window"], r.parameters["long_window"]) for r in results) == [
+        (3, 20), (3, 30), (5, 20), (5, 30)
+    ]
+
+    default_run = next(r for r in results if r.parameters["short_window"] == 5 and r.parameters["long_window"] == 20)
+    expected = VectorizedBacktestEngine().run_backtest(strategy, market_data, request)
+    assert default_run.result.total_trades == expected.total_trades
+    assert default_run.result.total_return == pytest.approx(expected.total_return)
+
+@pytest.mark.asyncio
+async def test_walk_forward_windows_run_in_parallel(backtesting_service: BacktestingService):
+    market_data = create_market_data(1000)
+    strategy = create_strategy()
+    request = create_request(warmup_period=50)
+
+    results = [
+        r async for r in backtesting_service.stream_walk_forward_windows(
+            strategy, market_data, request, window_bars=400, step_bars=200
+        )
+    ]
+
+    assert sorted(r.window["period"] for r in results) == [1, 2, 3]
+    for r in results:
+        assert r.error is None
+        assert r.in_sample_result is not None
+        assert len(r.result.equity_curve) <= 200
+
+@pytest.fixture
+def historical_backtest():
+    market_data = create_market_data(1500)
+    return VectorizedBacktestEngine().run_backtest(create_strategy(), market_data, create_request())
+
+def test_monte_carlo_path_statistics():
+    returns = np.array([
+        [0.10, -0.50, 0.20, 1.00],
+        [-0.10, -0.10, 0.05, 0.30],
+    ])
+
+    final, drawdowns, durations = MonteCarloSimulator()._path_statistics(returns.copy())
+
+    np.testing.assert_allclose(final, np.prod(1 + returns, axis=1) - 1)
+    np.testing.assert_allclose(drawdowns, [0.5, 1 - 0.81])
+    np.testing.assert_array_equal(durations, [2, 3])
+
+@pytest.mark.parametrize("mode", ["parametric", "bootstrap"])
+def test_monte_carlo_is_independent_of_memory_budget(historical_backtest, mode: str):
+    strategy = create_strategy()
+    small = MonteCarloSimulator(memory_budget_mb=0.05).run_simulation(
+        strategy, [historical_backtest], num_simulations=2000, time_horizon_days=60, mode=mode, seed=11
+    )
+    large = MonteCarloSimulator(memory_budget_mb=64).run_simulation(
+        strategy, [historical_backtest], num_simulations=2000, time_horizon_days=60, mode=mode, seed=11
+    )
+
+    assert small.mean_return == pytest.approx(large.mean_return)
+    assert small.percentiles == pytest.approx(large.percentiles)
+    assert small.worst_drawdown == pytest.approx(large.worst_drawdown)
+    assert small.max_drawdown_duration == large.max_drawdown_duration
+    assert 0 < small.avg_drawdown <= small.worst_drawdown < 1
+
+@pytest.mark.parametrize("mode", ["parametric", "bootstrap"])
+def test_monte_carlo_antithetic_reduces_estimator_variance(historical_backtest, mode: str):
+    strategy = create_strategy()
+    simulator = MonteCarloSimulator()
+
+    def mean_estimates(antithetic: bool):
+        return [
+            simulator.run_simulation(
+                strategy, [historical_backtest], num_simulations=200, time_horizon_days=30,
+                mode=mode, antithetic=antithetic, seed=seed
+            ).mean_return
+            for seed in range(30)
+        ]
+
+    assert np.std(mean_estimates(True)) < np.std(mean_estimates(False))
+
+def test_monte_carlo_rejects_unknown_mode(historical_backtest):
+    with pytest.raises(ValueError):
+        MonteCarloSimulator().run_simulation(create_strategy(), [historical_backtest], mode="quasi")
@@ -0,0 +1,147 @@
+import pytest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from python_ai_services.services.bar_store import BarStore
+
+# --- Fixtures ---
+
+@pytest.fixture
+def store(tmp_path):
+    return BarStore(tmp_path / "bars")
+
+class RecordingFetcher:
+    """Provider stand-in serving business-day bars from a fixed price series"""
+
+    def __init__(self, tz=None):
+        self.tz = tz
+        self.calls = []
+
+    def __call__(self, symbol, interval, start, end):
+        self.calls.append((start.date().isoformat(), end.date().isoformat()))
+        days = pd.bdate_range(start.tz_localize(None).normalize(), end.tz_localize(None) - pd.Timedelta(days=1))
+        index = days.tz_localize(self.tz) if self.tz else days
+        close = np.array([float(day.toordinal() % 1000) for day in days])
+        return pd.DataFrame(
+            {"Open": close - 1, "High": close + 1, "Low": close - 2, "Close": close, "Volume": close * 10},
+            index=index
+        )
+
+# --- Tests ---
+
+def test_warm_reads_do_not_fetch_and_are_zero_copy(store):
+    fetch = RecordingFetcher()
+
+    cold = store.get_bars("AAPL", "1d", "2024-01-01", "2024-03-01", fetch)
+    warm = store.get_bars("AAPL", "1d", "2024-01-01", "2024-03-01", fetch)
+
+    assert fetch.calls == [("2024-01-01", "2024-03-01")]
+    assert len(warm["close"]) == len(pd.bdate_range("2024-01-01", "2024-02-29"))
+    np.testing.assert_array_equal(cold["close"], warm["close"])
+    assert isinstance(warm["close"].base, np.memmap) or isinstance(warm["close"], np.memmap)
+    assert store.stats["warm_reads"] == 1
+
+def test_only_missing_ranges_are_fetched(store):
+    fetch = RecordingFetcher()
+    store.get_bars("AAPL", "1d", "2024-02-01", "2024-03-01", fetch)
+    store.get_bars("AAPL", "1d", "2024-04-01", "2024-05-01", fetch)
+    fetch.calls.clear()
+
+    bars = store.get_bars("AAPL", "1d", "2024-01-01", "2024-06-01", fetch)
+
+    assert fetch.calls == [("2024-01-01", "2024-02-01"), ("2024-03-01", "2024-04-01"), ("2024-05-01", "2024-06-01")]
+    assert store.missing_ranges("AAPL", "1d", "2024-01-01", "2024-06-01") == []
+    timestamps = bars["timestamp"]
+    assert len(timestamps) == len(pd.bdate_range("2024-01-01", "2024-05-31"))
+    assert np.all(np.diff(timestamps) > 0)
+
+def test_appends_in_place_and_rewrites_only_for_backfills(store):
+    fetch = RecordingFetcher()
+    store.get_bars("MSFT", "1d", "2024-01-01", "2024-02-01", fetch)
+    store.get_bars("MSFT", "1d", "2024-02-01", "2024-03-01", fetch)
+    assert store.stats["appends"] == 2 and store.stats["rewrites"] == 0
+
+    store.get_bars("MSFT", "1d", "2023-12-01", "2024-03-01", fetch)
+    assert store.stats["rewrites"] == 1
+    assert len(list((store.root / "default" / "1d" / "MSFT").glob("v*.close"))) == 1  # The old version was removed
+
+def test_store_persists_across_instances(store):
+    fetch = RecordingFetcher()
+    assert store.read_frame("SPY", "1d").empty
+
+    store.get_bars("SPY", "1d", "2024-01-01", "2024-02-01", fetch)
+    reopened = BarStore(store.root)
+    frame = reopened.get_frame("SPY", "1d", "2024-01-10", "2024-01-20", fetch)
+
+    assert len(fetch.calls) == 1
+    assert list(frame.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert frame.index[0] == pd.Timestamp("2024-01-10", tz="UTC")
+    assert frame.index[-1] == pd.Timestamp("2024-01-19", tz="UTC")
+
+def test_daily_bars_from_different_timezones_share_dates(store):
+    store.get_bars("AAPL", "1d", "2024-01-01", "2024-01-15", RecordingFetcher(tz="America/New_York"))
+    store.get_bars("AAPL", "1d", "2024-01-08", "2024-01-22", RecordingFetcher())
+
+    timestamps = store.read("AAPL", "1d")["timestamp"]
+    assert len(timestamps) == len(set(timestamps)) == len(pd.bdate_range("2024-01-01", "2024-01-21"))
+    assert (pd.to_datetime(timestamps, unit="ns") == pd.to_datetime(timestamps, unit="ns").normalize()).all()
+
+def test_recent_bars_are_refetched_until_settled(store):
+    fetch = RecordingFetcher()
+    now = pd.Timestamp.now(tz="UTC")
+
+    store.get_bars("BTC-USD", "1d", now - pd.Timedelta(days=10), now, fetch)
+    store.get_bars("BTC-USD", "1d", now - pd.Timedelta(days=10), now, fetch)
+
+    assert len(fetch.calls) == 2
+    gap_start, gap_end = store.missing_ranges("BTC-USD", "1d", now - pd.Timedelta(days=10), now)[0]
+    assert gap_end - gap_start <= pd.Timedelta(days=1, minutes=1)
+
+def test_failed_and_empty_fetches_record_no_coverage(store):
+    fetch = RecordingFetcher()
+    store.get_bars("QQQ", "1d", "2024-01-01", "2024-02-01", lambda *args: None)
+    store.get_bars("QQQ", "1d", "2024-01-01", "2024-02-01", lambda *args: pd.DataFrame())
+    assert store.stats["empty_fetches"] == 2
+    assert store.coverage("QQQ", "1d") == []
+
+    store.get_bars("QQQ", "1d", "2024-01-01", "2024-02-01", fetch)
+    assert fetch.calls == [("2024-01-01", "2024-02-01")]
+
+def test_providers_are_stored_separately(store):
+    fetch = RecordingFetcher()
+    store.get_bars("AAPL", "1d", "2024-01-01", "2024-02-01", fetch, provider="yfinance")
+    store.get_bars("AAPL", "1d", "2024-01-01", "2024-02-01", fetch, provider="alpaca")
+
+    assert len(fetch.calls) == 2
+    assert store.missing_ranges("AAPL", "1d", "2024-01-01", "2024-02-01", provider="yfinance") == []
+    assert store.read_frame("AAPL", "1d").empty
+    assert (store.root / "alpaca" / "1d" / "AAPL" / "manifest.json").exists()
+    assert store.get_stats()["keys"] == 2
+
+def test_bytes_from_an_unpublished_append_are_ignored(store):
+    fetch = RecordingFetcher()
+    store.get_bars("ETH-USD", "1d", "2024-01-01", "2024-01-10", fetch)
+    rows = len(store.read("ETH-USD", "1d")["close"])
+    with open(store.root / "default" / "1d" / "ETH-USD" / "v0.close", "ab") as f:
+        f.write(b"\xff" * 24)  # A crash between the data write and the manifest swap
+
+    assert len(BarStore(store.root).read("ETH-USD", "1d")["close"]) == rows
+    store.get_bars("ETH-USD", "1d", "2024-01-10", "2024-01-20", fetch)
+    closes = BarStore(store.root).read("ETH-USD", "1d")["close"]
+    assert np.isfinite(closes).all() and len(closes) == len(pd.bdate_range("2024-01-01", "2024-01-19"))
+
+@pytest.mark.asyncio
+async def test_historical_data_service_reads_through_store(store):
+    pytest.importorskip("yfinance")
+    from python_ai_services.services.historical_data_service import HistoricalDataService
+
+    service = HistoricalDataService(bar_store=store)
+    with patch.object(HistoricalDataService, "_fetch_yfinance", side_effect=RecordingFetcher()) as fetch:
+        data = await service.get_historical_data("AAPL", period="1mo")
+        service.cache.clear()
+        await service.get_historical_data("AAPL", period="1mo")
+
+    assert not data.empty and "Close" in data.columns
+    assert fetch.call_count == 2  # The full month once, then only the unsettled tail
@@ -0,0 +1,151 @@
+import pytest
+import math
+from unittest.mock import patch
+
+import numpy as np
+
+from python_ai_services.services.portfolio_analytics import compute_series_analytics, correlation_matrix
+from python_ai_services.services.calculation_service import CalculationService
+
+# --- Fixtures ---
+
+@pytest.fixture
+def calculation_service():
+    with patch("python_ai_services.services.calculation_service.DatabaseManager"):
+        yield CalculationService()
+
+@pytest.fixture
+def price_matrix():
+    rng = np.random.default_rng(7)
+    returns = rng.normal(0.0005, 0.02, (300, 6))
+    returns[::17, 2] = 0.0  # Flat days
+    return 100 * np.cumprod(1 + returns, axis=0)
+
+# --- Helpers ---
+
+def loop_metrics(prices, risk_free_rate=0.05, periods_per_year=252):
+    """Reference per-series metrics computed with plain Python loops"""
+    returns = [prices[i] / prices[i - 1] - 1 for i in range(1, len(prices)) if prices[i - 1] != 0]
+    n = len(returns)
+    mean = sum(returns) / n
+    volatility = math.sqrt(sum((r - mean) ** 2 for r in returns) / (n - 1))
+    peak, max_drawdown = prices[0], 0.0
+    for price in prices:
+        peak = max(peak, price)
+        max_drawdown = max(max_drawdown, (peak - price) / peak)
+    gains = sum(r for r in returns if r > 0)
+    losses = -sum(r for r in returns if r < 0)
+    return {
+        "total_return": prices[-1] / prices[0] - 1,
+        "volatility": volatility * math.sqrt(periods_per_year),
+        "sharpe_ratio": (mean - risk_free_rate / periods_per_year) / volatility,
+        "max_drawdown": max_drawdown,
+        "win_rate": sum(1 for r in returns if r > 0) / n,
+        "profit_factor": gains / losses,
+        "var_95": sorted(returns)[int((1 - 0.95) * n)],
+        "var_99": sorted(returns)[int((1 - 0.99) * n)],
+    }
+
+# --- Kernel ---
+
+def test_kernel_matches_per_series_loops(price_matrix):
+    analytics = compute_series_analytics(price_matrix)
+
+    for column in range(price_matrix.shape[1]):
+        expected = loop_metrics(price_matrix[:, column].tolist())
+        for name, value in expected.items():
+            assert getattr(analytics, name)[column] == pytest.approx(value, rel=1e-9), name
+
+    returns = price_matrix[1:] / price_matrix[:-1] - 1
+    np.testing.assert_allclose(analytics.correlation, np.corrcoef(returns.T), atol=1e-12)
+    np.testing.assert_allclose(analytics.covariance, np.cov(returns.T), atol=1e-12)
+
+def test_kernel_rolling_windows_match_direct_computation(price_matrix):
+    analytics = compute_series_analytics(price_matrix, rolling_window=20)
+    returns = price_matrix[1:] / price_matrix[:-1] - 1
+
+    assert analytics.rolling_volatility.shape == (len(returns) - 19, price_matrix.shape[1])
+    for end in (20, 150, len(returns)):
+        window = returns[end - 20:end]
+        np.testing.assert_allclose(analytics.rolling_volatility[end - 20], window.std(axis=0, ddof=1) * np.sqrt(252), rtol=1e-8)
+
+def test_kernel_handles_ragged_and_degenerate_series():
+    prices = np.array([
+        [np.nan, 10.0, 5.0],
+        [100.0, 10.0, 0.0],
+        [110.0, 10.0, 4.0],
+        [99.0, 10.0, 6.0],
+    ])
+    analytics = compute_series_analytics(prices)
+
+    assert analytics.total_return[0] == pytest.approx(-0.01)
+    assert analytics.max_drawdown[0] == pytest.approx(0.1)
+    assert analytics.volatility[1] == 0.0 and analytics.sharpe_ratio[1] == 0.0
+    assert analytics.observations.tolist() == [2, 3, 2]  # The return after a zero price is dropped
+    assert analytics.correlation[0, 1] == 0.0 and analytics.correlation[1, 1] == 1.0
+
+def test_kernel_covariance_uses_pairwise_overlap_for_ragged_series(price_matrix):
+    series = price_matrix[:, 0]
+    ragged = np.column_stack([series, np.concatenate([np.full(200, np.nan), series[200:]])])
+    analytics = compute_series_analytics(ragged)
+
+    overlap = series[201:] / series[200:-1] - 1
+    assert analytics.correlation[0, 1] == pytest.approx(1.0)
+    assert analytics.covariance[0, 1] == pytest.approx(overlap.var(ddof=1)) == pytest.approx(analytics.covariance[1, 1])
+
+def test_correlation_matrix_zeroes_constant_columns():
+    matrix = np.array([[1.0, 2.0, 5.0], [2.0, 4.0, 5.0], [3.0, 7.0, 5.0]])
+    correlation = correlation_matrix(matrix)
+
+    assert correlation[0, 1] == pytest.approx(np.corrcoef(matrix[:, 0], matrix[:, 1])[0, 1])
+    assert correlation[0, 2] == 0.0
+    assert np.diag(correlation).tolist() == [1.0, 1.0, 1.0]
+
+# --- Service ---
+
+@pytest.mark.asyncio
+async def test_portfolio_performance_uses_kernel(calculation_service, price_matrix):
+    values = price_matrix[:, 0].tolist()
+    metrics = await calculation_service.calculate_portfolio_performance([], values)
+    expected = loop_metrics(values)
+
+    assert metrics.total_return == round(expected["total_return"] * 100, 2)
+    assert metrics.volatility == round(expected["volatility"] * 100, 2)
+    assert metrics.max_drawdown == round(expected["max_drawdown"] * 100, 2)
+    assert metrics.var_95 == round(expected["var_95"] * 100, 2)
+
+@pytest.mark.asyncio
+async def test_market_correlation_groups_equal_length_series(calculation_service):
+    price_data = {"A": [1.0, 2.0, 3.0, 4.0], "B": [2.0, 4.0, 6.0, 8.5], "C": [4.0, 3.0, 2.0, 1.0], "D": [1.0, 2.0]}
+    matrix = await calculation_service.calculate_market_correlation(price_data)
+
+    assert matrix["A"]["A"] == 1.0
+    assert matrix["A"]["C"] == -1.0
+    assert matrix["A"]["B"] == round(float(np.corrcoef(price_data["A"], price_data["B"])[0, 1]), 3)
+    assert matrix["A"]["D"] == 0 and matrix["D"]["D"] == 1.0
+
+@pytest.mark.asyncio
+async def test_risk_metrics_use_price_history_covariance(calculation_service, price_matrix):
+    positions = [{"symbol": "A", "value": 6000}, {"symbol": "B", "value": 4000}]
+    history = {"A": price_matrix[:, 0].tolist(), "B": price_matrix[:, 1].tolist()}
+    metrics = await calculation_service.calculate_risk_metrics(positions, price_history=history)
+
+    returns = price_matrix[1:, :2] / price_matrix[:-1, :2] - 1
+    weights = np.array([0.6, 0.4])
+    expected_var = 10000 * math.sqrt(weights @ np.cov(returns.T) @ weights) * math.sqrt(252) * 1.645
+    assert metrics.portfolio_var == round(expected_var, 2)
+    assert metrics.correlation_risk == round(abs(np.corrcoef(returns.T)[0, 1]), 2)
+
+    fallback = await calculation_service.calculate_risk_metrics(positions)
+    assert fallback.portfolio_var == round(10000 * 0.02 * 1.645, 2)
+    assert fallback.correlation_risk == 0.5
+
+@pytest.mark.asyncio
+async def test_universe_performance_reports_every_symbol(calculation_service, price_matrix):
+    price_data = {f"S{i}": price_matrix[:, i].tolist() for i in range(price_matrix.shape[1])}
+    result = await calculation_service.calculate_universe_performance(price_data, rolling_window=30)
+
+    assert set(result["performance"]) == set(price_data)
+    assert result["performance"]["S3"].max_drawdown == round(loop_metrics(price_data["S3"])["max_drawdown"] * 100, 2)
+    assert result["correlation"]["S0"]["S0"] == 1.0
+    assert set(result["rolling_volatility"]) == set(price_data)
@@ -0,0 +1,93 @@
+import pytest
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from python_ai_services.services.entity_index import EntityIndex
+
+# --- Fixtures ---
+
+DOCUMENTS = {
+    "strategy_1": ("strategy", "strategy momentum breakout rsi 14"),
+    "strategy_2": ("strategy", "strategy mean reversion bollinger bands"),
+    "trade_1": ("trade", "trade AAPL pnl_120 momentum breakout"),
+    "trade_2": ("trade", "trade BTC-USD pnl_-40 mean reversion"),
+    "decision_1": ("decision", "decision buy AAPL momentum breakout confidence_0.8"),
+    "agent_1": ("agent", "agent momentum_bot trades_12 pnl_300"),
+}
+
+@pytest.fixture
+def vectorizer():
+    vectorizer = TfidfVectorizer()
+    vectorizer.fit([text for _, text in DOCUMENTS.values()])
+    return vectorizer
+
+@pytest.fixture
+def index(vectorizer):
+    index = EntityIndex()
+    node_ids = list(DOCUMENTS)
+    index.add_many(node_ids, [DOCUMENTS[n][0] for n in node_ids], vectorizer.transform([DOCUMENTS[n][1] for n in node_ids]))
+    return index
+
+def brute_force(vectorizer, query, node_ids):
+    matrix = vectorizer.transform([DOCUMENTS[n][1] for n in node_ids])
+    scores = cosine_similarity(vectorizer.transform([query]), matrix)[0]
+    return sorted(zip(node_ids, scores), key=lambda hit: -hit[1])
+
+# --- Tests ---
+
+def test_top_k_matches_brute_force_cosine(index, vectorizer):
+    query = "momentum breakout"
+
+    hits = index.search(vectorizer.transform([query]), limit=3)
+    expected = brute_force(vectorizer, query, list(DOCUMENTS))[:3]
+
+    assert [node_id for node_id, _ in hits] == [node_id for node_id, _ in expected]
+    np.testing.assert_allclose([score for _, score in hits], [score for _, score in expected])
+
+def test_type_partition_limits_results(index, vectorizer):
+    hits = index.search(vectorizer.transform(["momentum breakout"]), node_type="trade", limit=10)
+
+    assert [node_id for node_id, _ in hits] == ["trade_1", "trade_2"]
+    assert index.search(vectorizer.transform(["momentum"]), node_type="unknown") == []
+
+def test_incremental_add_replace_and_remove(index, vectorizer):
+    query = vectorizer.transform(["mean reversion bollinger"])
+    index.add("strategy_3", "strategy", vectorizer.transform(["strategy mean reversion bollinger bands rsi"]))
+    assert [node_id for node_id, _ in index.search(query, "strategy", 2)] == ["strategy_2", "strategy_3"]
+
+    index.remove("strategy_2")
+    index.add("strategy_3", "strategy", vectorizer.transform(["strategy breakout"]))  # Replace in place
+    hits = index.search(query, "strategy", 5)
+
+    assert "strategy_2" not in dict(hits) and len(hits) == 2
+    assert dict(hits)["strategy_3"] == pytest.approx(0.0)
+    assert len(index) == len(DOCUMENTS) and "strategy_2" not in index
+
+def test_removed_rows_are_compacted(vectorizer):
+    index = EntityIndex(compact_ratio=0.25)
+    node_ids = [f"trade_{i}" for i in range(40)]
+    index.add_many(node_ids, ["trade"] * 40, vectorizer.transform(["trade AAPL momentum"] * 40))
+    index.search(vectorizer.transform(["AAPL"]), "trade")
+
+    for node_id in node_ids[:20]:
+        index.remove(node_id)
+    hits = index.search(vectorizer.transform(["AAPL"]), "trade", limit=50)
+
+    assert sorted(node_id for node_id, _ in hits) == sorted(node_ids[20:])
+    assert index.get_stats()["partitions"]["trade"] == {"entities": 20, "rows": 20}
+
+def test_dense_embeddings_use_the_same_api():
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(500, 32))
+    index = EntityIndex(dense=True)
+    index.add_many([f"agent_{i}" for i in range(500)], ["agent"] * 500, vectors)
+
+    query = vectors[42] + rng.normal(scale=0.01, size=32)
+    hits = index.search(query, "agent", limit=5)
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+    assert hits[0][0] == "agent_42"
+    assert [node_id for node_id, _ in hits] == [f"agent_{i}" for i in expected]
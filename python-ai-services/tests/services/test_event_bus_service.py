@@ -169,3 +169,130 @@ async def test_publish_with_non_async_subscriber_is_skipped(event_bus: EventBusS
         args, _ = mock_log_error.call_args
         assert "is not an async function as expected. Skipping." in args[0]
 
+
+# --- Tests for topic matching ---
+@pytest.mark.asyncio
+async def test_prefix_and_wildcard_subscriptions_match(event_bus: EventBusService):
+    exact_cb = AsyncMock()
+    prefix_cb = AsyncMock()
+    wildcard_cb = AsyncMock()
+    await event_bus.subscribe("MarketInsightEvent", exact_cb)
+    await event_bus.subscribe("Market*", prefix_cb)
+    await event_bus.subscribe("*", wildcard_cb)
+
+    insight = Event(publisher_agent_id="agent1", message_type="MarketInsightEvent", payload={})
+    condition = Event(publisher_agent_id="agent1", message_type="MarketConditionEvent", payload={})
+    signal = Event(publisher_agent_id="agent1", message_type="TradeSignal", payload={})
+    for event in (insight, condition, signal):
+        await event_bus.publish(event)
+
+    exact_cb.assert_called_once_with(insight)
+    assert prefix_cb.call_args_list == [call(insight), call(condition)]
+    assert wildcard_cb.call_args_list == [call(insight), call(condition), call(signal)]
+
+@pytest.mark.asyncio
+async def test_unsubscribe_stops_delivery(event_bus: EventBusService):
+    mock_callback = AsyncMock()
+    await event_bus.subscribe("Market*", mock_callback)
+
+    assert await event_bus.unsubscribe("Market*", mock_callback) is True
+    assert await event_bus.unsubscribe("Market*", mock_callback) is False
+
+    await event_bus.publish(Event(publisher_agent_id="agent1", message_type="MarketInsightEvent", payload={}))
+    mock_callback.assert_not_called()
+
+# --- Tests for queued dispatch ---
+@pytest.mark.asyncio
+async def test_queued_mode_slow_subscriber_does_not_stall_publisher():
+    bus = EventBusService(dispatch_mode="queued")
+    release = asyncio.Event()
+    fast_cb = AsyncMock()
+
+    async def slow_cb(event: Event):
+        await release.wait()
+
+    await bus.subscribe("TradeSignal", slow_cb)
+    await bus.subscribe("TradeSignal", fast_cb)
+
+    events = [Event(publisher_agent_id="agent1", message_type="TradeSignal", payload={"i": i}) for i in range(5)]
+    for event in events:
+        await asyncio.wait_for(bus.publish(event), timeout=1)
+    await asyncio.sleep(0.01)
+
+    assert fast_cb.call_args_list == [call(event) for event in events]
+    release.set()
+    await bus.shutdown()
+
+    metrics = bus.get_metrics()
+    assert metrics["topics"]["TradeSignal"]["published"] == 5
+    assert metrics["topics"]["TradeSignal"]["dispatched"] == 10
+
+@pytest.mark.asyncio
+async def test_queued_mode_drop_oldest_overflow():
+    bus = EventBusService(dispatch_mode="queued", max_queue_size=2)
+    received = []
+    release = asyncio.Event()
+
+    async def callback(event: Event):
+        await release.wait()
+        received.append(event.payload["i"])
+
+    await bus.subscribe("Tick", callback)
+    for i in range(5):
+        await bus.publish(Event(publisher_agent_id="feed", message_type="Tick", payload={"i": i}))
+        await asyncio.sleep(0)  # Let the consumer pick up the first event
+
+    release.set()
+    await bus.shutdown()
+
+    assert received == [0, 3, 4]
+    assert bus.get_metrics()["subscribers"][0]["dropped"] == 2
+
+@pytest.mark.asyncio
+async def test_queued_mode_coalesces_by_key():
+    bus = EventBusService(dispatch_mode="queued")
+    received = []
+    release = asyncio.Event()
+
+    async def callback(event: Event):
+        await release.wait()
+        received.append((event.payload["symbol"], event.payload["price"]))
+
+    await bus.subscribe("Quote", callback, overflow_policy="coalesce", coalesce_key=lambda e: e.payload["symbol"])
+    quotes = [("BTC", 1), ("ETH", 1), ("BTC", 2), ("BTC", 3), ("ETH", 2)]
+    for symbol, price in quotes:
+        await bus.publish(Event(publisher_agent_id="feed", message_type="Quote", payload={"symbol": symbol, "price": price}))
+
+    release.set()
+    await bus.shutdown()
+
+    assert received == [("BTC", 3), ("ETH", 2)]
+    assert bus.get_metrics()["subscribers"][0]["coalesced"] == 3
+
+@pytest.mark.asyncio
+async def test_queued_mode_block_policy_applies_backpressure():
+    bus = EventBusService(dispatch_mode="queued", max_queue_size=1, overflow_policy="block")
+    release = asyncio.Event()
+    received = []
+
+    async def callback(event: Event):
+        await release.wait()
+        received.append(event.payload["i"])
+
+    await bus.subscribe("Tick", callback)
+    await bus.publish(Event(publisher_agent_id="feed", message_type="Tick", payload={"i": 0}))
+    await asyncio.sleep(0)
+    await bus.publish(Event(publisher_agent_id="feed", message_type="Tick", payload={"i": 1}))
+
+    blocked = asyncio.create_task(bus.publish(Event(publisher_agent_id="feed", message_type="Tick", payload={"i": 2})))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    release.set()
+    await asyncio.wait_for(blocked, timeout=1)
+    await bus.shutdown()
+    assert received == [0, 1, 2]
+
+def test_invalid_dispatch_mode_rejected():
+    with pytest.raises(ValueError):
+        EventBusService(dispatch_mode="threaded")
@@ -0,0 +1,54 @@
+import pytest
+import json
+
+import networkx as nx
+
+from python_ai_services.services.graph_snapshot import save_graph_snapshot, load_graph_snapshot
+
+# --- Fixtures ---
+
+@pytest.fixture
+def graph():
+    graph = nx.DiGraph()
+    graph.add_node("strategy_s1", type="strategy", name="momentum", parameters={"rsi": 14}, created_at="2024-01-01T00:00:00")
+    graph.add_node("trade_t1", type="trade", symbol="AAPL", pnl=120.5, entry_price=190.0, exit_time=None)
+    graph.add_node("trade_t2", type="trade", symbol="MSFT", pnl=float("nan"), entry_price=410.0)
+    graph.add_node("agent_a1", type="agent", agent_id="a1", trade_count=2, total_pnl=80.5)
+    graph.add_edge("strategy_s1", "trade_t1", relationship="executed")
+    graph.add_edge("agent_a1", "trade_t1", relationship="performed")
+    graph.add_edge("agent_a1", "trade_t2", relationship="performed")
+    return graph
+
+# --- Tests ---
+
+def test_round_trip_preserves_nodes_attributes_and_edges(graph, tmp_path):
+    size = save_graph_snapshot(graph, tmp_path, {"watermarks": {"trades": "2024-01-02T00:00:00+00:00"}})
+    loaded, metadata = load_graph_snapshot(tmp_path)
+
+    assert size > 0 and metadata["watermarks"]["trades"] == "2024-01-02T00:00:00+00:00"
+    assert set(loaded.edges(data="relationship")) == set(graph.edges(data="relationship"))
+    assert loaded.nodes["strategy_s1"] == graph.nodes["strategy_s1"]
+    assert loaded.nodes["agent_a1"]["trade_count"] == 2 and isinstance(loaded.nodes["agent_a1"]["trade_count"], int)
+    assert loaded.nodes["trade_t1"] == graph.nodes["trade_t1"]  # Explicit None kept
+    assert "exit_time" not in loaded.nodes["trade_t2"]  # Absent attribute stays absent
+    assert loaded.nodes["trade_t2"]["pnl"] != loaded.nodes["trade_t2"]["pnl"]  # Real NaN kept
+
+def test_numeric_attributes_are_stored_as_columns(graph, tmp_path):
+    save_graph_snapshot(graph, tmp_path)
+    manifest = json.loads((tmp_path / "graph.json").read_text())
+
+    assert manifest["columns"]["trade"]["pnl"]["kind"] == "float"
+    assert manifest["columns"]["agent"]["trade_count"]["kind"] == "int"
+    assert manifest["columns"]["strategy"]["parameters"]["kind"] == "json"
+    assert manifest["edge_count"] == 3
+
+def test_mismatched_or_missing_snapshot_is_ignored(graph, tmp_path):
+    assert load_graph_snapshot(tmp_path) is None
+
+    save_graph_snapshot(graph, tmp_path)
+    stale_manifest = (tmp_path / "graph.json").read_text()
+    graph.add_node("trade_t3", type="trade", symbol="NVDA", pnl=1.0, entry_price=1.0)
+    save_graph_snapshot(graph, tmp_path)
+    (tmp_path / "graph.json").write_text(stale_manifest)  # Crash after the arrays were replaced
+
+    assert load_graph_snapshot(tmp_path) is None
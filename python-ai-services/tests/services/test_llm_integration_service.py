@@ -0,0 +1,174 @@
+import pytest
+import asyncio
+
+from python_ai_services.services.llm_integration_service import LLMIntegrationService, LLMConfig
+from python_ai_services.services.llm_response_cache import LLMResponseCache
+from python_ai_services.models.llm_models import LLMProvider, LLMTaskType, LLMRequest, LLMResponse
+
+# --- Fixtures ---
+
+class StubProvider:
+    """Stands in for the Gemini client: counts calls and echoes the prompt"""
+
+    def __init__(self, delay=0.02, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+
+    async def __call__(self, request, model_name):
+        self.calls.append(request.prompt)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("provider unavailable")
+        return {"content": f"analysis of: {request.prompt}", "tokens_used": 500}
+
+@pytest.fixture
+def stub_provider():
+    return StubProvider()
+
+@pytest.fixture
+def llm_service(stub_provider):
+    service = LLMIntegrationService(response_cache=LLMResponseCache(max_entries=100, ttl_seconds=60))
+    service.providers[LLMProvider.GOOGLE_GEMINI] = object()
+    service.provider_configs[LLMProvider.GOOGLE_GEMINI] = LLMConfig(
+        provider=LLMProvider.GOOGLE_GEMINI, model_name="gemini-pro", api_key=None, endpoint=None,
+        max_tokens=1000, temperature=0.2, timeout=30, cost_per_token=0.00001, rate_limit_rpm=60, rate_limit_tpm=100000
+    )
+    service._process_gemini = stub_provider
+    return service
+
+def analysis_request(prompt, task_type=LLMTaskType.MARKET_ANALYSIS, **context):
+    return LLMRequest(task_type=task_type, prompt=prompt, context=context)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+# --- Service ---
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_provider_call(llm_service, stub_provider):
+    requests = [analysis_request("Summarize BTC-USD momentum", symbol="BTC-USD") for _ in range(20)]
+
+    responses = await asyncio.gather(*(
+        llm_service.process_llm_request(request, preferred_provider=LLMProvider.GOOGLE_GEMINI) for request in requests
+    ))
+
+    assert len(stub_provider.calls) == 1
+    assert {response.content for response in responses} == {"analysis of: Summarize BTC-USD momentum"}
+    assert llm_service.cache_savings["hits"]["coalesced"] == 19
+    assert llm_service.token_usage["google_gemini"] == 500
+    assert llm_service.cache_savings["tokens_saved"] == 19 * 500
+    assert llm_service.cache_savings["cost_saved"] == pytest.approx(19 * 500 * 0.00001)
+
+@pytest.mark.asyncio
+async def test_repeated_request_is_served_from_cache(llm_service, stub_provider):
+    request = analysis_request("Risk outlook for ETH", task_type=LLMTaskType.RISK_ASSESSMENT)
+
+    await llm_service.process_llm_request(request, preferred_provider=LLMProvider.GOOGLE_GEMINI)
+    await llm_service.process_llm_request(request, preferred_provider=LLMProvider.GOOGLE_GEMINI)
+    await llm_service.process_llm_request(
+        analysis_request("Risk outlook for SOL", task_type=LLMTaskType.RISK_ASSESSMENT),
+        preferred_provider=LLMProvider.GOOGLE_GEMINI
+    )
+
+    assert stub_provider.calls == ["Risk outlook for ETH", "Risk outlook for SOL"]
+    assert llm_service.cache_savings["hits"]["exact"] == 1
+    status = await llm_service.get_service_status()
+    assert status["cache_size"] == 2 and status["cache"]["misses"] == 2
+
+@pytest.mark.asyncio
+async def test_failures_reach_every_waiter_and_are_not_cached(llm_service, stub_provider):
+    stub_provider.fail = True
+    request = analysis_request("Summarize SPY breadth")
+
+    results = await asyncio.gather(*(
+        llm_service.process_llm_request(request, preferred_provider=LLMProvider.GOOGLE_GEMINI) for _ in range(5)
+    ), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(stub_provider.calls) == 1
+
+    stub_provider.fail = False
+    response = await llm_service.process_llm_request(request, preferred_provider=LLMProvider.GOOGLE_GEMINI)
+    assert response.content == "analysis of: Summarize SPY breadth"
+    assert len(stub_provider.calls) == 2
+
+@pytest.mark.asyncio
+async def test_similarity_tier_serves_near_duplicate_market_analysis(stub_provider, llm_service):
+    llm_service.response_cache = LLMResponseCache(similarity_threshold=0.8)
+    ask = lambda request: llm_service.process_llm_request(request, preferred_provider=LLMProvider.GOOGLE_GEMINI)
+
+    await ask(analysis_request("Give me a market analysis of BTC-USD trend, momentum and support levels today"))
+    near = await ask(analysis_request("Give a market analysis of the BTC-USD trend, momentum and support levels for today"))
+    await ask(analysis_request("Give me a market analysis of AAPL earnings risk and implied volatility"))
+    await ask(analysis_request(
+        "Give me a market analysis of BTC-USD trend, momentum and support levels today",
+        task_type=LLMTaskType.TRADING_DECISION
+    ))
+
+    assert near.content.startswith("analysis of: Give me a market analysis of BTC-USD")
+    assert len(stub_provider.calls) == 3
+    assert llm_service.cache_savings["hits"]["similar"] == 1
+
+# --- Cache ---
+
+def make_response(content="ok"):
+    return LLMResponse(
+        request_id="r", provider=LLMProvider.GEMINI_FLASH, content=content,
+        tokens_used=10, processing_time=0.1, confidence_score=0.8
+    )
+
+def test_cache_is_bounded_lru_with_ttl():
+    clock = FakeClock()
+    cache = LLMResponseCache(max_entries=2, ttl_seconds=10, clock=clock)
+    first, second, third = (analysis_request(prompt) for prompt in ("a", "b", "c"))
+
+    cache.put(first, make_response("a"))
+    cache.put(second, make_response("b"))
+    assert cache.get(first).source == "exact"  # Touch: "b" is now least recently used
+    cache.put(third, make_response("c"))
+
+    assert cache.get(second) is None
+    assert len(cache) == 2 and cache.get_stats()["evictions"] == 1
+
+    clock.now = 11
+    assert cache.get(first) is None
+    assert cache.purge_expired() == 1 and len(cache) == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_first_caller_does_not_cancel_waiters():
+    cache = LLMResponseCache()
+    request = analysis_request("Summarize QQQ flows")
+    calls = []
+
+    async def compute():
+        calls.append(request.prompt)
+        await asyncio.sleep(0.02)
+        return make_response("qqq")
+
+    first = asyncio.create_task(cache.get_or_compute(request, compute))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_compute(request, compute))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    response, lookup = await waiter
+    assert response.content == "qqq" and lookup.source == "coalesced"
+    assert first.cancelled() and len(calls) == 1
+    assert cache.get(request).source == "exact" and cache.get_stats()["inflight"] == 0
+
+def test_similarity_is_scoped_and_thresholded():
+    cache = LLMResponseCache(similarity_threshold=0.8)
+    cache.put(analysis_request("BTC-USD trend and momentum summary"), make_response("btc"))
+
+    assert cache.get(analysis_request("BTC-USD trend and momentum summary please")).source == "similar"
+    assert cache.get(analysis_request("ETH-USD trend and momentum summary")) is None
+    other_system_prompt = analysis_request("BTC-USD trend and momentum summary please")
+    other_system_prompt.system_prompt = "You are a contrarian trader"
+    assert cache.get(other_system_prompt) is None
+
+    with pytest.raises(ValueError):
+        LLMResponseCache(similarity_threshold=1.5)
@@ -0,0 +1,208 @@
+import pytest
+import asyncio
+import time
+
+from python_ai_services.core.llm_router import LLMRouter
+from python_ai_services.services.llm_integration_service import LLMIntegrationService, LLMConfig
+from python_ai_services.services.llm_response_cache import LLMResponseCache
+from python_ai_services.services.llm_scheduler import LLMScheduler, request_priority
+from python_ai_services.models.llm_models import LLMProvider, LLMTaskType, LLMRequest
+
+# --- Fixtures ---
+
+PROVIDER = LLMProvider.GEMINI_FLASH
+
+class TrackingCall:
+    """Provider call stand-in recording peak concurrency and completion order"""
+
+    def __init__(self, delay=0.02, tokens_used=100):
+        self.delay = delay
+        self.tokens_used = tokens_used
+        self.active = 0
+        self.peak = 0
+        self.order = []
+
+    def __call__(self, label):
+        async def call():
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(self.delay)
+            self.active -= 1
+            self.order.append(label)
+            return type("Result", (), {"tokens_used": self.tokens_used})()
+        return call
+
+def make_request(task_type=LLMTaskType.MARKET_ANALYSIS, prompt="x" * 40, **fields):
+    return LLMRequest(task_type=task_type, prompt=prompt, **fields)
+
+def make_scheduler(max_concurrency=2, tokens_per_minute=1_000_000, outcomes=None, timings=None):
+    async def on_complete(provider, latency, success, tokens, queue_wait):
+        if outcomes is not None:
+            outcomes.append((provider, success, tokens))
+        if timings is not None:
+            timings.append((latency, queue_wait))
+    return LLMScheduler(lambda provider: (max_concurrency, tokens_per_minute), on_complete)
+
+# --- Scheduler ---
+
+@pytest.mark.asyncio
+async def test_lane_caps_concurrency_and_reports_outcomes():
+    outcomes = []
+    scheduler = make_scheduler(max_concurrency=3, outcomes=outcomes)
+    call = TrackingCall()
+
+    await asyncio.gather(*(scheduler.submit(PROVIDER, make_request(), call(i)) for i in range(12)))
+
+    assert call.peak == 3
+    assert len(outcomes) == 12 and all(success and tokens == 100 for _, success, tokens in outcomes)
+    stats = scheduler.get_stats()[PROVIDER.value]
+    assert stats["completed"] == 12 and stats["active"] == 0 and stats["tokens_used"] == 1200
+
+@pytest.mark.asyncio
+async def test_queued_requests_dispatch_by_priority():
+    scheduler = make_scheduler(max_concurrency=1)
+    call = TrackingCall(delay=0.01)
+
+    blocker = asyncio.create_task(scheduler.submit(PROVIDER, make_request(), call("blocker")))
+    await asyncio.sleep(0)  # The blocker holds the only slot
+    queued = [
+        scheduler.submit(PROVIDER, make_request(LLMTaskType.AGENT_COMMUNICATION), call("chat")),
+        scheduler.submit(PROVIDER, make_request(LLMTaskType.MARKET_ANALYSIS), call("analysis")),
+        scheduler.submit(PROVIDER, make_request(LLMTaskType.RISK_ASSESSMENT), call("risk")),
+        scheduler.submit(PROVIDER, make_request(LLMTaskType.AGENT_COMMUNICATION, priority=10), call("urgent chat")),
+    ]
+    await asyncio.gather(blocker, *queued)
+
+    assert call.order == ["blocker", "urgent chat", "risk", "analysis", "chat"]
+
+def test_explicit_priority_overrides_task_default():
+    assert request_priority(make_request(LLMTaskType.RISK_ASSESSMENT)) == 9
+    assert request_priority(make_request(LLMTaskType.RISK_ASSESSMENT, priority=2)) == 2
+
+@pytest.mark.asyncio
+async def test_token_budget_delays_requests_until_refilled():
+    # 6000 tokens/minute refills 100 tokens/second; each request reserves 10 prompt + 50 output tokens
+    scheduler = make_scheduler(max_concurrency=10, tokens_per_minute=6000)
+    call = TrackingCall(delay=0, tokens_used=60)
+    lane = scheduler.lane(PROVIDER)
+    lane.tokens = 120
+
+    started = time.monotonic()
+    await asyncio.gather(*(scheduler.submit(PROVIDER, make_request(max_tokens=50), call(i)) for i in range(4)))
+
+    assert time.monotonic() - started >= 1.0  # Two requests' worth of tokens had to refill
+    assert lane.get_stats()["max_queue_wait"] >= 1.0
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_its_slot():
+    scheduler = make_scheduler(max_concurrency=1)
+    call = TrackingCall(delay=0.02)
+
+    blocker = asyncio.create_task(scheduler.submit(PROVIDER, make_request(), call("blocker")))
+    await asyncio.sleep(0)
+    abandoned = asyncio.create_task(scheduler.submit(PROVIDER, make_request(), call("abandoned")))
+    await asyncio.sleep(0)
+    abandoned.cancel()
+    await blocker
+    await scheduler.submit(PROVIDER, make_request(), call("next"))
+
+    assert call.order == ["blocker", "next"]
+    assert scheduler.lane(PROVIDER).active == 0
+
+@pytest.mark.asyncio
+async def test_latency_excludes_queue_wait():
+    timings = []
+    scheduler = make_scheduler(max_concurrency=1, timings=timings)
+    call = TrackingCall(delay=0.05)
+
+    await asyncio.gather(*(scheduler.submit(PROVIDER, make_request(), call(i)) for i in range(3)))
+
+    latencies, waits = zip(*timings)
+    assert all(0.04 < latency < 0.09 for latency in latencies)  # Service time only
+    assert waits[0] < 0.01 and waits[2] >= 0.09  # The last request queued behind two calls
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_releases_its_slot_and_reports():
+    outcomes = []
+    scheduler = make_scheduler(max_concurrency=1, outcomes=outcomes)
+
+    async def chunks():
+        for chunk in ("a", "b", "c"):
+            yield chunk
+
+    stream = scheduler.stream(PROVIDER, make_request(), chunks)
+    assert await stream.__anext__() == "a"
+    await stream.aclose()  # The consumer stopped reading
+    await asyncio.gather(*scheduler.pending_reports)
+
+    assert scheduler.lane(PROVIDER).active == 0
+    assert outcomes == [(PROVIDER, False, 0)]
+    assert scheduler.get_stats()[PROVIDER.value]["failed"] == 1
+
+# --- Service ---
+
+@pytest.fixture
+def llm_service():
+    service = LLMIntegrationService(response_cache=LLMResponseCache(max_entries=100, ttl_seconds=60))
+    service.providers[PROVIDER] = object()
+    service.provider_configs[PROVIDER] = LLMConfig(
+        provider=PROVIDER, model_name="gemini-flash", api_key=None, endpoint=None, max_tokens=1000,
+        temperature=0.2, timeout=30, cost_per_token=0.0, rate_limit_rpm=60, rate_limit_tpm=100000, max_concurrency=2
+    )
+    return service
+
+@pytest.mark.asyncio
+async def test_service_requests_share_the_provider_lane(llm_service):
+    call = TrackingCall()
+
+    async def process(request, provider):
+        result = await call(request.prompt)()
+        return {"content": request.prompt, "tokens_used": result.tokens_used}
+
+    llm_service._process_gemini = process
+    await asyncio.gather(*(
+        llm_service.process_llm_request(make_request(prompt=f"prompt {i}"), preferred_provider=PROVIDER)
+        for i in range(6)
+    ))
+
+    assert call.peak == 2
+    status = await llm_service.get_service_status()
+    assert status["scheduler"][PROVIDER.value]["completed"] == 6
+    assert llm_service.router.provider_performance[PROVIDER]["total_requests"] == 6
+
+@pytest.mark.asyncio
+async def test_streamed_response_is_cached(llm_service):
+    async def stream(provider, request):
+        for chunk in ("Support ", "holds ", "at 42k."):
+            await asyncio.sleep(0)
+            yield chunk
+
+    llm_service._stream_with_provider = stream
+    request = make_request(prompt="Where is BTC support?")
+
+    chunks = [chunk async for chunk in llm_service.stream_llm_request(request, preferred_provider=PROVIDER)]
+    replay = [chunk async for chunk in llm_service.stream_llm_request(request, preferred_provider=PROVIDER)]
+    response = await llm_service.process_llm_request(request, preferred_provider=PROVIDER)
+
+    assert chunks == ["Support ", "holds ", "at 42k."]
+    assert replay == ["Support holds at 42k."]
+    assert response.content == "Support holds at 42k." and response.metadata["streamed"]
+    assert llm_service.cache_savings["hits"]["exact"] == 2
+
+# --- Router feedback ---
+
+@pytest.mark.asyncio
+async def test_router_prefers_measurably_faster_fallback():
+    router = LLMRouter()
+    decision = await router.select_provider(LLMTaskType.MARKET_ANALYSIS, complexity=5)
+    primary, fallback = decision.primary_provider, decision.fallback_provider
+
+    for _ in range(router.min_samples_for_routing):
+        await router.update_performance(primary, 6.0, True, 0.0)
+        await router.update_performance(fallback, 1.0, True, 0.0)
+    rerouted = await router.select_provider(LLMTaskType.MARKET_ANALYSIS, complexity=5)
+    assert (rerouted.primary_provider, rerouted.fallback_provider) == (fallback, primary)
+
+    router.provider_performance[primary]["updated_at"] -= router.probe_interval_seconds + 1
+    probe = await router.select_provider(LLMTaskType.MARKET_ANALYSIS, complexity=5)
+    assert probe.primary_provider == primary  # Stale numbers: let the primary through to re-measure
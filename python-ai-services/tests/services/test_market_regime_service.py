@@ -0,0 +1,164 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from python_ai_services.services.market_regime_service import (
+    MarketRegimeService, MarketRegime, MarketData, INDICATOR_NAMES
+)
+
+# --- Fixtures ---
+
+class QuietRegimeService(MarketRegimeService):
+    """No background monitoring loop; tests trigger detection explicitly"""
+
+    def _start_regime_monitoring(self):
+        pass
+
+@pytest.fixture
+def service():
+    return QuietRegimeService()
+
+# --- Helpers ---
+
+def make_bars(count, seed=0, drift=0.0, scale=0.02, start=100.0):
+    rng = np.random.default_rng(seed)
+    closes = start * np.exp(np.cumsum(rng.normal(drift, scale, count)))
+    opens = np.concatenate([[start], closes[:-1]])
+    highs = np.maximum(opens, closes) * (1 + rng.uniform(0, 0.01, count))
+    lows = np.minimum(opens, closes) * (1 - rng.uniform(0, 0.01, count))
+    return [
+        {"open": o, "high": h, "low": l, "close": c, "volume": 1000.0}
+        for o, h, l, c in zip(opens, highs, lows, closes)
+    ]
+
+def reference_indicators(bars):
+    """The original pandas recompute, returning every bar's values instead of only the last"""
+    df = pd.DataFrame(bars)
+    out = pd.DataFrame(index=df.index)
+    out['sma_20'] = df['close'].rolling(window=20).mean()
+    out['sma_50'] = df['close'].rolling(window=50).mean()
+    out['ema_12'] = df['close'].ewm(span=12).mean()
+    out['ema_26'] = df['close'].ewm(span=26).mean()
+    delta = df['close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    out['rsi'] = 100 - (100 / (1 + gain / loss))
+    prev_close = df['close'].shift(1)
+    tr = np.maximum(df['high'] - df['low'], np.maximum(abs(df['high'] - prev_close), abs(df['low'] - prev_close)))
+    out['atr'] = tr.rolling(window=14).mean()
+    std = df['close'].rolling(window=20).std()
+    out['bb_upper'] = out['sma_20'] + std * 2
+    out['bb_lower'] = out['sma_20'] - std * 2
+    out['macd'] = out['ema_12'] - out['ema_26']
+    up, down = df['high'] - df['high'].shift(1), df['low'].shift(1) - df['low']
+    dm_plus = pd.Series(np.where(up > down, np.maximum(up, 0), 0))
+    dm_minus = pd.Series(np.where(down > up, np.maximum(down, 0), 0))
+    di_plus = 100 * (dm_plus.rolling(window=14).mean() / out['atr'])
+    di_minus = 100 * (dm_minus.rolling(window=14).mean() / out['atr'])
+    dx = 100 * abs(di_plus - di_minus) / (di_plus + di_minus)
+    out['adx'] = dx.rolling(window=14).mean()
+    return out[INDICATOR_NAMES].to_numpy()
+
+def reference_regime(service, closes, indicators):
+    """The original scalar feature calculation and if/elif classification for one symbol"""
+    thresholds = service.regime_thresholds
+    latest = {name: value for name, value in zip(INDICATOR_NAMES, indicators) if value == value}
+    sma_50 = np.mean(closes[-50:])
+    trend_strength = (closes[-1] - sma_50) / sma_50 if sma_50 > 0 else 0
+    trend_consistency = np.sum(np.diff(closes[-20:]) > 0) / 19
+    volatility_level = np.std(np.diff(np.log(closes[-20:]))) * np.sqrt(252)
+    momentum_score = np.tanh(latest['macd'] / closes[-1]) if 'macd' in latest else 0.0
+    adx, rsi = latest.get('adx', 20.0), latest.get('rsi', 50.0)
+
+    if volatility_level > thresholds['volatility_high']:
+        if abs(trend_strength) > 0.3:
+            return MarketRegime.VOLATILE, [min(volatility_level / thresholds['volatility_high'], 1.0)]
+        return MarketRegime.RANGING, [0.6]
+    if volatility_level < thresholds['volatility_low']:
+        return MarketRegime.LOW_VOLATILITY, [1.0 - volatility_level / thresholds['volatility_low']]
+    if abs(trend_strength) > thresholds['trend_strength'] and adx > 25:
+        regime = MarketRegime.TRENDING_UP if trend_strength > 0 else MarketRegime.TRENDING_DOWN
+        return regime, [min(abs(trend_strength) / thresholds['trend_strength'], 1.0), min(adx / 50, 1.0), abs(trend_consistency - 0.5) * 2]
+    if abs(momentum_score) > thresholds['momentum_strong']:
+        if momentum_score > 0 and rsi > 70:
+            regime = MarketRegime.BREAKOUT
+        elif momentum_score < 0 and rsi < 30:
+            regime = MarketRegime.BREAKDOWN
+        else:
+            regime = MarketRegime.VOLATILE
+        return regime, [min(abs(momentum_score) / thresholds['momentum_strong'], 1.0)]
+    if trend_strength > 0.2 and 40 < rsi < 60 and momentum_score > 0.1:
+        return MarketRegime.RECOVERY, [0.7]
+    if abs(trend_strength) < 0.2 and volatility_level < 0.5:
+        return MarketRegime.RANGING, [1.0 - abs(trend_strength) / 0.2]
+    return MarketRegime.UNDETERMINED, [0.3]
+
+def stored_indicators(market_data):
+    return market_data.tail(len(market_data))[:, len(MarketData.COLUMNS) - len(INDICATOR_NAMES):]
+
+# --- Tests ---
+
+@pytest.mark.asyncio
+async def test_incremental_indicators_match_pandas(service):
+    bars = make_bars(120, seed=1)
+    for bar in bars:
+        await service.add_market_data("AAPL", [bar])
+
+    np.testing.assert_allclose(stored_indicators(service.market_data["AAPL"]), reference_indicators(bars), rtol=1e-9, equal_nan=True)
+
+@pytest.mark.asyncio
+async def test_batch_ingest_matches_pandas_and_continues_per_bar(service):
+    bars = make_bars(200, seed=2)
+    await service.add_market_data("BTC", bars[:150])  # Vectorized path
+    for bar in bars[150:]:
+        await service.add_market_data("BTC", [bar])  # Per-bar path seeded by the batch
+
+    np.testing.assert_allclose(stored_indicators(service.market_data["BTC"]), reference_indicators(bars), rtol=1e-9, equal_nan=True)
+
+@pytest.mark.asyncio
+async def test_flat_prices_keep_pandas_nan_semantics(service):
+    bars = [{"open": 10.0, "high": 10.0, "low": 10.0, "close": 10.0, "volume": 0.0}] * 60
+    await service.add_market_data("FLAT", bars[:40])
+    await service.add_market_data("FLAT", bars[40:])
+
+    np.testing.assert_allclose(stored_indicators(service.market_data["FLAT"]), reference_indicators(bars), atol=1e-9, equal_nan=True)
+
+@pytest.mark.asyncio
+async def test_ring_buffer_keeps_the_newest_bars(service):
+    bars = make_bars(700, seed=3)
+    await service.add_market_data("ETH", bars[:450])
+    for start in range(450, 700, 10):
+        await service.add_market_data("ETH", bars[start:start + 10])
+    market_data = service.market_data["ETH"]
+
+    assert len(market_data) == 500
+    np.testing.assert_array_equal(market_data.tail(500, "close"), [bar["close"] for bar in bars[-500:]])
+    np.testing.assert_allclose(stored_indicators(market_data), reference_indicators(bars)[-500:], rtol=1e-9, equal_nan=True)
+
+@pytest.mark.asyncio
+async def test_regime_sweep_matches_scalar_classification(service):
+    scenarios = [(0.0, 0.002), (0.0, 0.08), (0.01, 0.01), (-0.01, 0.01), (0.03, 0.03), (-0.03, 0.03), (0.004, 0.02)]
+    symbols = []
+    for i, (drift, scale) in enumerate(scenarios * 6):
+        symbol = f"SYM{i}"
+        symbols.append(symbol)
+        await service.add_market_data(symbol, make_bars(80, seed=i, drift=drift, scale=scale))
+    await service.add_market_data("SHORT", make_bars(30))
+
+    await service._update_all_regime_detections()
+
+    assert "SHORT" not in service.current_regimes
+    regimes = set()
+    for symbol in symbols:
+        market_data = service.market_data[symbol]
+        expected_regime, factors = reference_regime(service, market_data.tail(50, "close"), market_data.latest_indicators())
+        detection = service.current_regimes[symbol]
+        regimes.add(detection.regime)
+        assert detection.regime == expected_regime
+        assert detection.confidence == pytest.approx(max(0.1, min(0.95, np.mean(factors))))
+        assert set(detection.indicators) == set(INDICATOR_NAMES) and detection.data_points_used == 50
+    assert len(regimes) >= 4
+
+    single = await service.detect_regime("SYM3")
+    assert single.regime == service.regime_history["SYM3"][0].regime and single.regime_duration_days is not None
@@ -0,0 +1,121 @@
+import pytest
+import asyncio
+import json
+
+import numpy as np
+
+from python_ai_services.services.optimization_jobs import (
+    OptimizationJobManager, SearchParameter, SharedArrays, JobStatus,
+    BAYESIAN_OPTIMIZATION, GENETIC_ALGORITHM
+)
+
+# --- Fixtures ---
+
+PARAMETERS = [
+    SearchParameter("short_window", "int", (5, 20), 10),
+    SearchParameter("momentum_threshold", "float", (0.005, 0.05), 0.02),
+    SearchParameter("stop_loss_pct", "float", (0.02, 0.10), 0.05),
+    SearchParameter("mode", "categorical", ["fast", "slow"], "fast"),
+]
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(5)
+    return rng.normal(size=(120, 5)), rng.normal(1.0, 0.5, 120)
+
+@pytest.fixture
+def manager(tmp_path):
+    return OptimizationJobManager(max_workers=2, trial_workers=2, storage_dir=str(tmp_path))
+
+# --- Tests ---
+
+def test_shared_arrays_round_trip(data):
+    features, targets = data
+    shm, handle = SharedArrays.publish({"features": features, "targets": targets})
+    try:
+        attached, views = handle.attach()
+        np.testing.assert_array_equal(views["features"], features)
+        np.testing.assert_array_equal(views["targets"], targets)
+        assert not views["features"].flags.writeable
+        del views
+        attached.close()
+    finally:
+        shm.close()
+        shm.unlink()
+
+@pytest.mark.asyncio
+async def test_evolution_job_runs_off_loop_and_streams_best(manager, data, tmp_path):
+    longest_stall = 0.0
+
+    async def ticker():
+        nonlocal longest_stall
+        loop = asyncio.get_running_loop()
+        while True:
+            before = loop.time()
+            await asyncio.sleep(0.005)
+            longest_stall = max(longest_stall, loop.time() - before)
+
+    ticking = asyncio.create_task(ticker())
+    try:
+        job_id = manager.submit(GENETIC_ALGORITHM, PARAMETERS, *data, budget=4, study_prefix="s1")
+        updates = [update async for update in manager.stream_best(job_id, poll_interval=0.01)]
+        outcome = await manager.result(job_id)
+    finally:
+        ticking.cancel()
+
+    status = manager.status(job_id)
+    assert status["status"] == JobStatus.COMPLETED.value
+    assert longest_stall < status["elapsed_seconds"] / 2  # The search never held the event loop
+    assert updates and [u["value"] for u in updates] == sorted(u["value"] for u in updates)
+    assert outcome["best_value"] == pytest.approx(updates[-1]["value"]) == pytest.approx(status["best_value"])
+    assert outcome["best_parameters"]["mode"] == "fast" and isinstance(outcome["best_parameters"]["short_window"], int)
+    checkpoint = json.loads((tmp_path / f"{outcome['study_name']}.de.json").read_text())
+    assert checkpoint["generations"] == outcome["iterations"]
+    await manager.shutdown()
+
+@pytest.mark.asyncio
+async def test_resubmitted_evolution_study_resumes_from_checkpoint(manager, data, tmp_path):
+    first = await manager.result(manager.submit(GENETIC_ALGORITHM, PARAMETERS, *data, budget=3, study_prefix="s2"))
+    checkpoint = tmp_path / f"{first['study_name']}.de.json"
+    state = json.loads(checkpoint.read_text())
+    state["generations"] = 1  # As if the worker died after one generation
+    checkpoint.write_text(json.dumps(state))
+
+    second = await manager.result(manager.submit(GENETIC_ALGORITHM, PARAMETERS, *data, budget=3, study_prefix="s2"))
+
+    assert second["study_name"] == first["study_name"]
+    assert second["best_value"] >= state["best_value"]  # Seeded with the checkpointed best member
+    assert json.loads(checkpoint.read_text())["generations"] <= 3
+    await manager.shutdown()
+
+@pytest.mark.asyncio
+async def test_cancel_keeps_best_so_far(manager, data):
+    job_id = manager.submit(GENETIC_ALGORITHM, PARAMETERS, *data, budget=10_000, study_prefix="s3")
+    async for update in manager.stream_best(job_id, poll_interval=0.01):
+        assert manager.cancel(job_id)
+        break
+
+    outcome = await asyncio.wait_for(manager.result(job_id), timeout=30)
+
+    assert manager.status(job_id)["status"] == JobStatus.CANCELLED.value
+    assert outcome["iterations"] < 10_000 and not outcome["converged"]
+    assert outcome["best_value"] >= update["value"]
+    assert not manager.cancel(job_id)
+    await manager.shutdown()
+
+@pytest.mark.asyncio
+async def test_bayesian_trials_are_shared_pruned_and_resumable(manager, data):
+    pytest.importorskip("optuna")
+    outcome = await manager.result(manager.submit(BAYESIAN_OPTIMIZATION, PARAMETERS, *data, budget=40, study_prefix="s4"))
+
+    assert outcome["iterations"] >= 40 and outcome["converged"]  # Workers may each finish one trial past the budget
+    assert outcome["trials_pruned"] > 0
+    assert set(outcome["best_parameters"]) == {p.name for p in PARAMETERS}
+
+    resumed = await manager.result(manager.submit(BAYESIAN_OPTIMIZATION, PARAMETERS, *data, budget=40, study_prefix="s4"))
+    assert resumed["iterations"] == outcome["iterations"] and resumed["best_value"] == outcome["best_value"]
+    await manager.shutdown()
+
+def test_unknown_algorithm_is_rejected(manager, data):
+    with pytest.raises(ValueError):
+        manager.submit("grid_search", PARAMETERS, *data, budget=5)
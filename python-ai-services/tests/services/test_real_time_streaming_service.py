@@ -0,0 +1,169 @@
+import pytest
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+from python_ai_services.services.real_time_streaming_service import RealTimeStreamingService, WebSocketConnection
+from python_ai_services.models.enhanced_market_data_models import (
+    PriceData, MarketDataProvider, AssetType, TradingSignal, TimeFrame
+)
+
+# --- Fixtures ---
+
+class FakeWebSocket:
+    def __init__(self):
+        self.closed = False
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    def price_frames(self, symbol=None):
+        return [m for m in self.sent if m["type"] == "price_update" and (symbol is None or m["symbol"] == symbol)]
+
+@pytest.fixture
+def market_data():
+    service = MagicMock()
+    service.generate_trading_signals = AsyncMock(return_value=[])
+    return service
+
+@pytest.fixture
+def streaming(market_data):
+    service = RealTimeStreamingService(market_data)
+    service.stream_config.update(price_source="push", max_client_update_rate=20.0, keyframe_interval=4)
+    service.is_running = True
+    yield service
+    for connection in service.connections.values():
+        connection.writer_task.cancel()
+
+async def connect(service, client_id, symbols):
+    websocket = FakeWebSocket()
+    connection = WebSocketConnection(websocket, client_id)
+    service.connections[client_id] = connection
+    connection.writer_task = asyncio.create_task(service._client_writer_loop(connection))
+    await service._handle_subscribe(connection, {"symbols": symbols})
+    return websocket
+
+BASE_TIME = datetime(2024, 1, 2, 14, 30, tzinfo=timezone.utc)
+
+def tick(symbol, price, seconds=0, volume=1000):
+    return PriceData(
+        symbol=symbol, price=Decimal(str(price)), volume=Decimal(volume), bid=Decimal(str(price - 0.01)),
+        ask=Decimal(str(price + 0.01)), timestamp=BASE_TIME + timedelta(seconds=seconds),
+        provider=MarketDataProvider.POLYGON, asset_type=AssetType.STOCK
+    )
+
+async def settle(service):
+    await asyncio.sleep(2.5 / service.stream_config["max_client_update_rate"])
+
+# --- Frames ---
+
+@pytest.mark.asyncio
+async def test_first_frame_is_a_keyframe_then_only_changes_are_sent(streaming):
+    websocket = await connect(streaming, "c1", ["AAPL"])
+
+    streaming.publish_tick(tick("AAPL", 190.0))
+    await settle(streaming)
+    streaming.publish_tick(tick("AAPL", 190.0, seconds=1, volume=1500))
+    await settle(streaming)
+
+    key, delta = websocket.price_frames()
+    assert key["frame"] == "key" and key["data"]["price"] == 190.0 and key["data"]["provider"] == "polygon"
+    assert delta["frame"] == "delta" and set(delta["data"]) == {"volume", "timestamp"}
+    assert delta["seq"] == key["seq"] + 1
+
+@pytest.mark.asyncio
+async def test_bursts_are_conflated_to_the_latest_quote(streaming):
+    websocket = await connect(streaming, "c1", ["AAPL"])
+    streaming.publish_tick(tick("AAPL", 190.0))
+    await settle(streaming)
+
+    for i in range(50):
+        streaming.publish_tick(tick("AAPL", 190.0 + i / 100, seconds=i / 100))
+    await settle(streaming)
+
+    frames = websocket.price_frames()
+    assert len(frames) <= 3
+    assert frames[-1]["data"]["price"] == pytest.approx(190.49)
+    assert streaming.stream_stats["conflated"] >= 45
+
+@pytest.mark.asyncio
+async def test_periodic_keyframes_and_resync(streaming):
+    websocket = await connect(streaming, "c1", ["MSFT"])
+    for i in range(5):
+        streaming.publish_tick(tick("MSFT", 400 + i, seconds=i))
+        await settle(streaming)
+    assert [frame["frame"] for frame in websocket.price_frames()] == ["key", "delta", "delta", "delta", "key"]
+
+    streaming._handle_resync(streaming.connections["c1"], {"symbols": ["MSFT"]})
+    await settle(streaming)
+    assert websocket.price_frames()[-1]["frame"] == "key"
+
+@pytest.mark.asyncio
+async def test_late_subscriber_starts_from_its_own_keyframe(streaming):
+    early = await connect(streaming, "early", ["AAPL"])
+    streaming.publish_tick(tick("AAPL", 190.0))
+    await settle(streaming)
+
+    late = await connect(streaming, "late", ["AAPL"])
+    await settle(streaming)
+
+    assert late.price_frames()[0]["frame"] == "key" and late.price_frames()[0]["data"]["price"] == 190.0
+    assert len(early.price_frames()) == 1
+
+@pytest.mark.asyncio
+async def test_resync_only_sends_the_clients_own_symbols(streaming):
+    aapl = await connect(streaming, "c1", ["AAPL"])
+    await connect(streaming, "c2", ["MSFT"])
+    streaming.publish_tick(tick("AAPL", 190.0))
+    streaming.publish_tick(tick("MSFT", 400.0))
+    await settle(streaming)
+
+    streaming._handle_resync(streaming.connections["c1"], {"symbols": ["AAPL", "MSFT"]})
+    await settle(streaming)
+
+    assert [frame["symbol"] for frame in aapl.price_frames()] == ["AAPL", "AAPL"]
+    assert streaming._price_frame(streaming.connections["c1"], "MSFT") is None
+
+@pytest.mark.asyncio
+async def test_channels_are_dropped_with_their_last_subscriber(streaming):
+    await connect(streaming, "c1", ["AAPL", "MSFT"])
+    await connect(streaming, "c2", ["AAPL"])
+    streaming.publish_tick(tick("AAPL", 190.0))
+    streaming.publish_tick(tick("MSFT", 400.0))
+    streaming.publish_tick(tick("TSLA", 250.0))  # Nobody subscribes
+    assert set(streaming.channels) == {"AAPL", "MSFT"}
+
+    await streaming._handle_unsubscribe(streaming.connections["c1"], {"symbols": ["MSFT"]})
+    assert set(streaming.channels) == {"AAPL"}
+
+    await streaming._cleanup_connection("c1")
+    assert set(streaming.channels) == {"AAPL"}
+    await streaming._cleanup_connection("c2")
+    assert streaming.channels == {} and streaming.symbol_subscriptions == {}
+
+# --- Signals ---
+
+@pytest.mark.asyncio
+async def test_signals_are_recomputed_only_for_symbols_whose_bar_closed(streaming, market_data):
+    streaming.stream_config["signal_check_interval"] = 0
+    await connect(streaming, "c1", ["AAPL", "MSFT"])
+    market_data.generate_trading_signals.return_value = [TradingSignal(
+        symbol="AAPL", signal_type="BUY", confidence=Decimal("0.8"), timestamp=BASE_TIME,
+        source="rsi", reasoning="oversold", timeframe=TimeFrame.M1
+    )]
+    signal_loop = asyncio.create_task(streaming._signal_monitoring_loop())
+
+    streaming.publish_tick(tick("AAPL", 190.0, seconds=5))
+    streaming.publish_tick(tick("MSFT", 400.0, seconds=5))
+    streaming.publish_tick(tick("MSFT", 400.5, seconds=30))  # Same bar
+    streaming.publish_tick(tick("AAPL", 190.5, seconds=65))  # Closes AAPL's first bar
+    await asyncio.sleep(0.05)
+
+    streaming.is_running = False
+    streaming.bars_closed.set()
+    await signal_loop
+
+    market_data.generate_trading_signals.assert_awaited_once_with("AAPL")
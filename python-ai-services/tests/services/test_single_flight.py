@@ -0,0 +1,63 @@
+import pytest
+import asyncio
+
+from python_ai_services.services.single_flight import SingleFlight
+
+# --- Helpers ---
+
+def counting_call(calls: list, delay: float = 0.02, fail: bool = False):
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("upstream failed")
+        return len(calls)
+    return call
+
+# --- Tests ---
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flight, calls = SingleFlight(), []
+
+    results = await asyncio.gather(*(flight.run("key", counting_call(calls)) for _ in range(5)))
+
+    assert [result for result, _ in results] == [1] * 5
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    assert calls == [1] and len(flight) == 0
+
+@pytest.mark.asyncio
+async def test_failures_reach_every_caller_and_are_not_kept():
+    flight, calls = SingleFlight(), []
+
+    results = await asyncio.gather(*(flight.run("key", counting_call(calls, fail=True)) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    assert (await flight.run("key", counting_call(calls)))[0] == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_first_caller_leaves_the_call_running_for_the_others():
+    flight, calls = SingleFlight(), []
+    first = asyncio.ensure_future(flight.run("key", counting_call(calls)))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(flight.run("key", counting_call(calls)))
+    await asyncio.sleep(0)
+
+    first.cancel()
+
+    assert await asyncio.wait_for(second, timeout=1) == (1, True)
+    assert first.cancelled() and calls == [1]
+
+@pytest.mark.asyncio
+async def test_call_is_cancelled_once_every_caller_has_gone():
+    flight, calls = SingleFlight(), []
+    callers = [asyncio.ensure_future(flight.run("key", counting_call(calls, delay=1))) for _ in range(2)]
+    await asyncio.sleep(0)
+    task = flight.inflight["key"]
+
+    for caller in callers:
+        caller.cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert task.cancelled() and "key" not in flight
@@ -0,0 +1,126 @@
+import pytest
+import asyncio
+from datetime import datetime, timezone
+
+from python_ai_services.services.staged_pipeline import StagedPipeline, PipelineStage
+from python_ai_services.services.data_management_pipeline_service import (
+    DataManagementPipelineService, DataRecord, DataSourceType, ProcessingStage, DataQuality
+)
+
+# --- Helpers ---
+
+def stage(name, fn, parallelism=1, batch_size=10, delay=0.0):
+    async def handler(batch):
+        if delay:
+            await asyncio.sleep(delay)
+        outputs, failures = [], []
+        for item in batch:
+            try:
+                outputs.append(fn(item))
+            except ValueError as e:
+                failures.append((item, str(e)))
+        return outputs, failures
+    return PipelineStage(name, handler, parallelism, batch_size)
+
+def reject_odd(item):
+    if item % 2:
+        raise ValueError(f"odd: {item}")
+    return item
+
+def record(data, data_type=DataSourceType.MARKET_DATA):
+    return DataRecord(
+        record_id=str(id(data)), source_id="market_data_primary", data_type=data_type,
+        stage=ProcessingStage.RAW, quality=DataQuality.MEDIUM, timestamp=datetime.now(timezone.utc),
+        data=data, metadata={}
+    )
+
+# --- Tests ---
+
+@pytest.mark.asyncio
+async def test_results_keep_input_order_and_carry_failures():
+    pipeline = StagedPipeline([stage("double", lambda x: x * 2, parallelism=3, batch_size=4), stage("even", reject_odd)])
+
+    results = await pipeline.run(list(range(10)))
+    await pipeline.stop()
+
+    assert [item for item, error in results] == [x * 2 for x in range(10)]
+    assert all(error is None for _, error in results)
+
+    pipeline = StagedPipeline([stage("even", reject_odd), stage("double", lambda x: x * 2)])
+    results = await pipeline.run([1, 2, 3])
+    metrics = pipeline.get_metrics()
+    await pipeline.stop()
+
+    assert results == [(1, "odd: 1"), (4, None), (3, "odd: 3")]
+    assert metrics["stages"]["even"]["errors"] == 2 and metrics["stages"]["double"]["records_in"] == 1
+
+@pytest.mark.asyncio
+async def test_malformed_handler_result_fails_the_batch_but_not_the_worker():
+    async def handler(batch):
+        if 0 in batch:
+            return [], [("not a failure pair",)]
+        return batch, []
+
+    pipeline = StagedPipeline([PipelineStage("fragile", handler, parallelism=1, batch_size=1)])
+
+    first = await asyncio.wait_for(pipeline.run([0]), timeout=1)
+    second = await asyncio.wait_for(pipeline.run([1]), timeout=1)
+    metrics = pipeline.get_metrics()
+    await pipeline.stop()
+
+    assert first[0][0] == 0 and first[0][1].startswith("Stage fragile failed")
+    assert second == [(1, None)]
+    assert metrics["stages"]["fragile"]["errors"] == 1
+
+@pytest.mark.asyncio
+async def test_parallel_workers_overlap_batches():
+    pipeline = StagedPipeline([stage("slow", lambda x: x, parallelism=4, batch_size=1, delay=0.05)])
+
+    started = asyncio.get_running_loop().time()
+    await pipeline.run(list(range(8)))
+    elapsed = asyncio.get_running_loop().time() - started
+    metrics = pipeline.get_metrics()["stages"]["slow"]
+    await pipeline.stop()
+
+    assert elapsed < 0.3  # Serial would take 0.4s
+    assert metrics["batches"] == 8 and metrics["latency_ms"]["p50"] >= 50
+
+@pytest.mark.asyncio
+async def test_full_queue_blocks_submit():
+    release = asyncio.Event()
+
+    async def blocked(batch):
+        await release.wait()
+        return batch, []
+
+    pipeline = StagedPipeline([PipelineStage("blocked", blocked, 1, 1)], queue_size=2)
+    futures = [await pipeline.submit(i) for i in range(3)]  # One in the worker, two queued
+    pending_submit = asyncio.create_task(pipeline.submit(3))
+    await asyncio.sleep(0.01)
+
+    assert not pending_submit.done() and pipeline.get_metrics()["queued"] == 2
+
+    release.set()
+    futures.append(await pending_submit)
+    assert [result for result, _ in await asyncio.gather(*futures)] == [0, 1, 2, 3]
+    await pipeline.stop()
+
+@pytest.mark.asyncio
+async def test_service_batch_validates_and_scores_records():
+    service = DataManagementPipelineService()
+    records = [
+        record({"symbol": "AAPL", "price": 190.0, "volume": 1000}),
+        record({"symbol": "MSFT", "volume": 10}),
+        record({"symbol": "BTC", "price": -1.0}),
+        record({"symbol": "ETH", "price": 3000.0, "volume": None}),
+    ]
+
+    result = await service.process_data_batch(records)
+    status = await service.get_pipeline_status()
+    await service.pipeline.stop()
+
+    assert result["processed_count"] == 2 and result["error_count"] == 2
+    assert "missing fields: price" in records[1].errors[0] and "invalid price" in records[2].errors[0]
+    assert records[0].quality == DataQuality.HIGH and records[0].metadata["quality_score"] == pytest.approx(1.0, abs=0.01)
+    assert records[3].metadata["quality_score"] < records[0].metadata["quality_score"]
+    assert status["stages"]["validate"]["errors"] == 2 and status["stages"]["quality"]["records_out"] == 2
@@ -0,0 +1,164 @@
+import pytest
+import asyncio
+import json
+from unittest.mock import MagicMock, AsyncMock, patch
+
+from fastapi import WebSocket
+
+from python_ai_services.services import websocket_service
+from python_ai_services.services.websocket_service import ConnectionManager, WebSocketMessage
+
+# --- Fixtures ---
+
+@pytest.fixture
+def manager() -> ConnectionManager:
+    return ConnectionManager()
+
+def create_websocket() -> MagicMock:
+    ws = MagicMock(spec=WebSocket)
+    ws.accept = AsyncMock()
+    ws.send_text = AsyncMock()
+    ws.send_bytes = AsyncMock()
+    return ws
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+# --- Tests ---
+
+@pytest.mark.asyncio
+async def test_broadcast_encodes_once(manager: ConnectionManager):
+    websockets = [create_websocket() for _ in range(10)]
+    for ws in websockets:
+        manager.subscribe(await manager.connect(ws), ["price_update"])
+    await settle()
+
+    with patch.object(websocket_service, "encode_message", wraps=websocket_service.encode_message) as encode:
+        await manager.broadcast_to_subscribers("price_update", {"BTC": 45000})
+        await settle()
+
+    encode.assert_called_once()
+    frames = {ws.send_text.call_args.args[0] for ws in websockets}
+    assert len(frames) == 1
+    assert json.loads(frames.pop())["data"] == {"BTC": 45000}
+
+@pytest.mark.asyncio
+async def test_msgpack_clients_share_one_binary_frame(manager: ConnectionManager):
+    msgpack = pytest.importorskip("msgpack")
+    json_ws = create_websocket()
+    binary_websockets = [create_websocket() for _ in range(3)]
+    manager.subscribe(await manager.connect(json_ws), ["price_update"])
+    for ws in binary_websockets:
+        manager.subscribe(await manager.connect(ws, encoding="msgpack"), ["price_update"])
+    await settle()
+
+    with patch.object(websocket_service, "encode_message", wraps=websocket_service.encode_message) as encode:
+        await manager.broadcast_to_subscribers("price_update", {"BTC": 45000})
+        await settle()
+
+    assert sorted(c.args[1] for c in encode.call_args_list) == ["json", "msgpack"]
+    frames = {ws.send_bytes.call_args.args[0] for ws in binary_websockets}
+    assert len(frames) == 1
+    assert msgpack.unpackb(frames.pop())["data"] == {"BTC": 45000}
+    json_ws.send_bytes.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_slow_client_receives_coalesced_updates(manager: ConnectionManager):
+    release = asyncio.Event()
+    slow_ws = create_websocket()
+
+    async def slow_send(frame):
+        await release.wait()
+
+    connection_id = await manager.connect(slow_ws)  # The connection status frame blocks the sender
+    manager.subscribe(connection_id, ["price_update", "risk_alert"])
+    slow_ws.send_text.side_effect = slow_send
+    await settle()
+
+    for price in range(5):
+        await manager.broadcast_to_subscribers("price_update", {"price": price})
+    await manager.broadcast_to_subscribers("risk_alert", {"level": "warning"})
+    await manager.broadcast_to_subscribers("risk_alert", {"level": "critical"})
+
+    buffer = manager.send_buffers[connection_id]
+    assert buffer.pending == 3
+    assert buffer.coalesced == 4
+
+    release.set()
+    await settle()
+    sent = [json.loads(c.args[0]) for c in slow_ws.send_text.call_args_list[1:]]
+    assert [(m["event_type"], m["data"]) for m in sent] == [
+        ("price_update", {"price": 4}), ("risk_alert", {"level": "warning"}), ("risk_alert", {"level": "critical"})
+    ]
+
+@pytest.mark.asyncio
+async def test_snapshots_of_different_symbols_are_not_coalesced(manager: ConnectionManager):
+    release = asyncio.Event()
+    slow_ws = create_websocket()
+
+    async def slow_send(frame):
+        await release.wait()
+
+    connection_id = await manager.connect(slow_ws)
+    manager.subscribe(connection_id, ["price_update"])
+    slow_ws.send_text.side_effect = slow_send
+    await settle()
+
+    await manager.broadcast_to_subscribers("price_update", {"symbol": "BTC", "price": 1})
+    await manager.broadcast_to_subscribers("price_update", {"symbol": "ETH", "price": 2})
+    await manager.broadcast_to_subscribers("price_update", {"symbol": "BTC", "price": 3})
+
+    assert manager.send_buffers[connection_id].pending == 2
+    release.set()
+    await settle()
+    sent = [json.loads(c.args[0])["data"] for c in slow_ws.send_text.call_args_list[1:]]
+    assert sent == [{"symbol": "ETH", "price": 2}, {"symbol": "BTC", "price": 3}]
+
+@pytest.mark.asyncio
+async def test_full_buffer_drops_snapshots_before_discrete_events():
+    manager = ConnectionManager(max_pending_per_connection=3)
+    slow_ws = create_websocket()
+
+    async def stalled_send(frame):
+        await asyncio.Event().wait()
+
+    slow_ws.send_text.side_effect = stalled_send
+    connection_id = await manager.connect(slow_ws)
+    manager.subscribe(connection_id, ["price_update", "trade_execution"])
+    await settle()
+
+    await manager.broadcast_to_subscribers("price_update", {"price": 1})
+    for trade in range(3):
+        await manager.broadcast_to_subscribers("trade_execution", {"trade": trade})
+
+    buffer = manager.send_buffers[connection_id]
+    assert buffer.pending == 3 and buffer.dropped == 1
+    assert connection_id in manager.active_connections
+
+    await manager.broadcast_to_subscribers("trade_execution", {"trade": 3})
+
+    assert buffer.overflowed
+    assert connection_id not in manager.active_connections
+    assert connection_id not in manager.send_buffers
+
+@pytest.mark.asyncio
+async def test_direct_messages_are_not_coalesced(manager: ConnectionManager):
+    ws = create_websocket()
+    connection_id = await manager.connect(ws)
+    for i in range(3):
+        await manager.send_to_connection(connection_id, WebSocketMessage(event_type="pong", data={"i": i}, timestamp="t"))
+    await settle()
+
+    sent = [json.loads(c.args[0]) for c in ws.send_text.call_args_list]
+    assert [m["event_type"] for m in sent] == ["connection_status", "pong", "pong", "pong"]
+
+@pytest.mark.asyncio
+async def test_failed_send_disconnects(manager: ConnectionManager):
+    ws = create_websocket()
+    ws.send_text.side_effect = RuntimeError("socket closed")
+    connection_id = await manager.connect(ws)
+    await settle()
+
+    assert connection_id not in manager.active_connections
+    assert connection_id not in manager.send_buffers
@@ -0,0 +1,147 @@
+import pytest
+import asyncio
+import importlib
+import json
+
+# --- Fixtures ---
+
+@pytest.fixture(scope="module")
+def oe():
+    """Import the engine module inside a loop; its global instance starts monitoring on creation"""
+    async def import_module():
+        module = importlib.import_module("python_ai_services.optimization_engine")
+        module.optimization_engine.monitoring_active = False
+        await asyncio.sleep(0)
+        return module
+    return asyncio.run(import_module())
+
+@pytest.fixture
+def tiered_cache(oe, tmp_path):
+    return oe.TieredCache(
+        oe.LRUCacheLayer(max_size=2, ttl=300, max_bytes=1_000_000),
+        oe.RedisCacheLayer(oe.InMemoryRedis(), max_size=3, ttl=3600, max_bytes=1_000_000),
+        oe.SQLiteCacheLayer(str(tmp_path / "l3.sqlite"), max_size=10, ttl=86400, max_bytes=1_000_000)
+    )
+
+# --- L1 ---
+
+@pytest.mark.asyncio
+async def test_lru_layer_evicts_least_recently_used(oe):
+    layer = oe.LRUCacheLayer(max_size=2, ttl=300, max_bytes=1_000)
+    await layer.set("a", 1, 10)
+    await layer.set("b", 2, 10)
+    assert await layer.get("a") == 1
+    await layer.set("c", 3, 10)
+
+    assert list(layer.data) == ["a", "c"]
+    assert layer.stats["evictions"] == 1
+    assert layer.bytes_used == 20
+
+@pytest.mark.asyncio
+async def test_lru_layer_enforces_byte_budget(oe):
+    layer = oe.LRUCacheLayer(max_size=100, ttl=300, max_bytes=100)
+    for key in "abcd":
+        await layer.set(key, key, 40)
+    await layer.set("huge", "x", 500)
+
+    assert list(layer.data) == ["c", "d"]
+    assert layer.bytes_used == 80
+    assert layer.stats["rejections"] == 1
+
+@pytest.mark.asyncio
+async def test_tinylfu_admission_keeps_frequent_keys(oe):
+    layer = oe.LRUCacheLayer(max_size=2, ttl=300, max_bytes=1_000, admission="tinylfu")
+    for key in ("hot1", "hot2"):
+        await layer.get(key)
+        await layer.set(key, key, 10)
+        for _ in range(5):
+            await layer.get(key)
+
+    for i in range(20):
+        await layer.set(f"scan{i}", i, 10)  # One-hit wonders never displace the hot keys
+
+    assert set(layer.data) == {"hot1", "hot2"}
+    assert layer.stats["rejections"] == 20
+
+# --- Tiers ---
+
+@pytest.mark.asyncio
+async def test_tiered_cache_promotes_lower_tier_hits(oe, tiered_cache):
+    value = {"price": 101.5, "levels": [1, 2, 3]}
+    await tiered_cache.set("k", value, layer="l3")
+
+    assert await tiered_cache.get("k") == value
+    assert "k" in tiered_cache.layers["l1"].data
+    assert len(tiered_cache.layers["l2"]) == 1
+    assert tiered_cache.layers["l3"].stats["hits"] == 1
+
+    assert await tiered_cache.get("k") == value
+    assert tiered_cache.layers["l1"].stats["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_lower_tiers_store_json_not_pickle(oe, tiered_cache):
+    await tiered_cache.set("k", {"price": 101.5, "symbols": ("BTC", "ETH")})
+
+    payload = await tiered_cache.layers["l3"].get_payload("k")
+    assert json.loads(payload) == {"price": 101.5, "symbols": ["BTC", "ETH"]}
+    assert await tiered_cache.get("k", layer="l2") == {"price": 101.5, "symbols": ["BTC", "ETH"]}
+
+@pytest.mark.asyncio
+async def test_redis_layer_evicts_in_one_delete(oe):
+    client = oe.InMemoryRedis()
+    deletes = []
+    delete = client.delete
+
+    async def counting_delete(*keys):
+        deletes.append(keys)
+        return await delete(*keys)
+
+    client.delete = counting_delete
+    layer = oe.RedisCacheLayer(client, max_size=10, ttl=60, max_bytes=6, namespace="t:")
+    for key in "abc":
+        await layer.set_payload(key, b"xx")
+    await layer.set_payload("big", b"yyyyy")
+
+    assert deletes == [("t:a", "t:b", "t:c")]
+    assert layer.stats["evictions"] == 3 and len(layer) == 1
+
+@pytest.mark.asyncio
+async def test_redis_layer_evicts_lru_keys_from_client(oe):
+    client = oe.InMemoryRedis()
+    layer = oe.RedisCacheLayer(client, max_size=2, ttl=60, max_bytes=1_000, namespace="t:")
+    await layer.set_payload("a", b"1")
+    await layer.set_payload("b", b"22")
+    assert await layer.get_payload("a") == b"1"
+    await layer.set_payload("c", b"333")
+
+    assert await client.dbsize() == 2
+    assert await client.get("t:b") is None
+    assert layer.bytes_used == 4
+
+@pytest.mark.asyncio
+async def test_sqlite_layer_persists_and_evicts_by_recency(oe, tmp_path):
+    path = str(tmp_path / "l3.sqlite")
+    layer = oe.SQLiteCacheLayer(path, max_size=2, ttl=60, max_bytes=1_000)
+    await layer.set_payload("a", b"aa")
+    await layer.set_payload("b", b"bb")
+    await asyncio.sleep(0.01)
+    assert await layer.get_payload("a") == b"aa"
+    await layer.set_payload("c", b"cc")
+
+    reopened = oe.SQLiteCacheLayer(path, max_size=2, ttl=60, max_bytes=1_000)
+    assert len(reopened) == 2
+    assert reopened.bytes_used == 4
+    assert await reopened.get_payload("b") is None
+    assert await reopened.get_payload("a") == b"aa"
+
+@pytest.mark.asyncio
+async def test_sqlite_layer_evicts_only_as_many_entries_as_the_byte_budget_needs(oe, tmp_path):
+    layer = oe.SQLiteCacheLayer(str(tmp_path / "l3.sqlite"), max_size=100, ttl=60, max_bytes=10)
+    for key in "abcde":
+        await layer.set_payload(key, b"xx")
+    await layer.set_payload("big", b"yyyyy")
+
+    assert len(layer) == 3 and layer.bytes_used == 9
+    assert layer.stats["evictions"] == 3
+    assert await layer.get_payload("c") is None
+    assert await layer.get_payload("d") == b"xx" and await layer.get_payload("big") == b"yyyyy"
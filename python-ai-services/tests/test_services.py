@@ -376,6 +376,85 @@ async def test_restore_agent_checkpoint_refactored(agent_state_manager: AgentSta
     )
     # In-memory and Redis caches are updated by the call to update_agent_state
 
+@pytest.mark.asyncio
+async def test_update_agent_state_locks_per_agent(agent_state_manager: AgentStateManager, mock_persistence_service: mock.AsyncMock):
+    slow_agent_release = asyncio.Event()
+
+    async def save_supabase(agent_id_call, strategy_type_call, state_call, memory_refs_call):
+        if agent_id_call == "slow_agent":
+            await slow_agent_release.wait()
+        return {"agent_id": agent_id_call, "state": state_call, "strategy_type": strategy_type_call}
+    mock_persistence_service.save_agent_state_to_supabase.side_effect = save_supabase
+
+    slow_update = asyncio.create_task(agent_state_manager.update_agent_state("slow_agent", {"v": 1}))
+    await asyncio.sleep(0)
+    fast_result = await asyncio.wait_for(agent_state_manager.update_agent_state("fast_agent", {"v": 2}), timeout=1)
+
+    assert fast_result["state"] == {"v": 2}
+    assert not slow_update.done()
+    slow_agent_release.set()
+    assert (await slow_update)["state"] == {"v": 1}
+
+@pytest.mark.asyncio
+async def test_write_behind_coalesces_updates_into_one_batch(mock_persistence_service: mock.AsyncMock, tmp_path):
+    manager = AgentStateManager(
+        persistence_service=mock_persistence_service, write_behind=True, journal_path=str(tmp_path / "journal.jsonl")
+    )
+    mock_persistence_service.save_agent_states_to_supabase_batch.side_effect = lambda records: records
+
+    await asyncio.gather(*(
+        manager.update_state_fields(f"agent_{i % 2}", {f"field_{i}": i, "last": i}) for i in range(20)
+    ))
+    assert mock_persistence_service.save_agent_state_to_supabase.call_count == 0
+    assert manager.get_flush_stats()["pending_updates"] == 20
+
+    flushed = await manager.flush()
+
+    assert flushed == 2
+    mock_persistence_service.save_agent_states_to_supabase_batch.assert_called_once()
+    batch = {record["agent_id"]: record for record in mock_persistence_service.save_agent_states_to_supabase_batch.call_args.args[0]}
+    assert set(batch["agent_0"]["state"]) == {"last"} | {f"field_{i}" for i in range(0, 20, 2)}
+    assert batch["agent_1"]["state"]["last"] == 19
+    assert (tmp_path / "journal.jsonl").read_text() == ""
+    assert manager.get_flush_stats()["updates_coalesced"] == 18
+
+@pytest.mark.asyncio
+async def test_write_behind_failed_flush_keeps_agents_dirty(mock_persistence_service: mock.AsyncMock, tmp_path):
+    journal_path = tmp_path / "journal.jsonl"
+    manager = AgentStateManager(persistence_service=mock_persistence_service, write_behind=True, journal_path=str(journal_path))
+    mock_persistence_service.save_agent_states_to_supabase_batch.return_value = None
+
+    await manager.update_agent_state("agent_a", {"position": 1}, strategy_type="momentum")
+
+    assert await manager.flush() == 0
+    assert manager.dirty_agents == {"agent_a"}
+    assert len(journal_path.read_text().splitlines()) == 1
+    assert (await manager.get_agent_state("agent_a"))["state"] == {"position": 1} # Cache stays authoritative
+
+@pytest.mark.asyncio
+async def test_write_behind_replays_journal_after_crash(mock_persistence_service: mock.AsyncMock, tmp_path):
+    journal_path = str(tmp_path / "journal.jsonl")
+    crashed = AgentStateManager(persistence_service=mock_persistence_service, write_behind=True, journal_path=journal_path)
+    await crashed.update_agent_state("agent_a", {"position": 1, "cash": 100}, strategy_type="momentum")
+    await crashed.update_state_field("agent_a", "position", 2)
+    await crashed.update_agent_state("agent_b", {"position": 5})
+    await crashed.delete_agent_state("agent_b")
+    with open(journal_path, "a") as handle:
+        handle.write('{"agent_id": "agent_a", "op": "mer') # Torn write at crash time
+
+    mock_persistence_service.save_agent_states_to_supabase_batch.side_effect = lambda records: records
+    recovered = AgentStateManager(
+        persistence_service=mock_persistence_service, write_behind=True, journal_path=journal_path, flush_interval_seconds=60
+    )
+    await recovered.start()
+    await recovered.shutdown()
+
+    records = mock_persistence_service.save_agent_states_to_supabase_batch.call_args.args[0]
+    assert [(record["agent_id"], record["state"], record["strategy_type"]) for record in records] == [
+        ("agent_a", {"position": 2, "cash": 100}, "momentum")
+    ]
+    assert open(journal_path).read() == ""
+
 
 # --- MarketDataService Tests ---
 